@@ -23,9 +23,9 @@ with app.setup:
     from pathlib import Path
     # sys.path.insert(0, str(Path(__file__).parent))
     # Cache-bypass + external-path flags now live in the per-site config
-    # (`config/<site>_config.json`). Default = reuse cache if present. To
-    # force a one-shot recompute without editing config, delete the cache
-    # parquet (`rm output/{site}/cohort_resp_processed_bf.parquet`) and run.
+    # (`config/<site>_config.json`). Default = reuse the waterfall cache when
+    # its input fingerprint (raw resp table, cohort IDs, outlier config —
+    # see `_stage_cache`) is unchanged; `rerun_waterfall` forces a recompute.
     _CONFIG_PATH_SETUP = "config/config.json"
     with open(_CONFIG_PATH_SETUP) as _cfg_f:
         _cfg_setup = json.load(_cfg_f)
@@ -43,11 +43,27 @@ with app.setup:
         to_utc,
         add_day_shift_id,
         coerce_dttm_to_utc,
-        compute_weight_qc_exclusions,
         normalize_categories,
         plot_consort,
         consort_to_markdown,
     )
+    # Cohort-restricted raw loads SEMI JOIN against ID TEMP TABLEs instead
+    # of `filters={'hospitalization_id': [...]}` IN-lists (see _cohort_ids).
+    from _cohort_ids import (
+        COHORT_IDS_TABLE,
+        register_ids,
+        semi_join_ids,
+        write_cohort_ids,
+    )
+    # One sorted weight extract feeds weight QC here and every later
+    # weight attachment (02/04/SOFA); see _weight_extract.
+    from _weight_extract import weight_qc_exclusions, write_weight_extract
+    # NMB minutes per patient-day (per-hour definition, range-join form).
+    from _nmb import (
+        NMB_CATEGORIES,
+        nmb_patient_day_minutes,
+        nmb_running_intervals,
+    )
     from clifpy.utils.logging_config import get_logger
     logger = get_logger("epi_sedation.cohort")
 
@@ -84,6 +100,7 @@ def _():
     import duckdb
     from clifpy.utils.config import get_config_or_params
     from _outlier_handler import apply_outlier_handling_duckdb
+    from _perf import perf_stage
 
     import warnings
     warnings.filterwarnings('ignore', category=FutureWarning)
@@ -95,6 +112,7 @@ def _():
         duckdb,
         get_config_or_params,
         load_data,
+        perf_stage,
         setup_logging,
     )
 
@@ -124,7 +142,9 @@ def _(CONFIG_PATH, get_config_or_params, setup_logging):
 
     # Step 5 (cache-state banner): tell the operator at a glance which
     # heavy step will recompute vs reuse, and which load Mode the resp
-    # waterfall will take (A=external / B=cache / C=fresh).
+    # waterfall will take (A=external / B=cache / C=fresh). B vs C needs
+    # the post-stitch cohort IDs for the fingerprint, so it is resolved
+    # (and logged as `[cache] waterfall: HIT/MISS`) in the resp cell.
     import datetime as _dt
     _resp_cache = f"output/{SITE_NAME}/cohort_resp_processed_bf.parquet"
     if os.path.exists(_resp_cache):
@@ -138,10 +158,10 @@ def _(CONFIG_PATH, get_config_or_params, setup_logging):
     _external_present = bool(_external) and os.path.exists(_external)
     if _external_present:
         _mode = "A (external — load from config path, write internal cache)"
-    elif os.path.exists(_resp_cache) and not RERUN_WATERFALL:
-        _mode = "B (internal cache reuse)"
+    elif RERUN_WATERFALL:
+        _mode = "C (fresh waterfall recompute — forced by rerun_waterfall)"
     else:
-        _mode = "C (fresh waterfall recompute)"
+        _mode = "B or C (fingerprint check at the respiratory-support cell)"
     logger.info("=" * 60)
     logger.info("Cache state at entry (01_cohort.py):")
     logger.info(f"  rerun_waterfall (config):                    {RERUN_WATERFALL}")
@@ -163,9 +183,6 @@ def _():
 @app.cell
 def _(SITE_TZ, duckdb, load_data):
     # Lazy ADT load with column + ICU-category pushdown into the parquet scan.
-    # hospital_id is included so the same relation can feed both ICU filtering
-    # and clifpy's stitch_encounters (which requires it in adt) without a
-    # second parquet scan.
     # Load WITHOUT the location_category filter so we can normalize first,
     # then filter ourselves — a site that delivers 'ICU' uppercase would
     # otherwise silently get zero ICU hospitalizations from the parquet
@@ -175,18 +192,17 @@ def _(SITE_TZ, duckdb, load_data):
         'adt',
         config_path='config/config.json',
         return_rel=True,
-        columns=['hospitalization_id', 'hospital_id', 'in_dttm', 'out_dttm', 'location_category', 'location_type'],
+        columns=['hospitalization_id', 'in_dttm', 'out_dttm', 'location_category', 'location_type'],
     )
     # Cross-site tz normalization: naive TIMESTAMP cols are reinterpreted as
     # SITE_TZ-local → UTC TIMESTAMPTZ; tagged sources pass through unchanged.
     adt_rel = coerce_dttm_to_utc(adt_rel, ['in_dttm', 'out_dttm'], SITE_TZ)
     adt_rel = normalize_categories(adt_rel, ['location_category', 'location_type'])
     adt_rel = duckdb.sql("FROM adt_rel WHERE location_category = 'icu'")
-    hosp_ids_w_icu_stays = [
-        r[0] for r in duckdb.sql(
-            "FROM adt_rel SELECT DISTINCT hospitalization_id"
-        ).fetchall()
-    ]
+    # ICU hospitalization IDs as a TEMP TABLE: the hospitalization load in
+    # the stitch cell SEMI JOINs against it (no giant IN-list literal).
+    icu_hosp_ids_rel = register_ids('icu_hosp_ids', adt_rel)
+    hosp_ids_w_icu_stays = [r[0] for r in icu_hosp_ids_rel.fetchall()]
     logger.info(f"Hospitalizations with ICU stays: {len(hosp_ids_w_icu_stays):,}")
     if len(hosp_ids_w_icu_stays) == 0:
         logger.error(
@@ -194,7 +210,7 @@ def _(SITE_TZ, duckdb, load_data):
             "contains the lowercase 'icu' literal expected by the CLIF spec. "
             "normalize_categories has already TRIM(LOWER)'d the column."
         )
-    return adt_rel, hosp_ids_w_icu_stays
+    return adt_rel, hosp_ids_w_icu_stays, icu_hosp_ids_rel
 
 
 @app.cell
@@ -223,7 +239,7 @@ def _():
 
 
 @app.cell
-def _(SITE_TZ, adt_rel, hosp_ids_w_icu_stays, load_data):
+def _(SITE_TZ, hosp_ids_w_icu_stays, icu_hosp_ids_rel, load_data):
     # Encounter-stitch DEDUP filter — see markdown above. Toggle:
     # COHORT_STITCH_DEDUP_ON=0 short-circuits to identity passthrough
     # (n_dropped_stitch=None → CONSORT step 2 is omitted). Default ON.
@@ -241,7 +257,7 @@ def _(SITE_TZ, adt_rel, hosp_ids_w_icu_stays, load_data):
         encounter_mapping = None
         logger.info("Encounter stitch-dedup: OFF (COHORT_STITCH_DEDUP_ON=0)")
     else:
-        from clifpy.utils.stitching_encounters import stitch_encounters
+        from _stitch import stitch_encounter_blocks
 
         _hosp_rel = load_data(
             'hospitalization',
@@ -249,57 +265,48 @@ def _(SITE_TZ, adt_rel, hosp_ids_w_icu_stays, load_data):
             return_rel=True,
             columns=[
                 'patient_id', 'hospitalization_id', 'admission_dttm',
-                'discharge_dttm', 'age_at_admission',
-                'admission_type_category', 'discharge_category',
+                'discharge_dttm',
             ],
-            filters={'hospitalization_id': hosp_ids_w_icu_stays},
         )
+        _hosp_rel = semi_join_ids(_hosp_rel, icu_hosp_ids_rel)
         # Cross-site tz normalization (see ADT cell for rationale).
         _hosp_rel = coerce_dttm_to_utc(
             _hosp_rel, ['admission_dttm', 'discharge_dttm'], SITE_TZ
         )
-        # Category normalization (cross-site safety). UCMC/MIMIC deliver
-        # lowercase, but a new CLIF site with mixed-case discharge_category
-        # ('Expired' vs 'expired') would silently break any downstream
-        # equality filter. Same load-boundary pattern as line 660.
-        _hosp_rel = normalize_categories(
-            _hosp_rel, ['admission_type_category', 'discharge_category']
-        )
-        _hosp_df = _hosp_rel.df()
-        _adt_df = adt_rel.df()
-
-        # stitch_encounters is pandas-only — clifpy I/O bridge. Returns
-        # (hosp_stitched, adt_stitched, encounter_mapping); only the mapping
-        # is needed (cols: hospitalization_id, encounter_block).
-        _, _, _encounter_mapping = stitch_encounters(
-            _hosp_df, _adt_df, time_interval=12,
-        )
 
-        # CRITICAL: clifpy's stitch_encounters can silently drop hospitalizations
-        # from the returned encounter_mapping (e.g., when admission_dttm /
-        # discharge_dttm have null/quirky values that confuse the propagation
-        # step). These hosps are NOT stitched to anything — they should be
+        # DuckDB gaps-and-islands replacement for clifpy's pandas-only
+        # stitch_encounters (same 12h rule and encounter_block numbering —
+        # parity-tested in tests/test_stitch.py). Runs on the lazy
+        # relation: no `.df()` of hospitalization/ADT for every ICU stay.
+        # One row per hospitalization: (hospitalization_id, encounter_block,
+        # is_block_start), as the `encounter_stitch` TEMP TABLE.
+        _encounter_stitch = stitch_encounter_blocks(_hosp_rel, time_interval=12)
+
+        # ICU hosps absent from the stitch table (no hospitalization row —
+        # a data-quality edge case) are NOT stitched to anything; they are
         # KEPT as singletons by the dedup filter, not dropped along with the
-        # genuinely-stitched-second-or-later hosps. Surface the missing count
-        # separately in QA so federated sites can investigate clifpy data
-        # quality without it confounding the cohort-attrition story.
-        _mapped_ids = set(_encounter_mapping['hospitalization_id'])
-        _unmapped_ids = [h for h in hosp_ids_w_icu_stays if h not in _mapped_ids]
-        n_unmapped_singletons = len(_unmapped_ids)
-
-        # For each MAPPED hosp, pick the first by admission_dttm in its
-        # encounter block. Then re-add unmapped hosps as singletons.
-        _merged = _encounter_mapping.merge(
-            _hosp_df[['hospitalization_id', 'admission_dttm']],
-            on='hospitalization_id',
+        # genuinely-stitched-second-or-later hosps. Surface the missing
+        # count separately in QA so federated sites can investigate it
+        # without it confounding the cohort-attrition story.
+        n_unmapped_singletons = (
+            icu_hosp_ids_rel
+            .join(_encounter_stitch, 'hospitalization_id', how='anti')
+            .count('*').fetchone()[0]
         )
-        _first_per_block = (
-            _merged
-            .sort_values(['encounter_block', 'admission_dttm'])
-            .drop_duplicates('encounter_block', keep='first')
+
+        # Kept = first admission of each encounter block + unmapped hosps,
+        # i.e. every ICU hosp except the later members of a block.
+        _stitched_out_rel = (
+            _encounter_stitch
+            .filter('NOT is_block_start')
+            .select('hospitalization_id')
         )
-        _kept_from_mapping = _first_per_block['hospitalization_id'].tolist()
-        cohort_hosp_ids_post_stitch = _kept_from_mapping + _unmapped_ids
+        cohort_hosp_ids_post_stitch = [
+            r[0] for r in icu_hosp_ids_rel
+            .join(_stitched_out_rel, 'hospitalization_id', how='anti')
+            .order('hospitalization_id')
+            .fetchall()
+        ]
         n_dropped_stitch = (
             len(hosp_ids_w_icu_stays) - len(cohort_hosp_ids_post_stitch)
         )
@@ -307,20 +314,25 @@ def _(SITE_TZ, adt_rel, hosp_ids_w_icu_stays, load_data):
         # Surface the dropped hosp_ids list + block-size series for the
         # QA-summary cell that follows. Both are cross-cell DAG outputs (no
         # underscore prefix). IDs stay in-memory only — never persisted.
-        _kept_set = set(cohort_hosp_ids_post_stitch)
         stitch_dropped_hosp_ids = [
-            h for h in hosp_ids_w_icu_stays if h not in _kept_set
+            r[0] for r in _stitched_out_rel.order('hospitalization_id').fetchall()
         ]
-        stitch_block_sizes = _encounter_mapping.groupby('encounter_block').size()
+        stitch_block_sizes = (
+            _encounter_stitch
+            .aggregate('encounter_block, COUNT(*) AS _n', 'encounter_block')
+            .order('encounter_block')
+            .df()
+            .set_index('encounter_block')['_n']
+        )
 
         # Surface the (hospitalization_id, encounter_block) mapping as a
         # cross-cell variable so downstream cells (notably the
         # `cohort_meta_by_id_imvday` / `cohort_meta_by_id` builders) can
-        # propagate `encounter_block` without re-running stitch_encounters.
-        # Restrict to the two ID columns to keep memory footprint minimal.
-        encounter_mapping = _encounter_mapping[
-            ['hospitalization_id', 'encounter_block']
-        ].copy()
+        # propagate `encounter_block` without re-running the stitch. Stays
+        # a relation over the TEMP TABLE.
+        encounter_mapping = _encounter_stitch.select(
+            'hospitalization_id, encounter_block'
+        )
 
         logger.info(
             f"Encounter stitch-dedup (12h window): {n_dropped_stitch:,} "
@@ -328,11 +340,17 @@ def _(SITE_TZ, adt_rel, hosp_ids_w_icu_stays, load_data):
             f"{len(cohort_hosp_ids_post_stitch):,} remain). "
             f"Unmapped (kept as singletons): {n_unmapped_singletons:,}"
         )
+    # The resp load (waterfall) and the weight checks downstream restrict
+    # through this TEMP TABLE.
+    post_stitch_hosp_ids_rel = register_ids(
+        'post_stitch_hosp_ids', cohort_hosp_ids_post_stitch,
+    )
     return (
         cohort_hosp_ids_post_stitch,
         encounter_mapping,
         n_dropped_stitch,
         n_unmapped_singletons,
+        post_stitch_hosp_ids_rel,
         stitch_block_sizes,
         stitch_dropped_hosp_ids,
     )
@@ -382,12 +400,14 @@ def _(
         # underscore-prefixed cell-local relations, so we materialize the
         # filtered relation to pandas and aggregate there.
         if len(stitch_dropped_hosp_ids) > 0:
-            _resp_dropped_rel = load_data(
-                'respiratory_support',
-                config_path='config/config.json',
-                return_rel=True,
-                columns=['hospitalization_id', 'recorded_dttm', 'device_category'],
-                filters={'hospitalization_id': stitch_dropped_hosp_ids},
+            _resp_dropped_rel = semi_join_ids(
+                load_data(
+                    'respiratory_support',
+                    config_path='config/config.json',
+                    return_rel=True,
+                    columns=['hospitalization_id', 'recorded_dttm', 'device_category'],
+                ),
+                register_ids('stitch_dropped_hosp_ids', stitch_dropped_hosp_ids),
             )
             # Cross-site tz normalization (see ADT cell for rationale).
             _resp_dropped_rel = coerce_dttm_to_utc(
@@ -458,20 +478,21 @@ def _(
                 "n_blocks_size_ge3": _n_blocks_size_ge3,
                 "describe": _bs_describe,
                 "comment": (
-                    "describes encounter_mapping returned by clifpy's "
-                    "stitch_encounters; excludes unmapped hosps (see "
+                    "describes encounter_mapping from the 12h stitch "
+                    "(code/_stitch.py, clifpy stitch_encounters rule); "
+                    "excludes unmapped hosps (see "
                     "clifpy_data_quality.n_unmapped_singletons)"
                 ),
             },
             "clifpy_data_quality": {
                 "n_unmapped_singletons": n_unmapped_singletons,
                 "comment": (
-                    "Hospitalizations missing from clifpy's returned "
-                    "encounter_mapping (likely null/quirky admission_dttm "
-                    "or discharge_dttm). Kept as singletons by the dedup "
-                    "filter, not stitched. Investigate at federated sites "
-                    "where this count is non-trivial relative to total ICU "
-                    "stays — may indicate upstream date-parsing issues."
+                    "ICU hospitalizations missing from encounter_mapping "
+                    "(ADT rows with no clif_hospitalization row). Kept as "
+                    "singletons by the dedup filter, not stitched. "
+                    "Investigate at federated sites where this count is "
+                    "non-trivial relative to total ICU stays — may indicate "
+                    "an incomplete hospitalization extract."
                 ),
             },
             "dropped_hosp_decomposition": {
@@ -511,27 +532,47 @@ def _():
 @app.cell
 def _(
     CONFIG_PATH,
+    DATA_DIR,
     SITE_NAME,
     SITE_TZ,
     apply_outlier_handling_duckdb,
     cohort_hosp_ids_post_stitch,
-    load_data,
+    duckdb,
+    perf_stage,
+    post_stitch_hosp_ids_rel,
 ):
-    from clifpy import RespiratorySupport
-    import pandas as pd  # used by trach-dtype normalization in Mode A and Mode C
+    import pandas as pd  # used by trach-dtype normalization in Mode A
+    from _waterfall import write_resp_waterfall
+    import json as _json
+    from _stage_cache import (
+        drop_stage_manifest,
+        resolve_stage_cache,
+        stage_components,
+        write_stage_manifest,
+    )
 
     resp_processed_path = f"output/{SITE_NAME}/cohort_resp_processed_bf.parquet"
+    with open(CONFIG_PATH) as _cfg_f:
+        _cfg = _json.load(_cfg_f)
 
     # Three-mode load precedence:
     #   Mode A — `path_to_waterfall_processed_resp_table` config key is set
     #            and the file exists → load from external, filter to cohort
-    #            via Polars predicate pushdown (handles whole-CLIF-system
-    #            tables efficiently). No internal cache write.
-    #   Mode B — internal cache exists and `rerun_waterfall=false` → cached
-    #            Polars read (preserves tz tag).
-    #   Mode C — fresh waterfall recompute + internal cache write.
+    #            via a DuckDB SEMI JOIN pushed into the scan (handles
+    #            whole-CLIF-system tables efficiently). Rewrites the internal
+    #            cache, untracked by the fingerprint manifest.
+    #   Mode B — internal cache whose manifest matches the current input
+    #            fingerprint (raw resp table metadata, post-stitch cohort
+    #            IDs, outlier_config.yaml, timezone, waterfall code) →
+    #            lazy DuckDB scan of the cache (TIMESTAMPTZ on disk).
+    #   Mode C — fingerprint miss or `rerun_waterfall=true` → fresh
+    #            out-of-core waterfall (code/_waterfall.py) written straight
+    #            to the cache + manifest write.
     _external_path = PATH_TO_WATERFALL_PROCESSED_RESP_TABLE
     _use_external = bool(_external_path) and os.path.exists(_external_path)
+    _components = stage_components(
+        'waterfall', _cfg, cohort_ids=cohort_hosp_ids_post_stitch,
+    )
 
     if _use_external:
         # Mode A — external waterfall-processed table. Trusted to be already
@@ -558,17 +599,15 @@ def _(
                 f"{_expected_cols}. Check the source pipeline or set "
                 f"`path_to_waterfall_processed_resp_table` to null in config."
             )
-        # Polars predicate pushdown: select cols + filter by cohort hosp ids
-        # all push into the parquet scan. On a whole-CLIF table, row-group
-        # statistics on hospitalization_id skip non-overlapping groups.
-        _resp_df = (
-            pl.scan_parquet(_external_path)
-              .select(_expected_cols)
-              .filter(
-                  pl.col("hospitalization_id").is_in(cohort_hosp_ids_post_stitch)
-              )
-              .collect()
-        )
+        # Projection + SEMI JOIN against the post-stitch ID table: DuckDB
+        # pushes the join's hospitalization_id min/max into the parquet
+        # scan, so on a whole-CLIF table row-group statistics still skip
+        # non-overlapping groups — without a Polars `is_in` over a Python
+        # list of every cohort ID.
+        _resp_df = semi_join_ids(
+            duckdb.read_parquet(_external_path).select(*_expected_cols),
+            post_stitch_hosp_ids_rel,
+        ).pl()
         # Coverage check — warn if external table predates the cohort refresh.
         _n_actual = _resp_df["hospitalization_id"].n_unique()
         _n_target = len(set(cohort_hosp_ids_post_stitch))
@@ -584,7 +623,7 @@ def _(
                 f"(<99%) — table may predate cohort refresh; missing "
                 f"{_n_target - _n_actual:,} hospitalizations."
             )
-        resp_p = _resp_df.to_pandas()
+        _resp_pd = _resp_df.to_pandas()
         # Tracheostomy dtype normalization (Bug C + Step 0 NU fix) — source
         # may be BOOL / INT / FLOAT / VARCHAR-of-bool / VARCHAR-of-int /
         # VARCHAR-of-float / VARCHAR-of-yesno. The two-branch check covers
@@ -594,44 +633,48 @@ def _(
         # `.isin({'true','1','t'})` check missed → entire trach cohort
         # silently coerced to 0 and exit_mechanism='tracheostomy' was
         # empty in NU's Table 1.
-        _as_num = pd.to_numeric(resp_p['tracheostomy'], errors='coerce')
-        _as_str = resp_p['tracheostomy'].astype(str).str.strip().str.lower()
-        resp_p['tracheostomy'] = (
+        _as_num = pd.to_numeric(_resp_pd['tracheostomy'], errors='coerce')
+        _as_str = _resp_pd['tracheostomy'].astype(str).str.strip().str.lower()
+        _resp_pd['tracheostomy'] = (
             (_as_num.fillna(0) > 0) | _as_str.isin({'true', 't', 'yes', 'y'})
         ).astype('int8')
         # Category casing (B4) — defensive against external sources that
         # haven't applied the lowercase convention.
-        resp_p = normalize_categories(
-            resp_p, ['device_category', 'mode_category']
+        _resp_pd = normalize_categories(
+            _resp_pd, ['device_category', 'mode_category']
         )
         # UTC display tag (project convention — see docs/timezone_audit.md).
         # naive_means=SITE_TZ: for sites whose external waterfall table writes
         # naive `recorded_dttm` (no tz tag), interpret the wall-clock as
         # site-local before converting to UTC. No-op for tz-aware sources.
-        resp_p = to_utc(resp_p, ['recorded_dttm'], naive_means=SITE_TZ)
+        _resp_pd = to_utc(_resp_pd, ['recorded_dttm'], naive_means=SITE_TZ)
         # Step 1 (NU-reported fix): write the canonical internal cache after
         # Mode A's filter + normalization. 03_outcomes.py asserts this path
         # exists; without this write Mode-A site reruns crash at the assert.
         # The on-disk parquet is schema-indistinguishable from Mode C's
         # output (same column set, same dtypes, same UTC tz tag) so
         # downstream consumers can't tell which Mode produced it.
-        pl.from_pandas(resp_p).write_parquet(resp_processed_path)
+        pl.from_pandas(_resp_pd).write_parquet(resp_processed_path)
+        # Not derived from the raw resp table, so it must not satisfy a
+        # later Mode B fingerprint check if the external path is unset.
+        drop_stage_manifest(SITE_NAME, 'waterfall')
+        # Same lazy scan of the cache as Modes B/C.
+        resp_p = duckdb.read_parquet(resp_processed_path)
         logger.info(
-            f"resp_p: {len(resp_p):,} rows (Mode A — external); "
+            f"resp_p: {len(_resp_pd):,} rows (Mode A — external); "
             f"wrote canonical cache to {resp_processed_path}"
         )
-    elif not os.path.exists(resp_processed_path) or RERUN_WATERFALL:
-        # Mode C — fresh waterfall. Load via clifpy.utils.io.load_data with
-        # site_tz="" to skip the
-        # default UTC→site_tz conversion. clifpy's standard `from_file` path
-        # would convert to site_tz via DuckDB's `timezone(site_tz, col)`,
-        # which RETURNS A NAIVE TIMESTAMP (no tz metadata) — leaving us with
-        # tz-naive Central wall-clock values. clifpy's waterfall scaffold
-        # builder then forces tz-aware UTC, the dtype mismatch silently
-        # downgrades recorded_dttm to object after concat, and pandas 2.3+
-        # raises a strict-Categorical TypeError on the subsequent sort_values.
-        # Bypass that path: load raw UTC (tz-aware) directly so the waterfall
-        # gets compatible dtypes throughout.
+    elif resolve_stage_cache(
+        SITE_NAME, 'waterfall', _components, force=RERUN_WATERFALL,
+    ):
+        # Mode C — fresh waterfall. Scan the raw parquet directly (as
+        # clifpy's load_data(return_rel=True, site_tz="") does) rather than
+        # via clifpy's standard `from_file` path, which converts via DuckDB's
+        # `timezone(site_tz, col)` and RETURNS A NAIVE TIMESTAMP (no tz
+        # metadata); the waterfall's UTC hourly scaffold needs the raw
+        # tz-aware TIMESTAMPTZ. `file_row_number` is the waterfall's
+        # tie-break for rows sharing a recorded_dttm (clifpy keeps the
+        # first in file order), so ties resolve the same on every run.
         _resp_columns = [
             "hospitalization_id",
             "recorded_dttm",
@@ -647,18 +690,14 @@ def _(
             "peak_inspiratory_pressure_set",
             "tracheostomy",
         ]
-        import json as _json
-        with open(CONFIG_PATH) as _cfg_f:
-            _cfg = _json.load(_cfg_f)
         # Lazy load + vendored DuckDB outlier handler (per duckdb_perf_guide
         # §11.1 — replaces clifpy's pandas-based apply_outlier_handling).
-        _resp_rel = load_data(
-            "respiratory_support",
-            config_path=CONFIG_PATH,
-            return_rel=True,
-            columns=_resp_columns,
-            filters={"hospitalization_id": cohort_hosp_ids_post_stitch},
-            site_tz="",  # skip auto-conversion; values stay UTC tz-aware
+        _resp_rel = semi_join_ids(
+            duckdb.read_parquet(
+                f"{DATA_DIR}/clif_respiratory_support.parquet",
+                file_row_number=True,
+            ).select(*_resp_columns, "file_row_number"),
+            post_stitch_hosp_ids_rel,
         )
         # Cross-site tz normalization (see ADT cell for rationale). For a site
         # whose CLIF parquet stores recorded_dttm as naive TIMESTAMP, this
@@ -677,45 +716,32 @@ def _(
         _resp_rel = apply_outlier_handling_duckdb(
             _resp_rel, 'respiratory_support', 'config/outlier_config.yaml',
         )
-        # Materialize at the waterfall boundary — RespiratorySupport.waterfall
-        # is Table-bound (operates on .df, pandas). Vendoring waterfall is
-        # out of scope.
-        cohort_resp = RespiratorySupport(
-            data_directory=_cfg["data_directory"],
-            filetype=_cfg.get("filetype", "parquet"),
-            timezone="UTC",
-            data=_resp_rel.df(),
+        # Out-of-core waterfall: DuckDB port of clifpy's
+        # process_resp_support_waterfall(bfill=True), run per hash partition
+        # of hospitalization_id and written straight to parquet — the
+        # cohort's resp table is never materialized in pandas (this used to
+        # be the largest memory peak in 01). Row-for-row parity with clifpy
+        # is pinned in tests/test_waterfall.py. The writer also applies the
+        # on-disk conventions the old pandas path did by hand: tracheostomy
+        # as int8 {0,1} (downstream SQL compares `tracheostomy = 1`) and
+        # recorded_dttm as UTC TIMESTAMPTZ (docs/timezone_audit.md).
+        with perf_stage("waterfall") as _ps:
+            _n_rows = write_resp_waterfall(_resp_rel, resp_processed_path)
+            _ps.rows = _n_rows
+        write_stage_manifest(
+            SITE_NAME, 'waterfall', _components, n_rows=_n_rows,
         )
-        cohort_resp_p = cohort_resp.waterfall(bfill=True)
-        # Normalize tracheostomy at the parquet-write boundary: the cold
-        # waterfall returns it as object-dtype with Python's `str(False)` =
-        # 'False'/'True'. Downstream SQL compares `tracheostomy = 1` which
-        # forces a VARCHAR→INT implicit cast that chokes on 'False'. Coerce
-        # to int{0,1} here so the parquet has a single canonical INT type
-        # regardless of warm/cold path (also fixes 03_outcomes.py).
-        # Robust truth check (Step 0): handles bool / int / float / numeric
-        # string / yes-no string. NU stores trach as float ('1.0'/'0.0')
-        # which the old `.isin({'true','1','t'})` check missed.
-        _as_num = pd.to_numeric(cohort_resp_p.df['tracheostomy'], errors='coerce')
-        _as_str = cohort_resp_p.df['tracheostomy'].astype(str).str.strip().str.lower()
-        cohort_resp_p.df['tracheostomy'] = (
-            (_as_num.fillna(0) > 0) | _as_str.isin({'true', 't', 'yes', 'y'})
-        ).astype('int8')
-        # Re-tag recorded_dttm to UTC display tag at the parquet-write
-        # boundary (project convention: every *_dttm column on disk is
-        # UTC tz-aware — see docs/timezone_audit.md). Same UTC instants;
-        # tz_convert is metadata-only.
-        cohort_resp_p.df = to_utc(cohort_resp_p.df, ["recorded_dttm"])
-        cohort_resp_p.df.to_parquet(resp_processed_path)
-        resp_p = cohort_resp_p.df
+        # The only consumer is cohort_t1's SQL, so hand it a lazy parquet
+        # scan rather than reading the waterfall output back into pandas.
+        resp_p = duckdb.read_parquet(resp_processed_path)
     else:
-        # Cached load via Polars to preserve the on-disk site-tz tag (pyarrow
-        # round-trips the tag through parquet metadata; DuckDB's `.df()` would
-        # rewrite the tag to session tz). `.to_pandas()` keeps the tz info.
+        # Cached load as a lazy DuckDB scan: recorded_dttm is TIMESTAMPTZ on
+        # disk, so the UTC instants reach cohort_t1 unchanged (no `.df()`,
+        # which would rewrite the tag to session tz).
         logger.info(f"Loading cached {resp_processed_path}")
-        resp_p = pl.read_parquet(resp_processed_path).to_pandas()
+        resp_p = duckdb.read_parquet(resp_processed_path)
 
-    logger.info(f"resp_p: {len(resp_p):,} rows")
+    logger.info(f"resp_p: {resp_p.count('*').fetchone()[0]:,} rows")
     return (resp_p,)
 
 
@@ -896,35 +922,37 @@ def _(
 
 
 @app.cell
-def _(SITE_TZ, cohort_hosp_ids_pre_weight, duckdb, load_data):
-    # Cell B — weight-presence exclusion (upfront, runtime).
+def _(DATA_DIR, SITE_NAME, SITE_TZ, cohort_hosp_ids_pre_weight, duckdb):
+    # Cell B — weight extract + weight-presence exclusion (upfront, runtime).
+    # One scan of clif_vitals weight_kg for the whole pipeline: the
+    # cohort-scoped, (hospitalization_id, recorded_dttm)-sorted extract
+    # carries raw + clamped weights, the admission weight and the per-hosp
+    # QC flags (see _weight_extract). Weight QC below, the ASOF weight
+    # attachments in 02/04 and the cardiovascular SOFA read it instead of
+    # rescanning vitals. Scoped to the pre-weight cohort, a superset of every
+    # later cohort.
+    #
     # Drop hospitalizations with ZERO non-null weight_kg rows in vitals so the
     # first-pass cohort already excludes hosps that can never produce weight-
     # dependent dose conversions. Value-quality checks (clamp / jump / range)
-    # follow in the next cell via the in-memory helper.
+    # follow in the next cell from the precomputed flags.
     #
-    # recorded_dttm is included so the next cell's jump check has the
-    # timestamps it needs (avoids a second vitals load).
-    weight_presence_rel = load_data(
-        'vitals',
-        config_path='config/config.json',
-        return_rel=True,
-        columns=['hospitalization_id', 'recorded_dttm', 'vital_category', 'vital_value'],
-        filters={
-            'vital_category': ['weight_kg'],
-            'hospitalization_id': cohort_hosp_ids_pre_weight,
-        },
-    )
-    # Cross-site tz normalization (see ADT cell for rationale).
-    weight_presence_rel = coerce_dttm_to_utc(
-        weight_presence_rel, ['recorded_dttm'], SITE_TZ
+    # Env-var-tunable thresholds (matched to weight_audit.py defaults).
+    import os as _os
+    weight_qc_thresholds = {
+        'max_jump_kg': float(_os.getenv("WEIGHT_QC_MAX_JUMP_KG", "20")),
+        'max_jump_hours': float(_os.getenv("WEIGHT_QC_MAX_JUMP_HOURS", "24")),
+        'max_range_kg': float(_os.getenv("WEIGHT_QC_MAX_RANGE_KG", "30")),
+    }
+    _weight_path = write_weight_extract(
+        DATA_DIR, SITE_NAME, SITE_TZ,
+        register_ids('pre_weight_hosp_ids', cohort_hosp_ids_pre_weight),
+        **weight_qc_thresholds,
     )
+    weight_extract = duckdb.read_parquet(_weight_path)
     cohort_hosp_ids_w_weight = [
-        r[0] for r in duckdb.sql("""
-            FROM weight_presence_rel
-            SELECT DISTINCT hospitalization_id
-            WHERE vital_value IS NOT NULL
-        """).fetchall()
+        r[0] for r in weight_extract.filter("wqc_has_weight")
+        .select("hospitalization_id").distinct().fetchall()
     ]
     n_dropped_no_weight = (
         len(cohort_hosp_ids_pre_weight) - len(cohort_hosp_ids_w_weight)
@@ -933,51 +961,36 @@ def _(SITE_TZ, cohort_hosp_ids_pre_weight, duckdb, load_data):
         f"Weight-presence exclusion: {n_dropped_no_weight:,} hospitalizations "
         f"dropped (zero weight_kg rows in vitals)"
     )
-    return cohort_hosp_ids_w_weight, n_dropped_no_weight, weight_presence_rel
+    return (
+        cohort_hosp_ids_w_weight,
+        n_dropped_no_weight,
+        weight_extract,
+        weight_qc_thresholds,
+    )
 
 
 @app.cell
 def _(
     cohort_hosp_ids_w_weight,
     cohort_pre_weight_counts,
-    compute_weight_qc_exclusions,
-    duckdb,
     n_dropped_no_weight,
-    weight_presence_rel,
+    weight_extract,
+    weight_qc_thresholds,
 ):
     # Cell C — weight-QC value-quality exclusions (computed in-memory).
     # B3 refactor (2026-05): the prior 2-pass `make run` → `make weight-audit`
-    # → `make run` dance is gone. Drop sets are now computed inline via
-    # `compute_weight_qc_exclusions`, eliminating ~half the pipeline runtime.
+    # → `make run` dance is gone. Drop sets are now computed inline from the
+    # weight extract's precomputed flags (`weight_qc_exclusions`),
+    # eliminating ~half the pipeline runtime.
     # `code/qc/weight_audit.py` remains as a diagnostic-only tool that emits
     # the federated audit CSVs/PNG for sharing across sites.
-    #
-    # Env-var-tunable thresholds (matched to weight_audit.py defaults).
     import os as _os
-    _wqc_max_jump_kg = float(_os.getenv("WEIGHT_QC_MAX_JUMP_KG", "20"))
-    _wqc_max_jump_hours = float(_os.getenv("WEIGHT_QC_MAX_JUMP_HOURS", "24"))
-    _wqc_max_range_kg = float(_os.getenv("WEIGHT_QC_MAX_RANGE_KG", "30"))
     _wqc_range_rule_on = _os.getenv("WEIGHT_QC_RANGE_RULE_ON", "0") == "1"
-
-    # Reshape weight_presence_rel into the (hospitalization_id, recorded_dttm,
-    # weight_kg_raw) contract expected by the helper. weight_presence_rel was
-    # loaded at Cell B with columns (hospitalization_id, vital_category, vital_value)
-    # filtered to weight_kg only — but it lacks recorded_dttm. Re-load with the
-    # timestamp column included for the jump check.
-    _weight_for_qc = duckdb.sql("""
-        FROM weight_presence_rel
-        SELECT hospitalization_id
-            , recorded_dttm
-            , weight_kg_raw: vital_value
-        WHERE vital_value IS NOT NULL
-    """)
-    _excl = compute_weight_qc_exclusions(
-        _weight_for_qc,
+    _excl = weight_qc_exclusions(
+        weight_extract,
         cohort_hosp_ids_w_weight,
-        max_jump_kg=_wqc_max_jump_kg,
-        max_jump_hours=_wqc_max_jump_hours,
-        max_range_kg=_wqc_max_range_kg,
         range_rule_on=_wqc_range_rule_on,
+        **weight_qc_thresholds,
     )
     # Apply incrementally; each step's count is the marginal exclusion.
     # zero_weight here = hosps with rows in vitals but ALL clamped out
@@ -1116,17 +1129,25 @@ def _(cohort_streak_bounds):
 
 
 @app.cell
-def _(SITE_TZ, cohort_hrly_grids):
+def _(SITE_TZ, cohort_hrly_grids, duckdb):
     # add_day_shift_id derives _dh / _hr / _shift / _is_day_start / _nth_day /
     # _day_shift via explicit `AT TIME ZONE site_tz` in SQL — session-tz
     # invariant (see tests/test_timezone.py for invariants and DST coverage).
-    # The function returns pandas; downstream consumers via DuckDB
-    # replacement scan handle pandas natively.
-    _grids_df = cohort_hrly_grids.df()
-    cohort_hrly_grids_f = add_day_shift_id(_grids_df, site_tz=SITE_TZ)
-    assert len(cohort_hrly_grids_f) == len(_grids_df), 'length altered by add_day_shift_id'
-    logger.info(f"Hourly grid rows: {len(cohort_hrly_grids_f):,}")
-    return (cohort_hrly_grids_f,)
+    # Relation in → relation out: generate_series → _dh/_hr → shift IDs is a
+    # single DuckDB query with no pandas round-trip. The result is
+    # materialized once as a TEMP TABLE (perf-guide §2b) because three
+    # consumers read it (per-day registry, NMB range join, terminal write).
+    cohort_hrly_grids_f_rel = add_day_shift_id(cohort_hrly_grids, site_tz=SITE_TZ)
+    duckdb.sql("""
+        CREATE OR REPLACE TEMP TABLE cohort_hrly_grids_f_ckpt AS
+        FROM cohort_hrly_grids_f_rel
+    """)
+    cohort_hrly_grids_f = duckdb.table("cohort_hrly_grids_f_ckpt")
+    _n_grid = cohort_hrly_grids.count("*").fetchone()[0]
+    _n_grid_f = cohort_hrly_grids_f.count("*").fetchone()[0]
+    assert _n_grid_f == _n_grid, 'length altered by add_day_shift_id'
+    logger.info(f"Hourly grid rows: {_n_grid_f:,}")
+    return cohort_hrly_grids_f, cohort_hrly_grids_f_rel
 
 
 @app.cell
@@ -1162,7 +1183,8 @@ def _():
 def _(encounter_mapping, nmb_excluded_patient_days):
     # Setup cell — non-SQL prep for the CTE chain below. Two materializations:
     # (1) `encounter_map_df`: when stitch is ON, `encounter_mapping` is a
-    #     (hospitalization_id, encounter_block) pandas df; when OFF it's None.
+    #     (hospitalization_id, encounter_block) relation over the
+    #     `encounter_stitch` TEMP TABLE; when OFF it's None.
     #     We synthesize an empty-but-schema-stable mapping df on the OFF path
     #     so the downstream LEFT JOIN unifies both cases (NULL encounter_block
     #     when stitch is off).
@@ -1350,29 +1372,55 @@ def _():
 
 
 @app.cell
-def _(DATA_DIR, SITE_TZ, duckdb):
-    # Inline raw DuckDB read of clifpy's parquet — mirrors 02_exposure.py's
-    # pattern. Bypasses clifpy.load_data (which silently does
-    # UTC→naive-site-local conversion and breaks downstream
+def _(DATA_DIR, SITE_NAME, SITE_TZ, cohort_imv_streaks, duckdb):
+    # Single scan of clif_medication_admin_continuous for the whole pipeline.
+    # Pushes down the union of med_categories needed by NMB (here),
+    # sedatives (02), vasopressors (04) and cardiovascular SOFA (04 via
+    # _sofa) plus the cohort IDs, and writes a med_category-partitioned
+    # extract under output/{site}/. Scoped to the pre-weight IMV cohort
+    # (= every hospitalization on the hourly grid) so the NMB intervals below
+    # see the same rows they did against the raw file, and every later,
+    # narrower cohort is a subset.
+    from _med_extract import (
+        med_admin_continuous_source,
+        write_med_admin_continuous_extract,
+    )
+    _extract_ids_rel = duckdb.sql(
+        "FROM cohort_imv_streaks SELECT DISTINCT hospitalization_id"
+    )
+    write_med_admin_continuous_extract(
+        DATA_DIR, SITE_NAME, SITE_TZ, _extract_ids_rel,
+    )
+    med_cont_src = med_admin_continuous_source(DATA_DIR, SITE_NAME)
+    return (med_cont_src,)
+
+
+@app.cell
+def _(SITE_TZ, cohort_hosp_ids_pre_nmb, duckdb, med_cont_src):
+    # Inline raw DuckDB read of the cohort medication extract — mirrors
+    # 02_exposure.py's pattern. Bypasses clifpy.load_data (which silently
+    # does UTC→naive-site-local conversion and breaks downstream
     # `AT TIME ZONE site_tz + extract` semantics). admin_dttm flows
-    # downstream as UTC TIMESTAMPTZ. Predicate pushdown engages on the
-    # med_category filter via the parquet scan; the cohort restriction
-    # is delegated to the downstream ASOF join in `nmb_hrly` which only
-    # keeps grid rows for kept-cohort patients.
+    # downstream as UTC TIMESTAMPTZ. The med_category filter prunes the
+    # extract to the three NMB partitions; the SEMI JOIN against the
+    # pre-NMB cohort (the only hospitalizations this exclusion can drop)
+    # keeps every other patient's NMB history out of the window below.
+    register_ids('pre_nmb_hosp_ids', cohort_hosp_ids_pre_nmb)
     nmb_rel = duckdb.sql(f"""
-        FROM '{DATA_DIR}/clif_medication_admin_continuous.parquet'
+        FROM {med_cont_src} c
+        SEMI JOIN pre_nmb_hosp_ids USING (hospitalization_id)
         SELECT
             hospitalization_id
-            , admin_dttm
-            , med_name
-            , med_category
-            , med_dose
-            , med_dose_unit
-        WHERE med_category IN ('cisatracurium', 'vecuronium', 'rocuronium')
+            , c.admin_dttm
+            , c.med_name
+            , c.med_category
+            , c.med_dose
+            , c.med_dose_unit
+        WHERE c.med_category IN {NMB_CATEGORIES}
     """)
-    # Cross-site tz normalization: for sites whose CLIF parquet stores
-    # admin_dttm as naive TIMESTAMP, reinterpret wall-clock as SITE_TZ-local
-    # and emit TIMESTAMPTZ (UTC). Passthrough for tagged sources.
+    # Cross-site tz normalization: the extract is already UTC; this is a
+    # passthrough there and still covers the raw-file fallback, where
+    # naive admin_dttm is reinterpreted as SITE_TZ-local wall-clock.
     nmb_rel = coerce_dttm_to_utc(nmb_rel, ['admin_dttm'], SITE_TZ)
     if logger.isEnabledFor(logging.DEBUG):
         _n = nmb_rel.count("*").fetchone()[0]
@@ -1383,53 +1431,29 @@ def _(DATA_DIR, SITE_TZ, duckdb):
 
 
 @app.cell
-def _(nmb_rel):
-    nmb_w_duration = mo.sql(
-        f"""
-        -- Compute duration (minutes) between consecutive NMB administrations
-        FROM nmb_rel
-        SELECT hospitalization_id
-            , admin_dttm
-            , med_dose
-            , _duration_min: EXTRACT(EPOCH FROM (
-                LEAD(admin_dttm, 1, admin_dttm) OVER w - admin_dttm
-              )) / 60.0
-        WINDOW w AS (PARTITION BY hospitalization_id ORDER BY admin_dttm)
-        """
-    )
-    return (nmb_w_duration,)
-
-
-@app.cell
-def _(cohort_hrly_grids_f, nmb_w_duration):
-    nmb_hrly = mo.sql(
-        f"""
-        -- ASOF join NMB to hourly grid to get NMB status at each hour
-        FROM cohort_hrly_grids_f g
-        ASOF LEFT JOIN nmb_w_duration n
-            ON g.hospitalization_id = n.hospitalization_id
-            AND n.admin_dttm <= g.event_dttm
-        SELECT g.hospitalization_id
-            , g._nth_day
-            , n.med_dose
-            , n._duration_min
-        """
-    )
-    return (nmb_hrly,)
+def _(cohort_streak_bounds, nmb_rel):
+    # Running (med_dose > 0) NMB intervals [admin, next admin) that can
+    # cover a grid hour of the IMV streak (see _nmb).
+    nmb_intervals = nmb_running_intervals(nmb_rel, cohort_streak_bounds)
+    return (nmb_intervals,)
 
 
 @app.cell
-def _(nmb_hrly):
-    nmb_excluded_patient_days = mo.sql(
-        f"""
-        -- Flag patient-days with >1 hour total NMB for exclusion
-        FROM nmb_hrly
-        SELECT hospitalization_id, _nth_day
-            , _nmb_total_min: SUM(CASE WHEN med_dose > 0 THEN _duration_min ELSE 0 END)
-        GROUP BY hospitalization_id, _nth_day
-        HAVING _nmb_total_min > 60
-        """
-    )
+def _(cohort_hrly_grids_f, duckdb, nmb_intervals):
+    # Flag patient-days with >1 hour total NMB for exclusion. Same per-hour
+    # definition as the former grid ASOF join: each grid hour adds the full
+    # duration of the running interval it falls in. Computed as a range
+    # join of the interval list onto the grid (see _nmb).
+    # Persisted once as a small TEMP TABLE: the exclusion, CONSORT and save
+    # cells all read it, and 01 writes it for 05.
+    nmb_day_minutes = nmb_patient_day_minutes(nmb_intervals, cohort_hrly_grids_f)
+    duckdb.sql("""
+        CREATE OR REPLACE TEMP TABLE nmb_excluded_patient_days AS
+        FROM nmb_day_minutes
+        WHERE _nmb_total_min > 60
+        ORDER BY hospitalization_id, _nth_day
+    """)
+    nmb_excluded_patient_days = duckdb.table("nmb_excluded_patient_days")
     return (nmb_excluded_patient_days,)
 
 
@@ -1453,9 +1477,10 @@ def _(cohort_hosp_ids_pre_nmb, duckdb, nmb_excluded_patient_days):
     cohort_hosp_ids = [
         h for h in cohort_hosp_ids_pre_nmb if h not in nmb_excluded_hosp_ids
     ]
-    cohort_hosp_ids_rel = duckdb.sql(
-        f"SELECT UNNEST({cohort_hosp_ids}) AS hospitalization_id"
-    )
+    # Registered as the `cohort_ids` TEMP TABLE (via Arrow, not an UNNEST
+    # literal); the save cell persists it as cohort_hosp_ids.parquet for the
+    # downstream scripts.
+    cohort_hosp_ids_rel = register_ids(COHORT_IDS_TABLE, cohort_hosp_ids)
     logger.info(
         f"NMB exclusion: dropped "
         f"{len(cohort_hosp_ids_pre_nmb) - len(cohort_hosp_ids):,} "
@@ -1661,6 +1686,7 @@ def _(
     # Non-tz outputs: DuckDB native .to_parquet() directly on the relation.
     nmb_excluded_patient_days.to_parquet(f"output/{SITE_NAME}/cohort_nmb_excluded.parquet")
     icu_type_df.to_parquet(f"output/{SITE_NAME}/cohort_icu_type.parquet")
+    write_cohort_ids(SITE_NAME, cohort_hosp_ids_rel)
 
     _n_grids_rows = _grids_kept_rel.count("*").fetchone()[0]
     _n_meta_imvday_rows = _meta_imvday_kept_rel.count("*").fetchone()[0]
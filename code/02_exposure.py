@@ -17,6 +17,7 @@ with app.setup:
     import marimo as mo
     import os
     import sys
+    import time
     import logging
     from pathlib import Path
     # sys.path.insert(0, str(Path(__file__).parent))
@@ -104,6 +105,15 @@ def _():
         remove_meds_duplicates,
     )
     from _outlier_handler import apply_outlier_handling_duckdb
+    from _perf import perf_stage
+    from _cohort_ids import register_cohort_ids
+    from _shard import (
+        configure_shard_session,
+        current_shard,
+        shard_predicate,
+        stage_output_dir,
+        stage_qc_dir,
+    )
 
     import warnings
     warnings.filterwarnings('ignore', category=FutureWarning)
@@ -123,43 +133,72 @@ def _():
         CONFIG_PATH,
         apply_outlier_handling_duckdb,
         coerce_dttm_to_utc,
+        configure_shard_session,
         convert_dose_units_by_med_category,
+        current_shard,
         duckdb,
         get_config_or_params,
         mar_action_not_given_filter_sql,
         mar_action_zero_dose_sql,
         normalize_categories,
+        perf_stage,
+        register_cohort_ids,
         remove_meds_duplicates,
         setup_logging,
+        shard_predicate,
+        stage_output_dir,
+        stage_qc_dir,
     )
 
 
 @app.cell
-def _(CONFIG_PATH, get_config_or_params, setup_logging):
+def _(
+    CONFIG_PATH,
+    configure_shard_session,
+    current_shard,
+    get_config_or_params,
+    setup_logging,
+    stage_output_dir,
+    stage_qc_dir,
+):
     # Site-scoped output dir (see Makefile SITE= flag).
     cfg = get_config_or_params(CONFIG_PATH)
     SITE_NAME = cfg['site_name'].lower()
     SITE_TZ = cfg['timezone']
     DATA_DIR = cfg['data_directory']
     os.makedirs(f"output/{SITE_NAME}", exist_ok=True)
+    # Shard mode (`make run-sharded`, see code/_shard.py): SHARD is the hash
+    # partition of the cohort this process handles and OUT_DIR / QC_DIR
+    # point at its shard directory; run_sharded.py merges the parts into
+    # the canonical paths. Unsharded: SHARD is None, OUT_DIR is
+    # output/{site}, QC_DIR is output_to_share/{site}/qc.
+    SHARD = current_shard()
+    OUT_DIR = stage_output_dir(SITE_NAME, SHARD)
+    QC_DIR = stage_qc_dir(SITE_NAME, SHARD)
     # Per-site log separation: each site writes to output/{site}/logs/
     # clifpy_all.log + clifpy_errors.log. setup_logging is idempotent; we
     # call it explicitly here (instead of via ClifOrchestrator's __init__
     # side effect) so the output_directory is site-scoped.
     setup_logging(output_directory=f"output_to_share/{SITE_NAME}")
     logger.info(f"Site: {SITE_NAME} (tz: {SITE_TZ})")
-    return DATA_DIR, SITE_NAME, SITE_TZ
+    configure_shard_session(SHARD)
+    return DATA_DIR, OUT_DIR, QC_DIR, SHARD, SITE_NAME, SITE_TZ
 
 
 @app.cell
-def _(SITE_NAME, duckdb):
+def _(SHARD, SITE_NAME, duckdb, shard_predicate):
     # Lazy parquet read — DuckDB scans on demand. The grid is UTC tagged
     # at write time by 01_cohort's to_utc boundary, so event_dttm carries
     # canonical UTC on disk; downstream SQL uses AT TIME ZONE for explicit
     # local-hour extraction.
-    cohort_meta_by_id_imvhr = duckdb.sql(
-        f"FROM 'output/{SITE_NAME}/cohort_meta_by_id_imvhr.parquet' SELECT *"
-    )
+    # In shard mode the grid is restricted to the shard's hospitalizations;
+    # downstream loads are scoped through the same shard's cohort_ids table
+    # (cohort_hosp_ids_rel).
+    cohort_meta_by_id_imvhr = duckdb.sql(f"""
+        FROM 'output/{SITE_NAME}/cohort_meta_by_id_imvhr.parquet'
+        SELECT *
+        WHERE {shard_predicate(SHARD)}
+    """)
     if logger.isEnabledFor(logging.DEBUG):
         _n = cohort_meta_by_id_imvhr.count("*").fetchone()[0]
         logger.debug(f"Hourly grid rows: {_n:,}")
@@ -169,16 +208,13 @@ def _(SITE_NAME, duckdb):
 
 
 @app.cell
-def _(cohort_meta_by_id_imvhr, duckdb):
-    # Lazy one-column relation for downstream INNER JOINs. Stays as a
-    # DuckDBPyRelation through the chain (no .fetchall() → Python list
-    # → giant SQL literal round-trip). Scales to 1M+ hospitalizations
-    # without per-query statement-length blowup.
-    cohort_hosp_ids_rel = duckdb.sql(
-        "FROM cohort_meta_by_id_imvhr SELECT DISTINCT hospitalization_id"
-    )
-    _n_hosp = cohort_hosp_ids_rel.count("*").fetchone()[0]
-    logger.info(f"Cohort hospitalizations: {_n_hosp:,}")
+def _(SHARD, SITE_NAME, register_cohort_ids):
+    # Cohort membership as the sorted `cohort_ids` TEMP TABLE written by
+    # 01_cohort (restricted to this shard), for the downstream raw-table
+    # SEMI JOINs. Stays in DuckDB through the chain (no .fetchall() →
+    # Python list → giant SQL literal round-trip), and no longer rescans
+    # the hourly grid for its DISTINCT IDs.
+    cohort_hosp_ids_rel = register_cohort_ids(SITE_NAME, SHARD)
     return (cohort_hosp_ids_rel,)
 
 
@@ -219,35 +255,29 @@ def _():
 
 
 @app.cell
-def _(DATA_DIR, SITE_TZ, apply_outlier_handling_duckdb, coerce_dttm_to_utc,
-      cohort_hosp_ids_rel, duckdb):
-    # Inline raw DuckDB read of clifpy's parquet — bypasses
-    # `clifpy.load_data` (slow pandas-based tz path). Predicate +
-    # projection pushdown engages via parquet zonemap.
-    # tz coercion: `coerce_dttm_to_utc` normalizes recorded_dttm to
-    # TIMESTAMPTZ UTC instant regardless of source shape (UTC tagged /
-    # local tagged / naive). For MIMIC/UCMC (UTC tagged) it's a passthrough.
-    # See docs/timezone_audit.md.
-    vitals_rel = duckdb.sql(f"""
-        FROM '{DATA_DIR}/clif_vitals.parquet' v
-        JOIN cohort_hosp_ids_rel USING (hospitalization_id)
-        SELECT
-            hospitalization_id
-            , v.recorded_dttm
-            , v.vital_category
-            , v.vital_value
-        WHERE v.vital_category = 'weight_kg'
-    """)
-    vitals_rel = coerce_dttm_to_utc(vitals_rel, ['recorded_dttm'], SITE_TZ)
-    vitals_rel = apply_outlier_handling_duckdb(
-        vitals_rel, 'vitals', 'config/outlier_config.yaml',
-    )
-    logger.info(f"Vitals (weight_kg): lazy relation built (tz-normalized via site_tz={SITE_TZ})")
-    return (vitals_rel,)
+def _(DATA_DIR, SITE_NAME, SITE_TZ, cohort_hosp_ids_rel):
+    # Cohort weights from the sorted weight extract written by
+    # 01_cohort.py (raw clif_vitals fallback if absent) — no vitals rescan.
+    # recorded_dttm is a UTC TIMESTAMPTZ instant; `weight_kg` is already
+    # clamped to the outlier_config.yaml weight_kg range (NULL outside).
+    # `vitals_rel` is the same rows in clif_vitals shape for clifpy's
+    # converter (`vitals_df=`). See docs/timezone_audit.md.
+    from _weight_extract import as_vitals, weight_extract_rel
+    weight_rel = weight_extract_rel(DATA_DIR, SITE_NAME, SITE_TZ, cohort_hosp_ids_rel)
+    vitals_rel = as_vitals(weight_rel)
+    logger.info("Vitals (weight_kg): lazy relation built from the weight extract")
+    return vitals_rel, weight_rel
 
 
 @app.cell
-def _(DATA_DIR, duckdb):
+def _(DATA_DIR, SITE_NAME, duckdb):
+    from _med_extract import med_admin_continuous_source
+
+    # Continuous meds come from the cohort-scoped, med_category-partitioned
+    # extract written by 01_cohort.py (raw-file fallback if absent), so the
+    # multi-billion-row source table is not rescanned here.
+    med_cont_src = med_admin_continuous_source(DATA_DIR, SITE_NAME)
+
     # B5: detect mar_action_category presence on each medication table.
     # Asymmetric contract:
     #   - continuous: column is OPTIONAL — fall back to mar_action_name regex.
@@ -256,9 +286,8 @@ def _(DATA_DIR, duckdb):
     #   - intermittent: column is REQUIRED — bolus dose accounting depends on
     #     the structured 'not_given' zeroing, and free-text mar_action_name
     #     varies too widely across sites to regex reliably.
-    _cont_path = f"{DATA_DIR}/clif_medication_admin_continuous.parquet"
     _intm_path = f"{DATA_DIR}/clif_medication_admin_intermittent.parquet"
-    _cont_cols = {r[0] for r in duckdb.sql(f"DESCRIBE FROM '{_cont_path}'").fetchall()}
+    _cont_cols = {r[0] for r in duckdb.sql(f"DESCRIBE FROM {med_cont_src}").fetchall()}
     _intm_cols = {r[0] for r in duckdb.sql(f"DESCRIBE FROM '{_intm_path}'").fetchall()}
     HAS_MAR_CAT_CONT = 'mar_action_category' in _cont_cols
     HAS_MAR_CAT_INTM = 'mar_action_category' in _intm_cols
@@ -282,17 +311,17 @@ def _(DATA_DIR, duckdb):
             "falling back to mar_action_name regex for stop/not_given detection. "
             "Acceptable for continuous FFILL semantics."
         )
-    return (HAS_MAR_CAT_CONT,)
+    return HAS_MAR_CAT_CONT, med_cont_src
 
 
 @app.cell
 def _(
-    DATA_DIR,
     HAS_MAR_CAT_CONT,
     SITE_TZ,
     coerce_dttm_to_utc,
     duckdb,
     mar_action_not_given_filter_sql,
+    med_cont_src,
     normalize_categories,
 ):
     # Inline raw DuckDB read — bypasses clifpy.load_data. admin_dttm is
@@ -305,8 +334,8 @@ def _(
     )
     _not_given_filter = mar_action_not_given_filter_sql(HAS_MAR_CAT_CONT)
     cont_sed_rel = duckdb.sql(f"""
-        FROM '{DATA_DIR}/clif_medication_admin_continuous.parquet' c
-        JOIN cohort_hosp_ids_rel USING (hospitalization_id)
+        FROM {med_cont_src} c
+        SEMI JOIN cohort_hosp_ids_rel USING (hospitalization_id)
         SELECT
             hospitalization_id
             , c.admin_dttm
@@ -380,7 +409,7 @@ def _(cont_sed_rel, duckdb, remove_meds_duplicates):
 
 
 @app.cell
-def _(cont_sed_deduped, vitals_rel):
+def _(cont_sed_deduped, weight_rel):
     cont_sed_with_weight = mo.sql(
         f"""
         -- Phase 2 weight override: pre-attach a project-controlled `weight_kg`
@@ -395,22 +424,21 @@ def _(cont_sed_deduped, vitals_rel):
         -- (same temporal logic as clifpy), with fallback to the patient's
         -- first-ever weight (admission fallback). The weight-QC drop list at
         -- 01_cohort.py guarantees every kept patient has ≥1 weight, so the
-        -- admission fallback is never NULL.
+        -- admission fallback is never NULL. Both come pre-sorted from the
+        -- weight extract (clamped `weight_kg`, precomputed
+        -- `admission_weight_kg`).
         --
         -- Stays lazy as a DuckDBPyRelation — feeds directly into
         -- convert_dose_units_by_med_category(return_rel=True) below.
         WITH weights AS (
-                FROM vitals_rel
-                SELECT hospitalization_id, recorded_dttm
-                    , weight_kg: vital_value
-                WHERE vital_category = 'weight_kg' AND vital_value IS NOT NULL
+                FROM weight_rel
+                SELECT hospitalization_id, recorded_dttm, weight_kg
+                WHERE weight_kg IS NOT NULL
             )
             , first_w AS (
-                FROM weights
-                SELECT hospitalization_id, _admit_weight: weight_kg
-                QUALIFY ROW_NUMBER() OVER (
-                    PARTITION BY hospitalization_id ORDER BY recorded_dttm
-                ) = 1
+                FROM weight_rel
+                SELECT DISTINCT hospitalization_id
+                    , _admit_weight: admission_weight_kg
             )
             , asof_w AS (
                 FROM cont_sed_deduped m
@@ -502,12 +530,11 @@ def _(cont_sed_convert_summary):
 
 
 @app.cell
-def _(SITE_NAME, cont_sed_convert_summary):
+def _(QC_DIR, cont_sed_convert_summary):
     # Persist the convert summary to output_to_share/{site}/qc/ so sites'
     # uploaded bundles include per-(drug, source-unit) conversion counts.
     # Federation-safe: group-level counts only, no IDs.
-    _qc_dir = Path(f"output_to_share/{SITE_NAME}/qc")
-    _qc_dir.mkdir(parents=True, exist_ok=True)
+    _qc_dir = QC_DIR
     cont_sed_convert_summary.pl().write_csv(
         _qc_dir / "cont_sed_convert_summary.csv"
     )
@@ -902,7 +929,7 @@ def _(DATA_DIR, SITE_TZ, coerce_dttm_to_utc, cohort_hosp_ids_rel, duckdb, normal
     # (HAS_MAR_CAT_INTM) has already asserted presence and raised otherwise.
     intm_sed_rel = duckdb.sql(f"""
         FROM '{DATA_DIR}/clif_medication_admin_intermittent.parquet' c
-        JOIN cohort_hosp_ids_rel USING (hospitalization_id)
+        SEMI JOIN cohort_hosp_ids_rel USING (hospitalization_id)
         SELECT
             hospitalization_id
             , c.admin_dttm
@@ -980,8 +1007,9 @@ def _(convert_dose_units_by_med_category, intm_sed_deduped, vitals_rel):
     # so the converted intm column drops into `prop_mcg_kg_min_total`'s sum
     # alongside continuous; the other four drugs stay at weight-free amount
     # units because they roll into fenteq/midazeq equivalency sums in
-    # absolute units, not per-kg. `vitals_df=vitals_rel` provides the
-    # per-bolus ASOF weight that clifpy's mcg/kg converter needs.
+    # absolute units, not per-kg. `vitals_df=vitals_rel` (the weight
+    # extract in clif_vitals shape) provides the per-bolus ASOF weight that
+    # clifpy's mcg/kg converter needs.
     #
     # `INTM_SED_PREFERRED_UNITS` is hoisted to setup scope (see header) —
     # single source of truth for both this conversion AND the intm pivot's
@@ -1003,11 +1031,10 @@ def _(intm_sed_convert_summary):
 
 
 @app.cell
-def _(SITE_NAME, intm_sed_convert_summary):
+def _(QC_DIR, intm_sed_convert_summary):
     # Persist the intm convert summary alongside the cont one. Same QC
     # purpose: cross-site verification of unit-mapping per drug.
-    _qc_dir = Path(f"output_to_share/{SITE_NAME}/qc")
-    _qc_dir.mkdir(parents=True, exist_ok=True)
+    _qc_dir = QC_DIR
     intm_sed_convert_summary.pl().write_csv(
         _qc_dir / "intm_sed_convert_summary.csv"
     )
@@ -1214,7 +1241,7 @@ def _(cohort_meta_by_id_imvhr, cont_sed_dose_by_hr, intm_sed_dose_by_hr):
     # so they add cleanly. Dividing by 60 re-rates the hourly sum to a
     # mcg/kg/min equivalent — the standard simplification of treating
     # bolus dose as distributed across the hour.
-    seddose_by_id_imvhr = mo.sql(
+    seddose_by_id_imvhr_rel = mo.sql(
         f"""
         WITH joined AS (
             FROM cohort_meta_by_id_imvhr g
@@ -1256,11 +1283,47 @@ def _(cohort_meta_by_id_imvhr, cont_sed_dose_by_hr, intm_sed_dose_by_hr):
         ORDER BY hospitalization_id, event_dttm
         """
     )
-    return (seddose_by_id_imvhr,)
+    return (seddose_by_id_imvhr_rel,)
 
 
 @app.cell
-def _(seddose_by_id_imvhr, duckdb):
+def _(duckdb, perf_stage, seddose_by_id_imvhr_rel):
+    # Checkpoint: materialize the per-hour grid ONCE into a DuckDB temp
+    # table. Everything above is a lazy relation chain (pivot → FULL JOIN
+    # grid → LAST_VALUE ffill → per-hour SUM, for cont and intm), and a
+    # DuckDBPyRelation re-executes its whole chain on every consumer: the
+    # M1 clamp diagnostics (7 scalar queries), the clamped/raw per-hour
+    # writes and the daily roll-up would each re-run it. Downstream cells
+    # now read the temp table instead. The CTAS keeps the ORDER BY above
+    # (insertion order is preserved), and a temp table spills to DuckDB's
+    # temp_directory under memory pressure rather than OOMing.
+    #
+    # TOGGLE: `SEDDOSE_CHECKPOINT=0` skips the checkpoint (every consumer
+    # re-executes the lazy chain, the pre-checkpoint behavior) — only
+    # useful to compare the "02 post-grid wall-clock" log line of both
+    # modes.
+    seddose_ckpt_t0 = time.perf_counter()
+    if os.getenv("SEDDOSE_CHECKPOINT", "1") == "1":
+        with perf_stage("seddose_checkpoint") as _ps:
+            duckdb.sql("""
+                CREATE OR REPLACE TEMP TABLE seddose_by_id_imvhr_ckpt AS
+                FROM seddose_by_id_imvhr_rel
+            """)
+            seddose_by_id_imvhr = duckdb.table("seddose_by_id_imvhr_ckpt")
+            _n = seddose_by_id_imvhr.count("*").fetchone()[0]
+            _ps.rows = _n
+        logger.info(
+            f"seddose_by_id_imvhr checkpoint: {_n:,} rows materialized in "
+            f"{time.perf_counter() - seddose_ckpt_t0:,.1f}s"
+        )
+    else:
+        logger.info("seddose_by_id_imvhr checkpoint DISABLED (SEDDOSE_CHECKPOINT=0)")
+        seddose_by_id_imvhr = seddose_by_id_imvhr_rel
+    return seddose_by_id_imvhr, seddose_ckpt_t0
+
+
+@app.cell
+def _(QC_DIR, seddose_by_id_imvhr, duckdb):
     # M1: per-hour clinical-ceiling clamp (cap-to-ceiling, not NULL).
     #
     # WHAT: caps per-hour avg rates at a clinical-implausibility ceiling.
@@ -1290,15 +1353,9 @@ def _(seddose_by_id_imvhr, duckdb):
     # written at the end of this script lets users diff clamped vs raw at
     # the per-hour level without a second pipeline run.
     import os as _os
+    from _utils import SEDDOSE_CEILINGS as _ceilings
+    from _utils import seddose_clamp_summary as _seddose_clamp_summary
     _seddose_clamp_on = _os.getenv("SEDDOSE_CLAMP", "1") == "1"
-    _ceilings = {
-        'prop_mcg_kg_min_cont':  200,
-        'prop_mcg_kg_min_total': 200,
-        'fenteq_mcg_hr_cont':   1000,
-        'fenteq_mcg_hr_total':  1000,
-        'midazeq_mg_hr_cont':     50,
-        'midazeq_mg_hr_total':    50,
-    }
     if not _seddose_clamp_on:
         logger.info("M1 clinical-ceiling clamp DISABLED (SEDDOSE_CLAMP=0)")
         seddose_by_id_imvhr_clamped = seddose_by_id_imvhr
@@ -1311,26 +1368,17 @@ def _(seddose_by_id_imvhr, duckdb):
         # → likely weight-error or unit-conversion bug). On-disk parquet
         # caps via LEAST() so stored values never exceed the ceiling —
         # these percentiles describe the ORIGINAL magnitudes.
-        _total = duckdb.sql(
-            "FROM seddose_by_id_imvhr SELECT COUNT(*)"
-        ).fetchone()[0]
-        _clamp_rows = []  # for the qc/m1_clamp_summary.csv
-        for _col, _ceil in _ceilings.items():
-            _stats = duckdb.sql(f"""
-                FROM seddose_by_id_imvhr
-                SELECT
-                    COUNT(*) FILTER (WHERE {_col} > {_ceil})                       AS n_above
-                    , quantile_cont({_col}, 0.50) FILTER (WHERE {_col} > {_ceil})  AS p50_above
-                    , quantile_cont({_col}, 0.95) FILTER (WHERE {_col} > {_ceil})  AS p95_above
-                    , MAX({_col})                  FILTER (WHERE {_col} > {_ceil}) AS max_above
-            """).fetchone()
-            _n_above, _p50_above, _p95_above, _max_above = _stats
-            _pct = _n_above / _total * 100 if _total else 0
-            _clamp_rows.append({
-                'column': _col, 'ceiling': _ceil,
-                'n_above': _n_above, 'n_total': _total, 'pct_above': round(_pct, 4),
-                'p50_above': _p50_above, 'p95_above': _p95_above, 'max_above': _max_above,
-            })
+        # (Stats live in _utils.seddose_clamp_summary so shard mode can
+        # recompute them on the merged output.)
+        _clamp_rows = _seddose_clamp_summary(seddose_by_id_imvhr, _ceilings)
+        for _row in _clamp_rows:
+            _col, _ceil, _n_above, _total = (
+                _row['column'], _row['ceiling'], _row['n_above'], _row['n_total']
+            )
+            _pct = _row['pct_above']
+            _p50_above, _p95_above, _max_above = (
+                _row['p50_above'], _row['p95_above'], _row['max_above']
+            )
             if _n_above > 0:
                 logger.warning(
                     f"M1 clamp [{_col}]: {_n_above:,} / {_total:,} ({_pct:.3f}%) "
@@ -1351,8 +1399,7 @@ def _(seddose_by_id_imvhr, duckdb):
         # Persist structured summary CSV — federation-safe (per-ceiling
         # aggregates only, no IDs).
         import polars as _pl_clamp_qc
-        _qc_dir = Path(f"output_to_share/{SITE_NAME}/qc")
-        _qc_dir.mkdir(parents=True, exist_ok=True)
+        _qc_dir = QC_DIR
         _pl_clamp_qc.DataFrame(_clamp_rows).write_csv(
             _qc_dir / "m1_clamp_summary.csv"
         )
@@ -1473,10 +1520,11 @@ def _():
 
     Under `sql_output="native"`, every upstream `mo.sql` cell returns a
     lazy `DuckDBPyRelation` — the full cont/intm pipelines stay
-    unmaterialized through pivot, forward-fill, per-hour aggregation,
-    M1 clamp, per-shift aggregation, and pivot-to-day/night. The write
-    cell below materializes to Polars exactly ONCE per output file via
-    `.pl()`, then applies `convert_time_zone("UTC")` (Polars metadata
+    unmaterialized through pivot, forward-fill and per-hour aggregation
+    up to the `seddose_by_id_imvhr` checkpoint (one temp-table
+    materialization); M1 clamp, per-shift aggregation and pivot-to-day/
+    night are lazy over that table. The write cell below materializes to
+    Polars exactly ONCE per output file via `.pl()`, then applies `convert_time_zone("UTC")` (Polars metadata
     op, no row scan) and calls `.write_parquet(...)` (Polars preserves
     the tz tag). See `docs/timezone_audit.md`.
 
@@ -1489,7 +1537,14 @@ def _():
 
 
 @app.cell
-def _(SITE_NAME, seddose_by_id_imvday, seddose_by_id_imvhr, seddose_by_id_imvhr_clamped):
+def _(
+    OUT_DIR,
+    perf_stage,
+    seddose_by_id_imvday,
+    seddose_by_id_imvhr,
+    seddose_by_id_imvhr_clamped,
+    seddose_ckpt_t0,
+):
     import polars as pl  # cell-local — used only for the tz-bearing parquet write
 
     # Under sql_output="native" (post Step 2), the inputs are all lazy
@@ -1498,32 +1553,42 @@ def _(SITE_NAME, seddose_by_id_imvday, seddose_by_id_imvhr, seddose_by_id_imvhr_
     # metadata op, no row scan) before `.write_parquet(...)`. Polars'
     # parquet writer preserves the tz tag, matching the project's
     # UTC-everywhere convention (docs/timezone_audit.md).
-    seddose_by_id_imvday.pl().write_parquet(
-        f"output/{SITE_NAME}/seddose_by_id_imvday.parquet"
-    )
+    with perf_stage("write_seddose_by_id_imvday") as _ps:
+        _imvday = seddose_by_id_imvday.pl()
+        _imvday.write_parquet(f"{OUT_DIR}/seddose_by_id_imvday.parquet")
+        _ps.rows = _imvday.height
 
     # Canonical per-hour parquet: clamped (or pass-through if SEDDOSE_CLAMP=0).
     # This is what every downstream consumer reads (descriptive scripts,
     # 05_modeling_dataset.py via the daily roll-up).
-    (
-        seddose_by_id_imvhr_clamped.pl()
-        .with_columns(pl.col("event_dttm").dt.convert_time_zone("UTC"))
-        .write_parquet(f"output/{SITE_NAME}/seddose_by_id_imvhr.parquet")
-    )
+    with perf_stage("write_seddose_by_id_imvhr") as _ps:
+        _imvhr = (
+            seddose_by_id_imvhr_clamped.pl()
+            .with_columns(pl.col("event_dttm").dt.convert_time_zone("UTC"))
+        )
+        _imvhr.write_parquet(f"{OUT_DIR}/seddose_by_id_imvhr.parquet")
+        _ps.rows = _imvhr.height
+    del _imvhr
 
     # Raw sibling: pre-clamp data, always written so users can diff the two
     # parquets to see the clamp's impact at the patient-hour level without
     # re-running the pipeline with SEDDOSE_CLAMP=0. When SEDDOSE_CLAMP=0 the
     # two files have identical contents (M1 cell is a pass-through).
-    (
-        seddose_by_id_imvhr.pl()
-        .with_columns(pl.col("event_dttm").dt.convert_time_zone("UTC"))
-        .write_parquet(f"output/{SITE_NAME}/seddose_by_id_imvhr_raw.parquet")
-    )
+    with perf_stage("write_seddose_by_id_imvhr_raw"):
+        (
+            seddose_by_id_imvhr.pl()
+            .with_columns(pl.col("event_dttm").dt.convert_time_zone("UTC"))
+            .write_parquet(f"{OUT_DIR}/seddose_by_id_imvhr_raw.parquet")
+        )
 
-    logger.info(f"Saved: output/{SITE_NAME}/seddose_by_id_imvday.parquet")
-    logger.info(f"Saved: output/{SITE_NAME}/seddose_by_id_imvhr.parquet (event_dttm in UTC, clamp-aware)")
-    logger.info(f"Saved: output/{SITE_NAME}/seddose_by_id_imvhr_raw.parquet (event_dttm in UTC, always pre-clamp)")
+    logger.info(f"Saved: {OUT_DIR}/seddose_by_id_imvday.parquet")
+    logger.info(f"Saved: {OUT_DIR}/seddose_by_id_imvhr.parquet (event_dttm in UTC, clamp-aware)")
+    logger.info(f"Saved: {OUT_DIR}/seddose_by_id_imvhr_raw.parquet (event_dttm in UTC, always pre-clamp)")
+    # Checkpoint → clamp diagnostics → daily roll-up → three writes.
+    logger.info(
+        f"02 post-grid wall-clock: {time.perf_counter() - seddose_ckpt_t0:,.1f}s "
+        f"(SEDDOSE_CHECKPOINT={os.getenv('SEDDOSE_CHECKPOINT', '1')})"
+    )
     return
 
 
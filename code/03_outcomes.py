@@ -42,6 +42,13 @@ def _():
     from clifpy.utils.config import get_config_or_params
     from _logging_setup import setup_logging
     from _utils import normalize_categories, to_utc
+    from _perf import perf_stage
+    from _shard import (
+        configure_shard_session,
+        current_shard,
+        shard_predicate,
+        stage_output_dir,
+    )
     import pandas as pd
     import duckdb
 
@@ -53,17 +60,29 @@ def _():
     os.makedirs("output", exist_ok=True)
     return (
         CONFIG_PATH,
+        configure_shard_session,
+        current_shard,
         duckdb,
         get_config_or_params,
         normalize_categories,
         pd,
+        perf_stage,
         setup_logging,
+        shard_predicate,
+        stage_output_dir,
         to_utc,
     )
 
 
 @app.cell
-def _(CONFIG_PATH, get_config_or_params, setup_logging):
+def _(
+    CONFIG_PATH,
+    configure_shard_session,
+    current_shard,
+    get_config_or_params,
+    setup_logging,
+    stage_output_dir,
+):
     # Site-scoped output dir (see Makefile SITE= flag).
     cfg = get_config_or_params(CONFIG_PATH)
     SITE_NAME = cfg['site_name'].lower()
@@ -76,13 +95,17 @@ def _(CONFIG_PATH, get_config_or_params, setup_logging):
     REINTUB_WINDOW_HRS = cfg['reintub_window_hrs']
     # V2 outcome family (success_extub_v2, sbt_done_v2, exit_mechanism_v2_based)
     # is SENSITIVITY-ONLY — no manuscript primary depends on it. Large sites
-    # (≥50K cohort) should set `enable_v2_outcomes: false` to skip the V2
-    # state-machine cell entirely (saves ~7 min at NU scale; ~110 min at
-    # 200K cohort scale). When false, V2-suffix columns are emitted as
-    # constant zero so downstream schema stays stable; 08_models.py skips
-    # *_v2_next_day outcome fits explicitly.
+    # can set `enable_v2_outcomes: false` to skip the V2 state-machine cell
+    # entirely (a DuckDB window pass since the columnar rewrite — the former
+    # per-row pandas loop cost ~7 min at NU scale). When false, V2-suffix
+    # columns are emitted as constant zero so downstream schema stays
+    # stable; 08_models.py skips *_v2_next_day outcome fits explicitly.
     ENABLE_V2_OUTCOMES = bool(cfg.get('enable_v2_outcomes', True))
     os.makedirs(f"output/{SITE_NAME}", exist_ok=True)
+    # Shard mode (`make run-sharded`, see code/_shard.py): only the shard's
+    # hospitalizations are processed and OUT_DIR is its shard directory.
+    SHARD = current_shard()
+    OUT_DIR = stage_output_dir(SITE_NAME, SHARD)
     # Per-site dual log files at output/{site}/logs/clifpy_all.log +
     # clifpy_errors.log. Each numbered script runs in its own subprocess,
     # so each must call setup_logging itself (pyCLIF integration guide
@@ -90,7 +113,8 @@ def _(CONFIG_PATH, get_config_or_params, setup_logging):
     setup_logging(output_directory=f"output_to_share/{SITE_NAME}")
     logger.info(f"Site: {SITE_NAME} (tz: {SITE_TZ}); reintub window: {REINTUB_WINDOW_HRS}h")
     logger.info(f"enable_v2_outcomes: {ENABLE_V2_OUTCOMES}")
-    return ENABLE_V2_OUTCOMES, REINTUB_WINDOW_HRS, SITE_NAME, SITE_TZ
+    configure_shard_session(SHARD)
+    return ENABLE_V2_OUTCOMES, OUT_DIR, REINTUB_WINDOW_HRS, SHARD, SITE_NAME, SITE_TZ
 
 
 @app.cell(hide_code=True)
@@ -102,7 +126,7 @@ def _():
 
 
 @app.cell
-def _(SITE_NAME, duckdb, normalize_categories):
+def _(SHARD, SITE_NAME, duckdb, normalize_categories, shard_predicate):
     resp_processed_path = f"output/{SITE_NAME}/cohort_resp_processed_bf.parquet"
     assert os.path.exists(resp_processed_path), (
         f"Missing {resp_processed_path} — run 01_cohort.py first"
@@ -110,10 +134,11 @@ def _(SITE_NAME, duckdb, normalize_categories):
     # Step 2 (scalability): scan via DuckDB instead of materializing the full
     # parquet to pandas. At 1M-source-DB scale this resp_p can be 28-56 GB —
     # pandas OOMs; DuckDB streams. Downstream `FROM resp_p` mo.sql cells work
-    # equivalently on DuckDBPyRelation via marimo's replacement scan. The V2
-    # state machine cell (if enabled) materializes its own pandas copy via
-    # `resp_p.df()`.
-    resp_p = duckdb.sql(f"FROM '{resp_processed_path}'")
+    # equivalently on DuckDBPyRelation via marimo's replacement scan,
+    # including the V2 state machine (`add_imv_events_v2`).
+    resp_p = duckdb.sql(
+        f"FROM '{resp_processed_path}' WHERE {shard_predicate(SHARD)}"
+    )
     # F5 tracheostomy dtype normalization — ported to SQL REPLACE so it
     # composes with the DuckDB relation. Same two-branch logic as the prior
     # pandas implementation: numeric > 0 OR string match in the truthy set.
@@ -146,9 +171,14 @@ def _():
 
 
 @app.cell
-def _(SITE_NAME, pd):
-    cohort_hrly_grids_f = pd.read_parquet(f"output/{SITE_NAME}/cohort_meta_by_id_imvhr.parquet")
-    logger.info(f"cohort_hrly_grids_f: {len(cohort_hrly_grids_f)} rows")
+def _(SHARD, SITE_NAME, duckdb, shard_predicate):
+    # Lazy DuckDB scan (only consumed by the grid LEFT JOIN below); in
+    # shard mode restricted to the shard's hospitalizations.
+    cohort_hrly_grids_f = duckdb.sql(f"""
+        FROM 'output/{SITE_NAME}/cohort_meta_by_id_imvhr.parquet'
+        WHERE {shard_predicate(SHARD)}
+    """)
+    logger.info(f"cohort_hrly_grids_f: {cohort_hrly_grids_f.count('*').fetchone()[0]} rows")
     return (cohort_hrly_grids_f,)
 
 
@@ -351,7 +381,7 @@ def _(sbt_t1):
 
 
 @app.cell
-def _(REINTUB_WINDOW_HRS, sbt_t1, sbt_t2):
+def _(REINTUB_WINDOW_HRS, sbt_t2):
     sbt_t3 = mo.sql(
         f"""
         -- Assign block IDs (per-hospitalization gap-island over _sbt_state)
@@ -365,16 +395,20 @@ def _(REINTUB_WINDOW_HRS, sbt_t1, sbt_t2):
             , _block_id_subira: SUM(_chg_sbt_state_subira) OVER w
             , _block_id_abc:    SUM(_chg_sbt_state_abc)    OVER w
             , _imv_streak_id: SUM(_imv_chg) OVER w
+            -- Next intubation strictly after this row's recorded_dttm
+            -- (EXCLUDE GROUP drops same-timestamp peers). One forward window
+            -- pass replaces the per-extubation correlated EXISTS re-scan of
+            -- sbt_t1; _intub is already a column of sbt_t2.
+            , _next_intub_dttm: MIN(CASE WHEN _intub = 1 THEN recorded_dttm END) OVER w_after
             , _fail_extub: CASE
-                WHEN sbt_t2._extub_1st = 1 AND EXISTS (
-                    SELECT 1
-                    FROM sbt_t1
-                    WHERE sbt_t1.hospitalization_id = sbt_t2.hospitalization_id
-                      AND sbt_t1._intub = 1
-                      AND sbt_t1.recorded_dttm > sbt_t2.recorded_dttm
-                      AND sbt_t1.recorded_dttm <= sbt_t2.recorded_dttm + INTERVAL '{REINTUB_WINDOW_HRS} HOUR'
-                ) THEN 1 ELSE 0 END
+                WHEN _extub_1st = 1
+                    AND _next_intub_dttm <= recorded_dttm + INTERVAL '{REINTUB_WINDOW_HRS} HOUR'
+                THEN 1 ELSE 0 END
         WINDOW w AS (PARTITION BY hospitalization_id ORDER BY recorded_dttm)
+            , w_after AS (
+                PARTITION BY hospitalization_id ORDER BY recorded_dttm
+                RANGE BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING EXCLUDE GROUP
+            )
         """
     )
     return (sbt_t3,)
@@ -414,145 +448,40 @@ def _():
 
 
 @app.cell
-def _():
-    import numpy as np
-
-    CONSENSUS_INTUB_WINDOW_MIN = 15
-    CONSENSUS_EXTUB_WINDOW_MIN = 30
-
-    def count_intubations_v2(group):
-        """ABT-RISE consensus-window state machine over a per-hosp resp slice.
-
-        Input: a DataFrame slice with columns `recorded_dttm`,
-        `device_category`, `tracheostomy` for ONE hospitalization, sorted
-        ascending by `recorded_dttm`.
-
-        Output: a DataFrame indexed identically to `group` with three
-        binary columns:
-          `_intub_event_v2`: 1 on the first row of each new IMV episode
-              (after a 15-min consensus window).
-          `_extub_event_v2`: 1 on the first row patient leaves IMV
-              (after a 30-min consensus window confirming non-reversion).
-          `_trach_event_v2`: 1 on the row where tracheostomy first appears.
-
-        Rules (per the reference doc lines 96–179):
-          - Direct-to-trach: if a tracheostomy row precedes any IMV row,
-            count zero IMV episodes (mark only `_trach_event_v2 = 1`).
-          - Tracheostomy sentinel: any later trach event closes the open
-            episode (firing `_extub_event_v2` if mid-IMV, then `_trach`)
-            and halts further state-machine processing for that patient.
-          - Consensus windows: a transition is only confirmed once the
-            new state has been sustained for ≥ window_min minutes; if the
-            new state reverts within the window, the transition is aborted
-            and no event is fired.
-        """
-        n = len(group)
-        out = pd.DataFrame(
-            {'_intub_event_v2': 0, '_extub_event_v2': 0, '_trach_event_v2': 0},
-            index=group.index,
-        )
-        if n == 0:
-            return out
-
-        is_imv = group['device_category'].eq('imv').to_numpy()
-        has_trach = group['tracheostomy'].eq(1).to_numpy()
-        dttm = group['recorded_dttm'].to_numpy()
-
-        # Direct-to-trach rule: trach appears before any IMV row.
-        first_trach = np.argmax(has_trach) if has_trach.any() else -1
-        first_imv = np.argmax(is_imv) if is_imv.any() else -1
-        if first_trach >= 0 and (first_imv < 0 or first_trach < first_imv):
-            out.iloc[first_trach, out.columns.get_loc('_trach_event_v2')] = 1
-            return out
-
-        state = 'pre'  # pre / intub_candidate / on_imv / off_imv_candidate / off_imv
-        intub_cand_i = None
-        extub_cand_i = None
-
-        for i in range(n):
-            if has_trach[i]:
-                # Trach sentinel: close any open extub-pending state, then halt.
-                if state == 'off_imv_candidate' and extub_cand_i is not None:
-                    out.iloc[extub_cand_i, out.columns.get_loc('_extub_event_v2')] = 1
-                elif state in ('on_imv', 'intub_candidate'):
-                    # Patient went straight from IMV to trach — count as extub
-                    # event at the trach row (so the IMV episode has a closure).
-                    out.iloc[i, out.columns.get_loc('_extub_event_v2')] = 1
-                out.iloc[i, out.columns.get_loc('_trach_event_v2')] = 1
-                return out
-
-            if state == 'pre':
-                if is_imv[i]:
-                    intub_cand_i = i
-                    state = 'intub_candidate'
-            elif state == 'intub_candidate':
-                if not is_imv[i]:
-                    state = 'pre'
-                    intub_cand_i = None
-                else:
-                    mins = (dttm[i] - dttm[intub_cand_i]) / np.timedelta64(1, 'm')
-                    if mins >= CONSENSUS_INTUB_WINDOW_MIN:
-                        out.iloc[intub_cand_i, out.columns.get_loc('_intub_event_v2')] = 1
-                        state = 'on_imv'
-                        intub_cand_i = None
-            elif state == 'on_imv':
-                if not is_imv[i]:
-                    extub_cand_i = i
-                    state = 'off_imv_candidate'
-            elif state == 'off_imv_candidate':
-                if is_imv[i]:
-                    state = 'on_imv'
-                    extub_cand_i = None
-                else:
-                    mins = (dttm[i] - dttm[extub_cand_i]) / np.timedelta64(1, 'm')
-                    if mins >= CONSENSUS_EXTUB_WINDOW_MIN:
-                        out.iloc[extub_cand_i, out.columns.get_loc('_extub_event_v2')] = 1
-                        state = 'off_imv'
-                        extub_cand_i = None
-            elif state == 'off_imv':
-                if is_imv[i]:
-                    intub_cand_i = i
-                    state = 'intub_candidate'
-
-        # Trailing partial states (window not consummated by end of stream):
-        # leave as no-event. Conservative — partial transitions don't fire.
-        return out
-
-    return (count_intubations_v2, np)
-
-
-@app.cell
-def _(ENABLE_V2_OUTCOMES, count_intubations_v2, pd, resp_p):
-    # Apply state machine per hospitalization. group_keys=False preserves the
-    # original index so we can concat back to resp_p without realignment.
-    # ENABLE_V2_OUTCOMES=False short-circuit: emit constant-zero v2 event
-    # columns and skip the ~7-min pandas state machine entirely. Downstream
-    # SQL aggregations (sbt_t5_v2, etc.) continue to execute on the all-zero
-    # inputs and emit all-zero v2 outcome columns — schema stays stable for
-    # cross-site agg scripts. 08_models.py skips the *_v2_next_day outcome
-    # fits explicitly (does NOT attempt to fit on constant-zero outcomes).
+def _(ENABLE_V2_OUTCOMES, duckdb, resp_p):
+    # ABT-RISE consensus-window state machine (15-min intub / 30-min extub
+    # windows, trach sentinel, direct-to-trach). Columnar DuckDB engine in
+    # `_imv_state_machine.add_imv_events_v2` — window SQL over IMV/non-IMV
+    # runs, lazy on resp_p, so the waterfall table is never materialized to
+    # pandas. Row-for-row parity with the original per-row pandas loop
+    # (`count_intubations_v2`, kept as the reference implementation) is
+    # pinned by tests/test_imv_state_machine.py.
     #
-    # resp_p is a DuckDBPyRelation (Step 2 of the scalability refactor);
-    # materialize to pandas once here. At 1M-source-DB scale this is bounded
-    # by the cohort size (~28-56 GB at 100-200K cohort) — still large but
-    # consumed only by the V2 cell when enabled, never module-level.
-    _resp_pdf = resp_p.df()
-    _sorted = _resp_pdf.sort_values(['hospitalization_id', 'recorded_dttm']).reset_index(drop=True)
+    # ENABLE_V2_OUTCOMES=False short-circuit: emit constant-zero v2 event
+    # columns. Downstream SQL aggregations (sbt_t5_v2, etc.) continue to
+    # execute on the all-zero inputs and emit all-zero v2 outcome columns —
+    # schema stays stable for cross-site agg scripts. 08_models.py skips the
+    # *_v2_next_day outcome fits explicitly (does NOT attempt to fit on
+    # constant-zero outcomes).
+    from _imv_state_machine import add_imv_events_v2
+
     if ENABLE_V2_OUTCOMES:
-        _events = _sorted.groupby('hospitalization_id', group_keys=False).apply(
-            count_intubations_v2
-        )
-        resp_p_v2 = pd.concat([_sorted, _events], axis=1)
+        resp_p_v2 = add_imv_events_v2(resp_p)
     else:
-        resp_p_v2 = _sorted.assign(
-            _intub_event_v2=0, _extub_event_v2=0, _trach_event_v2=0,
-        )
+        resp_p_v2 = duckdb.sql("""
+            FROM resp_p
+            SELECT *
+                , _intub_event_v2: 0, _extub_event_v2: 0, _trach_event_v2: 0
+        """)
         logger.info("V2 state machine SKIPPED (enable_v2_outcomes=false)")
+    _n, _n_intub, _n_extub, _n_trach = resp_p_v2.aggregate(
+        "COUNT(*), SUM(_intub_event_v2), SUM(_extub_event_v2), SUM(_trach_event_v2)"
+    ).fetchone()
     logger.info(
-        f"resp_p_v2: {len(resp_p_v2)} rows | "
-        f"_intub_event_v2 fired on {int(resp_p_v2['_intub_event_v2'].sum())} rows | "
-        f"_extub_event_v2 fired on {int(resp_p_v2['_extub_event_v2'].sum())} rows | "
-        f"_trach_event_v2 fired on {int(resp_p_v2['_trach_event_v2'].sum())} rows"
+        f"resp_p_v2: {_n} rows | "
+        f"_intub_event_v2 fired on {int(_n_intub or 0)} rows | "
+        f"_extub_event_v2 fired on {int(_n_extub or 0)} rows | "
+        f"_trach_event_v2 fired on {int(_n_trach or 0)} rows"
     )
     return (resp_p_v2,)
 
@@ -689,21 +618,23 @@ def _(resp_p_v2, sbt_t4):
 @app.cell
 def _(REINTUB_WINDOW_HRS, sbt_t5_v2):
     # Compute v2 fail-extub: re-intub event within REINTUB_WINDOW_HRS after
-    # _extub_1st_v2 fires. Mirror of sbt_t3's existing _fail_extub but using
-    # v2 event flags.
+    # _extub_1st_v2 fires. Mirror of sbt_t3's _fail_extub (next-intubation
+    # window instead of a correlated self-EXISTS) but using v2 event flags.
     sbt_t5_v2_w_fail = mo.sql(
         f"""
-        FROM sbt_t5_v2 AS a
-        SELECT a.*
+        FROM sbt_t5_v2
+        SELECT *
+            , _next_intub_dttm_v2: MIN(
+                CASE WHEN _intub_event_v2 = 1 THEN recorded_dttm END
+              ) OVER w_after
             , _fail_extub_v2: CASE
-                WHEN a._extub_1st_v2 = 1 AND EXISTS (
-                    SELECT 1
-                    FROM sbt_t5_v2 AS b
-                    WHERE b.hospitalization_id = a.hospitalization_id
-                      AND b._intub_event_v2 = 1
-                      AND b.recorded_dttm > a.recorded_dttm
-                      AND b.recorded_dttm <= a.recorded_dttm + INTERVAL '{REINTUB_WINDOW_HRS} HOUR'
-                ) THEN 1 ELSE 0 END
+                WHEN _extub_1st_v2 = 1
+                    AND _next_intub_dttm_v2 <= recorded_dttm + INTERVAL '{REINTUB_WINDOW_HRS} HOUR'
+                THEN 1 ELSE 0 END
+        WINDOW w_after AS (
+            PARTITION BY hospitalization_id ORDER BY recorded_dttm
+            RANGE BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING EXCLUDE GROUP
+        )
         """
     )
     return (sbt_t5_v2_w_fail,)
@@ -1073,9 +1004,13 @@ def _():
 
 
 @app.cell
-def _(SITE_NAME, cohort_sbt_outcomes_daily):
-    _out = cohort_sbt_outcomes_daily.df()
-    _path = f"output/{SITE_NAME}/outcomes_by_id_imvday.parquet"
+def _(OUT_DIR, cohort_sbt_outcomes_daily, perf_stage):
+    # The whole SBT / extubation chain (incl. the V2 state machine) is lazy
+    # up to here, so this stage's timing covers all of it.
+    with perf_stage("outcomes_materialize") as _ps:
+        _out = cohort_sbt_outcomes_daily.df()
+        _ps.rows = len(_out)
+    _path = f"{OUT_DIR}/outcomes_by_id_imvday.parquet"
     _out.to_parquet(_path)
     logger.info(f"Saved: {_path} ({len(_out)} rows, {_out['hospitalization_id'].nunique()} hospitalizations)")
     return
@@ -26,8 +26,9 @@ with app.setup:
 
     # Cache-bypass flags for expensive Table 1 covariate recomputes — now
     # config-driven (per-site config keys `rerun_sofa_24h` / `rerun_ase`).
-    # Default = reuse cached parquet if present. To force a one-shot
-    # recompute without editing config, delete the cache parquet.
+    # Default = reuse the cached parquet when its input fingerprint (raw
+    # CLIF metadata, cohort IDs, config — see `_stage_cache`) is unchanged;
+    # the flags force a one-shot recompute regardless.
     _CONFIG_PATH_SETUP = "config/config.json"
     with open(_CONFIG_PATH_SETUP) as _cfg_f:
         _cfg_setup = json.load(_cfg_f)
@@ -57,6 +58,8 @@ def _():
     from clifpy.utils.config import get_config_or_params
     from clifpy.utils import apply_outlier_handling
     from _utils import normalize_categories, remove_meds_duplicates, to_utc
+    from _perf import perf_stage
+    from _cohort_ids import load_cohort_table, register_cohort_ids
 
     import warnings
     warnings.filterwarnings('ignore', category=FutureWarning)
@@ -69,8 +72,11 @@ def _():
         convert_dose_units_by_med_category,
         duckdb,
         get_config_or_params,
+        load_cohort_table,
         normalize_categories,
         pd,
+        perf_stage,
+        register_cohort_ids,
         remove_meds_duplicates,
         setup_logging,
         to_utc,
@@ -78,7 +84,7 @@ def _():
 
 
 @app.cell
-def _(CONFIG_PATH, get_config_or_params, setup_logging):
+def _(CONFIG_PATH, duckdb, get_config_or_params, setup_logging):
     # Site-scoped output dir (see Makefile SITE= flag).
     cfg = get_config_or_params(CONFIG_PATH)
     SITE_NAME = cfg['site_name'].lower()
@@ -91,28 +97,30 @@ def _(CONFIG_PATH, get_config_or_params, setup_logging):
     logger.info(f"Site: {SITE_NAME} (tz: {SITE_TZ})")
 
     # Step 5 (cache-state banner): tell the operator at a glance whether
-    # SOFA and ASE will recompute vs reuse cache.
-    import datetime as _dt
-    def _cache_status(path):
-        if os.path.exists(path):
-            _st = os.stat(path)
-            _mb = _st.st_size / (1024 * 1024)
-            _mtime = _dt.datetime.fromtimestamp(_st.st_mtime).strftime('%Y-%m-%d %H:%M')
-            return f"EXISTS ({_mb:,.1f} MB, written {_mtime})"
-        return "ABSENT — will be created"
-
-    _sofa_path = f"output/{SITE_NAME}/sofa_first_24h.parquet"
-    _ase_path = f"output/{SITE_NAME}/covariates_ase.parquet"
-    _sofa_will_recompute = (not os.path.exists(_sofa_path)) or RERUN_SOFA_24H
-    _ase_will_recompute = (not os.path.exists(_ase_path)) or RERUN_ASE
+    # SOFA, ASE and CCI/Elixhauser will recompute vs reuse cache. The
+    # fingerprint needs the cohort IDs, which are not loaded yet, so the
+    # banner reports against the prior run's cohort_meta_by_id_imvhr — the
+    # authoritative `[cache] <stage>: HIT/MISS` line is logged by each cell.
+    from _stage_cache import check_stage_cache, stage_components
+    _grid_path = f"output/{SITE_NAME}/cohort_meta_by_id_imvhr.parquet"
+    _banner_ids = (
+        [r[0] for r in duckdb.sql(
+            f"FROM '{_grid_path}' SELECT DISTINCT hospitalization_id"
+        ).fetchall()]
+        if os.path.exists(_grid_path) else []
+    )
     logger.info("=" * 60)
     logger.info("Cache state at entry (04_covariates.py):")
     logger.info(f"  rerun_sofa_24h (config):    {RERUN_SOFA_24H}")
     logger.info(f"  rerun_ase (config):         {RERUN_ASE}")
-    logger.info(f"  sofa_first_24h.parquet:     {_cache_status(_sofa_path)}")
-    logger.info(f"  covariates_ase.parquet:     {_cache_status(_ase_path)}")
-    logger.info(f"  → SOFA action: {'RECOMPUTE' if _sofa_will_recompute else 'REUSE CACHE'}")
-    logger.info(f"  → ASE action:  {'RECOMPUTE' if _ase_will_recompute else 'REUSE CACHE'}")
+    for _stage, _force in [
+        ('sofa_first_24h', RERUN_SOFA_24H), ('ase', RERUN_ASE), ('cci_elix', False),
+    ]:
+        _hit, _reason = check_stage_cache(
+            SITE_NAME, _stage, stage_components(_stage, cfg, cohort_ids=_banner_ids),
+        )
+        _action = 'RECOMPUTE' if (_force or not _hit) else 'REUSE CACHE'
+        logger.info(f"  → {_stage:<15} {_action} ({_reason})")
     logger.info("=" * 60)
     return SITE_NAME, SITE_TZ
 
@@ -132,10 +140,13 @@ def _(cohort_hrly_grids):
 
 
 @app.cell
-def _(cohort_hrly_grids):
+def _(SITE_NAME, cohort_hrly_grids, register_cohort_ids):
+    # The list feeds the stage-cache fingerprints and the clifpy calls that
+    # take IDs (ASE, SOFA); raw-table loads SEMI JOIN against the
+    # `cohort_ids` TEMP TABLE written by 01_cohort instead.
     cohort_hosp_ids = cohort_hrly_grids['hospitalization_id'].unique().tolist()
-    logger.info(f"Cohort hospitalizations: {len(cohort_hosp_ids)}")
-    return (cohort_hosp_ids,)
+    cohort_ids_rel = register_cohort_ids(SITE_NAME)
+    return cohort_hosp_ids, cohort_ids_rel
 
 
 @app.cell
@@ -160,19 +171,23 @@ def _():
 
 
 @app.cell
-def _(SITE_TZ, apply_outlier_handling, cohort_hosp_ids, duckdb, to_utc):
+def _(
+    SITE_TZ,
+    apply_outlier_handling,
+    cohort_ids_rel,
+    duckdb,
+    load_cohort_table,
+    to_utc,
+):
     from clifpy import Labs
 
-    labs = Labs.from_file(
-        config_path='config/config.json',
+    labs = load_cohort_table(
+        Labs, 'config/config.json', cohort_ids_rel,
         columns=[
             'hospitalization_id', 'lab_order_dttm', 'lab_result_dttm',
             'lab_category', 'lab_value_numeric',
         ],
-        filters={
-            'hospitalization_id': cohort_hosp_ids,
-            'lab_category': ['ph_arterial', 'ph_venous'],
-        },
+        filters={'lab_category': ['ph_arterial', 'ph_venous']},
     )
     apply_outlier_handling(labs, outlier_config_path='config/outlier_config.yaml')
     # Cross-site tz normalization: to_utc with naive_means=SITE_TZ guarantees
@@ -241,17 +256,22 @@ def _():
 
 
 @app.cell
-def _(Labs, SITE_TZ, apply_outlier_handling, cohort_hosp_ids, duckdb, to_utc):
-    po2 = Labs.from_file(
-        config_path='config/config.json',
+def _(
+    Labs,
+    SITE_TZ,
+    apply_outlier_handling,
+    cohort_ids_rel,
+    duckdb,
+    load_cohort_table,
+    to_utc,
+):
+    po2 = load_cohort_table(
+        Labs, 'config/config.json', cohort_ids_rel,
         columns=[
             'hospitalization_id', 'lab_order_dttm', 'lab_result_dttm',
             'lab_category', 'lab_value_numeric',
         ],
-        filters={
-            'hospitalization_id': cohort_hosp_ids,
-            'lab_category': ['po2_arterial'],
-        },
+        filters={'lab_category': ['po2_arterial']},
     )
     apply_outlier_handling(po2, outlier_config_path='config/outlier_config.yaml')
     # Cross-site tz normalization (see labs cell for rationale).
@@ -311,34 +331,48 @@ def _():
 
 
 @app.cell
-def _(SITE_TZ, apply_outlier_handling, cohort_hosp_ids, to_utc):
-    from clifpy import Vitals
-
-    vitals = Vitals.from_file(
-        config_path='config/config.json',
-        columns=['hospitalization_id', 'recorded_dttm', 'vital_category', 'vital_value'],
-        filters={
-            'vital_category': ['weight_kg'],
-            'hospitalization_id': cohort_hosp_ids,
-        },
+def _(
+    CONFIG_PATH,
+    SITE_NAME,
+    SITE_TZ,
+    cohort_ids_rel,
+    get_config_or_params,
+    to_utc,
+):
+    # Cohort weights from the sorted weight extract written by 01_cohort.py
+    # (raw clif_vitals fallback if absent) instead of another vitals scan.
+    # `weight_kg` is already clamped to the outlier_config.yaml range (NULL
+    # outside). `weight_rel` feeds BMI / weight_daily below; `vitals_df` is
+    # the same rows in clif_vitals shape for the vasopressor unit converter.
+    from _weight_extract import as_vitals, weight_extract_rel
+
+    weight_rel = weight_extract_rel(
+        get_config_or_params(CONFIG_PATH)['data_directory'],
+        SITE_NAME, SITE_TZ, cohort_ids_rel,
     )
-    apply_outlier_handling(vitals, outlier_config_path='config/outlier_config.yaml')
+    _vitals_df = as_vitals(weight_rel).df()
+    _vitals_df['hospitalization_id'] = _vitals_df['hospitalization_id'].astype('string')
     # Cross-site tz normalization (see labs cell for rationale).
-    vitals_df = to_utc(vitals.df, ['recorded_dttm'], naive_means=SITE_TZ)
-    return (vitals_df,)
+    vitals_df = to_utc(_vitals_df, ['recorded_dttm'], naive_means=SITE_TZ)
+    return vitals_df, weight_rel
 
 
 @app.cell
 def _(
+    CONFIG_PATH,
+    SITE_NAME,
     SITE_TZ,
     apply_outlier_handling,
-    cohort_hosp_ids,
+    cohort_ids_rel,
     convert_dose_units_by_med_category,
+    duckdb,
+    get_config_or_params,
     remove_meds_duplicates,
     to_utc,
     vitals_df,
 ):
     from clifpy import MedicationAdminContinuous
+    from _med_extract import med_admin_continuous_source
 
     _vaso_categories = [
         "norepinephrine",
@@ -349,42 +383,29 @@ def _(
         "angiotensin",
     ]
 
-    try:
-        cont_veso = MedicationAdminContinuous.from_file(
-            config_path="config/config.json",
-            columns=[
-                "hospitalization_id",
-                "admin_dttm",
-                "med_name",
-                "med_category",
-                "med_dose",
-                "med_dose_unit",
-                "mar_action_name",
-                "mar_action_category",
-            ],
-            filters={
-                "med_category": _vaso_categories,
-                "hospitalization_id": cohort_hosp_ids,
-            },
-        )
-    except Exception:
-        logger.info("Loading without mar_action_category instead")
-        cont_veso = MedicationAdminContinuous.from_file(
-            config_path="config/config.json",
-            columns=[
-                "hospitalization_id",
-                "admin_dttm",
-                "med_name",
-                "med_category",
-                "med_dose",
-                "med_dose_unit",
-                "mar_action_name",
-            ],
-            filters={
-                "med_category": _vaso_categories,
-                "hospitalization_id": cohort_hosp_ids,
-            },
-        )
+    # Read from the cohort-scoped med_category-partitioned extract written
+    # by 01_cohort.py (raw-file fallback if absent) instead of a third full
+    # scan of clif_medication_admin_continuous via from_file. COLUMNS(...)
+    # keeps mar_action_category only when the site ships it — replaces the
+    # previous try/except reload without that column.
+    _cfg = get_config_or_params(CONFIG_PATH)
+    _med_cont_src = med_admin_continuous_source(_cfg['data_directory'], SITE_NAME)
+    _vaso_in = ", ".join(f"'{c}'" for c in _vaso_categories)
+    _cont_veso_df = duckdb.sql(f"""
+        FROM {_med_cont_src} c
+        SEMI JOIN cohort_ids_rel USING (hospitalization_id)
+        SELECT COLUMNS(x -> x IN (
+            'hospitalization_id', 'admin_dttm', 'med_name', 'med_category',
+            'med_dose', 'med_dose_unit', 'mar_action_name', 'mar_action_category'
+        ))
+        WHERE c.med_category IN ({_vaso_in})
+    """).df()
+    cont_veso = MedicationAdminContinuous(
+        data_directory=_cfg['data_directory'],
+        filetype=_cfg.get('filetype', 'parquet'),
+        timezone="UTC",
+        data=_cont_veso_df,
+    )
 
     # NOTE: Preferred units match NEE formula expectations
     cont_veso_preferred_units = {
@@ -513,17 +534,23 @@ def _(SITE_NAME):
 
 
 @app.cell
-def _(CONFIG_PATH, get_config_or_params, sofa_cohort):
+def _(CONFIG_PATH, SITE_NAME, get_config_or_params, perf_stage, sofa_cohort):
     from _sofa import compute_sofa_polars
+    from _med_extract import med_extract_path
+    from _weight_extract import weight_extract_path
 
     _cfg = get_config_or_params(CONFIG_PATH)
-    sofa_raw = compute_sofa_polars(
-        data_directory=_cfg['data_directory'],
-        cohort_df=sofa_cohort,
-        filetype=_cfg.get('filetype', 'parquet'),
-        id_name='patient_day_id',
-        timezone=_cfg.get('timezone'),
-    )
+    with perf_stage("sofa_daily") as _ps:
+        sofa_raw = compute_sofa_polars(
+            data_directory=_cfg['data_directory'],
+            cohort_df=sofa_cohort,
+            filetype=_cfg.get('filetype', 'parquet'),
+            id_name='patient_day_id',
+            timezone=_cfg.get('timezone'),
+            medication_path=med_extract_path(SITE_NAME),
+            weight_path=weight_extract_path(SITE_NAME),
+        )
+        _ps.rows = sofa_raw.height
     logger.info(f"SOFA raw: {sofa_raw.height} rows, {sofa_raw.width} columns")
     return (sofa_raw,)
 
@@ -643,22 +670,43 @@ def _():
 
 
 @app.cell
-def _(CONFIG_PATH, SITE_NAME, cohort_hosp_ids):
-    from clifpy import HospitalDiagnosis
-    from clifpy.utils import calculate_cci
-    from clifpy.utils.comorbidity import calculate_elix
-
-    _dx = HospitalDiagnosis.from_file(
-        config_path=CONFIG_PATH,
-        filters={'hospitalization_id': cohort_hosp_ids},
+def _(
+    CONFIG_PATH,
+    SITE_NAME,
+    cohort_hosp_ids,
+    cohort_ids_rel,
+    get_config_or_params,
+    load_cohort_table,
+    perf_stage,
+):
+    from _stage_cache import (
+        resolve_stage_cache as _resolve_stage_cache,
+        stage_components as _stage_components,
+        write_stage_manifest as _write_stage_manifest,
     )
-    cci_df = calculate_cci(_dx, hierarchy=True)
-    elix_df = calculate_elix(_dx, hierarchy=True)
-    logger.info(f"CCI: {len(cci_df)} rows, Elixhauser: {len(elix_df)} rows")
 
-    cci_df.to_parquet(f"output/{SITE_NAME}/covariates_cci.parquet", index=False)
-    elix_df.to_parquet(f"output/{SITE_NAME}/covariates_elix.parquet", index=False)
-    logger.info(f"Saved: output/{SITE_NAME}/covariates_cci.parquet, output/{SITE_NAME}/covariates_elix.parquet")
+    # Fingerprint-cached: hospital_diagnosis metadata + cohort IDs + clifpy
+    # version. Both parquets are only consumed by 05, so a HIT skips the
+    # load entirely.
+    _components = _stage_components(
+        'cci_elix', get_config_or_params(CONFIG_PATH), cohort_ids=cohort_hosp_ids,
+    )
+    if _resolve_stage_cache(SITE_NAME, 'cci_elix', _components):
+        from clifpy import HospitalDiagnosis
+        from clifpy.utils import calculate_cci
+        from clifpy.utils.comorbidity import calculate_elix
+
+        with perf_stage("cci_elix") as _ps:
+            _dx = load_cohort_table(HospitalDiagnosis, CONFIG_PATH, cohort_ids_rel)
+            _cci_df = calculate_cci(_dx, hierarchy=True)
+            _elix_df = calculate_elix(_dx, hierarchy=True)
+            _ps.rows = len(_cci_df)
+        logger.info(f"CCI: {len(_cci_df)} rows, Elixhauser: {len(_elix_df)} rows")
+
+        _cci_df.to_parquet(f"output/{SITE_NAME}/covariates_cci.parquet", index=False)
+        _elix_df.to_parquet(f"output/{SITE_NAME}/covariates_elix.parquet", index=False)
+        _write_stage_manifest(SITE_NAME, 'cci_elix', _components, n_rows=len(_cci_df))
+        logger.info(f"Saved: output/{SITE_NAME}/covariates_cci.parquet, output/{SITE_NAME}/covariates_elix.parquet")
     return
 
 
@@ -679,28 +727,25 @@ def _():
 
 
 @app.cell
-def _(CONFIG_PATH, SITE_TZ, cohort_hosp_ids, duckdb, to_utc):
+def _(CONFIG_PATH, SITE_TZ, cohort_ids_rel, duckdb, load_cohort_table, to_utc):
     # Cell A — first ICU admit dttm per cohort hospitalization.
     # NOTE: For patients intubated in ED/OR then transferred to ICU,
     # this 24 h window starts AFTER intubation. Per user spec (first 24 h of ICU admit).
     from clifpy import Adt
 
-    _adt_icu = Adt.from_file(
-        config_path=CONFIG_PATH,
+    _adt_icu = load_cohort_table(
+        Adt, CONFIG_PATH, cohort_ids_rel,
         columns=['hospitalization_id', 'in_dttm', 'location_category'],
-        filters={
-            'hospitalization_id': cohort_hosp_ids,
-            'location_category': ['icu'],
-        },
+        filters={'location_category': ['icu']},
     )
     adt_icu_df = _adt_icu.df
-    # clifpy's `from_file` loaders return *_dttm columns NAIVE but with
-    # wall-clock already in the config's site tz (per loader log line
-    # "Timezone: <site_tz>"). to_utc with naive_means=SITE_TZ localizes
-    # the naive wall-clock as site-local then converts the metadata tag
-    # to UTC, so downstream DuckDB SQL sees a TIMESTAMPTZ tagged UTC.
-    # to_utc handles DST fall-back ambiguity (UCMC has ICU admits at
-    # 01:00-02:00 on fall-back Sundays in 2019 / 2021).
+    # `load_cohort_table` returns *_dttm as read from the raw parquet: UTC
+    # tz-aware for TIMESTAMPTZ sources, naive site wall-clock for naive
+    # ones. to_utc with naive_means=SITE_TZ localizes a naive wall-clock
+    # as site-local then converts the metadata tag to UTC, so downstream
+    # DuckDB SQL sees a TIMESTAMPTZ tagged UTC either way. to_utc handles
+    # DST fall-back ambiguity (UCMC has ICU admits at 01:00-02:00 on
+    # fall-back Sundays in 2019 / 2021).
     adt_icu_df = to_utc(adt_icu_df, 'in_dttm', naive_means=SITE_TZ)
 
     first_icu_admit = duckdb.sql("""
@@ -716,7 +761,13 @@ def _(CONFIG_PATH, SITE_TZ, cohort_hosp_ids, duckdb, to_utc):
 
 
 @app.cell
-def _(CONFIG_PATH, first_icu_admit, get_config_or_params):
+def _(
+    CONFIG_PATH,
+    cohort_hosp_ids,
+    first_icu_admit,
+    get_config_or_params,
+    perf_stage,
+):
     # Cell B — SOFA over first 24 h of ICU admit (cached).
     # Reuses the existing local _sofa.compute_sofa_polars but with a different cohort_df:
     # one row per hospitalization with [start_dttm, end_dttm] = [first_icu, first_icu+24h]
@@ -725,6 +776,13 @@ def _(CONFIG_PATH, first_icu_admit, get_config_or_params):
     # with the existing SOFA cell above.
     import polars as _pl
     from _sofa import compute_sofa_polars as _compute_sofa_polars
+    from _med_extract import med_extract_path as _med_extract_path
+    from _weight_extract import weight_extract_path as _weight_extract_path
+    from _stage_cache import (
+        resolve_stage_cache as _resolve_stage_cache,
+        stage_components as _stage_components,
+        write_stage_manifest as _write_stage_manifest,
+    )
 
     # Site-scoped cache path. Earlier versions used a global path
     # (`output/sofa_first_24h.parquet`) which silently collided across
@@ -733,21 +791,33 @@ def _(CONFIG_PATH, first_icu_admit, get_config_or_params):
     # the cache held the wrong site's IDs. That bug surfaced as MIMIC's
     # SOFA = 100% NULL on cohort_meta_by_id.parquet (2026-05-11).
     _sofa_24h_path = f"output/{SITE_NAME}/sofa_first_24h.parquet"
-    if (not os.path.exists(_sofa_24h_path)) or RERUN_SOFA_24H:
-        _cfg = get_config_or_params(CONFIG_PATH)
+    _cfg = get_config_or_params(CONFIG_PATH)
+    # The 24h windows are a function of ADT (fingerprinted) + the cohort, so
+    # the cohort ID set is fingerprinted rather than first_icu_admit's ICU
+    # subset — the same set the entry banner and `make cache-status` use.
+    _components = _stage_components(
+        'sofa_first_24h', _cfg, cohort_ids=cohort_hosp_ids,
+    )
+    if _resolve_stage_cache(
+        SITE_NAME, 'sofa_first_24h', _components, force=RERUN_SOFA_24H,
+    ):
         _sofa_24h_cohort = _pl.from_pandas(
             first_icu_admit.rename(columns={
                 '_first_icu_dttm': 'start_dttm',
                 '_first_icu_24h_end': 'end_dttm',
             })[['hospitalization_id', 'start_dttm', 'end_dttm']]
         )
-        _sofa_24h = _compute_sofa_polars(
-            data_directory=_cfg['data_directory'],
-            cohort_df=_sofa_24h_cohort,
-            filetype=_cfg.get('filetype', 'parquet'),
-            id_name='hospitalization_id',
-            timezone=_cfg.get('timezone'),
-        )
+        with perf_stage("sofa_first_24h") as _ps:
+            _sofa_24h = _compute_sofa_polars(
+                data_directory=_cfg['data_directory'],
+                cohort_df=_sofa_24h_cohort,
+                filetype=_cfg.get('filetype', 'parquet'),
+                id_name='hospitalization_id',
+                timezone=_cfg.get('timezone'),
+                medication_path=_med_extract_path(SITE_NAME),
+                weight_path=_weight_extract_path(SITE_NAME),
+            )
+            _ps.rows = _sofa_24h.height
         # Rename to avoid collision with existing per-day `sofa_total` in analytical_dataset
         _sofa_24h = _sofa_24h.rename({
             'sofa_total': 'sofa_1st24h',
@@ -759,6 +829,9 @@ def _(CONFIG_PATH, first_icu_admit, get_config_or_params):
             'sofa_renal': 'sofa_renal_1st24h',
         })
         _sofa_24h.write_parquet(_sofa_24h_path)
+        _write_stage_manifest(
+            SITE_NAME, 'sofa_first_24h', _components, n_rows=_sofa_24h.height,
+        )
         logger.info(f"Computed + saved {_sofa_24h_path} ({_sofa_24h.height} rows)")
     else:
         _sofa_24h = _pl.read_parquet(_sofa_24h_path)
@@ -769,28 +842,33 @@ def _(CONFIG_PATH, first_icu_admit, get_config_or_params):
 
 
 @app.cell
-def _(CONFIG_PATH, SITE_TZ, apply_outlier_handling, cohort_hosp_ids, duckdb, to_utc):
-    # Cell C — Load vitals needed for BMI (height_cm + weight_kg) and P/F fallback (spo2).
-    # Single combined load for efficiency; kept separate from the existing weight-only
-    # `vitals_df` at the top of the Vasopressors section so we don't perturb the dose
-    # unit converter that depends on that DataFrame's exact shape.
+def _(
+    CONFIG_PATH,
+    SITE_TZ,
+    apply_outlier_handling,
+    cohort_ids_rel,
+    duckdb,
+    load_cohort_table,
+    to_utc,
+    weight_rel,
+):
+    # Cell C — Load vitals needed for BMI (height_cm) and P/F fallback (spo2).
+    # Weight comes from the weight extract (`weight_rel`, Vasopressors section):
+    # its precomputed admission weight is the BMI weight.
     # `_Vitals` alias avoids marimo multi-cell definition collision with the existing
     # Vitals import in the vasopressor cell.
     from clifpy import Vitals as _Vitals
 
-    _vitals_t1 = _Vitals.from_file(
-        config_path=CONFIG_PATH,
+    _vitals_t1 = load_cohort_table(
+        _Vitals, CONFIG_PATH, cohort_ids_rel,
         columns=['hospitalization_id', 'recorded_dttm', 'vital_category', 'vital_value'],
-        filters={
-            'vital_category': ['height_cm', 'weight_kg', 'spo2'],
-            'hospitalization_id': cohort_hosp_ids,
-        },
+        filters={'vital_category': ['height_cm', 'spo2']},
     )
     apply_outlier_handling(_vitals_t1, outlier_config_path='config/outlier_config.yaml')
     # Cross-site tz normalization (see labs cell for rationale).
     vitals_t1_df = to_utc(_vitals_t1.df, ['recorded_dttm'], naive_means=SITE_TZ)
 
-    # First non-null height_cm and weight_kg per hospitalization → BMI.
+    # First non-null height_cm and (admission) weight_kg per hospitalization → BMI.
     # Height guarded to 50–250 cm (reject impossible values even post-outlier-handling).
     bmi_df = duckdb.sql("""
         WITH first_h AS (
@@ -803,13 +881,10 @@ def _(CONFIG_PATH, SITE_TZ, apply_outlier_handling, cohort_hosp_ids, duckdb, to_
             QUALIFY ROW_NUMBER() OVER (PARTITION BY hospitalization_id ORDER BY recorded_dttm) = 1
         )
         , first_w AS (
-            FROM vitals_t1_df
-            SELECT hospitalization_id
-                , weight_kg: vital_value
-            WHERE vital_category = 'weight_kg'
-              AND vital_value IS NOT NULL
-              AND vital_value > 0
-            QUALIFY ROW_NUMBER() OVER (PARTITION BY hospitalization_id ORDER BY recorded_dttm) = 1
+            FROM weight_rel
+            SELECT DISTINCT hospitalization_id
+                , weight_kg: admission_weight_kg
+            WHERE admission_weight_kg IS NOT NULL
         )
         FROM first_h h
         FULL JOIN first_w w USING (hospitalization_id)
@@ -824,9 +899,9 @@ def _(CONFIG_PATH, SITE_TZ, apply_outlier_handling, cohort_hosp_ids, duckdb, to_
 
 
 @app.cell
-def _(bmi_df, cohort_shift_change_grids, vitals_t1_df):
+def _(bmi_df, cohort_shift_change_grids, weight_rel):
     # Cell C2 — Per-patient-day weight at start of each patient-day (7am anchor).
-    # ASOF backward-join most recent vitals weight_kg to each 7am grid row; coalesce
+    # ASOF backward-join most recent extract weight_kg to each 7am grid row; coalesce
     # with admission weight (bmi_df.weight_kg = first recorded weight per hospitalization)
     # when no prior reading exists. Consumed by the mcg/kg/min propofol descriptives
     # in code/descriptive/.
@@ -838,11 +913,9 @@ def _(bmi_df, cohort_shift_change_grids, vitals_t1_df):
             WHERE _hr = 7 AND _nth_day > 0
         )
         , weight_events AS (
-            FROM vitals_t1_df
-            SELECT hospitalization_id
-                , recorded_dttm
-                , weight_kg: vital_value
-            WHERE vital_category = 'weight_kg' AND vital_value IS NOT NULL
+            FROM weight_rel
+            SELECT hospitalization_id, recorded_dttm, weight_kg
+            WHERE weight_kg IS NOT NULL
         )
         , asof_weight AS (
             FROM day_starts d
@@ -988,23 +1061,45 @@ def _(SITE_NAME, pd):
 
 
 @app.cell
-def _(CONFIG_PATH, SITE_NAME, SITE_TZ, cohort_hosp_ids, duckdb, pd, to_utc):
+def _(
+    CONFIG_PATH,
+    SITE_NAME,
+    SITE_TZ,
+    cohort_hosp_ids,
+    duckdb,
+    get_config_or_params,
+    pd,
+    perf_stage,
+    to_utc,
+):
     # Cell G — Sepsis CDC Adult Sepsis Event (ASE) via clifpy (cached).
     # compute_ase independently loads many CLIF tables (Hospitalization, MedAdmin-cont,
     # MedAdmin-intermittent, Labs, MicrobiologyCulture, Adt, RespiratorySupport) and can
     # take 5–15 minutes for ~thousand hospitalizations. Cached to output/{site}/covariates_ase.parquet
-    # and re-used on subsequent notebook runs unless RERUN_ASE flag is True.
+    # and re-used while the fingerprint of those tables + the cohort IDs is unchanged
+    # (or recomputed unconditionally when RERUN_ASE is True).
+    from _stage_cache import (
+        resolve_stage_cache as _resolve_stage_cache,
+        stage_components as _stage_components,
+        write_stage_manifest as _write_stage_manifest,
+    )
+
     _ase_path = f"output/{SITE_NAME}/covariates_ase.parquet"
-    if (not os.path.exists(_ase_path)) or RERUN_ASE:
+    _components = _stage_components(
+        'ase', get_config_or_params(CONFIG_PATH), cohort_ids=cohort_hosp_ids,
+    )
+    if _resolve_stage_cache(SITE_NAME, 'ase', _components, force=RERUN_ASE):
         from clifpy.utils import compute_ase
-        ase_full = compute_ase(
-            hospitalization_ids=cohort_hosp_ids,
-            config_path=CONFIG_PATH,
-            apply_rit=True,
-            rit_only_hospital_onset=True,
-            include_lactate=False,  # CDC strict definition (matches function default)
-            verbose=True,
-        )
+        with perf_stage("ase") as _ps:
+            ase_full = compute_ase(
+                hospitalization_ids=cohort_hosp_ids,
+                config_path=CONFIG_PATH,
+                apply_rit=True,
+                rit_only_hospital_onset=True,
+                include_lactate=False,  # CDC strict definition (matches function default)
+                verbose=True,
+            )
+            _ps.rows = len(ase_full)
         # clifpy emits *_dttm columns as a mix of naive site-local and tz-aware
         # site-local depending on the upstream table; auto-detect and route both
         # cases through to_utc for on-disk consistency.
@@ -1015,6 +1110,7 @@ def _(CONFIG_PATH, SITE_NAME, SITE_TZ, cohort_hosp_ids, duckdb, pd, to_utc):
         if _ase_dttm_cols:
             ase_full = to_utc(ase_full, _ase_dttm_cols, naive_means=SITE_TZ)
         ase_full.to_parquet(_ase_path, index=False)
+        _write_stage_manifest(SITE_NAME, 'ase', _components, n_rows=len(ase_full))
         logger.info(f"Computed + saved {_ase_path} ({len(ase_full)} rows)")
     else:
         ase_full = pd.read_parquet(_ase_path)
@@ -1163,22 +1259,22 @@ def _():
 def _(
     CONFIG_PATH,
     SITE_TZ,
-    cohort_hosp_ids,
+    cohort_ids_rel,
+    load_cohort_table,
     normalize_categories,
     to_utc,
 ):
     from clifpy import Hospitalization as _Hospitalization
 
-    # Load discharge metadata + age for the cohort. Naive *_dttm gets
-    # localized to SITE_TZ then converted to UTC (clifpy convention:
-    # from_file returns naive wall-clock that is already site-local).
-    _hosp = _Hospitalization.from_file(
-        config_path=CONFIG_PATH,
+    # Load discharge metadata + age for the cohort. A naive *_dttm (naive
+    # source parquet) gets localized to SITE_TZ then converted to UTC; a
+    # UTC-tagged one passes through.
+    _hosp = load_cohort_table(
+        _Hospitalization, CONFIG_PATH, cohort_ids_rel,
         columns=[
             'hospitalization_id', 'discharge_category', 'discharge_dttm',
             'age_at_admission',
         ],
-        filters={'hospitalization_id': cohort_hosp_ids},
     )
     hosp_meta_df = _hosp.df.copy()
     hosp_meta_df = to_utc(hosp_meta_df, 'discharge_dttm', naive_means=SITE_TZ)
@@ -100,6 +100,7 @@ def _():
         SITE_NAME,
         SITE_TZ,
         apply_outlier_handling,
+        duckdb,
         normalize_categories,
         pd,
         to_utc,
@@ -136,9 +137,11 @@ def _(SITE_NAME, pd):
 
 
 @app.cell
-def _(SITE_NAME, pd):
-    nmb_excluded = pd.read_parquet(f"output/{SITE_NAME}/cohort_nmb_excluded.parquet")
-    logger.info(f"nmb_excluded patient-days: {len(nmb_excluded)}")
+def _(SITE_NAME, duckdb):
+    # NMB-excluded patient-days persisted by 01_cohort.py. Only feeds the
+    # ANTI JOIN below, so it stays a DuckDB relation (no pandas round-trip).
+    nmb_excluded = duckdb.read_parquet(f"output/{SITE_NAME}/cohort_nmb_excluded.parquet")
+    logger.info(f"nmb_excluded patient-days: {nmb_excluded.count('*').fetchone()[0]}")
     return (nmb_excluded,)
 
 
@@ -47,6 +47,9 @@ def _():
     # When false, the v2 outcome family (success_extub_v2, sbt_done_v2) is
     # all-zero in the modeling dataset, and 08 explicitly skips those fits.
     ENABLE_V2_OUTCOMES = bool(cfg.get('enable_v2_outcomes', True))
+    # Refit every model instead of loading unchanged fits from the fit
+    # store (output/{site}/models/fit_store.parquet).
+    RERUN_MODELS = bool(cfg.get('rerun_models', False))
 
     # Site-scoped output dirs (see Makefile SITE= flag).
     # Path B++ refactor: every modeling artifact lands under {site}/models/.
@@ -54,39 +57,21 @@ def _():
     os.makedirs(f"output_to_share/{SITE_NAME}/models", exist_ok=True)
     # Per-site dual log files (pyCLIF integration guide rule 1).
     setup_logging(output_directory=f"output_to_share/{SITE_NAME}")
-    logger.info(f"Site: {SITE_NAME}; enable_v2_outcomes: {ENABLE_V2_OUTCOMES}")
-    return ENABLE_V2_OUTCOMES, SITE_NAME, pd
+    logger.info(f"Site: {SITE_NAME}; enable_v2_outcomes: {ENABLE_V2_OUTCOMES}; rerun_models: {RERUN_MODELS}")
+    return ENABLE_V2_OUTCOMES, RERUN_MODELS, SITE_NAME, pd
 
 
 @app.cell
-def _(SITE_NAME, pd):
-    # Phase 4 cutover (2026-05-08): read consolidated parquet + apply
-    # outcome-modeling filter inline. Byte-equivalent to the legacy
-    # modeling_dataset.parquet on the surviving cohort. The day-0
-    # sensitivity analysis below flips `>` to `>=` to keep partial
-    # intubation-day rows (no separate parquet needed).
-    _full = pd.read_parquet(f"output/{SITE_NAME}/model_input_by_id_imvday.parquet")
-    # Alias the `_total` (cont + intermittent) daytime/night dose columns
-    # onto the unsuffixed names the model formulas use. Manuscript primary
-    # scope is "all sedation forms" = `_total`. To switch the analysis to
-    # continuous-only, point the rename at `_cont` columns instead.
-    # (Pipeline produces both _cont and _total; we never use both at once.)
-    _DAYDOSE_SCOPE = "_total"  # change to "_cont" for continuous-only SA
-    _ALIAS = {
-        f"_prop_day_mcg_kg_min{_DAYDOSE_SCOPE}":   "_prop_day_mcg_kg_min",
-        f"_prop_night_mcg_kg_min{_DAYDOSE_SCOPE}": "_prop_night_mcg_kg_min",
-        f"_fenteq_day_mcg_hr{_DAYDOSE_SCOPE}":     "_fenteq_day_mcg_hr",
-        f"_fenteq_night_mcg_hr{_DAYDOSE_SCOPE}":   "_fenteq_night_mcg_hr",
-        f"_midazeq_day_mg_hr{_DAYDOSE_SCOPE}":     "_midazeq_day_mg_hr",
-        f"_midazeq_night_mg_hr{_DAYDOSE_SCOPE}":   "_midazeq_night_mg_hr",
-    }
-    _full = _full.rename(columns=_ALIAS)
-    cohort_merged_final = _full.loc[
-        (_full["_nth_day"] > 0)
-        & _full["sbt_done_next_day"].notna()
-        & _full["success_extub_next_day"].notna()
-    ].reset_index(drop=True)
-    logger.info(f"Modeling cohort: {len(cohort_merged_final)} rows (daydose scope: {_DAYDOSE_SCOPE})")
+def _(SITE_NAME):
+    from _models_common import DAYDOSE_SCOPE, load_modeling_cohort
+
+    # Phase 4 cutover (2026-05-08): consolidated parquet + the
+    # outcome-modeling filter, with the `_total` (cont + intermittent)
+    # daytime/night dose columns aliased onto the unsuffixed names the
+    # model formulas use — shared with 08b via code/_models_common.py.
+    # To switch to the continuous-only SA, pass daydose_scope="_cont".
+    cohort_merged_final = load_modeling_cohort(SITE_NAME)
+    logger.info(f"Modeling cohort: {len(cohort_merged_final)} rows (daydose scope: {DAYDOSE_SCOPE})")
     return (cohort_merged_final,)
 
 
@@ -164,7 +149,8 @@ def _():
 
     - Wide CSVs (`model_comparison_*.csv`) — rows=covariates, cols=specs, cells=OR (95% CI)
 
-    **Variable scaling:** `VAR_DISPLAY` centralizes scaling and labels. Edit
+    **Variable scaling:** `VAR_DISPLAY` (code/_models_common.py, shared with
+    08b) centralizes scaling and labels. Edit
     `scale` to rescale; edit `label` to relabel.
     """)
     return
@@ -172,126 +158,31 @@ def _():
 
 @app.cell
 def _():
-    # Central configuration for variable scaling + display labels.
+    # Central configuration for variable scaling + display labels lives in
+    # code/_models_common.py (shared with 08b_models_cascade.py).
     # To change a scale (e.g., age per 10 yrs): edit the 'scale' divisor.
     # To change a label: edit 'label'.
-    # To add a new scaled variable: add a new entry.
-    #
-    # UNIT NOTE: Phase 2 (2026-04-27): propofol exposures are now in
-    # mcg/kg/min (the bedside pump-display unit) thanks to the pre-attached
-    # weight column in 02_exposure.py and the preferred_units change to
-    # mcg/kg/min. Other drugs unchanged: fentanyl mcg/hr, midazolam mg/hr.
-    # Scales below: propofol "per 10 mcg/kg/min" matches typical pump
-    # titration steps (5–25 mcg/kg/min increments).
-    VAR_DISPLAY = {
-        # Exposures (day-night rate differences). 2026-05-11: standardized
-        # to fixed clinical units across diffs and daytime: prop = per 10
-        # mcg/kg/min, fent eq = per 25 mcg/hr, midaz eq = per 1 mg/hr.
-        # Replaces the prior mixed scales (fent per 10, midaz per 0.1).
-        'prop_dif_mcg_kg_min': {'scale': 10, 'label': 'Δ propofol (per 10 mcg/kg/min)'},
-        'fenteq_dif_mcg_hr':   {'scale': 25, 'label': 'Δ fentanyl eq (per 25 mcg/hr)'},
-        'midazeq_dif_mg_hr':   {'scale': 1,  'label': 'Δ midazolam eq (per 1 mg/hr)'},
-        # Daytime absolute rates (same fixed scales as the diffs above)
-        '_prop_day_mcg_kg_min': {'scale': 10, 'label': 'Daytime propofol (per 10 mcg/kg/min)'},
-        '_fenteq_day_mcg_hr':   {'scale': 25, 'label': 'Daytime fentanyl eq (per 25 mcg/hr)'},
-        '_midazeq_day_mg_hr':   {'scale': 1,  'label': 'Daytime midazolam eq (per 1 mg/hr)'},
-        # Hurdle binaries: any 24h exposure (day OR night, yes/no). scale=1
-        # keeps the column 0/1 — the regression OR (= 10→90 OR when ≥10% of
-        # rows are 1) is interpretable as "odds ratio for any exposure vs
-        # none." 24h indicator (vs daytime-only) avoids misclassifying
-        # night-only-sedated patients as non-users.
-        '_prop_any':   {'scale': 1, 'label': 'Any propofol use (day or night, yes/no)'},
-        '_fenteq_any': {'scale': 1, 'label': 'Any fentanyl eq use (day or night, yes/no)'},
-        '_midazeq_any': {'scale': 1, 'label': 'Any midazolam eq use (day or night, yes/no)'},
-        # Other continuous covariates
-        'age':          {'scale': 1,   'label': 'Age (per year)'},
-        '_nth_day':     {'scale': 1,   'label': 'Day on IMV (per day)'},
-        'cci_score':    {'scale': 1,   'label': 'Charlson CCI (per point)'},
-        'sofa_total':   {'scale': 1,   'label': 'SOFA total (per point)'},
-        'nee_7am':      {'scale': 0.1, 'label': 'NEE 7am (per 0.1 mcg/kg/min)'},
-        'nee_7pm':      {'scale': 0.1, 'label': 'NEE 7pm (per 0.1 mcg/kg/min)'},
-        # Body habitus. weight_kg is in BASELINE so it appears in every
-        # spec; bmi is retained in case a future BMI-adjusted spec is added.
-        'weight_kg':    {'scale': 10,  'label': 'Weight (per 10 kg)'},
-        'bmi':          {'scale': 5,   'label': 'BMI (per 5 kg/m²)'},
-    }
-    return (VAR_DISPLAY,)
+    from _models_common import HURDLE_INDICATORS, VAR_DISPLAY, build_reference_row, scale_frame
+    return HURDLE_INDICATORS, VAR_DISPLAY, build_reference_row, scale_frame
 
 
 @app.cell
-def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
-    import statsmodels.formula.api as smf
-    import statsmodels.api as sm
+def _(ENABLE_V2_OUTCOMES, RERUN_MODELS, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd, scale_frame):
     import numpy as np
     import re
+    from _model_fit import FitJob, FitStore, fit_grid
+    from _perf import perf_stage
 
     # ── Rescale on a COPY so we never mutate cohort_merged_final ──────
-    # Using copy() prevents accidental double-scaling if this cell re-runs.
-    _df_scaled = cohort_merged_final.copy()
-    for _col, _info in VAR_DISPLAY.items():
-        if _col in _df_scaled.columns and _info['scale'] != 1:
-            _df_scaled[_col] = _df_scaled[_col] / _info['scale']
-
-    # ── Fit functions ──────────────────────────────────────────────────
-    # maxiter=500 (statsmodels defaults: Logit=35, GEE=60). The earlier
-    # 100-iter ceiling stopped success_extub_v2 × daydose_rcs_diff short of
-    # convergence on logit + logit_asym (function value plateaued at ~0.4407
-    # with near-zero gradient). 500 gives the optimizer headroom; fits still
-    # hitting the cap here are structurally ill-conditioned rather than
-    # iteration-bound, and the NO_CONVERGE flag propagates into
-    # models_coeffs.csv (fit_status column) for downstream filtering.
-    def _fit_gee(formula, data):
-        m = smf.gee(formula=formula, groups='hospitalization_id',
-                    data=data, family=sm.families.Binomial())
-        return m.fit(maxiter=500)
-
-    def _fit_logit(formula, data):
-        """Cluster-robust logit (groups=hospitalization_id).
-
-        Methodologically appropriate when within-cluster correlation
-        exists (avg cluster size ~5 days here). On cr() basis × binary
-        terminal-event outcome the sandwich estimator can produce
-        degenerate link-scale variance — see `_fit_logit_asym` for the
-        pragmatic alternative used in v1/v3 of the cross-site marginal-
-        effects figure. v2 of the cross-site figure uses this version
-        deliberately to illustrate the failure mode.
-        """
-        # Drop rows with NaN in any column referenced by the formula so the
-        # cluster-robust SE's `groups` length matches the model's residuals.
-        _names = [c for c in data.columns if c in formula]
-        if 'hospitalization_id' not in _names:
-            _names.append('hospitalization_id')
-        _d = data.dropna(subset=_names)
-        m = smf.logit(formula=formula, data=_d)
-        return m.fit(cov_type='cluster',
-                     cov_kwds={'groups': _d['hospitalization_id']},
-                     maxiter=500, disp=False)
-
-    def _fit_logit_asym(formula, data):
-        """Asymptotic-SE logit (no cluster-robust).
-
-        Anti-conservative when within-cluster correlation exists, but
-        produces usable prediction CIs where `_fit_logit` can degenerate.
-        Used by v1 (`_full` spec) and v3 (`_diff` spec) of the cross-site
-        marginal-effects figure.
-        """
-        _names = [c for c in data.columns if c in formula]
-        if 'hospitalization_id' not in _names:
-            _names.append('hospitalization_id')
-        _d = data.dropna(subset=_names)
-        m = smf.logit(formula=formula, data=_d)
-        return m.fit(maxiter=500, disp=False)
-
-    def _is_converged(result):
-        # Logit exposes mle_retvals['converged']; GEE exposes result.converged.
-        # Default True when neither attribute is present (e.g. future statsmodels
-        # API change) so we never spuriously flag a fit as non-converged.
-        mle = getattr(result, 'mle_retvals', None)
-        if isinstance(mle, dict) and 'converged' in mle:
-            return bool(mle['converged'])
-        if hasattr(result, 'converged'):
-            return bool(result.converged)
-        return True
+    # scale_frame() copies, preventing double-scaling if this cell re-runs.
+    _df_scaled = scale_frame(cohort_merged_final)
+
+    # Fit functions (gee / cluster-robust logit / asymptotic-SE logit,
+    # maxiter=500) live in code/_model_fit.py, keyed by model_type, so the
+    # grid below can run in worker processes. Fits are kept in the
+    # site's fit store (output/{site}/models/fit_store.parquet, shared
+    # with 08b) and only re-fit when a formula, the modeling columns or
+    # the fit code change — or when config `rerun_models` is true.
 
     # ── Dimension 1: nested covariate sets (all include exposures) ────
     # Rate-based exposures (mcg/kg/min for propofol, mcg/hr for fentanyl,
@@ -367,16 +258,11 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
     for _v in _RCS_FULL_VARS:
         logger.info(f"  {_v:<24s}: raw={RCS_KNOTS_RAW[_v]}  scaled={_knots_by_var[_v]}")
 
-    # HURDLE_INDICATORS kept in scope: used by the forest plot's
-    # PERCENTILE_REF builder for filtering daytime predictors to the
-    # non-zero subset when computing percentiles. The 24h `_*_any` indicators
-    # are NO LONGER added as model covariates (no spec includes them since
-    # the 2026-05-11 trim removed `daydose_anydose`).
-    HURDLE_INDICATORS = {
-        '_prop_day_mcg_kg_min': '_prop_any',
-        '_fenteq_day_mcg_hr':   '_fenteq_any',
-        '_midazeq_day_mg_hr':   '_midazeq_any',
-    }
+    # HURDLE_INDICATORS (code/_models_common.py) kept in scope: used by the
+    # forest plot's PERCENTILE_REF builder for filtering daytime predictors
+    # to the non-zero subset when computing percentiles. The 24h `_*_any`
+    # indicators are NO LONGER added as model covariates (no spec includes
+    # them since the 2026-05-11 trim removed `daydose_anydose`).
 
     def _cr_term(v):
         return f"cr({v}, knots={_knots_by_var[v]})"
@@ -422,18 +308,18 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
     # v1/v3 from `logit_asym` and v2 from `logit`.
     MODEL_CONFIGS = [
         # — extubation (gee + logit + logit_asym) —
-        {'outcome': 'success_extub_next_day',     'model_type': 'gee',        'fit_fn': _fit_gee},
-        {'outcome': 'success_extub_next_day',     'model_type': 'logit',      'fit_fn': _fit_logit},
-        {'outcome': 'success_extub_next_day',     'model_type': 'logit_asym', 'fit_fn': _fit_logit_asym},
-        {'outcome': 'success_extub_v2_next_day',  'model_type': 'gee',        'fit_fn': _fit_gee},
-        {'outcome': 'success_extub_v2_next_day',  'model_type': 'logit',      'fit_fn': _fit_logit},
-        {'outcome': 'success_extub_v2_next_day',  'model_type': 'logit_asym', 'fit_fn': _fit_logit_asym},
+        {'outcome': 'success_extub_next_day',     'model_type': 'gee'},
+        {'outcome': 'success_extub_next_day',     'model_type': 'logit'},
+        {'outcome': 'success_extub_next_day',     'model_type': 'logit_asym'},
+        {'outcome': 'success_extub_v2_next_day',  'model_type': 'gee'},
+        {'outcome': 'success_extub_v2_next_day',  'model_type': 'logit'},
+        {'outcome': 'success_extub_v2_next_day',  'model_type': 'logit_asym'},
         # — SBT outcomes (gee only) —
-        {'outcome': 'sbt_done_prefix_next_day',   'model_type': 'gee',   'fit_fn': _fit_gee},
-        {'outcome': 'sbt_done_multiday_next_day', 'model_type': 'gee',   'fit_fn': _fit_gee},
-        {'outcome': 'sbt_done_subira_next_day',   'model_type': 'gee',   'fit_fn': _fit_gee},
-        {'outcome': 'sbt_done_abc_next_day',      'model_type': 'gee',   'fit_fn': _fit_gee},
-        {'outcome': 'sbt_done_v2_next_day',       'model_type': 'gee',   'fit_fn': _fit_gee},
+        {'outcome': 'sbt_done_prefix_next_day',   'model_type': 'gee'},
+        {'outcome': 'sbt_done_multiday_next_day', 'model_type': 'gee'},
+        {'outcome': 'sbt_done_subira_next_day',   'model_type': 'gee'},
+        {'outcome': 'sbt_done_abc_next_day',      'model_type': 'gee'},
+        {'outcome': 'sbt_done_v2_next_day',       'model_type': 'gee'},
         # — RETIRED (paste back to revert) —
         # 2026-05-11: sbt_elig_next_day (eligibility, not delivery)
         # 2026-05-01: sbt_done_next_day, sbt_done_anyprior_next_day,
@@ -450,7 +336,7 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
         'sbt_done_abc_next_day',
     }
 
-    # ── Cross-product loop ─────────────────────────────────────────────
+    # ── Cross-product grid ─────────────────────────────────────────────
     # Key shape: (outcome, model_type) → {spec_label: result}
     # `fit_meta` parallels `fitted` and carries n_obs / n_events / n_clusters
     # captured on the same dropna'd row set the fit consumed. Required by
@@ -460,6 +346,7 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
     # Step 6: collect per-fit status into a structured table for end-of-loop
     # summary + qc/model_fit_summary.csv.
     fit_summary_rows = []
+    _jobs = []
     for _config in MODEL_CONFIGS:
         _key = (_config['outcome'], _config['model_type'])
         fitted[_key] = {}
@@ -471,30 +358,12 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
         # operator can confirm the flag took effect. Forest + marginal-effect
         # plots for v2 outcomes do not render in this mode.
         if (not ENABLE_V2_OUTCOMES) and '_v2_next_day' in _config['outcome']:
-            for _spec in COVARIATE_SPECS:
-                fit_summary_rows.append({
-                    'outcome': _config['outcome'],
-                    'method': _config['model_type'],
-                    'spec': _spec['label'],
-                    'status': 'SKIPPED_V2',
-                    'n_obs': 0,
-                    'n_events': 0,
-                    'fail_reason': 'enable_v2_outcomes=false',
-                })
             logger.info(
                 f"  SKIPPED_V2: {_config['outcome']} / {_config['model_type']} "
                 f"(all {len(COVARIATE_SPECS)} specs)"
             )
             continue
         for _spec in COVARIATE_SPECS:
-            _formula = _spec['formula'].replace('{{outcome}}', _config['outcome'])
-            # Replicate the dropna logic used by _fit_logit / _fit_logit_asym
-            # so n_events / n_clusters are computed on the same row set.
-            _names_in_formula = [c for c in _df_scaled.columns if c in _formula]
-            if 'hospitalization_id' not in _names_in_formula:
-                _names_in_formula.append('hospitalization_id')
-            _d_for_count = _df_scaled.dropna(subset=_names_in_formula)
-
             # Pre-fit singularity check (Step 3) — LINEAR SPECS ONLY.
             # RCS specs use cr() basis which is INHERENTLY rank-deficient by
             # construction (basis columns span a continuous space with
@@ -505,78 +374,71 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
             # rank-deficiency genuinely predicts fit failure. The truly-
             # singular failures observed at NU (per F11) were on the linear
             # `sofa` spec, not on RCS — so this scope is exactly right.
-            # Rank check is O(n_cols^3) — trivial vs the iterative cost.
-            _is_rcs = 'rcs' in _spec['label']
-            _is_singular = False
-            _rank = _ncols = 0
-            if not _is_rcs:
-                try:
-                    import patsy
-                    _y_dm, _x_dm = patsy.dmatrices(
-                        _formula, _d_for_count, return_type='dataframe'
-                    )
-                    _x_arr = _x_dm.values
-                    _rank = int(np.linalg.matrix_rank(_x_arr, tol=1e-10))
-                    _ncols = int(_x_arr.shape[1])
-                    _is_singular = _rank < _ncols
-                except Exception:
-                    # If we can't even build the design matrix, let the
-                    # fit_fn handle the failure path; don't pre-judge.
-                    _is_singular = False
-
-            if _is_singular:
+            _jobs.append(FitJob(
+                outcome=_config['outcome'],
+                model_type=_config['model_type'],
+                spec=_spec['label'],
+                formula=_spec['formula'].replace('{{outcome}}', _config['outcome']),
+                check_rank='rcs' not in _spec['label'],
+            ))
+
+    # Independent fits → process pool (code/_model_fit.py; MODEL_FIT_WORKERS
+    # overrides the per-core default, =1 fits serially in-process). Outcomes
+    # come back in job order, so the log below is deterministic.
+    _store = FitStore(f"output/{SITE_NAME}/models/fit_store.parquet", refresh=RERUN_MODELS)
+    _outcomes = {}
+    with perf_stage("model_fits") as _ps:
+        for _fo in fit_grid(_jobs, _df_scaled, store=_store):
+            _job = _fo.job
+            _outcomes[(_job.outcome, _job.model_type, _job.spec)] = _fo
+            _where = f"{_job.spec} / {_job.outcome} / {_job.model_type}"
+            if _fo.status == 'SKIP_SINGULAR':
                 logger.warning(
-                    f"  SKIP_SINGULAR: {_spec['label']} / {_config['outcome']} / "
-                    f"{_config['model_type']} — design matrix rank "
-                    f"{_rank}/{_ncols} (deficient)"
+                    f"  SKIP_SINGULAR: {_where} — {_fo.fail_reason} (deficient)"
                 )
+            elif _fo.status == 'FAIL':
+                logger.info(f"  FAIL: {_where}: {_fo.fail_reason}")
+            else:
+                _log = logger.info if _fo.status == 'OK' else logger.warning
+                _log(
+                    f"  {_fo.status}: {_where} (N={_fo.n_obs}) [{_fo.fit_seconds:.1f}s"
+                    + (", stored]" if _fo.from_store else "]")
+                )
+        _ps.rows = len(_jobs)
+
+    for _config in MODEL_CONFIGS:
+        _key = (_config['outcome'], _config['model_type'])
+        for _spec in COVARIATE_SPECS:
+            _fo = _outcomes.get(_key + (_spec['label'],))
+            if _fo is None:  # SKIPPED_V2
                 fit_summary_rows.append({
                     'outcome': _config['outcome'],
                     'method': _config['model_type'],
                     'spec': _spec['label'],
-                    'status': 'SKIP_SINGULAR',
-                    'n_obs': len(_d_for_count),
-                    'n_events': int(_d_for_count[_config['outcome']].sum()),
-                    'fail_reason': f'design matrix rank {_rank}/{_ncols}',
+                    'status': 'SKIPPED_V2',
+                    'n_obs': 0,
+                    'n_events': 0,
+                    'fail_reason': 'enable_v2_outcomes=false',
+                    'fit_seconds': 0.0,
                 })
                 continue
-
-            try:
-                _result = _config['fit_fn'](_formula, _df_scaled)
-                fitted[_key][_spec['label']] = _result
+            if _fo.result is not None:
+                fitted[_key][_spec['label']] = _fo.result
                 fit_meta[_key][_spec['label']] = {
-                    'n_obs': int(_result.nobs),
-                    'n_events': int(_d_for_count[_config['outcome']].sum()),
-                    'n_clusters': int(_d_for_count['hospitalization_id'].nunique()),
+                    'n_obs': _fo.n_obs,
+                    'n_events': _fo.n_events,
+                    'n_clusters': _fo.n_clusters,
                 }
-                _converged = _is_converged(_result)
-                _status = 'OK' if _converged else 'NO_CONVERGE'
-                _tag = 'OK' if _converged else 'NO_CONVERGE'
-                _log = logger.info if _converged else logger.warning
-                _log(
-                    f"  {_tag}: {_spec['label']} / {_config['outcome']} / "
-                    f"{_config['model_type']} (N={int(_result.nobs)})"
-                )
-                fit_summary_rows.append({
-                    'outcome': _config['outcome'],
-                    'method': _config['model_type'],
-                    'spec': _spec['label'],
-                    'status': _status,
-                    'n_obs': int(_result.nobs),
-                    'n_events': int(_d_for_count[_config['outcome']].sum()),
-                    'fail_reason': '' if _converged else 'maxiter reached without convergence',
-                })
-            except Exception as e:
-                logger.info(f"  FAIL: {_spec['label']} / {_config['outcome']} / {_config['model_type']}: {e}")
-                fit_summary_rows.append({
-                    'outcome': _config['outcome'],
-                    'method': _config['model_type'],
-                    'spec': _spec['label'],
-                    'status': 'FAIL',
-                    'n_obs': len(_d_for_count),
-                    'n_events': int(_d_for_count[_config['outcome']].sum()),
-                    'fail_reason': str(e)[:200],  # truncate long tracebacks
-                })
+            fit_summary_rows.append({
+                'outcome': _config['outcome'],
+                'method': _config['model_type'],
+                'spec': _spec['label'],
+                'status': _fo.status,
+                'n_obs': _fo.n_obs,
+                'n_events': _fo.n_events,
+                'fail_reason': _fo.fail_reason,
+                'fit_seconds': round(_fo.fit_seconds, 2),
+            })
 
     # Aggregated summary block — per-method OK/FAIL counts so the operator
     # can read primary-vs-sensitivity status at a glance without grepping
@@ -615,12 +477,22 @@ def _(ENABLE_V2_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, pd):
                 f"  {_method:11s} ({_fam:13s}): {_n_ok}/{_n_total} OK   "
                 f"[{_tag}] — {'; '.join(_bits)}"
             )
+    _slowest = _summary_df.nlargest(5, 'fit_seconds')
+    logger.info(
+        f"Fit time: {_summary_df['fit_seconds'].sum():,.1f}s total across fits; slowest: "
+        + ", ".join(
+            f"{r.spec}/{r.outcome}/{r.method} {r.fit_seconds:.1f}s"
+            for r in _slowest.itertuples()
+        )
+    )
     logger.info("=" * 70)
+    os.makedirs(f"output_to_share/{SITE_NAME}/qc", exist_ok=True)
+    _summary_df.to_csv(f"output_to_share/{SITE_NAME}/qc/model_fit_summary.csv", index=False)
 
     # fit_summary_rows threads through to the models_coeffs.csv builder cell,
     # where its per-fit status stamps every coefficient row and a sentinel
     # row is appended for any FAIL fit (no coefficients otherwise).
-    return HURDLE_INDICATORS, MODEL_CONFIGS, SBT_VARIANT_OUTCOMES, fit_meta, fit_summary_rows, fitted, np, re
+    return MODEL_CONFIGS, SBT_VARIANT_OUTCOMES, fit_meta, fit_summary_rows, fitted, np, re
 
 
 @app.cell
@@ -719,8 +591,10 @@ def _():
     outcome as each exposure varies over its 2.5–97.5 percentile range, with
     all other covariates held at median (continuous) or mode (categorical).
     Produced from the `sofa` spec (closest to the example paper's adjustment
-    set). Uses `result.get_prediction(new_data)` which handles link-scale
-    CI transformation internally.
+    set). All six panels of a fit are predicted as one stacked design
+    matrix (`predict_marginal_effects`, code/_models_common.py); the CI is
+    formed on the link scale and transformed to probabilities. The same
+    frame feeds the PNG and `marginal_effects_grid.csv`.
 
     **Rows**: [daytime rate, day-to-night Δ rate]
     **Cols**: [propofol, fentanyl eq, midazolam eq]
@@ -730,11 +604,15 @@ def _():
 
 
 @app.cell
-def _(HURDLE_INDICATORS, OUTCOME_SHORT, SBT_VARIANT_OUTCOMES, SITE_NAME, VAR_DISPLAY, cohort_merged_final, fitted, np, pd):
-    # `np` is inherited from the fitting cell (returned above) to avoid the
-    # marimo "multiple definitions" error. `_plt` is private (underscore
-    # prefix) so it doesn't collide with any future cell that imports plt.
-    import matplotlib.pyplot as _plt
+def _(OUTCOME_SHORT, SBT_VARIANT_OUTCOMES, SITE_NAME, build_reference_row, cohort_merged_final, fitted, pd, scale_frame):
+    from _model_figures import render_marginal_effects
+    from _models_common import marginal_grid, predict_marginal_effects
+    from _render import RenderQueue as _RenderQueue
+
+    MARGINAL_GRID_COLUMNS = [
+        'outcome', 'model_type', 'spec', 'focal', 'xlabel', 'panel_row', 'panel_col',
+        'x_actual', 'x_scaled', 'prob', 'ci_lo', 'ci_hi',
+    ]
 
     # Focal variables + human-friendly x-axis labels (actual hourly-rate units).
     # The 2×3 panel layout: row = {daytime rate, day-to-night Δ rate}, col = {prop, fenteq, midazeq}.
@@ -757,182 +635,6 @@ def _(HURDLE_INDICATORS, OUTCOME_SHORT, SBT_VARIANT_OUTCOMES, SITE_NAME, VAR_DIS
         'sbt_done_v2_next_day': 'Probability of Passing SBT (v2)',
     }
 
-    def _build_reference_row(df_scaled):
-        """Median for numeric columns, mode for object/category columns.
-
-        Pandas 2.3 rejects 'str' as a select_dtypes argument (TypeError
-        'numpy string dtypes are not allowed, use \\'str\\' or \\'object\\''
-        — paradoxically). Use 'object' alone, plus 'category' for any
-        clinical-level groupings. Categoricals fall through both buckets
-        so .mode() handles them without explicit branching.
-        """
-        ref = df_scaled.median(numeric_only=True).to_dict()
-        for col in df_scaled.select_dtypes(include=['object', 'category']).columns:
-            ref[col] = df_scaled[col].mode().iloc[0]
-        return ref
-
-    def _marginal_prediction(result, ref_row, focal_col, scaled_grid):
-        """Run result.get_prediction for a grid holding everything else constant.
-
-        For daytime continuous-rate predictors paired with a hurdle indicator
-        (kept for forward compatibility with hypothetical specs that
-        reintroduce a `cr(rate):indicator` interaction; the current
-        manuscript RCS specs `daydose_rcs_*`/`daydose_physio_rcs_*` use
-        plain `cr(rate, knots=...)` so the indicator force is a no-op for
-        them), force the indicator to 1 across the entire grid so the
-        basis-times-indicator term evaluates the dose-response shape.
-        Otherwise the indicator stays at REF_ROW's median (typically 0),
-        the basis term is zero everywhere on the grid, and the curve
-        renders flat with a full-y-axis CI ribbon.
-
-        Returns (prob, ci_lo, ci_hi) all in probability space. statsmodels has
-        TWO different `summary_frame()` column schemes depending on the model
-        family — verified at statsmodels/base/_prediction_inference.py lines
-        118 and 326:
-
-        - `PredictionResultsMean` (GEE, GLM, OLS):
-          columns = ['mean', 'mean_se', 'mean_ci_lower', 'mean_ci_upper']
-        - `PredictionResultsBase` / `PredictionResultsMonotonic` (Logit, discrete):
-          columns = ['predicted', 'se', 'ci_lower', 'ci_upper']
-
-        We detect which scheme is present and use the appropriate keys.
-        """
-        new_data = pd.DataFrame([ref_row] * len(scaled_grid))
-        new_data[focal_col] = scaled_grid
-        _ind = HURDLE_INDICATORS.get(focal_col)
-        if _ind is not None:
-            new_data[_ind] = 1
-        pred = result.get_prediction(new_data)
-        sf = pred.summary_frame()
-        if 'mean' in sf.columns:
-            # GEE / GLM path
-            prob = np.asarray(sf['mean'])
-            ci_lo = np.asarray(sf['mean_ci_lower'])
-            ci_hi = np.asarray(sf['mean_ci_upper'])
-        elif 'predicted' in sf.columns:
-            # Logit / discrete path
-            prob = np.asarray(sf['predicted'])
-            ci_lo = np.asarray(sf['ci_lower'])
-            ci_hi = np.asarray(sf['ci_upper'])
-        else:
-            raise ValueError(
-                f"Unexpected summary_frame columns: {list(sf.columns)}. "
-                "Expected either ['mean', 'mean_ci_lower', 'mean_ci_upper'] "
-                "or ['predicted', 'ci_lower', 'ci_upper']."
-            )
-        return prob, ci_lo, ci_hi
-
-    def _ggplot_ax(ax):
-        """Style an axes to look like the ggplot default (gray bg, white grid)."""
-        ax.set_facecolor('#ebebeb')
-        ax.grid(color='white', linewidth=0.8, which='major', zorder=0)
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-        ax.tick_params(colors='#4d4d4d', labelsize=8)
-        ax.xaxis.label.set_color('#4d4d4d')
-        ax.yaxis.label.set_color('#4d4d4d')
-
-    def plot_marginal_effects(result, outcome, model_type, spec_label):
-        """Build and save a 2×3 figure of marginal-effect curves.
-
-        Also returns a long-format DataFrame of the prediction grid (50 points
-        per panel × 6 panels = 300 rows) so the caller can stack across all
-        (outcome × model_type × spec) runs and save a single
-        marginal_effects_grid.csv for cross-site aggregation.
-        """
-        # Rebuild scaled dataset (must match training-space units for prediction)
-        df_scaled = cohort_merged_final.copy()
-        for col, info in VAR_DISPLAY.items():
-            if col in df_scaled.columns and info['scale'] != 1:
-                df_scaled[col] = df_scaled[col] / info['scale']
-        ref_row = _build_reference_row(df_scaled)
-
-        fig, axes = _plt.subplots(2, 3, figsize=(12, 7.5))
-        fig.patch.set_facecolor('white')
-
-        panel_letters = ['A', 'B', 'C', 'D', 'E', 'F']
-        pidx = 0
-        grid_rows = []
-
-        for row_idx in range(2):
-            for col_idx in range(3):
-                focal, xlabel = FOCAL_VARS[row_idx][col_idx]
-                ax = axes[row_idx, col_idx]
-                _ggplot_ax(ax)
-
-                # Observed percentile range in ACTUAL hourly-rate units
-                raw = cohort_merged_final[focal].dropna()
-                q_lo, q_hi = np.percentile(raw, [2.5, 97.5])
-                actual_grid = np.linspace(q_lo, q_hi, 50)
-                # Convert to scaled-training-space units for prediction
-                scale = VAR_DISPLAY.get(focal, {}).get('scale', 1)
-                scaled_grid = actual_grid / scale
-
-                prob, ci_lo, ci_hi = _marginal_prediction(
-                    result, ref_row, focal, scaled_grid
-                )
-
-                # Collect grid rows for cross-site aggregation. xlabel is
-                # included so the agg layer can render axis labels without
-                # re-deriving from the focal var name.
-                for _xa, _xs, _p, _lo, _hi in zip(
-                    actual_grid, scaled_grid, prob, ci_lo, ci_hi,
-                ):
-                    grid_rows.append({
-                        'outcome': outcome,
-                        'model_type': model_type,
-                        'spec': spec_label,
-                        'focal': focal,
-                        'xlabel': xlabel,
-                        'panel_row': row_idx,
-                        'panel_col': col_idx,
-                        'x_actual': float(_xa),
-                        'x_scaled': float(_xs),
-                        'prob': float(_p),
-                        'ci_lo': float(_lo),
-                        'ci_hi': float(_hi),
-                    })
-
-                ax.fill_between(
-                    actual_grid, ci_lo, ci_hi,
-                    color='#808080', alpha=0.35, zorder=2,
-                )
-                ax.plot(
-                    actual_grid, prob,
-                    color='black', linewidth=1.5, zorder=3,
-                )
-
-                ax.set_xlabel(xlabel, fontsize=9)
-                ax.set_ylabel(
-                    Y_LABEL.get(outcome, 'Predicted Probability'),
-                    fontsize=9,
-                )
-                ax.set_ylim(0, 1)
-                # Panel letter in the top-left corner
-                ax.text(
-                    -0.12, 1.08, panel_letters[pidx],
-                    transform=ax.transAxes,
-                    fontsize=14, fontweight='bold', va='top', ha='left',
-                )
-                pidx += 1
-
-        fig.suptitle(
-            f"{Y_LABEL.get(outcome, 'Probability')} by Sedative Exposure\n"
-            f"({spec_label} spec, {model_type.upper()})",
-            fontsize=11, y=1.00,
-        )
-        fig.tight_layout()
-
-        _outcome_short = OUTCOME_SHORT.get(outcome, outcome)
-        out_path = (
-            f"output_to_share/{SITE_NAME}/models/"
-            f"marginal_effects_{_outcome_short}_{model_type}_{spec_label}.png"
-        )
-        fig.savefig(out_path, dpi=250, bbox_inches='tight', facecolor='white')
-        _plt.close(fig)
-        logger.info(f"Saved: {out_path}")
-        return pd.DataFrame(grid_rows)
-
     # Generate one 2×3 figure per (outcome, model_type, spec).
     # PLOT_SPECS includes both RCS spec families (`*_rcs_diff` parsimony /
     # `*_rcs_full` flexible) for the 2 manuscript base specs. The cross-site
@@ -942,22 +644,46 @@ def _(HURDLE_INDICATORS, OUTCOME_SHORT, SBT_VARIANT_OUTCOMES, SITE_NAME, VAR_DIS
     # outcome).
     PLOT_SPECS = ['daydose_rcs_diff', 'daydose_rcs_full',
                   'daydose_physio_rcs_diff', 'daydose_physio_rcs_full']
+
+    # The focal grid and the reference row (training-space units) depend
+    # only on the cohort: build them once, then each fit is one stacked
+    # prediction over all six panels.
+    _grid = marginal_grid(cohort_merged_final, FOCAL_VARS)
+    _ref_row = build_reference_row(scale_frame(cohort_merged_final))
+    # Figures are queued here and rendered in a process pool once the CSV
+    # is written (code/_render.py); `--no-figures` skips them.
+    _figures = _RenderQueue()
     _grid_frames = []
     for (_outcome, _mt), _spec_dict in fitted.items():
         if _outcome in SBT_VARIANT_OUTCOMES:
             continue
         for _spec_label in PLOT_SPECS:
             if _spec_label in _spec_dict:
-                _grid_frames.append(
-                    plot_marginal_effects(
-                        _spec_dict[_spec_label], _outcome, _mt, _spec_label
-                    )
+                _effects = predict_marginal_effects(_spec_dict[_spec_label], _ref_row, _grid)
+                _outcome_short = OUTCOME_SHORT.get(_outcome, _outcome)
+                _figures.submit(
+                    f"output_to_share/{SITE_NAME}/models/"
+                    f"marginal_effects_{_outcome_short}_{_mt}_{_spec_label}.png",
+                    render_marginal_effects, _effects,
+                    suptitle=(
+                        f"{Y_LABEL.get(_outcome, 'Probability')} by Sedative Exposure\n"
+                        f"({_spec_label} spec, {_mt.upper()})"
+                    ),
+                    ylabel=Y_LABEL.get(_outcome, 'Predicted Probability'),
+                    savefig_kwargs={'dpi': 250, 'facecolor': 'white'},
                 )
+                # outcome / model_type / spec lead so the agg layer can
+                # stack grids across sites; xlabel is included so it can
+                # render axis labels without re-deriving from the focal var.
+                _grid_frames.append(_effects.assign(
+                    outcome=_outcome, model_type=_mt, spec=_spec_label,
+                )[MARGINAL_GRID_COLUMNS])
     if _grid_frames:
         _grid_df = pd.concat(_grid_frames, ignore_index=True)
         _grid_path = f"output_to_share/{SITE_NAME}/models/marginal_effects_grid.csv"
         _grid_df.to_csv(_grid_path, index=False)
         logger.info(f"Saved {_grid_path} ({len(_grid_df)} rows)")
+    _figures.render()
     return
 
 
@@ -1000,10 +726,13 @@ def _():
 
 @app.cell
 def _(HURDLE_INDICATORS, MODEL_CONFIGS, OUTCOME_SHORT, SITE_NAME, VAR_DISPLAY,
-      cohort_merged_final, fit_meta, fit_summary_rows, fitted, np, pd, re):
-    import matplotlib.pyplot as _plt
+      build_reference_row, cohort_merged_final, fit_meta, fit_summary_rows, fitted,
+      np, pd, re, scale_frame):
     from patsy import dmatrix as _dmatrix
 
+    from _model_figures import render_forest
+    from _render import RenderQueue as _RenderQueue
+
     # 6 predictors visualized in the per-site forest PNG: 3 night-day diffs +
     # 3 daytime continuous rates. The 24h `_*_any` indicators were dropped
     # 2026-05-11 along with the `daydose_anydose` spec — no current spec
@@ -1129,17 +858,7 @@ def _(HURDLE_INDICATORS, MODEL_CONFIGS, OUTCOME_SHORT, SITE_NAME, VAR_DISPLAY,
 
     # Reference row (median for numeric, mode for categorical) over the
     # SCALED dataset — same construction as the marginal-effects cell.
-    def _build_reference_row_scaled(df_scaled):
-        ref = df_scaled.median(numeric_only=True).to_dict()
-        for col in df_scaled.select_dtypes(include=['object', 'category']).columns:
-            ref[col] = df_scaled[col].mode().iloc[0]
-        return ref
-
-    _df_scaled_forest = cohort_merged_final.copy()
-    for _col, _info in VAR_DISPLAY.items():
-        if _col in _df_scaled_forest.columns and _info['scale'] != 1:
-            _df_scaled_forest[_col] = _df_scaled_forest[_col] / _info['scale']
-    REF_ROW = _build_reference_row_scaled(_df_scaled_forest)
+    REF_ROW = build_reference_row(scale_frame(cohort_merged_final))
 
     _NAN_CONTRAST = (np.nan, np.nan, np.nan, np.nan, np.nan)
 
@@ -1178,7 +897,7 @@ def _(HURDLE_INDICATORS, MODEL_CONFIGS, OUTCOME_SHORT, SITE_NAME, VAR_DISPLAY,
         # Re-evaluate the formula's design matrix on the new rows so cr()
         # basis columns are recomputed at the new predictor value.
         try:
-            di = fit.model.data.design_info
+            di = fit.design_info
             X_lo = np.asarray(_dmatrix(di, nd_lo, return_type='matrix'))[0]
             X_hi = np.asarray(_dmatrix(di, nd_hi, return_type='matrix'))[0]
         except Exception:
@@ -1386,85 +1105,30 @@ def _(HURDLE_INDICATORS, MODEL_CONFIGS, OUTCOME_SHORT, SITE_NAME, VAR_DISPLAY,
     # ── Render one per-site forest PNG per (outcome, model_type) ─────
     # Uses or_p10_p90 columns (10→90 percentile shift) for QC view.
     # Cross-site pooled / per-unit views live in code/agg/.
-    def plot_forest(coeffs, outcome, model_type, site, predictors, percentile_ref, out_path):
-        fig, ax = _plt.subplots(figsize=(9.5, 5.5))
-        n_specs = len(SPEC_ORDER)
-        jitter = np.linspace(-0.20, 0.20, n_specs)
-
-        ymin, ymax = -0.6, len(predictors) - 0.4
-        for i, (pred, pred_label) in enumerate(predictors):
-            y_base = len(predictors) - 1 - i
-            for j, spec in enumerate(SPEC_ORDER):
-                _row = coeffs[
-                    (coeffs['outcome'] == outcome)
-                    & (coeffs['model_type'] == model_type)
-                    & (coeffs['spec'] == spec)
-                    & (coeffs['predictor'] == pred)
-                    & (coeffs['row_type'] == 'exposure')
-                ]
-                if _row.empty:
-                    continue
-                _r = _row.iloc[0]
-                _or = _r['or_p10_p90']
-                _lo = _r['or_p10_p90_lo']
-                _hi = _r['or_p10_p90_hi']
-                if not (np.isfinite(_or) and np.isfinite(_lo) and np.isfinite(_hi)):
-                    continue
-                _y = y_base + jitter[j]
-                ax.errorbar(
-                    _or, _y,
-                    xerr=[[_or - _lo], [_hi - _or]],
-                    fmt='o', color=SPEC_COLORS[spec], markersize=4,
-                    capsize=2, elinewidth=1.0, label=spec if i == 0 else None,
-                )
-
-        ytick_labels = []
-        ytick_pos = []
-        for i, (pred, pred_label) in enumerate(predictors):
-            y_base = len(predictors) - 1 - i
-            info = percentile_ref.get(pred, {})
-            x10 = info.get('x10_raw', np.nan)
-            x90 = info.get('x90_raw', np.nan)
-            ytick_labels.append(f"{pred_label}\nx10={x10:+.2f}, x90={x90:+.2f}")
-            ytick_pos.append(y_base)
-        ax.set_yticks(ytick_pos)
-        ax.set_yticklabels(ytick_labels, fontsize=8)
-        ax.set_ylim(ymin, ymax)
-
-        ax.set_xscale('log')
-        ax.set_xlim(0.5, 2.0)
-        ax.axvline(1.0, color='dimgray', linewidth=0.8, linestyle='--', zorder=0)
-        ax.set_xlabel('Odds ratio (10th → 90th percentile shift, log scale, clipped to [0.5, 2.0])', fontsize=9)
-        ax.set_title(f"{outcome} — {site} ({model_type.upper()})", fontsize=11)
-        ax.grid(True, axis='x', linewidth=0.4, alpha=0.4, zorder=0)
-
-        handles, labels = ax.get_legend_handles_labels()
-        seen = set()
-        dedup = [(h, l) for h, l in zip(handles, labels) if not (l in seen or seen.add(l))]
-        if dedup:
-            ax.legend(
-                [h for h, _ in dedup], [l for _, l in dedup],
-                loc='upper center', bbox_to_anchor=(0.5, 1.10),
-                ncol=len(dedup), fontsize=8, frameon=False,
-            )
-
-        fig.tight_layout()
-        fig.savefig(out_path, dpi=200, bbox_inches='tight', facecolor='white')
-        _plt.close(fig)
-
+    # Each figure's exposure rows are picked out here; the PNGs are
+    # rendered in a process pool after the loop (code/_render.py).
+    _exposure_rows = coeffs_df[coeffs_df['row_type'] == 'exposure'].rename(columns={
+        'or_p10_p90': 'or_', 'or_p10_p90_lo': 'lo', 'or_p10_p90_hi': 'hi',
+    })
+    _figures = _RenderQueue()
     for _config in MODEL_CONFIGS:
         _outcome = _config['outcome']
         _mt = _config['model_type']
         _outcome_short = OUTCOME_SHORT.get(_outcome, _outcome)
-        _out_path = (
-            f"output_to_share/{SITE_NAME}/models/"
-            f"forest_{_outcome_short}_{_mt}.png"
-        )
-        plot_forest(
-            coeffs_df, _outcome, _mt, SITE_NAME,
-            FOREST_PREDICTORS, PERCENTILE_REF, _out_path,
+        _points = _exposure_rows.loc[
+            (_exposure_rows['outcome'] == _outcome)
+            & (_exposure_rows['model_type'] == _mt)
+            & _exposure_rows['spec'].isin(SPEC_ORDER),
+            ['predictor', 'spec', 'or_', 'lo', 'hi'],
+        ].drop_duplicates(['predictor', 'spec'])
+        _figures.submit(
+            f"output_to_share/{SITE_NAME}/models/forest_{_outcome_short}_{_mt}.png",
+            render_forest, _points, FOREST_PREDICTORS, PERCENTILE_REF,
+            SPEC_ORDER, SPEC_COLORS,
+            title=f"{_outcome} — {SITE_NAME} ({_mt.upper()})",
+            savefig_kwargs={'dpi': 200, 'facecolor': 'white'},
         )
-        logger.info(f"Saved: {_out_path}")
+    _figures.render()
     return (FOREST_PREDICTORS, PERCENTILE_REF, coeffs_df)
 
 
@@ -0,0 +1,144 @@
+"""Cohort membership as a DuckDB table instead of Python IN-lists.
+
+Cohort restriction used to travel as Python lists (``hosp_ids_w_icu_stays``,
+``cohort_hosp_ids_post_stitch``, ``cohort_hosp_ids``) handed to
+``load_data(filters=...)`` / ``Table.from_file(filters=...)``, which render
+them as literal ``hospitalization_id IN ('…', '…', …)`` SQL — hundreds of
+thousands of string literals at large sites, re-planned on every load.
+
+- ``01_cohort.py`` writes the final cohort once as a small sorted parquet,
+  ``output/{site}/cohort_hosp_ids.parquet`` (:func:`write_cohort_ids`).
+- Every later script registers it in its DuckDB session as the TEMP TABLE
+  ``cohort_ids`` (:func:`register_cohort_ids`, restricted to the shard in
+  ``make run-sharded``); 01's intermediate ID sets are registered the same
+  way from Python lists via Arrow (:func:`register_ids`).
+- Raw-table loads apply the restriction as a SEMI JOIN against that table:
+  :func:`semi_join_ids` for DuckDB relations, :func:`load_cohort_table` in
+  place of ``Table.from_file(filters={'hospitalization_id': ...})``.
+
+Every script therefore shares one definition of the cohort, and the
+statement DuckDB plans stays the same size whatever the cohort size.
+"""
+from __future__ import annotations
+
+import os
+from typing import Iterable
+
+import duckdb
+import pyarrow as pa
+from clifpy.utils.config import get_config_or_params
+from clifpy.utils.io import load_data
+from clifpy.utils.logging_config import get_logger
+
+from _shard import shard_predicate
+
+logger = get_logger("epi_sedation.cohort_ids")
+
+COHORT_IDS_TABLE = "cohort_ids"
+
+
+def cohort_ids_path(site_name: str) -> str:
+    """Site-scoped cohort-membership parquet written by ``01_cohort.py``."""
+    return f"output/{site_name}/cohort_hosp_ids.parquet"
+
+
+def register_ids(
+    name: str, ids: "duckdb.DuckDBPyRelation | Iterable[str]",
+) -> duckdb.DuckDBPyRelation:
+    """(Re)create TEMP TABLE ``name`` holding the distinct, sorted ``ids``.
+
+    ``ids`` is a relation with a ``hospitalization_id`` column or an
+    iterable of IDs (kept in their source type); a Python iterable goes in
+    as an Arrow table, never as a SQL literal. Returns the table as a
+    relation on the default connection (the one
+    ``load_data(return_rel=True)`` uses).
+    """
+    if isinstance(ids, duckdb.DuckDBPyRelation):
+        _src = ids.select("hospitalization_id")
+    else:
+        _src = pa.table({'hospitalization_id': pa.array(list(ids))})
+    duckdb.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {name} AS
+        SELECT DISTINCT hospitalization_id
+        FROM _src
+        ORDER BY hospitalization_id
+    """)
+    return duckdb.table(name)
+
+
+def write_cohort_ids(site_name: str, ids: duckdb.DuckDBPyRelation) -> str:
+    """Write ``ids`` (one ``hospitalization_id`` column) as the cohort parquet."""
+    _path = cohort_ids_path(site_name)
+    os.makedirs(os.path.dirname(_path), exist_ok=True)
+    duckdb.sql("""
+        FROM ids
+        SELECT DISTINCT hospitalization_id
+        ORDER BY hospitalization_id
+    """).to_parquet(_path)
+    logger.info(f"Saved: {_path}")
+    return _path
+
+
+def register_cohort_ids(site_name: str, shard=None) -> duckdb.DuckDBPyRelation:
+    """Register the cohort as TEMP TABLE ``cohort_ids`` (this shard's part).
+
+    Falls back to the distinct IDs of ``cohort_meta_by_id_imvhr.parquet``
+    when 01 predates the membership parquet — the same cohort, since 01
+    filters the grid to it.
+    """
+    _path = cohort_ids_path(site_name)
+    if not os.path.exists(_path):
+        _path = f"output/{site_name}/cohort_meta_by_id_imvhr.parquet"
+        logger.info(f"{cohort_ids_path(site_name)} absent — cohort IDs from {_path}")
+    _src = duckdb.sql(f"""
+        FROM '{_path}'
+        SELECT DISTINCT hospitalization_id
+        WHERE {shard_predicate(shard)}
+    """)
+    rel = register_ids(COHORT_IDS_TABLE, _src)
+    logger.info(f"Cohort hospitalizations: {rel.count('*').fetchone()[0]:,}")
+    return rel
+
+
+def semi_join_ids(
+    rel: duckdb.DuckDBPyRelation, ids: duckdb.DuckDBPyRelation,
+) -> duckdb.DuckDBPyRelation:
+    """``rel`` restricted to the hospitalizations in ``ids`` (SEMI JOIN)."""
+    return rel.join(ids, 'hospitalization_id', how='semi')
+
+
+def load_cohort_table(
+    table_cls,
+    config_path: str,
+    ids: duckdb.DuckDBPyRelation,
+    columns: "list[str] | None" = None,
+    filters: "dict | None" = None,
+):
+    """``table_cls.from_file`` restricted to ``ids`` by a SEMI JOIN.
+
+    ``filters`` holds the remaining (small) category filters. Rows come
+    back from the raw ``TIMESTAMPTZ`` read, so ``*_dttm`` columns are UTC
+    tz-aware rather than relabeled to the site zone; callers already
+    normalize with ``to_utc(..., naive_means=SITE_TZ)``, which covers both
+    (and naive sources stay naive, as with ``from_file``). ``*_id`` columns
+    are cast to pandas ``string`` as ``from_file`` does.
+    """
+    cfg = get_config_or_params(config_path)
+    # Same snake_case rule clifpy uses to map the class to clif_<table>.
+    table_name = ''.join(
+        '_' + c.lower() if c.isupper() else c for c in table_cls.__name__
+    ).lstrip('_')
+    rel = load_data(
+        table_name, config_path=config_path, return_rel=True,
+        columns=columns, filters=filters,
+    )
+    df = semi_join_ids(rel, ids).df()
+    for col in [c for c in df.columns if c.endswith('_id')]:
+        df[col] = df[col].astype('string')
+    return table_cls(
+        data_directory=cfg['data_directory'],
+        filetype=cfg.get('filetype', 'parquet'),
+        timezone="UTC",
+        output_directory=cfg.get('output_directory'),
+        data=df,
+    )
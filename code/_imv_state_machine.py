@@ -0,0 +1,268 @@
+"""ABT-RISE consensus-window IMV state machine (V2 intubation/extubation).
+
+Two implementations of the same rules:
+
+- ``add_imv_events_v2`` — columnar DuckDB engine used by ``03_outcomes.py``.
+  Stays lazy on a ``DuckDBPyRelation`` (no pandas materialization of the
+  waterfall table) and runs as window SQL over IMV / non-IMV runs.
+- ``count_intubations_v2`` — the original per-row pandas state machine,
+  kept verbatim as the reference implementation for the parity test in
+  ``tests/test_imv_state_machine.py``. Not called by the pipeline.
+
+Why the run formulation is exact: the state machine only ever holds one
+open candidate, anchored at the first row of the current IMV (or non-IMV)
+run, and aborts it as soon as the run ends. So a transition is confirmed
+iff the run's span (last - first ``recorded_dttm``) reaches the window, and
+the patient's on/off-IMV state after each run is simply the type of the
+most recent *qualifying* run. An intubation fires at the start of a
+qualifying IMV run whose previous qualifying run was not IMV; an
+extubation fires at the start of a qualifying non-IMV run whose previous
+qualifying run was IMV. The tracheostomy sentinel truncates the runs at
+the first trach row and closes whatever episode is open there.
+"""
+from __future__ import annotations
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+
+CONSENSUS_INTUB_WINDOW_MIN = 15
+CONSENSUS_EXTUB_WINDOW_MIN = 30
+
+_EVENT_COLS = ('_intub_event_v2', '_extub_event_v2', '_trach_event_v2')
+
+
+def add_imv_events_v2(
+    data,
+    *,
+    intub_window_min: int = CONSENSUS_INTUB_WINDOW_MIN,
+    extub_window_min: int = CONSENSUS_EXTUB_WINDOW_MIN,
+):
+    """Add ``_intub_event_v2`` / ``_extub_event_v2`` / ``_trach_event_v2``.
+
+    Columnar equivalent of :func:`count_intubations_v2` applied per
+    hospitalization. Output flags are identical row-for-row (see the parity
+    test); the trailing-partial-window, trach-sentinel and direct-to-trach
+    rules are preserved:
+
+    - Direct-to-trach: a trach row before any IMV row leaves no pre-trach
+      IMV run, so only ``_trach_event_v2`` fires.
+    - Trach sentinel: runs are computed over rows strictly before the first
+      trach row. If the last pre-trach run is non-IMV while the patient is
+      on IMV, its start gets ``_extub_event_v2`` (pending candidate closed
+      early). If the last pre-trach run is IMV, ``_extub_event_v2`` fires on
+      the trach row itself. Rows after the first trach row never fire.
+    - Trailing partial windows (run still open at end of stream) never fire.
+
+    Polymorphic: pandas DataFrame in → pandas DataFrame out;
+    ``DuckDBPyRelation`` in → ``DuckDBPyRelation`` out (lazy). All input
+    columns are passed through; only the three event columns are added.
+
+    Caller contract: ``data`` has ``hospitalization_id``, ``recorded_dttm``,
+    ``device_category`` (lowercase) and ``tracheostomy`` (0/1 integer, as
+    normalized by the F5 cell in ``03_outcomes.py``). Rows with tied
+    ``recorded_dttm`` within a hospitalization are ordered arbitrarily,
+    matching the ``ORDER BY recorded_dttm`` windows in the SBT cells.
+    """
+    intub_us = int(intub_window_min) * 60_000_000
+    extub_us = int(extub_window_min) * 60_000_000
+    rel = duckdb.sql(f"""
+        WITH ordered AS (
+            FROM data
+            SELECT *
+                , _v2_rn: ROW_NUMBER() OVER (
+                    PARTITION BY hospitalization_id ORDER BY recorded_dttm)
+                , _v2_imv: COALESCE(device_category = 'imv', FALSE)
+                , _v2_trach: COALESCE(tracheostomy = 1, FALSE)
+        )
+        , sentinel AS (
+            FROM ordered
+            SELECT hospitalization_id, recorded_dttm, _v2_rn, _v2_imv
+                , _v2_chg: CASE
+                    WHEN _v2_imv IS DISTINCT FROM LAG(_v2_imv) OVER w
+                    THEN 1 ELSE 0 END
+                -- First trach row per hospitalization; NULL when never trached.
+                , _v2_trach_rn: MIN(CASE WHEN _v2_trach THEN _v2_rn END)
+                    OVER (PARTITION BY hospitalization_id)
+            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY _v2_rn)
+        )
+        , pre_trach AS (
+            -- The state machine halts at the first trach row, so runs are
+            -- only ever observed on the rows before it.
+            FROM sentinel
+            SELECT *
+                , _v2_run_id: SUM(_v2_chg) OVER (
+                    PARTITION BY hospitalization_id ORDER BY _v2_rn)
+            WHERE _v2_trach_rn IS NULL OR _v2_rn < _v2_trach_rn
+        )
+        , runs AS (
+            FROM pre_trach
+            SELECT hospitalization_id, _v2_run_id
+                , _v2_imv: ANY_VALUE(_v2_imv)
+                , _v2_start_rn: MIN(_v2_rn)
+                , _v2_trach_rn: ANY_VALUE(_v2_trach_rn)
+                , _v2_qual: CASE
+                    WHEN ANY_VALUE(_v2_imv)
+                    THEN epoch_us(MAX(recorded_dttm)) - epoch_us(MIN(recorded_dttm)) >= {intub_us}
+                    ELSE epoch_us(MAX(recorded_dttm)) - epoch_us(MIN(recorded_dttm)) >= {extub_us}
+                    END
+            GROUP BY hospitalization_id, _v2_run_id
+        )
+        , run_state AS (
+            FROM runs
+            SELECT *
+                -- On/off-IMV state entering this run = type of the most
+                -- recent qualifying run (NULL = never intubated = off).
+                , _v2_on_before: LAST_VALUE(
+                    CASE WHEN _v2_qual THEN _v2_imv END IGNORE NULLS
+                  ) OVER (
+                    PARTITION BY hospitalization_id ORDER BY _v2_run_id
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+                , _v2_last_run: _v2_run_id = MAX(_v2_run_id)
+                    OVER (PARTITION BY hospitalization_id)
+        )
+        , events AS (
+            FROM run_state
+            SELECT hospitalization_id, _v2_rn: _v2_start_rn
+                , _intub_event_v2: 1, _extub_event_v2: 0, _trach_event_v2: 0
+            WHERE _v2_imv AND _v2_qual AND _v2_on_before IS DISTINCT FROM TRUE
+            UNION ALL
+            FROM run_state
+            SELECT hospitalization_id, _v2_start_rn, 0, 1, 0
+            WHERE NOT _v2_imv AND _v2_on_before = TRUE
+              AND (_v2_qual OR (_v2_last_run AND _v2_trach_rn IS NOT NULL))
+            UNION ALL
+            -- IMV (confirmed or still a candidate) straight into trach:
+            -- close the episode on the trach row.
+            FROM run_state
+            SELECT hospitalization_id, _v2_trach_rn, 0, 1, 0
+            WHERE _v2_imv AND _v2_last_run AND _v2_trach_rn IS NOT NULL
+            UNION ALL
+            FROM sentinel
+            SELECT hospitalization_id, _v2_rn, 0, 0, 1
+            WHERE _v2_rn = _v2_trach_rn
+        )
+        , event_flags AS (
+            FROM events
+            SELECT hospitalization_id, _v2_rn
+                , _intub_event_v2: MAX(_intub_event_v2)
+                , _extub_event_v2: MAX(_extub_event_v2)
+                , _trach_event_v2: MAX(_trach_event_v2)
+            GROUP BY hospitalization_id, _v2_rn
+        )
+        FROM ordered AS o
+        LEFT JOIN event_flags AS e USING (hospitalization_id, _v2_rn)
+        SELECT o.* EXCLUDE (_v2_rn, _v2_imv, _v2_trach)
+            , _intub_event_v2: COALESCE(e._intub_event_v2, 0)::INTEGER
+            , _extub_event_v2: COALESCE(e._extub_event_v2, 0)::INTEGER
+            , _trach_event_v2: COALESCE(e._trach_event_v2, 0)::INTEGER
+    """)
+    if not isinstance(data, pd.DataFrame):
+        return rel
+    result = rel.df()
+    s = result['recorded_dttm']
+    if pd.api.types.is_datetime64_any_dtype(s) and s.dt.tz is not None:
+        result['recorded_dttm'] = s.dt.tz_convert("UTC")
+    return result
+
+
+def count_intubations_v2(group):
+    """ABT-RISE consensus-window state machine over a per-hosp resp slice.
+
+    Reference implementation — the pipeline uses :func:`add_imv_events_v2`.
+
+    Input: a DataFrame slice with columns `recorded_dttm`,
+    `device_category`, `tracheostomy` for ONE hospitalization, sorted
+    ascending by `recorded_dttm`.
+
+    Output: a DataFrame indexed identically to `group` with three
+    binary columns:
+      `_intub_event_v2`: 1 on the first row of each new IMV episode
+          (after a 15-min consensus window).
+      `_extub_event_v2`: 1 on the first row patient leaves IMV
+          (after a 30-min consensus window confirming non-reversion).
+      `_trach_event_v2`: 1 on the row where tracheostomy first appears.
+
+    Rules (per the reference doc lines 96–179):
+      - Direct-to-trach: if a tracheostomy row precedes any IMV row,
+        count zero IMV episodes (mark only `_trach_event_v2 = 1`).
+      - Tracheostomy sentinel: any later trach event closes the open
+        episode (firing `_extub_event_v2` if mid-IMV, then `_trach`)
+        and halts further state-machine processing for that patient.
+      - Consensus windows: a transition is only confirmed once the
+        new state has been sustained for ≥ window_min minutes; if the
+        new state reverts within the window, the transition is aborted
+        and no event is fired.
+    """
+    n = len(group)
+    out = pd.DataFrame(
+        {'_intub_event_v2': 0, '_extub_event_v2': 0, '_trach_event_v2': 0},
+        index=group.index,
+    )
+    if n == 0:
+        return out
+
+    is_imv = group['device_category'].eq('imv').to_numpy()
+    has_trach = group['tracheostomy'].eq(1).to_numpy()
+    dttm = group['recorded_dttm'].to_numpy()
+
+    # Direct-to-trach rule: trach appears before any IMV row.
+    first_trach = np.argmax(has_trach) if has_trach.any() else -1
+    first_imv = np.argmax(is_imv) if is_imv.any() else -1
+    if first_trach >= 0 and (first_imv < 0 or first_trach < first_imv):
+        out.iloc[first_trach, out.columns.get_loc('_trach_event_v2')] = 1
+        return out
+
+    state = 'pre'  # pre / intub_candidate / on_imv / off_imv_candidate / off_imv
+    intub_cand_i = None
+    extub_cand_i = None
+
+    for i in range(n):
+        if has_trach[i]:
+            # Trach sentinel: close any open extub-pending state, then halt.
+            if state == 'off_imv_candidate' and extub_cand_i is not None:
+                out.iloc[extub_cand_i, out.columns.get_loc('_extub_event_v2')] = 1
+            elif state in ('on_imv', 'intub_candidate'):
+                # Patient went straight from IMV to trach — count as extub
+                # event at the trach row (so the IMV episode has a closure).
+                out.iloc[i, out.columns.get_loc('_extub_event_v2')] = 1
+            out.iloc[i, out.columns.get_loc('_trach_event_v2')] = 1
+            return out
+
+        if state == 'pre':
+            if is_imv[i]:
+                intub_cand_i = i
+                state = 'intub_candidate'
+        elif state == 'intub_candidate':
+            if not is_imv[i]:
+                state = 'pre'
+                intub_cand_i = None
+            else:
+                mins = (dttm[i] - dttm[intub_cand_i]) / np.timedelta64(1, 'm')
+                if mins >= CONSENSUS_INTUB_WINDOW_MIN:
+                    out.iloc[intub_cand_i, out.columns.get_loc('_intub_event_v2')] = 1
+                    state = 'on_imv'
+                    intub_cand_i = None
+        elif state == 'on_imv':
+            if not is_imv[i]:
+                extub_cand_i = i
+                state = 'off_imv_candidate'
+        elif state == 'off_imv_candidate':
+            if is_imv[i]:
+                state = 'on_imv'
+                extub_cand_i = None
+            else:
+                mins = (dttm[i] - dttm[extub_cand_i]) / np.timedelta64(1, 'm')
+                if mins >= CONSENSUS_EXTUB_WINDOW_MIN:
+                    out.iloc[extub_cand_i, out.columns.get_loc('_extub_event_v2')] = 1
+                    state = 'off_imv'
+                    extub_cand_i = None
+        elif state == 'off_imv':
+            if is_imv[i]:
+                intub_cand_i = i
+                state = 'intub_candidate'
+
+    # Trailing partial states (window not consummated by end of stream):
+    # leave as no-event. Conservative — partial transitions don't fire.
+    return out
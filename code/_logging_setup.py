@@ -17,16 +17,28 @@ signature, same behavior on the clifpy side. Additions:
    at ``code/_sofa.py:798/947`` are pre-sorted at lines 793-794/942-943,
    so polars' inability to statically verify composite-key sortedness is
    uninformative noise.
+4. Per-stage perf records are bound to the site (``_perf.init_perf``):
+   every script gets a whole-process timing / peak-RSS record in
+   ``output/{site}/perf/stage_timings.jsonl`` and can time named hot spots
+   with ``_perf.perf_stage``.
+5. Under ``make run-sharded`` (``SHARD_INDEX`` / ``SHARD_COUNT`` set) the
+   log files go to the worker's own ``_shard.shard_log_dir``;
+   ``run_sharded.py`` appends them to the site logs afterwards.
 """
 
 from __future__ import annotations
 
 import logging
+import sys
 import warnings
+from pathlib import Path
 from typing import Optional
 
 from clifpy.utils.logging_config import setup_logging as _clifpy_setup_logging
 
+from _perf import init_perf
+from _shard import current_shard, shard_log_dir
+
 
 def setup_logging(
     output_directory: Optional[str] = None,
@@ -34,9 +46,15 @@ def setup_logging(
     console_output: bool = True,
     separate_error_log: bool = True,
 ) -> logging.Logger:
-    """Run clifpy's setup_logging, then layer on warning capture."""
+    """Run clifpy's setup_logging, then layer on warning capture + perf."""
+    log_directory = output_directory
+    shard = current_shard()
+    if shard is not None and output_directory is not None:
+        log_directory = shard_log_dir(
+            Path(output_directory).name, shard, Path(sys.argv[0]).stem,
+        )
     clifpy_root = _clifpy_setup_logging(
-        output_directory=output_directory,
+        output_directory=log_directory,
         level=level,
         console_output=console_output,
         separate_error_log=separate_error_log,
@@ -57,4 +75,6 @@ def setup_logging(
         category=UserWarning,
     )
 
+    init_perf(output_directory)
+
     return clifpy_root
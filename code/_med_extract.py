@@ -0,0 +1,145 @@
+"""Cohort-scoped extract of ``clif_medication_admin_continuous``.
+
+The raw continuous-medication table is the largest CLIF file most sites
+ship (billions of rows at whole-health-system scale) and four stages used
+to scan it independently: NMB exclusion in ``01_cohort.py``, continuous
+sedatives in ``02_exposure.py``, vasopressors in ``04_covariates.py`` and
+the cardiovascular SOFA component in ``_sofa._load_and_convert_medications``.
+
+``write_med_admin_continuous_extract`` (called once from ``01_cohort.py``)
+scans the raw file a single time, pushing down both the union of
+``med_category`` values every consumer needs and the cohort
+hospitalization IDs, and writes a hive-partitioned parquet directory keyed
+by ``med_category``::
+
+    output/{site}/cohort_med_admin_continuous/med_category=<cat>/*.parquet
+
+Each consumer's ``WHERE med_category IN (...)`` then prunes to its own
+partitions instead of re-reading the raw table. ``admin_dttm`` is written
+as UTC ``TIMESTAMPTZ`` (project convention for every ``*_dttm`` on disk);
+all other columns pass through untouched, so consumers keep their own
+mar_action / dose filters and the ``mar_action_category`` presence check
+still reflects the source schema.
+
+Consumers resolve their input through ``med_admin_continuous_source`` /
+``med_extract_path``, which fall back to the raw file when the extract
+has not been written yet (e.g., 02/04 re-run against an older 01 output).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+
+import duckdb
+from clifpy.utils.logging_config import get_logger
+
+from _utils import coerce_dttm_to_utc
+
+logger = get_logger("epi_sedation.med_extract")
+
+
+# Per-consumer med_category lists. Each consumer keeps its own IN-list in
+# its SQL; these exist so the extract's pushdown covers all of them.
+# SOFA_CATEGORIES must stay a superset of `_sofa.REQUIRED_MEDS`
+# (asserted in tests/test_med_extract.py).
+NMB_CATEGORIES = ('cisatracurium', 'vecuronium', 'rocuronium')
+SEDATIVE_CATEGORIES = ('propofol', 'fentanyl', 'midazolam', 'lorazepam', 'hydromorphone')
+VASOPRESSOR_CATEGORIES = (
+    'norepinephrine', 'epinephrine', 'phenylephrine',
+    'dopamine', 'vasopressin', 'angiotensin',
+)
+SOFA_CATEGORIES = ('norepinephrine', 'epinephrine', 'dopamine', 'dobutamine')
+
+EXTRACT_CATEGORIES = tuple(sorted(set(
+    NMB_CATEGORIES + SEDATIVE_CATEGORIES + VASOPRESSOR_CATEGORIES + SOFA_CATEGORIES
+)))
+
+
+def med_extract_dir(site_name: str) -> str:
+    """Site-scoped directory of the partitioned extract."""
+    return f"output/{site_name}/cohort_med_admin_continuous"
+
+
+def med_extract_path(site_name: str) -> "str | None":
+    """Extract directory if it has been written, else None.
+
+    ``None`` tells callers to fall back to the raw CLIF file.
+    """
+    _dir = med_extract_dir(site_name)
+    if os.path.isdir(_dir) and any(
+        f.endswith('.parquet')
+        for _, _, files in os.walk(_dir) for f in files
+    ):
+        return _dir
+    return None
+
+
+def med_admin_continuous_source(data_dir: str, site_name: str) -> str:
+    """DuckDB FROM-clause target for continuous medication reads.
+
+    Returns a ``read_parquet(..., hive_partitioning = true)`` call over the
+    extract when present, otherwise the quoted raw CLIF parquet path.
+    Either form drops into ``FROM {src} c`` unchanged.
+    """
+    _dir = med_extract_path(site_name)
+    if _dir is None:
+        logger.warning(
+            f"Medication extract not found at {med_extract_dir(site_name)}; "
+            f"reading raw clif_medication_admin_continuous.parquet (run 01_cohort.py "
+            f"to build the extract)"
+        )
+        return f"'{data_dir}/clif_medication_admin_continuous.parquet'"
+    return f"read_parquet('{_dir}/*/*.parquet', hive_partitioning = true)"
+
+
+def write_med_admin_continuous_extract(
+    data_dir: str,
+    site_name: str,
+    site_tz: str,
+    hosp_ids_rel: duckdb.DuckDBPyRelation,
+) -> str:
+    """Write the cohort-scoped, ``med_category``-partitioned extract.
+
+    Parameters
+    ----------
+    data_dir : str
+        CLIF data directory (``config["data_directory"]``).
+    site_name : str
+        Lower-cased site name; selects ``output/{site}/``.
+    site_tz : str
+        IANA timezone used to interpret naive ``admin_dttm`` wall-clocks
+        (see :func:`_utils.coerce_dttm_to_utc`).
+    hosp_ids_rel : DuckDBPyRelation
+        One ``hospitalization_id`` column. Must cover every consumer's
+        cohort — 01 passes the pre-weight IMV cohort, which is a superset
+        of the final cohort read by 02/04/SOFA.
+
+    Returns
+    -------
+    str
+        The extract directory (existing contents are replaced).
+    """
+    _dir = med_extract_dir(site_name)
+    _in_list = ", ".join(f"'{c}'" for c in EXTRACT_CATEGORIES)
+    _rel = duckdb.sql(f"""
+        FROM '{data_dir}/clif_medication_admin_continuous.parquet' c
+        SEMI JOIN hosp_ids_rel USING (hospitalization_id)
+        SELECT c.*
+        WHERE c.med_category IN ({_in_list})
+    """)
+    _rel = coerce_dttm_to_utc(_rel, ['admin_dttm'], site_tz)
+    # Replace rather than merge: a stale partition for a category that has
+    # no rows this run would otherwise survive the rewrite.
+    if os.path.isdir(_dir):
+        shutil.rmtree(_dir)
+    os.makedirs(os.path.dirname(_dir), exist_ok=True)
+    _rel.to_parquet(_dir, partition_by=['med_category'])
+    if logger.isEnabledFor(logging.DEBUG):
+        for _cat, _n in duckdb.sql(f"""
+            FROM read_parquet('{_dir}/*/*.parquet', hive_partitioning = true)
+            SELECT med_category, COUNT(*) GROUP BY ALL ORDER BY ALL
+        """).fetchall():
+            logger.debug(f"  {_cat}: {_n:,} rows")
+    logger.info(f"Medication extract written: {_dir} ({len(EXTRACT_CATEGORIES)} categories requested)")
+    return _dir
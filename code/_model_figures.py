@@ -0,0 +1,168 @@
+"""Figure renderers shared by 08_models.py and 08b_models_cascade.py.
+
+Module-level so :class:`_render.RenderQueue` can hand them to its worker
+processes: each takes the already-computed plotting data (a marginal-
+effects frame, forest points, 08b's stage summaries) and returns the
+Figure; saving, dpi and closing are the queue's job. A renderer defined
+in the calling script would be pickled by reference to ``__main__``, which
+a spawn worker can only resolve by re-importing that script.
+"""
+from __future__ import annotations
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+PANEL_LETTERS = ['A', 'B', 'C', 'D', 'E', 'F']
+
+
+def _ggplot_ax(ax) -> None:
+    """Style an axes to look like the ggplot default (gray bg, white grid)."""
+    ax.set_facecolor('#ebebeb')
+    ax.grid(color='white', linewidth=0.8, which='major', zorder=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.tick_params(colors='#4d4d4d', labelsize=8)
+    ax.xaxis.label.set_color('#4d4d4d')
+    ax.yaxis.label.set_color('#4d4d4d')
+
+
+def render_marginal_effects(
+    effects: pd.DataFrame,
+    suptitle: str,
+    ylabel: str = 'Predicted Probability',
+    error: str | None = None,
+):
+    """2×3 marginal-effect curves from a ``predict_marginal_effects`` frame.
+
+    One panel per (panel_row, panel_col): black curve over ``x_actual``
+    with a gray CI ribbon. With ``error`` (prediction failed) the panels
+    carry the message instead of curves; ``effects`` is then the bare grid.
+    """
+    fig, axes = plt.subplots(2, 3, figsize=(12, 7.5))
+    fig.patch.set_facecolor('white')
+    for (row_idx, col_idx), panel in effects.groupby(['panel_row', 'panel_col'], sort=True):
+        ax = axes[row_idx, col_idx]
+        _ggplot_ax(ax)
+        if error is None:
+            ax.fill_between(
+                panel['x_actual'], panel['ci_lo'], panel['ci_hi'],
+                color='#808080', alpha=0.35, zorder=2,
+            )
+            ax.plot(panel['x_actual'], panel['prob'], color='black', linewidth=1.5, zorder=3)
+        else:
+            ax.text(0.5, 0.5, f"failed: {error}", transform=ax.transAxes, ha='center')
+        ax.set_xlabel(panel['xlabel'].iloc[0], fontsize=9)
+        ax.set_ylabel(ylabel, fontsize=9)
+        ax.set_ylim(0, 1)
+        # Panel letter in the top-left corner
+        ax.text(
+            -0.12, 1.08, PANEL_LETTERS[3 * row_idx + col_idx],
+            transform=ax.transAxes,
+            fontsize=14, fontweight='bold', va='top', ha='left',
+        )
+    fig.suptitle(suptitle, fontsize=11, y=1.00)
+    fig.tight_layout()
+    return fig
+
+
+def render_forest(
+    points: pd.DataFrame,
+    predictors: list,
+    percentile_ref: dict,
+    spec_order: list,
+    spec_colors: dict,
+    title: str,
+    figsize: tuple = (9.5, 5.5),
+):
+    """Per-site 10th → 90th percentile OR forest, one jittered dot per spec.
+
+    ``points`` has one row per (predictor, spec) with ``or_`` / ``lo`` /
+    ``hi``; non-finite rows are skipped. Y ticks carry each predictor's
+    raw x10 / x90 anchors from ``percentile_ref``.
+    """
+    fig, ax = plt.subplots(figsize=figsize)
+    jitter = np.linspace(-0.20, 0.20, len(spec_order))
+    by_cell = {(r.predictor, r.spec): r for r in points.itertuples(index=False)}
+
+    ymin, ymax = -0.6, len(predictors) - 0.4
+    for i, (pred, _) in enumerate(predictors):
+        y_base = len(predictors) - 1 - i
+        for j, spec in enumerate(spec_order):
+            r = by_cell.get((pred, spec))
+            if r is None or not (np.isfinite(r.or_) and np.isfinite(r.lo) and np.isfinite(r.hi)):
+                continue
+            ax.errorbar(
+                r.or_, y_base + jitter[j],
+                xerr=[[r.or_ - r.lo], [r.hi - r.or_]],
+                fmt='o', color=spec_colors[spec], markersize=4,
+                capsize=2, elinewidth=1.0, label=spec if i == 0 else None,
+            )
+
+    ytick_labels = []
+    ytick_pos = []
+    for i, (pred, pred_label) in enumerate(predictors):
+        info = percentile_ref.get(pred, {})
+        x10 = info.get('x10_raw', np.nan)
+        x90 = info.get('x90_raw', np.nan)
+        ytick_labels.append(f"{pred_label}\nx10={x10:+.2f}, x90={x90:+.2f}")
+        ytick_pos.append(len(predictors) - 1 - i)
+    ax.set_yticks(ytick_pos)
+    ax.set_yticklabels(ytick_labels, fontsize=8)
+    ax.set_ylim(ymin, ymax)
+
+    ax.set_xscale('log')
+    ax.set_xlim(0.5, 2.0)
+    ax.axvline(1.0, color='dimgray', linewidth=0.8, linestyle='--', zorder=0)
+    ax.set_xlabel('Odds ratio (10th → 90th percentile shift, log scale, clipped to [0.5, 2.0])', fontsize=9)
+    ax.set_title(title, fontsize=11)
+    ax.grid(True, axis='x', linewidth=0.4, alpha=0.4, zorder=0)
+
+    handles, labels = ax.get_legend_handles_labels()
+    seen = set()
+    dedup = [(h, l) for h, l in zip(handles, labels) if not (l in seen or seen.add(l))]
+    if dedup:
+        ax.legend(
+            [h for h, _ in dedup], [l for _, l in dedup],
+            loc='upper center', bbox_to_anchor=(0.5, 1.10),
+            ncol=len(dedup), fontsize=8, frameon=False,
+        )
+
+    fig.tight_layout()
+    return fig
+
+
+def render_flow_diagram(cohort_summaries: list, site_name: str):
+    """08b's liberation-cascade flow: one stacked bar per stage.
+
+    ``cohort_summaries`` holds 08b's per-stage rows (``stage``, ``title``,
+    ``n_rows``, ``outcome_positive_rate``), top stage first.
+    """
+    fig, ax = plt.subplots(figsize=(8, 1.5 * len(cohort_summaries) + 1))
+    ax.set_facecolor('#fafafa')
+    n_stages = len(cohort_summaries)
+    y_positions = list(range(n_stages - 1, -1, -1))
+    palette = ['#5e3c99', '#1f77b4', '#2ca02c', '#9467bd', '#d62728', '#8c564b']
+    labels = [
+        f"{s['stage'].upper()}\n{s['title']}\nn_rows = {s['n_rows']:,}\noutcome rate = {s['outcome_positive_rate']:.2%}"
+        for s in cohort_summaries
+    ]
+    for i, (lab, y) in enumerate(zip(labels, y_positions)):
+        color = palette[i % len(palette)]
+        ax.barh(y, 1.0, color=color, alpha=0.30, edgecolor=color, linewidth=1.5, height=0.7)
+        ax.text(0.05, y, lab, va='center', fontsize=9)
+        if i < n_stages - 1:
+            ax.annotate(
+                '', xy=(0.5, y_positions[i + 1] + 0.4),
+                xytext=(0.5, y - 0.4),
+                arrowprops=dict(arrowstyle='->', color='dimgray', lw=1.0),
+            )
+    ax.set_xlim(0, 1.05)
+    ax.set_ylim(-0.7, n_stages - 0.3)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    for sp in ax.spines.values():
+        sp.set_visible(False)
+    ax.set_title(f'Liberation cascade — {site_name}', fontsize=12, pad=10)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,619 @@
+"""Process-pool fitting of 08_models.py's (outcome, model_type, spec) grid.
+
+Each grid cell is an independent GEE / logit fit (``maxiter=500``, ``cr()``
+spline terms), so :func:`fit_grid` dispatches them to a process pool
+sized to the available cores and yields the outcomes back **in job
+order** — log lines, ``fitted`` / ``fit_meta`` and the fit-summary rows
+come out identical to the old serial loop regardless of which worker
+finished first.
+
+The scaled modeling frame is built once in the notebook and handed to
+each worker once (pool initializer; inherited copy-on-write under fork),
+not per job. A job fits on that frame projected to its formula's columns.
+
+Fits run from cached design matrices rather than re-parsing the formula
+each time: a :class:`DesignCache` bound to the frame builds each spec's
+patsy RHS (``cr()`` bases on the fixed knots, ``C()`` dummies) once per
+complete-case row set and every outcome / model type with that row set
+reuses it. Models are built on the arrays with the formula and
+``design_info`` attached exactly as ``from_formula`` would, so parameter
+names and covariances match a formula fit.
+
+Every cell comes back as a :class:`FittedModel` (coefficients,
+covariance, N and the patsy design, with ``predict`` for CI curves)
+rather than the statsmodels result, which drags the full design matrix
+along. That keeps worker payloads small and lets :class:`FitStore` persist fits as params + covariance in one
+parquet (``output/{site}/models/fit_store.parquet``), keyed by (cohort,
+outcome, model_type, spec) and invalidated by a fingerprint of the
+formula, the modeling columns' contents and this module. A re-run with
+unchanged inputs — e.g. after a label or figure tweak — loads every fit
+instead of re-fitting; ``rerun_models: true`` in the site config forces a
+refit.
+
+``MODEL_FIT_WORKERS=<n>`` overrides the pool size; ``MODEL_FIT_WORKERS=1``
+fits serially in-process (no pool), which is also what a 1-CPU host gets.
+
+The pool forks where that is safe (Linux), so workers never re-import the
+calling script. Under spawn (macOS, Windows) the caller must keep its run
+behind ``if __name__ == "__main__":``; a grid requested from inside a pool
+worker — an unguarded script re-executed on import — fits serially
+rather than nesting pools.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from clifpy.utils.logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger("epi_sedation.model_fit")
+
+FIT_WORKERS_ENV = "MODEL_FIT_WORKERS"
+
+
+# ── Design matrices ────────────────────────────────────────────────────
+def formula_columns(formula: str, data: pd.DataFrame) -> list[str]:
+    """Columns of ``data`` named in ``formula``, plus hospitalization_id.
+
+    Substring match (the historical 08 rule): a superset of the true
+    formula variables, which is what the dropna / projection need.
+    """
+    names = [c for c in data.columns if c in formula]
+    if 'hospitalization_id' not in names:
+        names.append('hospitalization_id')
+    return names
+
+
+def formula_variables(formula: str, data: pd.DataFrame) -> list[str]:
+    """Columns of ``data`` the formula's terms actually evaluate.
+
+    The rows patsy keeps under its NA-drop are the complete cases of
+    exactly these columns (unlike the :func:`formula_columns` superset).
+    """
+    import patsy
+
+    desc = patsy.ModelDesc.from_formula(formula)
+    names = {
+        node.id
+        for term in desc.lhs_termlist + desc.rhs_termlist
+        for factor in term.factors
+        for node in ast.walk(ast.parse(factor.code, mode='eval'))
+        if isinstance(node, ast.Name)
+    }
+    return [c for c in data.columns if c in names]
+
+
+def design_columns(model_type: str, formula: str, data: pd.DataFrame) -> list[str]:
+    """Columns whose complete cases are the rows a ``model_type`` fit uses.
+
+    GEE: the formula's own variables + cluster id (patsy's NA-drop).
+    Logit: the historical :func:`formula_columns` superset dropna, which
+    keeps the cluster-robust ``groups`` aligned with the residuals.
+    """
+    if model_type == 'gee':
+        cols = formula_variables(formula, data)
+        if 'hospitalization_id' not in cols:
+            cols.append('hospitalization_id')
+        return cols
+    return formula_columns(formula, data)
+
+
+class DesignCache:
+    """Formula RHS design matrices over one frame, keyed by (RHS, row mask).
+
+    The row mask is the complete-case set of the columns a fit drops NaNs
+    on, so a design is shared by every outcome whose rows coincide and
+    rebuilt only where they differ (``cr()`` bounds follow the rows).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self._designs: dict[tuple[str, bytes], pd.DataFrame] = {}
+        self.built = 0
+        self.reused = 0
+
+    def rows(self, columns: list[str]) -> tuple[pd.DataFrame, np.ndarray]:
+        """Complete cases of ``columns`` (projected) and their row mask."""
+        mask = self.data[columns].notna().all(axis=1).to_numpy()
+        return self.data.loc[mask, columns], mask
+
+    def design(self, formula: str, columns: list[str]) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """``(frame, exog)`` — complete cases of ``columns`` and the RHS design on them."""
+        import patsy
+
+        frame, mask = self.rows(columns)
+        key = (formula.split('~', 1)[1].strip(), np.packbits(mask).tobytes())
+        exog = self._designs.get(key)
+        if exog is None:
+            exog = patsy.dmatrix(key[0], frame, return_type='dataframe')
+            self._designs[key] = exog
+            self.built += 1
+        else:
+            self.reused += 1
+        return frame, exog
+
+
+def design_model(model_cls, formula: str, frame: pd.DataFrame, exog: pd.DataFrame, **kwargs):
+    """``model_cls.from_formula(formula, frame)`` on a prebuilt ``exog``.
+
+    Attaches ``formula`` / ``design_info`` / ``data.frame`` the way
+    ``from_formula`` does, so predictions on new rows go through the
+    design and an unpickled result rebuilds its ``design_info``.
+    """
+    outcome = formula.split('~', 1)[0].strip()
+    mod = model_cls(frame[outcome].astype(float), exog, formula=formula,
+                    design_info=exog.design_info, **kwargs)
+    mod.formula = formula
+    mod.data.frame = frame
+    return mod
+
+
+# ── Fit functions ──────────────────────────────────────────────────────
+# maxiter=500 (statsmodels defaults: Logit=35, GEE=60). The earlier
+# 100-iter ceiling stopped success_extub_v2 × daydose_rcs_diff short of
+# convergence on logit + logit_asym (function value plateaued at ~0.4407
+# with near-zero gradient). 500 gives the optimizer headroom; fits still
+# hitting the cap here are structurally ill-conditioned rather than
+# iteration-bound, and the NO_CONVERGE flag propagates into
+# models_coeffs.csv (fit_status column) for downstream filtering.
+def fit_gee(formula: str, designs: DesignCache):
+    import statsmodels.api as sm
+
+    _frame, _exog = designs.design(formula, design_columns('gee', formula, designs.data))
+    m = design_model(sm.GEE, formula, _frame, _exog,
+                     groups=_frame['hospitalization_id'],
+                     family=sm.families.Binomial())
+    return m.fit(maxiter=500)
+
+
+def fit_logit(formula: str, designs: DesignCache):
+    """Cluster-robust logit (groups=hospitalization_id).
+
+    Methodologically appropriate when within-cluster correlation
+    exists (avg cluster size ~5 days here). On cr() basis × binary
+    terminal-event outcome the sandwich estimator can produce
+    degenerate link-scale variance — see `fit_logit_asym` for the
+    pragmatic alternative used in v1/v3 of the cross-site marginal-
+    effects figure. v2 of the cross-site figure uses this version
+    deliberately to illustrate the failure mode.
+    """
+    import statsmodels.api as sm
+
+    _frame, _exog = designs.design(formula, design_columns('logit', formula, designs.data))
+    m = design_model(sm.Logit, formula, _frame, _exog)
+    return m.fit(cov_type='cluster',
+                 cov_kwds={'groups': _frame['hospitalization_id']},
+                 maxiter=500, disp=False)
+
+
+def fit_logit_asym(formula: str, designs: DesignCache):
+    """Asymptotic-SE logit (no cluster-robust).
+
+    Anti-conservative when within-cluster correlation exists, but
+    produces usable prediction CIs where `fit_logit` can degenerate.
+    Used by v1 (`_full` spec) and v3 (`_diff` spec) of the cross-site
+    marginal-effects figure.
+    """
+    import statsmodels.api as sm
+
+    _frame, _exog = designs.design(formula, design_columns('logit_asym', formula, designs.data))
+    m = design_model(sm.Logit, formula, _frame, _exog)
+    return m.fit(maxiter=500, disp=False)
+
+
+FIT_FNS = {
+    'gee': fit_gee,
+    'logit': fit_logit,
+    'logit_asym': fit_logit_asym,
+}
+
+
+def is_converged(result) -> bool:
+    # Logit exposes mle_retvals['converged']; GEE exposes result.converged.
+    # Default True when neither attribute is present (e.g. future statsmodels
+    # API change) so we never spuriously flag a fit as non-converged.
+    mle = getattr(result, 'mle_retvals', None)
+    if isinstance(mle, dict) and 'converged' in mle:
+        return bool(mle['converged'])
+    if hasattr(result, 'converged'):
+        return bool(result.converged)
+    return True
+
+
+# ── Fitted models ──────────────────────────────────────────────────────
+@dataclass
+class FittedModel:
+    """Coefficients, covariance, N and design of one fit.
+
+    The part of a statsmodels result that 08 / 08b read (params, bse,
+    pvalues, conf_int, cov_params, nobs, design contrasts, predictions).
+    ``design_info`` is patsy's and does not pickle; :func:`fit_grid`
+    reattaches it from the parent's DesignCache.
+    """
+
+    formula: str
+    params: pd.Series
+    cov: pd.DataFrame
+    nobs: float
+    design_info: Any = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_result(cls, result) -> "FittedModel":
+        return cls(
+            formula=result.model.formula,
+            params=result.params.copy(),
+            cov=result.cov_params(),
+            nobs=float(result.nobs),
+            design_info=result.model.data.design_info,
+        )
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['design_info'] = None
+        return state
+
+    @property
+    def bse(self) -> pd.Series:
+        return pd.Series(np.sqrt(np.diag(self.cov.to_numpy())), index=self.params.index)
+
+    @property
+    def pvalues(self) -> pd.Series:
+        from scipy import stats
+
+        return pd.Series(2 * stats.norm.sf(np.abs(self.params / self.bse)), index=self.params.index)
+
+    def cov_params(self) -> pd.DataFrame:
+        return self.cov
+
+    def conf_int(self, alpha: float = 0.05) -> pd.DataFrame:
+        from scipy import stats
+
+        q = stats.norm.ppf(1 - alpha / 2)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+    def predict(self, new_data: pd.DataFrame, alpha: float = 0.05) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Predicted probability on ``new_data`` with its ``1 - alpha`` CI.
+
+        Linear predictor ± z·SE (delta method on the link scale) mapped
+        through the inverse logit — what ``get_prediction`` reports for
+        the binomial GEE and logit fits here.
+        """
+        from patsy import dmatrix
+        from scipy import special, stats
+
+        x = np.asarray(dmatrix(self.design_info, new_data, return_type='matrix'))
+        xb = x @ self.params.to_numpy()
+        se = np.sqrt((x * np.dot(self.cov.to_numpy(), x.T).T).sum(1))
+        q = stats.norm.ppf(1 - alpha / 2)
+        return special.expit(xb), special.expit(xb - q * se), special.expit(xb + q * se)
+
+
+# ── Scheduler ──────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class FitJob:
+    outcome: str
+    model_type: str
+    spec: str
+    formula: str
+    # Pre-fit rank check. Linear specs only: cr() bases are rank-deficient
+    # by construction and statsmodels copes, so the check would false-flag
+    # every RCS spec.
+    check_rank: bool = True
+    # Row-filter label: 08's modeling cohort, or an 08b cascade stage.
+    cohort: str = 'modeling'
+
+
+@dataclass
+class FitOutcome:
+    job: FitJob
+    status: str                 # OK / NO_CONVERGE / FAIL / SKIP_SINGULAR
+    result: Optional[FittedModel] = None
+    n_obs: int = 0
+    n_events: int = 0
+    n_clusters: int = 0
+    fail_reason: str = ''
+    fit_seconds: float = 0.0
+    from_store: bool = False
+
+
+_WORKER_DESIGNS: Optional[DesignCache] = None
+
+
+def _init_worker(data: pd.DataFrame) -> None:
+    global _WORKER_DESIGNS
+    _WORKER_DESIGNS = DesignCache(data)
+
+
+def run_fit_job(job: FitJob, designs: Optional[DesignCache] = None) -> FitOutcome:
+    """Fit one grid cell (rank check → fit → n_obs/n_events/n_clusters)."""
+    designs = _WORKER_DESIGNS if designs is None else designs
+    t0 = time.perf_counter()
+    # Same dropna rule as fit_logit / fit_logit_asym so n_events /
+    # n_clusters are computed on the row set the fit consumed.
+    _cols = formula_columns(job.formula, designs.data)
+    _d_for_count, _ = designs.rows(_cols)
+    n_events = int(_d_for_count[job.outcome].sum())
+
+    if job.check_rank:
+        try:
+            _, _x = designs.design(job.formula, _cols)
+            rank = int(np.linalg.matrix_rank(_x.values, tol=1e-10))
+            ncols = int(_x.shape[1])
+        except Exception:
+            # If we can't even build the design matrix, let the fit
+            # handle the failure path; don't pre-judge.
+            rank = ncols = 0
+        if rank < ncols:
+            return FitOutcome(
+                job, 'SKIP_SINGULAR', n_obs=len(_d_for_count), n_events=n_events,
+                fail_reason=f'design matrix rank {rank}/{ncols}',
+                fit_seconds=time.perf_counter() - t0,
+            )
+
+    try:
+        result = FIT_FNS[job.model_type](job.formula, designs)
+    except Exception as e:
+        return FitOutcome(
+            job, 'FAIL', n_obs=len(_d_for_count), n_events=n_events,
+            fail_reason=str(e)[:200],  # truncate long tracebacks
+            fit_seconds=time.perf_counter() - t0,
+        )
+    converged = is_converged(result)
+    return FitOutcome(
+        job, 'OK' if converged else 'NO_CONVERGE', result=FittedModel.from_result(result),
+        n_obs=int(result.nobs), n_events=n_events,
+        n_clusters=int(_d_for_count['hospitalization_id'].nunique()),
+        fail_reason='' if converged else 'maxiter reached without convergence',
+        fit_seconds=time.perf_counter() - t0,
+    )
+
+
+def fit_workers(n_jobs: int) -> int:
+    """Pool size: ``MODEL_FIT_WORKERS`` if set, else one per core (≤ jobs)."""
+    env = os.getenv(FIT_WORKERS_ENV)
+    if env:
+        n = int(env)
+        if n < 1:
+            raise ValueError(f"{FIT_WORKERS_ENV} must be >= 1, got {env!r}")
+        return min(n, max(n_jobs, 1))
+    return max(1, min(os.cpu_count() or 1, n_jobs))
+
+
+# ── Fit store ──────────────────────────────────────────────────────────
+class _ColumnDigests:
+    """Per-column content hashes of one frame, computed once per column."""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self._digests: dict[str, str] = {}
+
+    def __call__(self, columns: list[str]) -> str:
+        for col in columns:
+            if col not in self._digests:
+                _h = pd.util.hash_pandas_object(self.data[col], index=False).to_numpy()
+                self._digests[col] = hashlib.sha256(_h.tobytes()).hexdigest()
+        return hashlib.sha256(
+            "".join(f"{c}={self._digests[c]};" for c in columns).encode()
+        ).hexdigest()
+
+
+def _code_fingerprint() -> str:
+    return hashlib.sha256(
+        Path(__file__).read_bytes()
+        + f"statsmodels={version('statsmodels')};patsy={version('patsy')}".encode()
+    ).hexdigest()
+
+
+def fit_fingerprint(job: FitJob, digests: _ColumnDigests) -> str:
+    """Formula + fit options + modeling-column contents + fitter code."""
+    return hashlib.sha256("|".join((
+        job.model_type, job.formula, str(job.check_rank),
+        digests(formula_columns(job.formula, digests.data)),
+        _code_fingerprint(),
+    )).encode()).hexdigest()
+
+
+@contextmanager
+def _store_lock(path: Path) -> Iterator[None]:
+    """Exclusive cross-process lock on ``<path>.lock`` (blocks until held)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + '.lock'), 'a+') as f:
+        f.seek(0)
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FitStore:
+    """Fitted grid cells on disk, keyed by (cohort, outcome, model_type, spec).
+
+    One row per cell in a parquet: status + counts for every cell, and
+    param names / params / row-major covariance for cells that produced a
+    fit. A cell is served from the store only when its stored fingerprint
+    equals the current one; ``refresh=True`` ignores stored cells (but
+    still writes the new fits back).
+
+    08 and 08b share one store and may run at the same time, so
+    :meth:`flush` re-reads the file under a lock and replaces only the
+    cells this process fitted — the other script's fits written since
+    this store was opened are kept.
+    """
+
+    def __init__(self, path: "str | Path", refresh: bool = False):
+        self.path = Path(path)
+        self.refresh = refresh
+        self._rows = self._read()
+        self._put: dict[tuple, dict] = {}
+
+    def _read(self) -> dict[tuple, dict]:
+        if not self.path.exists():
+            return {}
+        return {
+            (rec['cohort'], rec['outcome'], rec['model_type'], rec['spec']): rec
+            for rec in pd.read_parquet(self.path).to_dict('records')
+        }
+
+    @staticmethod
+    def _key(job: FitJob) -> tuple:
+        return (job.cohort, job.outcome, job.model_type, job.spec)
+
+    def get(self, job: FitJob, fingerprint: str) -> Optional[FitOutcome]:
+        rec = self._rows.get(self._key(job))
+        if self.refresh or rec is None or rec['fingerprint'] != fingerprint:
+            return None
+        result = None
+        if len(rec['param_names']):
+            names = list(rec['param_names'])
+            result = FittedModel(
+                formula=job.formula,
+                params=pd.Series(np.asarray(rec['params'], dtype=float), index=names),
+                cov=pd.DataFrame(
+                    np.asarray(rec['cov'], dtype=float).reshape(len(names), len(names)),
+                    index=names, columns=names,
+                ),
+                nobs=float(rec['nobs']),
+            )
+        return FitOutcome(
+            job, rec['status'], result=result,
+            n_obs=int(rec['n_obs']), n_events=int(rec['n_events']),
+            n_clusters=int(rec['n_clusters']), fail_reason=rec['fail_reason'],
+            fit_seconds=float(rec['fit_seconds']), from_store=True,
+        )
+
+    def put(self, outcome: FitOutcome, fingerprint: str) -> None:
+        job, fit = outcome.job, outcome.result
+        self._put[self._key(job)] = self._rows[self._key(job)] = {
+            'cohort': job.cohort, 'outcome': job.outcome,
+            'model_type': job.model_type, 'spec': job.spec,
+            'fingerprint': fingerprint, 'status': outcome.status,
+            'n_obs': outcome.n_obs, 'n_events': outcome.n_events,
+            'n_clusters': outcome.n_clusters, 'fail_reason': outcome.fail_reason,
+            'fit_seconds': outcome.fit_seconds,
+            'nobs': fit.nobs if fit is not None else 0.0,
+            'param_names': list(fit.params.index) if fit is not None else [],
+            'params': fit.params.to_list() if fit is not None else [],
+            'cov': fit.cov.to_numpy().ravel().tolist() if fit is not None else [],
+        }
+
+    def flush(self) -> None:
+        """Merge this process's new cells into the on-disk store."""
+        if not self._put:
+            return
+        with _store_lock(self.path):
+            rows = {**self._read(), **self._put}
+            _tmp = self.path.with_suffix(f'.parquet.{os.getpid()}.tmp')
+            pd.DataFrame(list(rows.values())).to_parquet(_tmp, index=False)
+            os.replace(_tmp, self.path)
+        self._rows.update(rows)
+        self._put.clear()
+
+
+def _pool_context():
+    """fork on Linux; the platform default (spawn) on macOS / Windows.
+
+    fork is offered on macOS but unsafe there once system frameworks
+    (Accelerate BLAS) have started threads, which is why Python switched
+    its default.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _fit_jobs(
+    jobs: list[FitJob],
+    data: pd.DataFrame,
+    designs: DesignCache,
+    workers: int,
+) -> Iterator[FitOutcome]:
+    if workers > 1 and multiprocessing.parent_process() is not None:
+        logger.warning(
+            "Model grid requested inside a worker process (script not behind "
+            "`if __name__ == \"__main__\":`?) — fitting serially"
+        )
+        workers = 1
+    if workers <= 1:
+        for job in jobs:
+            yield run_fit_job(job, designs)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(data,),
+        mp_context=_pool_context(),
+    ) as pool:
+        futures = [pool.submit(run_fit_job, job) for job in jobs]
+        for fut in futures:
+            yield fut.result()
+
+
+def fit_grid(
+    jobs: Iterable[FitJob],
+    data: pd.DataFrame,
+    workers: Optional[int] = None,
+    store: Optional[FitStore] = None,
+) -> Iterator[FitOutcome]:
+    """Fit ``jobs`` on ``data``; yield outcomes in job order.
+
+    With a ``store``, cells whose fingerprint matches are loaded instead
+    of fitted, and fresh fits are written back when the grid finishes.
+    """
+    jobs = list(jobs)
+    designs = DesignCache(data)
+    stored: dict[FitJob, FitOutcome] = {}
+    prints: dict[FitJob, str] = {}
+    if store is not None:
+        _digests = _ColumnDigests(data)
+        prints = {job: fit_fingerprint(job, _digests) for job in jobs}
+        for job in jobs:
+            hit = store.get(job, prints[job])
+            if hit is not None:
+                stored[job] = hit
+    todo = [job for job in jobs if job not in stored]
+    workers = fit_workers(len(todo)) if workers is None else workers
+    logger.info(
+        f"Model grid: {len(jobs)} cells — {len(stored)} from the fit store, "
+        f"{len(todo)} to fit on {workers if todo else 0} worker process(es)"
+    )
+    fresh = _fit_jobs(todo, data, designs, workers)
+    try:
+        for job in jobs:
+            outcome = stored.get(job) or next(fresh)
+            fit = outcome.result
+            if fit is not None and fit.design_info is None:
+                _, _exog = designs.design(
+                    job.formula, design_columns(job.model_type, job.formula, data)
+                )
+                fit.design_info = _exog.design_info
+            if store is not None and not outcome.from_store:
+                store.put(outcome, prints[job])
+            yield outcome
+    finally:
+        fresh.close()
+        if store is not None:
+            store.flush()
@@ -0,0 +1,193 @@
+"""Modeling constants and helpers shared by 08_models.py and 08b_models_cascade.py.
+
+08 is a marimo notebook, so 08b cannot import its cell globals; both now
+import the pieces they had in common from here instead of 08b carrying
+copies that drifted (08b's scales were still the pre-2026-05-11 per-10 /
+per-0.1 ones):
+
+- ``VAR_DISPLAY`` / ``HURDLE_INDICATORS`` — per-variable scaling + labels
+  and the hurdle (rate → any-use indicator) pairing;
+- :func:`load_modeling_cohort` — ``model_input_by_id_imvday.parquet`` with
+  the daydose-scope alias and the outcome-modeling row filter;
+- :func:`scale_frame` / :func:`build_reference_row` — training-space
+  scaling and the median/mode reference row for predictions;
+- :func:`marginal_grid` / :func:`predict_marginal_effects` — the stacked
+  focal-variable grid behind the 2×3 marginal-effect figures, predicted
+  for all panels of a fit in one design matrix.
+
+Formulas stay with their scripts: 08's specs use fixed clinical knots,
+08b's use per-stage quartile knots.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Central configuration for variable scaling + display labels.
+# To change a scale (e.g., age per 10 yrs): edit the 'scale' divisor.
+# To change a label: edit 'label'.
+# To add a new scaled variable: add a new entry.
+#
+# UNIT NOTE: Phase 2 (2026-04-27): propofol exposures are now in
+# mcg/kg/min (the bedside pump-display unit) thanks to the pre-attached
+# weight column in 02_exposure.py and the preferred_units change to
+# mcg/kg/min. Other drugs unchanged: fentanyl mcg/hr, midazolam mg/hr.
+# Scales below: propofol "per 10 mcg/kg/min" matches typical pump
+# titration steps (5–25 mcg/kg/min increments).
+VAR_DISPLAY = {
+    # Exposures (day-night rate differences). 2026-05-11: standardized
+    # to fixed clinical units across diffs and daytime: prop = per 10
+    # mcg/kg/min, fent eq = per 25 mcg/hr, midaz eq = per 1 mg/hr.
+    # Replaces the prior mixed scales (fent per 10, midaz per 0.1).
+    'prop_dif_mcg_kg_min': {'scale': 10, 'label': 'Δ propofol (per 10 mcg/kg/min)'},
+    'fenteq_dif_mcg_hr':   {'scale': 25, 'label': 'Δ fentanyl eq (per 25 mcg/hr)'},
+    'midazeq_dif_mg_hr':   {'scale': 1,  'label': 'Δ midazolam eq (per 1 mg/hr)'},
+    # Daytime absolute rates (same fixed scales as the diffs above)
+    '_prop_day_mcg_kg_min': {'scale': 10, 'label': 'Daytime propofol (per 10 mcg/kg/min)'},
+    '_fenteq_day_mcg_hr':   {'scale': 25, 'label': 'Daytime fentanyl eq (per 25 mcg/hr)'},
+    '_midazeq_day_mg_hr':   {'scale': 1,  'label': 'Daytime midazolam eq (per 1 mg/hr)'},
+    # Hurdle binaries: any 24h exposure (day OR night, yes/no). scale=1
+    # keeps the column 0/1 — the regression OR (= 10→90 OR when ≥10% of
+    # rows are 1) is interpretable as "odds ratio for any exposure vs
+    # none." 24h indicator (vs daytime-only) avoids misclassifying
+    # night-only-sedated patients as non-users.
+    '_prop_any':   {'scale': 1, 'label': 'Any propofol use (day or night, yes/no)'},
+    '_fenteq_any': {'scale': 1, 'label': 'Any fentanyl eq use (day or night, yes/no)'},
+    '_midazeq_any': {'scale': 1, 'label': 'Any midazolam eq use (day or night, yes/no)'},
+    # Other continuous covariates
+    'age':          {'scale': 1,   'label': 'Age (per year)'},
+    '_nth_day':     {'scale': 1,   'label': 'Day on IMV (per day)'},
+    'cci_score':    {'scale': 1,   'label': 'Charlson CCI (per point)'},
+    'sofa_total':   {'scale': 1,   'label': 'SOFA total (per point)'},
+    'nee_7am':      {'scale': 0.1, 'label': 'NEE 7am (per 0.1 mcg/kg/min)'},
+    'nee_7pm':      {'scale': 0.1, 'label': 'NEE 7pm (per 0.1 mcg/kg/min)'},
+    # Body habitus. weight_kg is in BASELINE so it appears in every
+    # spec; bmi is retained in case a future BMI-adjusted spec is added.
+    'weight_kg':    {'scale': 10,  'label': 'Weight (per 10 kg)'},
+    'bmi':          {'scale': 5,   'label': 'BMI (per 5 kg/m²)'},
+}
+
+# Hurdle pairing: daytime continuous rate → its 24h any-use indicator.
+# Used for the PERCENTILE_REF non-zero filtering and to force the
+# indicator to 1 when evaluating a rate's contrast / marginal curve.
+HURDLE_INDICATORS = {
+    '_prop_day_mcg_kg_min': '_prop_any',
+    '_fenteq_day_mcg_hr':   '_fenteq_any',
+    '_midazeq_day_mg_hr':   '_midazeq_any',
+}
+
+# Alias the `_total` (cont + intermittent) daytime/night dose columns onto
+# the unsuffixed names the model formulas use. Manuscript primary scope is
+# "all sedation forms" = `_total`; pass "_cont" for the continuous-only SA.
+# (Pipeline produces both _cont and _total; we never use both at once.)
+DAYDOSE_SCOPE = "_total"
+
+
+def load_modeling_cohort(site_name: str, daydose_scope: str = DAYDOSE_SCOPE) -> pd.DataFrame:
+    """Outcome-modeling rows of ``output/{site}/model_input_by_id_imvday.parquet``.
+
+    Phase 4 cutover (2026-05-08): byte-equivalent to the legacy
+    modeling_dataset.parquet on the surviving cohort — IMV days after
+    day 0 with both next-day primary outcomes observed.
+    """
+    full = pd.read_parquet(f"output/{site_name}/model_input_by_id_imvday.parquet")
+    alias = {
+        f"{stem}{daydose_scope}": stem
+        for stem in (
+            '_prop_day_mcg_kg_min', '_prop_night_mcg_kg_min',
+            '_fenteq_day_mcg_hr', '_fenteq_night_mcg_hr',
+            '_midazeq_day_mg_hr', '_midazeq_night_mg_hr',
+        )
+    }
+    full = full.rename(columns=alias)
+    return full.loc[
+        (full["_nth_day"] > 0)
+        & full["sbt_done_next_day"].notna()
+        & full["success_extub_next_day"].notna()
+    ].reset_index(drop=True)
+
+
+def scale_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of ``df`` with VAR_DISPLAY columns divided by their scale.
+
+    Always a copy, so a re-run never double-scales the caller's frame.
+    """
+    out = df.copy()
+    for col, info in VAR_DISPLAY.items():
+        if col in out.columns and info['scale'] != 1:
+            out[col] = out[col] / info['scale']
+    return out
+
+
+def build_reference_row(df_scaled: pd.DataFrame) -> dict:
+    """Median for numeric columns, mode for object/category columns.
+
+    Pandas 2.3 rejects 'str' as a select_dtypes argument (TypeError
+    'numpy string dtypes are not allowed, use \\'str\\' or \\'object\\''
+    — paradoxically). Use 'object' alone, plus 'category' for any
+    clinical-level groupings. Categoricals fall through both buckets
+    so .mode() handles them without explicit branching.
+    """
+    ref = df_scaled.median(numeric_only=True).to_dict()
+    for col in df_scaled.select_dtypes(include=['object', 'category']).columns:
+        ref[col] = df_scaled[col].mode().iloc[0]
+    return ref
+
+
+def marginal_grid(cohort: pd.DataFrame, focal_vars: list, n_points: int = 50) -> pd.DataFrame:
+    """Stacked focal-variable grids for the marginal-effect panels.
+
+    ``focal_vars`` is the panel layout — rows of (column, x-axis label).
+    Each panel spans its column's observed 2.5–97.5 percentile range in
+    raw units (``x_actual``) with the training-space value alongside
+    (``x_scaled``). Panels whose column has no observed values are left
+    out. Depends only on the cohort, so build it once per cohort and
+    reuse it for every fit.
+    """
+    panels = []
+    for row_idx, row in enumerate(focal_vars):
+        for col_idx, (focal, xlabel) in enumerate(row):
+            raw = cohort[focal].dropna()
+            if len(raw) == 0:
+                continue
+            q_lo, q_hi = np.percentile(raw, [2.5, 97.5])
+            actual = np.linspace(q_lo, q_hi, n_points)
+            panels.append(pd.DataFrame({
+                'focal': focal,
+                'xlabel': xlabel,
+                'panel_row': row_idx,
+                'panel_col': col_idx,
+                'x_actual': actual,
+                'x_scaled': actual / VAR_DISPLAY.get(focal, {}).get('scale', 1),
+            }))
+    if not panels:
+        return pd.DataFrame(columns=['focal', 'xlabel', 'panel_row', 'panel_col', 'x_actual', 'x_scaled'])
+    return pd.concat(panels, ignore_index=True)
+
+
+def predict_marginal_effects(fit, ref_row: dict, grid: pd.DataFrame) -> pd.DataFrame:
+    """``grid`` with predicted probability and 95% CI for one fit.
+
+    Every grid row is ``ref_row`` with its panel's focal column set to
+    ``x_scaled``; all panels go through ``fit.predict`` as one stacked
+    design matrix (one ``X @ beta`` and one ``X V X'`` diagonal) instead
+    of a prediction call per panel.
+
+    Daytime rates paired with a hurdle indicator get the indicator forced
+    to 1 on their rows, so a ``cr(rate):indicator`` term (no current 08
+    spec; 08b's sofa_rcs) evaluates the dose-response shape rather than
+    the reference row's indicator (typically 0 → a flat curve with a
+    full-height CI ribbon).
+    """
+    n = len(grid)
+    new_data = pd.DataFrame({col: [val] * n for col, val in ref_row.items()})
+    focal = grid['focal'].to_numpy()
+    x_scaled = grid['x_scaled'].to_numpy()
+    for col in pd.unique(focal):
+        mask = focal == col
+        new_data.loc[mask, col] = x_scaled[mask]
+        ind = HURDLE_INDICATORS.get(col)
+        if ind is not None:
+            new_data.loc[mask, ind] = 1
+    prob, ci_lo, ci_hi = fit.predict(new_data)
+    return grid.assign(prob=prob, ci_lo=ci_lo, ci_hi=ci_hi)
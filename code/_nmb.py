@@ -0,0 +1,91 @@
+"""Neuromuscular-blockade (NMB) minutes per patient-day, for 01's exclusion.
+
+A patient-day with more than an hour of NMB disqualifies the whole
+hospitalization (``01_cohort.py``'s NMB cells). The minutes are defined on
+the hourly IMV grid:
+
+- each NMB administration (any agent) lasts until the next administration
+  of the hospitalization; the last one has zero duration;
+- every grid hour takes the latest administration at or before it, and
+  contributes that administration's FULL duration when ``med_dose > 0``;
+- a patient-day's NMB minutes are the sum over its grid hours.
+
+So a 3-hour infusion charted once counts 180 min on each of the three hours
+it spans (540 min), and a sub-hour interval that contains no grid hour
+counts nothing. This is the definition the per-hour ASOF join
+(grid ``ASOF LEFT JOIN`` durations) always had. It is computed here as a
+range join instead: an interval ``[start, next_start)`` contributes
+``duration × (grid hours inside it)`` to each patient-day, so only the
+running intervals that overlap an IMV streak are joined to the grid.
+``tests/test_nmb.py`` checks parity against the ASOF form.
+"""
+from __future__ import annotations
+
+import duckdb
+
+NMB_CATEGORIES = ('cisatracurium', 'vecuronium', 'rocuronium')
+
+
+def nmb_running_intervals(
+    nmb_rel: duckdb.DuckDBPyRelation,
+    streak_bounds: duckdb.DuckDBPyRelation,
+) -> duckdb.DuckDBPyRelation:
+    """Running (``med_dose > 0``) NMB intervals that can touch the grid.
+
+    ``nmb_rel`` needs ``hospitalization_id``, ``admin_dttm`` (UTC
+    TIMESTAMPTZ) and ``med_dose``; ``streak_bounds`` is 01's
+    ``cohort_streak_bounds`` (grid span ``[_start_hr, _end_hr]``). Intervals
+    are delimited over ALL of a hospitalization's NMB rows (zero-dose rows
+    end the preceding interval) before the dose filter, and the streak bound
+    is applied to intervals, not admin rows: a row just before the streak
+    start still delimits an interval that covers grid hours.
+
+    Returns ``hospitalization_id``, ``_nmb_start``, ``_nmb_end``,
+    ``_duration_min``.
+    """
+    return duckdb.sql("""
+        WITH intervals AS (
+            FROM nmb_rel
+            SELECT hospitalization_id
+                , med_dose
+                , _nmb_start: admin_dttm
+                , _nmb_end: LEAD(admin_dttm, 1, admin_dttm) OVER w
+            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY admin_dttm)
+        )
+        FROM intervals n
+        JOIN streak_bounds b USING (hospitalization_id)
+        SELECT hospitalization_id
+            , n._nmb_start
+            , n._nmb_end
+            , _duration_min: epoch(n._nmb_end - n._nmb_start) / 60.0
+        WHERE n.med_dose > 0
+          AND n._nmb_start <= b._end_hr
+          AND n._nmb_end > b._start_hr
+    """)
+
+
+def nmb_patient_day_minutes(
+    intervals: duckdb.DuckDBPyRelation,
+    grid: duckdb.DuckDBPyRelation,
+) -> duckdb.DuckDBPyRelation:
+    """NMB minutes per patient-day with any running NMB.
+
+    ``intervals`` is :func:`nmb_running_intervals`; ``grid`` the hourly
+    grid with ``hospitalization_id``, ``event_dttm`` and ``_nth_day``
+    (01's ``cohort_hrly_grids_f``). Each grid hour in
+    ``[_nmb_start, _nmb_end)`` adds the interval's full ``_duration_min``
+    (zero-duration intervals cover no hour).
+
+    Returns ``hospitalization_id``, ``_nth_day``, ``_nmb_total_min``;
+    the caller applies the > 60 min threshold.
+    """
+    return duckdb.sql("""
+        FROM intervals n
+        JOIN grid g
+            ON n.hospitalization_id = g.hospitalization_id
+            AND g.event_dttm >= n._nmb_start
+            AND g.event_dttm < n._nmb_end
+        SELECT g.hospitalization_id, g._nth_day
+            , _nmb_total_min: SUM(n._duration_min)
+        GROUP BY g.hospitalization_id, g._nth_day
+    """)
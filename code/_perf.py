@@ -0,0 +1,229 @@
+"""Per-stage wall time, row count and peak-RSS records for pipeline scripts.
+
+``_logging_setup.setup_logging`` calls :func:`init_perf` with the site's
+``output_to_share/{site}`` directory, so every numbered / descriptive / QC
+script gets, with no further wiring:
+
+- a ``__script__`` record (whole-process wall time + peak RSS) appended at
+  interpreter exit, with status ``error`` when the script died on an
+  uncaught exception;
+- :func:`perf_stage` — a context manager for named hot spots inside a
+  script (``with perf_stage("waterfall") as _ps: ...; _ps.rows = n``).
+
+Records are appended as one JSON object per line to
+``output/{site}/perf/stage_timings.jsonl`` (PHI-tier dir, but the records
+carry no IDs: script, stage, shard, timestamps, seconds, row counts, MB).
+At exit the JSONL is re-aggregated into the federation-safe
+``output_to_share/{site}/qc/stage_timings_summary.csv`` (per script/stage:
+runs, last/median/max wall seconds, last row count, max peak RSS), so the
+coordinator can compare hot spots across sites.
+
+Peak RSS is the process high-water mark at the end of the stage
+(``getrusage`` ``ru_maxrss``; monotone within a process, ``None`` on
+Windows). Row counts are whatever the caller already knows — a stage
+never re-executes a lazy relation just to count it.
+
+EXPLAIN ANALYZE (opt-in): ``PERF_EXPLAIN=waterfall,seddose_checkpoint``
+(or ``PERF_EXPLAIN=all``) turns on DuckDB profiling on the default
+connection for those stages and writes the operator tree with actual
+timings/cardinalities to ``output/{site}/perf/explain/<script>__<stage>.txt``.
+Profiling records the executed query rather than re-running it, so the
+file holds the stage's LAST DuckDB query (the materializing one for a
+checkpoint / write stage).
+"""
+from __future__ import annotations
+
+import atexit
+import datetime as _dt
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+import duckdb
+from clifpy.utils.logging_config import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = get_logger("epi_sedation.perf")
+
+TIMINGS_NAME = "stage_timings.jsonl"
+SUMMARY_NAME = "stage_timings_summary.csv"
+
+
+@dataclass
+class _PerfState:
+    site_root: Path
+    share_dir: Path
+    site: str
+    script: str
+    t0: float = field(default_factory=time.perf_counter)
+    status: str = "ok"
+
+
+_STATE: Optional[_PerfState] = None
+
+
+@dataclass
+class StageRecord:
+    """Mutable handle yielded by :func:`perf_stage`; set ``rows`` inside."""
+
+    stage: str
+    rows: Optional[int] = None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    _kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return round(_kb / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _script_name() -> str:
+    return Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "interactive"
+
+
+def init_perf(output_directory: Optional[str]) -> None:
+    """Bind perf records to the site of ``output_to_share/{site}``.
+
+    Idempotent (scripts may call ``setup_logging`` more than once). A
+    directory not shaped like ``.../output_to_share/<site>`` leaves perf
+    recording off; :func:`perf_stage` then only logs.
+    """
+    global _STATE
+    if _STATE is not None or output_directory is None:
+        return
+    share_dir = Path(output_directory)
+    if share_dir.parent.name != "output_to_share":
+        return
+    _STATE = _PerfState(
+        site_root=share_dir.parent.parent / "output" / share_dir.name,
+        share_dir=share_dir,
+        site=share_dir.name,
+        script=_script_name(),
+    )
+    atexit.register(_finish_script)
+    # atexit cannot see how the interpreter is exiting; an uncaught
+    # exception passes through sys.excepthook first, so flag the run there.
+    _prev_excepthook = sys.excepthook
+
+    def _excepthook(exc_type, exc, tb):
+        if _STATE is not None:
+            _STATE.status = "error"
+        _prev_excepthook(exc_type, exc, tb)
+
+    sys.excepthook = _excepthook
+
+
+def _explain_requested(stage: str) -> bool:
+    _wanted = {s.strip() for s in os.getenv("PERF_EXPLAIN", "").split(",") if s.strip()}
+    return "all" in _wanted or stage in _wanted
+
+
+def _append(record: dict) -> None:
+    if _STATE is None:
+        return
+    _dir = _STATE.site_root / "perf"
+    _dir.mkdir(parents=True, exist_ok=True)
+    # One short write per record: O_APPEND keeps concurrent shard
+    # processes from interleaving lines.
+    with open(_dir / TIMINGS_NAME, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def _record(stage: str, wall_s: float, rows: Optional[int], status: str) -> dict:
+    return {
+        'site': _STATE.site if _STATE else None,
+        'script': _STATE.script if _STATE else _script_name(),
+        'stage': stage,
+        'shard': (
+            f"{os.environ['SHARD_INDEX']}/{os.environ['SHARD_COUNT']}"
+            if os.getenv("SHARD_INDEX") and os.getenv("SHARD_COUNT") else None
+        ),
+        'finished_at': _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='microseconds'),
+        'wall_s': round(wall_s, 3),
+        'rows': rows,
+        'peak_rss_mb': _peak_rss_mb(),
+        'status': status,
+    }
+
+
+@contextmanager
+def perf_stage(stage: str) -> Iterator[StageRecord]:
+    """Time the enclosed block as ``stage`` and append its record."""
+    rec = StageRecord(stage)
+    explain_path = None
+    if _STATE is not None and _explain_requested(stage):
+        explain_path = _STATE.site_root / "perf" / "explain" / f"{_STATE.script}__{stage}.txt"
+        explain_path.parent.mkdir(parents=True, exist_ok=True)
+        duckdb.sql("SET enable_profiling = 'query_tree'")
+        duckdb.sql(f"SET profiling_output = '{explain_path}'")
+    status = "error"
+    t0 = time.perf_counter()
+    try:
+        yield rec
+        status = "ok"
+    finally:
+        wall_s = time.perf_counter() - t0
+        if explain_path is not None:
+            duckdb.sql("RESET enable_profiling")
+            duckdb.sql("RESET profiling_output")
+        record = _record(stage, wall_s, rec.rows, status)
+        _append(record)
+        logger.info(
+            f"[perf] {stage}: {wall_s:,.1f}s"
+            + (f", {rec.rows:,} rows" if rec.rows is not None else "")
+            + (f", peak RSS {record['peak_rss_mb']:,.0f} MB" if record['peak_rss_mb'] else "")
+            + ("" if status == "ok" else " (FAILED)")
+        )
+
+
+def write_perf_summary(site_root: Path, share_dir: Path) -> Optional[Path]:
+    """Aggregate ``stage_timings.jsonl`` into the shareable summary CSV."""
+    _jsonl = site_root / "perf" / TIMINGS_NAME
+    if not _jsonl.exists():
+        return None
+    _qc_dir = share_dir / "qc"
+    _qc_dir.mkdir(parents=True, exist_ok=True)
+    _out = _qc_dir / SUMMARY_NAME
+    # Private connection: runs at exit, after the script's own state.
+    with duckdb.connect() as _con:
+        _con.sql(f"""
+            COPY (
+                FROM read_json('{_jsonl}', format = 'newline_delimited', columns = {{
+                    site: 'VARCHAR', script: 'VARCHAR', stage: 'VARCHAR',
+                    shard: 'VARCHAR', finished_at: 'TIMESTAMPTZ', wall_s: 'DOUBLE',
+                    rows: 'BIGINT', peak_rss_mb: 'DOUBLE', status: 'VARCHAR'
+                }})
+                SELECT script, stage
+                    , n_runs: COUNT(*)
+                    , wall_s_last: arg_max(wall_s, finished_at)
+                    , wall_s_median: ROUND(MEDIAN(wall_s), 3)
+                    , wall_s_max: MAX(wall_s)
+                    , rows_last: arg_max(rows, finished_at)
+                    , peak_rss_mb_max: MAX(peak_rss_mb)
+                    , last_run_at: MAX(finished_at)
+                WHERE status = 'ok'
+                GROUP BY script, stage
+                ORDER BY script, stage = '__script__' DESC, wall_s_last DESC
+            ) TO '{_out}' (HEADER, DELIMITER ',')
+        """)
+    return _out
+
+
+def _finish_script() -> None:
+    if _STATE is None:
+        return
+    _append(_record("__script__", time.perf_counter() - _STATE.t0, None, _STATE.status))
+    try:
+        write_perf_summary(_STATE.site_root, _STATE.share_dir)
+    except Exception as e:  # never fail a finished pipeline run on perf I/O
+        logger.warning(f"[perf] summary CSV not written: {e}")
@@ -0,0 +1,138 @@
+"""Deferred figure rendering: collect figure specs, render them in a pool.
+
+Matplotlib (Agg) rendering is single-threaded and dominates wall-clock in
+the figure-heavy scripts (08's marginal-effect / forest PNGs at 200–250
+dpi, the descriptive figures, the cross-site forests). Those scripts
+split each figure into a compute pass and a render function:
+
+    figures = RenderQueue()
+    figures.submit(out_path, render_forest, points, title=...)  # compute pass
+    ...
+    figures.render()                                             # at the end
+
+``render_fn(*args, **kwargs)`` builds and returns a Figure from plain data;
+it must be a module-level function of an importable module such as
+``_model_figures`` (it is pickled to a worker by reference; one defined in
+the running script resolves to ``__main__``, which a spawn worker can only
+load by re-executing the script). The
+worker saves it to ``out_path`` with the submit-time ``savefig`` kwargs
+and the submit-time ``rcParams`` (so per-script styling such as
+``apply_style()`` carries over), closes it, and the parent logs each
+``Saved …`` in submit order.
+
+``RENDER_WORKERS=<n>`` sizes the pool (default: one worker per core,
+capped at the number of figures); ``RENDER_WORKERS=1`` renders serially
+in-process. ``--no-figures`` on the script's command line (or
+``NO_FIGURES=1`` in the environment, for ``make`` targets) turns
+``submit`` into a no-op, so a run writes its CSVs only.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from clifpy.utils.logging_config import get_logger
+
+logger = get_logger("epi_sedation.render")
+
+RENDER_WORKERS_ENV = "RENDER_WORKERS"
+NO_FIGURES_ENV = "NO_FIGURES"
+NO_FIGURES_FLAG = "--no-figures"
+
+
+def figures_enabled() -> bool:
+    """False under ``--no-figures`` / ``NO_FIGURES=1``."""
+    if NO_FIGURES_FLAG in sys.argv[1:]:
+        return False
+    return os.environ.get(NO_FIGURES_ENV, "").strip().lower() not in ("1", "true", "yes")
+
+
+def render_workers(n_jobs: int) -> int:
+    """Pool size for ``n_jobs`` figures: RENDER_WORKERS, else one per core."""
+    env = os.environ.get(RENDER_WORKERS_ENV, "").strip()
+    if env:
+        n = int(env)
+        if n < 1:
+            raise ValueError(f"{RENDER_WORKERS_ENV} must be >= 1, got {env!r}")
+    else:
+        n = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(1, min(n, n_jobs))
+
+
+def _init_worker() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_one(
+    out_path: str,
+    render_fn: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    savefig_kwargs: dict,
+    rc: dict,
+) -> str:
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    with matplotlib.rc_context(rc):
+        fig = render_fn(*args, **kwargs)
+        try:
+            fig.savefig(out_path, **savefig_kwargs)
+        finally:
+            plt.close(fig)
+    return out_path
+
+
+class RenderQueue:
+    """Figure specs collected during a script's compute pass."""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = figures_enabled() if enabled is None else enabled
+        self._jobs: list[tuple] = []
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(
+        self,
+        out_path: "str | os.PathLike",
+        render_fn: Callable[..., Any],
+        *args: Any,
+        savefig_kwargs: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Queue ``render_fn(*args, **kwargs)`` to be saved at ``out_path``."""
+        if not self.enabled:
+            self.skipped += 1
+            return
+        import matplotlib
+
+        self._jobs.append((
+            str(out_path), render_fn, args, kwargs,
+            {'bbox_inches': 'tight', **(savefig_kwargs or {})},
+            {k: v for k, v in matplotlib.rcParams.items() if k != 'backend'},
+        ))
+
+    def render(self, workers: Optional[int] = None) -> list[str]:
+        """Render every queued figure; returns the saved paths in submit order."""
+        jobs, self._jobs = self._jobs, []
+        if self.skipped:
+            logger.info(f"Figures skipped ({NO_FIGURES_FLAG}): {self.skipped}")
+            self.skipped = 0
+        if not jobs:
+            return []
+        workers = render_workers(len(jobs)) if workers is None else workers
+        if workers <= 1:
+            paths = [_render_one(*job) for job in jobs]
+        else:
+            logger.info(f"Rendering {len(jobs)} figures on {workers} worker process(es)")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                paths = list(pool.map(_render_one, *zip(*jobs)))
+        for path in paths:
+            logger.info(f"Saved: {path}")
+        return paths
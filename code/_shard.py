@@ -0,0 +1,227 @@
+"""Hospitalization-sharded execution of the per-patient stages.
+
+``02_exposure.py`` and ``03_outcomes.py`` only ever compute within a
+hospitalization (hourly sedation grid + forward fill, SBT blocks,
+extubation outcomes), so they can run on a hash partition of the cohort
+and be concatenated afterwards. Shard mode bounds peak memory by the
+shard size instead of the cohort size:
+
+- ``make run-sharded SHARDS=8 WORKERS=4`` runs ``01_cohort.py`` globally
+  (stitching, IMV streaks, CONSORT counts and the waterfall need the whole
+  cohort), then ``code/run_sharded.py``, then ``04``/``05`` globally on the
+  merged outputs.
+- ``run_sharded.py`` launches every (stage, shard) pair as its own
+  ``python code/<stage>.py`` subprocess with ``SHARD_INDEX`` /
+  ``SHARD_COUNT`` set, ``WORKERS`` at a time, then calls
+  :func:`merge_stage_shards`.
+- Inside a sharded script, :func:`current_shard` reads those variables,
+  :func:`shard_predicate` restricts the cohort grid (and resp table) to
+  ``hash(hospitalization_id) % SHARD_COUNT = SHARD_INDEX``, and outputs go
+  to :func:`stage_output_dir` / :func:`stage_qc_dir` under
+  ``output/{site}/shards/<k>-of-<n>/`` instead of the canonical paths.
+- Merging rewrites the canonical parquets (``seddose_by_id_imvhr.parquet``,
+  ``outcomes_by_id_imvday.parquet``, ...) from the shard parts in the same
+  row order the unsharded scripts write, and rebuilds the QC CSVs: count
+  tables are summed across shards, the M1 clamp summary (percentiles) is
+  recomputed from the merged raw hourly parquet.
+- Logs: a sharded script logs to :func:`shard_log_dir` (one directory per
+  stage and shard, via ``_logging_setup.setup_logging``) rather than the
+  site's shared ``clifpy_all.log`` / ``clifpy_errors.log``, so concurrent
+  workers never interleave lines; :func:`merge_shard_logs` appends them to
+  the site logs in stage / shard order once the pool finishes.
+
+With no ``SHARD_*`` variables set every helper is a no-op, so ``make run``
+is unchanged.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+from clifpy.utils.logging_config import get_logger
+
+logger = get_logger("epi_sedation.shard")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One hash partition of the cohort (``index`` in ``[0, count)``)."""
+
+    index: int
+    count: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.index:03d}-of-{self.count:03d}"
+
+
+@dataclass(frozen=True)
+class ShardedStage:
+    """Per-shard artifacts of one sharded script and how to merge them."""
+
+    script: str
+    # parquet name under output/{site}/ → ORDER BY of the unsharded write
+    parquets: dict[str, str]
+    # additive count tables under output_to_share/{site}/qc/
+    count_csvs: tuple[str, ...] = ()
+
+
+SHARDED_STAGES: dict[str, ShardedStage] = {
+    '02_exposure': ShardedStage(
+        script='code/02_exposure.py',
+        parquets={
+            'seddose_by_id_imvday.parquet': 'hospitalization_id, _nth_day',
+            'seddose_by_id_imvhr.parquet': 'hospitalization_id, event_dttm',
+            'seddose_by_id_imvhr_raw.parquet': 'hospitalization_id, event_dttm',
+        },
+        count_csvs=('cont_sed_convert_summary.csv', 'intm_sed_convert_summary.csv'),
+    ),
+    '03_outcomes': ShardedStage(
+        script='code/03_outcomes.py',
+        parquets={'outcomes_by_id_imvday.parquet': 'hospitalization_id, _nth_day'},
+    ),
+}
+
+
+def current_shard() -> "Shard | None":
+    """Shard this process runs, from ``SHARD_INDEX`` / ``SHARD_COUNT``."""
+    index, count = os.getenv("SHARD_INDEX"), os.getenv("SHARD_COUNT")
+    if index is None and count is None:
+        return None
+    if index is None or count is None:
+        raise RuntimeError("SHARD_INDEX and SHARD_COUNT must be set together")
+    shard = Shard(int(index), int(count))
+    if not 0 <= shard.index < shard.count:
+        raise RuntimeError(f"SHARD_INDEX={shard.index} out of range for SHARD_COUNT={shard.count}")
+    return shard
+
+
+def configure_shard_session(shard: "Shard | None") -> None:
+    """Apply the per-worker DuckDB limits ``run_sharded.py`` passes down."""
+    if shard is None:
+        return
+    if os.getenv("SHARD_MEMORY_LIMIT"):
+        duckdb.sql(f"SET memory_limit = '{os.environ['SHARD_MEMORY_LIMIT']}'")
+    if os.getenv("SHARD_THREADS"):
+        duckdb.sql(f"SET threads = {int(os.environ['SHARD_THREADS'])}")
+    logger.info(f"Shard mode: shard {shard.label}")
+
+
+def shard_predicate(shard: "Shard | None", col: str = "hospitalization_id") -> str:
+    """SQL boolean selecting the shard's hospitalizations (``TRUE`` if none)."""
+    if shard is None:
+        return "TRUE"
+    return f"hash({col}) % {shard.count} = {shard.index}"
+
+
+def shard_dir(site_name: str, shard: Shard) -> str:
+    return f"output/{site_name}/shards/{shard.label}"
+
+
+def shard_log_dir(site_name: str, shard: Shard, stage: str) -> str:
+    """``output_directory`` for one shard worker's logs (``<dir>/logs/*.log``)."""
+    return f"{shard_dir(site_name, shard)}/{stage}"
+
+
+def stage_output_dir(site_name: str, shard: "Shard | None") -> str:
+    """Where a sharded script writes its parquets (created on call)."""
+    _dir = f"output/{site_name}" if shard is None else shard_dir(site_name, shard)
+    os.makedirs(_dir, exist_ok=True)
+    return _dir
+
+
+def stage_qc_dir(site_name: str, shard: "Shard | None") -> Path:
+    """Where a sharded script writes its QC CSVs (created on call)."""
+    _dir = Path(
+        f"output_to_share/{site_name}/qc" if shard is None
+        else f"{shard_dir(site_name, shard)}/qc"
+    )
+    _dir.mkdir(parents=True, exist_ok=True)
+    return _dir
+
+
+def _shard_files(site_name: str, count: int, name: str) -> list[str]:
+    return [
+        _p for _p in (
+            f"{shard_dir(site_name, Shard(i, count))}/{name}" for i in range(count)
+        ) if os.path.exists(_p)
+    ]
+
+
+def merge_stage_shards(site_name: str, stage: str, count: int) -> None:
+    """Concatenate ``stage``'s shard outputs into the canonical paths."""
+    spec = SHARDED_STAGES[stage]
+    for name, order_by in spec.parquets.items():
+        parts = _shard_files(site_name, count, name)
+        if len(parts) != count:
+            raise RuntimeError(
+                f"{stage}: {name} present for {len(parts)} of {count} shards — "
+                f"not merging a partial cohort"
+            )
+        _out = f"output/{site_name}/{name}"
+        duckdb.sql(f"""
+            COPY (
+                FROM read_parquet({parts}, union_by_name = true)
+                ORDER BY {order_by}
+            ) TO '{_out}' (FORMAT parquet)
+        """)
+        _n = duckdb.sql(f"FROM read_parquet({parts}) SELECT COUNT(*)").fetchone()[0]
+        logger.info(f"Merged {len(parts)} shards → {_out} ({_n:,} rows)")
+
+    _qc_dir = Path(f"output_to_share/{site_name}/qc")
+    _qc_dir.mkdir(parents=True, exist_ok=True)
+    for name in spec.count_csvs:
+        parts = _shard_files(site_name, count, f"qc/{name}")
+        if not parts:
+            continue
+        duckdb.sql(f"""
+            COPY (
+                FROM read_csv({parts}, union_by_name = true)
+                SELECT * EXCLUDE (count), count: SUM(count)
+                GROUP BY ALL
+                ORDER BY med_category, count DESC
+            ) TO '{_qc_dir / name}' (HEADER, DELIMITER ',')
+        """)
+        logger.info(f"Merged {len(parts)} shards → {_qc_dir / name}")
+
+    if stage == '02_exposure' and _shard_files(site_name, count, "qc/m1_clamp_summary.csv"):
+        # Percentiles don't add across shards: recompute on the merged raw grid.
+        import polars as pl
+        from _utils import seddose_clamp_summary
+
+        _raw = duckdb.read_parquet(f"output/{site_name}/seddose_by_id_imvhr_raw.parquet")
+        pl.DataFrame(seddose_clamp_summary(_raw)).write_csv(_qc_dir / "m1_clamp_summary.csv")
+        logger.info(f"Recomputed {_qc_dir / 'm1_clamp_summary.csv'} on merged data")
+
+
+LOG_FILES = ('clifpy_all.log', 'clifpy_errors.log')
+
+
+def merge_shard_logs(site_name: str, stages: "list[str]", count: int) -> None:
+    """Append every shard worker's logs to ``output_to_share/{site}/logs/``.
+
+    Runs after the pool, succeeded or not; each shard's block is headed by
+    its stage and label so a failing shard's traceback is easy to find.
+    """
+    _log_dir = Path(f"output_to_share/{site_name}/logs")
+    _log_dir.mkdir(parents=True, exist_ok=True)
+    for name in LOG_FILES:
+        with open(_log_dir / name, "a") as out:
+            for stage in stages:
+                for i in range(count):
+                    shard = Shard(i, count)
+                    _part = Path(shard_log_dir(site_name, shard, stage)) / "logs" / name
+                    if not _part.exists():
+                        continue
+                    out.write(f"===== {stage} shard {shard.label} =====\n")
+                    out.write(_part.read_text())
+
+
+def clear_shards(site_name: str) -> None:
+    """Remove ``output/{site}/shards/`` (stale parts from a different N)."""
+    _dir = f"output/{site_name}/shards"
+    if os.path.isdir(_dir):
+        shutil.rmtree(_dir)
@@ -424,6 +424,29 @@ def _load_vitals(
     return vitals
 
 
+def _scan_columns(file_path: Path, filetype: str, columns: List[str]) -> pl.LazyFrame:
+    """Lazy scan of ``columns`` only; filters applied downstream push down
+    into the parquet reader (row-group pruning on hospitalization_id /
+    category statistics), so memory is bounded by the cohort."""
+    if filetype == 'parquet':
+        return pl.scan_parquet(str(file_path)).select(columns)
+    return pl.scan_csv(str(file_path)).select(columns)
+
+
+def _naive_as_site_local(lf: pl.LazyFrame, column: str) -> pl.LazyFrame:
+    """Parse (CSV) a datetime column, leaving naive values naive.
+
+    ``standardize_datetime_columns`` then reads naive values as site-local
+    wall-clock — the rule ``_load_labs`` / ``_load_vitals`` use and
+    ``_utils.coerce_dttm_to_utc`` applies when the medication and weight
+    extracts are written. Every raw-file loader here goes through it, so
+    all SOFA components share one clock at naive-timestamp sites.
+    """
+    if lf.collect_schema()[column] == pl.Utf8:
+        lf = lf.with_columns(pl.col(column).str.to_datetime())
+    return lf
+
+
 def _load_patient_assessments(
     data_directory: str,
     filetype: str,
@@ -432,10 +455,12 @@ def _load_patient_assessments(
     timezone: Optional[str] = None
 ) -> pl.LazyFrame:
     """
-    Load and filter patient assessments data using pandas for Windows stability.
+    Load and filter patient assessments data (returns LazyFrame).
+
+    Column projection plus category / hospitalization_id predicate pushdown,
+    as in _load_labs and _load_vitals. Naive ``recorded_dttm`` is
+    site-local wall-clock (see ``_naive_as_site_local``).
     """
-    import pandas as pd
-    
     file_path = Path(data_directory) / f"clif_patient_assessments.{filetype}"
 
     if not file_path.exists():
@@ -449,82 +474,52 @@ def _load_patient_assessments(
         })
 
     # Define columns to load
-    load_columns = ['hospitalization_id', 'recorded_dttm', 'assessment_category', 
+    load_columns = ['hospitalization_id', 'recorded_dttm', 'assessment_category',
                     'numerical_value', 'categorical_value']
 
-    logger.info("Loading patient assessments with pandas...")
-    
-    # Load with pandas instead of polars
-    if filetype == 'parquet':
-        assessments_pd = pd.read_parquet(file_path, columns=load_columns)
-    else:
-        assessments_pd = pd.read_csv(file_path, usecols=load_columns)
-    
-    logger.info(f"✓ Loaded {len(assessments_pd)} assessment rows with pandas")
-    
-    # Convert hospitalization_id to string
-    assessments_pd['hospitalization_id'] = assessments_pd['hospitalization_id'].astype(str)
-    
+    assessments = _scan_columns(file_path, filetype, load_columns)
+
+    # Normalize hospitalization_id to Utf8 for consistent type matching
+    assessments = assessments.with_columns([
+        pl.col('hospitalization_id').cast(pl.Utf8).alias('hospitalization_id')
+    ])
+
     # Filter for required categories and hospitalization_ids
-    assessments_pd = assessments_pd[
-        assessments_pd['assessment_category'].isin(REQUIRED_ASSESSMENTS) &
-        assessments_pd['hospitalization_id'].isin(hospitalization_ids)
-    ]
-    logger.info(f"✓ Filtered to {len(assessments_pd)} rows for target hospitalizations")
-    
-    # Convert datetime and timezone with pandas
-    if timezone:
-        logger.info("Converting timezone with pandas...")
-        assessments_pd['recorded_dttm'] = pd.to_datetime(assessments_pd['recorded_dttm'])
-        if assessments_pd['recorded_dttm'].dt.tz is None:
-            assessments_pd['recorded_dttm'] = assessments_pd['recorded_dttm'].dt.tz_localize('UTC')
-        assessments_pd['recorded_dttm'] = assessments_pd['recorded_dttm'].dt.tz_convert(timezone)
-        logger.info("✓ Timezone conversion complete")
-    
-    # Join with cohort using pandas
-    logger.info("Performing pandas merge...")
-    cohort_pd = cohort_df.to_pandas()
-    assessments_pd = assessments_pd.merge(
-        cohort_pd,
-        on='hospitalization_id',
-        how='inner'
-    )
-    logger.info(f"✓ Merge complete: {len(assessments_pd)} rows")
-    
-    # Apply date filter
-    logger.info("Applying date filters...")
-    assessments_pd = assessments_pd[
-        (assessments_pd['recorded_dttm'] >= assessments_pd['start_dttm']) &
-        (assessments_pd['recorded_dttm'] <= assessments_pd['end_dttm'])
-    ]
-    logger.info(f"✓ Filtered to {len(assessments_pd)} rows within time windows")
-    
-    # Coalesce numerical and categorical values with pandas
-    logger.info("Coalescing numerical and categorical values...")
-    assessments_pd['assessment_value'] = assessments_pd['numerical_value'].fillna(
-        assessments_pd['categorical_value'].astype(float)
+    assessments = assessments.filter(
+        pl.col('assessment_category').is_in(REQUIRED_ASSESSMENTS) &
+        pl.col('hospitalization_id').is_in(hospitalization_ids)
     )
-    
-    # Select relevant columns
-    id_cols = [col for col in cohort_df.columns if col not in ['start_dttm', 'end_dttm']]
-    assessments_pd = assessments_pd[[*id_cols, 'recorded_dttm', 'assessment_category', 'assessment_value']]
-    
-    # Convert to polars
-    logger.info("Converting to polars...")
-    assessments = pl.from_pandas(assessments_pd)
-    
-    # IMPORTANT: Re-standardize datetime columns after conversion
+
+    if timezone:
+        assessments = _naive_as_site_local(assessments, 'recorded_dttm')
     assessments = standardize_datetime_columns(
         assessments,
         target_timezone=timezone,
         target_time_unit='ns',  # Match the rest of your pipeline
         datetime_columns=['recorded_dttm']
     )
-    
-    logger.info("✓ Conversion to polars complete")
-    
-    # Return as lazy for downstream processing
-    return assessments.lazy()
+
+    # Join with cohort to apply time window filter
+    assessments = assessments.join(
+        cohort_df.lazy(),
+        on='hospitalization_id',
+        how='inner'
+    ).filter(
+        (pl.col('recorded_dttm') >= pl.col('start_dttm')) &
+        (pl.col('recorded_dttm') <= pl.col('end_dttm'))
+    )
+
+    # Coalesce numerical and categorical values
+    assessments = assessments.with_columns([
+        pl.col('numerical_value').cast(pl.Float64)
+        .fill_null(pl.col('categorical_value').cast(pl.Float64))
+        .alias('assessment_value')
+    ])
+
+    # Select relevant columns
+    id_cols = [col for col in cohort_df.columns if col not in ['start_dttm', 'end_dttm']]
+    return assessments.select([*id_cols, 'recorded_dttm', 'assessment_category', 'assessment_value'])
+
 
 def _load_respiratory_support(
     data_directory: str,
@@ -534,10 +529,12 @@ def _load_respiratory_support(
     lookback_hours: int = 24,
     timezone: Optional[str] = None
 ) -> pl.LazyFrame:
-    """Load respiratory support data using pandas for Windows stability."""
-    
-    import pandas as pd
-    
+    """Load respiratory support data (cohort-filtered scan, then episodes).
+
+    Naive ``recorded_dttm`` is site-local wall-clock (see
+    ``_naive_as_site_local``).
+    """
+
     file_path = Path(data_directory) / f"clif_respiratory_support.{filetype}"
 
     if not file_path.exists():
@@ -553,67 +550,20 @@ def _load_respiratory_support(
 
     # Define columns to load
     load_columns = ['hospitalization_id', 'recorded_dttm', 'device_category', 'mode_category',
-                    'fio2_set', 'lpm_set', 'tidal_volume_set', 'resp_rate_set']
+                    'fio2_set']
+
+    resp = _scan_columns(file_path, filetype, load_columns)
+
+    # Normalize hospitalization_id to Utf8 for consistent type matching
+    resp = resp.with_columns([
+        pl.col('hospitalization_id').cast(pl.Utf8).alias('hospitalization_id')
+    ])
 
-    logger.info("Loading respiratory support with pandas...")
-    
-    # Load with pandas instead of polars
-    if filetype == 'parquet':
-        resp_pd = pd.read_parquet(file_path, columns=load_columns)
-    else:
-        resp_pd = pd.read_csv(file_path, usecols=load_columns)
-    
-    logger.info(f"✓ Loaded {len(resp_pd)} rows with pandas")
-    
-    # Convert hospitalization_id to string
-    resp_pd['hospitalization_id'] = resp_pd['hospitalization_id'].astype(str)
-    
     # Filter for hospitalization_ids
-    resp_pd = resp_pd[resp_pd['hospitalization_id'].isin(hospitalization_ids)]
-    logger.info(f"✓ Filtered to {len(resp_pd)} rows for target hospitalizations")
-    
-    # Convert datetime
+    resp = resp.filter(pl.col('hospitalization_id').is_in(hospitalization_ids))
+
     if timezone:
-        logger.info("Converting timezone with pandas...")
-        resp_pd['recorded_dttm'] = pd.to_datetime(resp_pd['recorded_dttm'])
-        if resp_pd['recorded_dttm'].dt.tz is None:
-            resp_pd['recorded_dttm'] = resp_pd['recorded_dttm'].dt.tz_localize('UTC')
-        resp_pd['recorded_dttm'] = resp_pd['recorded_dttm'].dt.tz_convert(timezone)
-        logger.info("✓ Timezone conversion complete")
-    
-    # Create expanded cohort with lookback
-    from datetime import timedelta
-    lookback_delta = timedelta(hours=lookback_hours)
-    
-    cohort_pd = cohort_df.to_pandas()
-    cohort_pd['start_dttm_lookback'] = cohort_pd['start_dttm'] - lookback_delta
-    cohort_pd['end_dttm_original'] = cohort_pd['end_dttm']
-    
-    # Join with pandas
-    logger.info("Performing pandas merge...")
-    resp_pd = resp_pd.merge(
-        cohort_pd,
-        on='hospitalization_id',
-        how='inner'
-    )
-    logger.info(f"✓ Merge complete: {len(resp_pd)} rows")
-    
-    # Apply date filter
-    logger.info("Applying date filters...")
-    resp_pd = resp_pd[
-        (resp_pd['recorded_dttm'] >= resp_pd['start_dttm_lookback']) &
-        (resp_pd['recorded_dttm'] <= resp_pd['end_dttm_original'])
-    ]
-    logger.info(f"✓ Filtered to {len(resp_pd)} rows within time windows")
-    
-    # Select columns
-    id_cols = [col for col in cohort_df.columns if col not in ['start_dttm', 'end_dttm']]
-    resp_pd = resp_pd[[*id_cols, 'recorded_dttm', 'device_category', 'mode_category', 
-                       'fio2_set', 'start_dttm', 'end_dttm']]
-    
-    # Convert to polars for the rest of processing
-    logger.info("Converting to polars for episode processing...")
-    resp = pl.from_pandas(resp_pd)
+        resp = _naive_as_site_local(resp, 'recorded_dttm')
     resp = standardize_datetime_columns(
         resp,
         target_timezone=timezone,
@@ -621,9 +571,25 @@ def _load_respiratory_support(
         datetime_columns=['recorded_dttm']
     )
 
-    logger.info("✓ Conversion to polars complete")
-    
-    # Rest of the function continues with polars...
+    # Join with the cohort window widened by the lookback (episodes need the
+    # pre-window rows to forward-fill into the SOFA window).
+    from datetime import timedelta
+    lookback_delta = timedelta(hours=lookback_hours)
+
+    id_cols = [col for col in cohort_df.columns if col not in ['start_dttm', 'end_dttm']]
+    resp = resp.join(
+        cohort_df.lazy(),
+        on='hospitalization_id',
+        how='inner'
+    ).filter(
+        (pl.col('recorded_dttm') >= pl.col('start_dttm') - lookback_delta) &
+        (pl.col('recorded_dttm') <= pl.col('end_dttm'))
+    ).select([
+        *id_cols, 'recorded_dttm', 'device_category', 'mode_category',
+        'fio2_set', 'start_dttm', 'end_dttm'
+    ]).collect()
+    logger.info(f"✓ Loaded {resp.height} respiratory support rows within lookback windows")
+
     # Create respiratory support episodes for forward-filling
     resp = _create_resp_support_episodes(resp, id_col='hospitalization_id')
 
@@ -685,13 +651,28 @@ def _load_and_convert_medications(
     cohort_df: pl.DataFrame,
     vitals_df: pl.DataFrame,
     timezone: Optional[str] = None,
-    time_unit: str = 'ns'
+    time_unit: str = 'ns',
+    medication_path: Optional[str] = None,
+    weight_path: Optional[str] = None
 ) -> pl.LazyFrame:
-    """Load medication data using pandas for Windows stability."""
-    
-    import pandas as pd
-    
-    file_path = Path(data_directory) / f"clif_medication_admin_continuous.{filetype}"
+    """Load medication data and convert doses to mcg/kg/min.
+
+    ``medication_path`` points at the cohort-scoped, med_category-partitioned
+    extract written by 01_cohort.py (see ``_med_extract``); when given, only
+    the REQUIRED_MEDS partitions are read instead of the full raw table.
+    ``weight_path`` likewise points at the sorted weight extract (see
+    ``_weight_extract``) in place of clif_vitals. Both the medication and
+    the weight reads are projected, cohort-filtered scans.
+
+    Naive ``admin_dttm`` / ``recorded_dttm`` are site-local wall-clock in
+    every branch (extract or raw file), as in the extracts and the other
+    SOFA loaders.
+    """
+
+    if medication_path is not None:
+        file_path = Path(medication_path)
+    else:
+        file_path = Path(data_directory) / f"clif_medication_admin_continuous.{filetype}"
 
     if not file_path.exists():
         logger.warning(f"Medication admin continuous file not found: {file_path}")
@@ -705,94 +686,91 @@ def _load_and_convert_medications(
     # Define columns to load
     load_columns = ['hospitalization_id', 'admin_dttm', 'med_category', 'med_dose', 'med_dose_unit']
 
-    logger.info("Loading medications with pandas...")
-    
-    # Load with pandas
-    if filetype == 'parquet':
-        meds_pd = pd.read_parquet(file_path, columns=load_columns)
+    if medication_path is not None:
+        # Hive partition column; the med_category filter below prunes
+        # partitions.
+        meds = pl.scan_parquet(
+            str(file_path / "**" / "*.parquet"), hive_partitioning=True,
+        ).select(load_columns)
     else:
-        meds_pd = pd.read_csv(file_path, usecols=load_columns)
-    
-    logger.info(f"✓ Loaded {len(meds_pd)} medication rows")
-    
+        meds = _scan_columns(file_path, filetype, load_columns)
+
     # Convert types
-    meds_pd['hospitalization_id'] = meds_pd['hospitalization_id'].astype(str)
-    
+    meds = meds.with_columns([
+        pl.col('hospitalization_id').cast(pl.Utf8).alias('hospitalization_id'),
+        pl.col('med_category').cast(pl.Utf8).alias('med_category'),
+    ])
+
     # Filter for required meds and hospitalizations
-    meds_pd = meds_pd[
-        meds_pd['med_category'].isin(REQUIRED_MEDS) &
-        meds_pd['hospitalization_id'].isin(hospitalization_ids)
-    ]
-    logger.info(f"✓ Filtered to {len(meds_pd)} rows")
-    
-    # Convert datetime and timezone
+    meds = meds.filter(
+        pl.col('med_category').is_in(REQUIRED_MEDS) &
+        pl.col('hospitalization_id').is_in(hospitalization_ids)
+    )
+
     if timezone:
-        logger.info("Converting timezone with pandas...")
-        meds_pd['admin_dttm'] = pd.to_datetime(meds_pd['admin_dttm'])
-        if meds_pd['admin_dttm'].dt.tz is None:
-            meds_pd['admin_dttm'] = meds_pd['admin_dttm'].dt.tz_localize('UTC')
-        meds_pd['admin_dttm'] = meds_pd['admin_dttm'].dt.tz_convert(timezone)
-    
-    # Join with cohort for time window filtering
-    logger.info("Joining with cohort...")
-    cohort_pd = cohort_df.to_pandas()
-    meds_pd = meds_pd.merge(cohort_pd, on='hospitalization_id', how='inner')
-    
-    # Apply time window filter
-    meds_pd = meds_pd[
-        (meds_pd['admin_dttm'] >= meds_pd['start_dttm']) &
-        (meds_pd['admin_dttm'] <= meds_pd['end_dttm'])
-    ]
-    logger.info(f"✓ After time filter: {len(meds_pd)} rows")
-    
-    # Convert to polars for dose conversion operations
-    logger.info("Converting to polars for dose conversion...")
-    meds = pl.from_pandas(meds_pd)
-    # In _load_and_convert_medications, after: meds = pl.from_pandas(meds_pd)
+        meds = _naive_as_site_local(meds, 'admin_dttm')
     meds = standardize_datetime_columns(
         meds,
         target_timezone=timezone,
         target_time_unit='ns',  # Match the rest of your pipeline
         datetime_columns=['admin_dttm']
     )
+
+    # Join with cohort for time window filtering
+    meds = meds.join(
+        cohort_df.lazy(), on='hospitalization_id', how='inner'
+    ).filter(
+        (pl.col('admin_dttm') >= pl.col('start_dttm')) &
+        (pl.col('admin_dttm') <= pl.col('end_dttm'))
+    ).collect()
+    logger.info(f"✓ After time filter: {meds.height} rows")
+
     # Clean dose units
     meds = meds.with_columns([
         _clean_dose_unit(pl.col('med_dose_unit')).alias('dose_unit_clean')
     ])
-    
-    # Load weight data with pandas
-    logger.info("Loading weight data with pandas...")
+
+    # Weight: only weight_kg rows of cohort hospitalizations, 3 columns.
     weight_file = Path(data_directory) / f"clif_vitals.{filetype}"
-    if weight_file.exists():
-        if filetype == 'parquet':
-            weight_pd = pd.read_parquet(weight_file)
-        else:
-            weight_pd = pd.read_csv(weight_file)
-        
-        weight_pd['hospitalization_id'] = weight_pd['hospitalization_id'].astype(str)
-        weight_pd = weight_pd[
-            weight_pd['hospitalization_id'].isin(hospitalization_ids) &
-            (weight_pd['vital_category'] == 'weight_kg')
-        ][['hospitalization_id', 'recorded_dttm', 'vital_value']].copy()
-        
-        weight_pd.rename(columns={'vital_value': 'weight_kg'}, inplace=True)
-        weight_pd['recorded_dttm'] = pd.to_datetime(weight_pd['recorded_dttm'])
-        
-        if timezone:
-            if weight_pd['recorded_dttm'].dt.tz is None:
-                weight_pd['recorded_dttm'] = weight_pd['recorded_dttm'].dt.tz_localize('UTC')
-            weight_pd['recorded_dttm'] = weight_pd['recorded_dttm'].dt.tz_convert(timezone)
-        
-        logger.info(f"✓ Loaded {len(weight_pd)} weight records")
-        weight_data = pl.from_pandas(weight_pd)
-
-        # ADD THIS: Standardize weight_data datetime columns
+    if weight_path is not None:
+        # recorded_dttm is already a UTC instant in the extract;
+        # weight_kg_raw keeps this component's unclamped weights.
+        weight_data = pl.scan_parquet(weight_path).select([
+            pl.col('hospitalization_id').cast(pl.Utf8),
+            'recorded_dttm',
+            pl.col('weight_kg_raw').alias('weight_kg'),
+        ]).filter(
+            pl.col('hospitalization_id').is_in(hospitalization_ids)
+        )
         weight_data = standardize_datetime_columns(
             weight_data,
             target_timezone=timezone,
             target_time_unit='ns',  # Match meds time unit
             datetime_columns=['recorded_dttm']
-        )
+        ).collect()
+        logger.info(f"✓ Loaded {weight_data.height} weight records from the weight extract")
+    elif weight_file.exists():
+        weight = _scan_columns(
+            weight_file, filetype,
+            ['hospitalization_id', 'recorded_dttm', 'vital_category', 'vital_value'],
+        ).with_columns([
+            pl.col('hospitalization_id').cast(pl.Utf8).alias('hospitalization_id')
+        ]).filter(
+            pl.col('hospitalization_id').is_in(hospitalization_ids) &
+            (pl.col('vital_category') == 'weight_kg')
+        ).select([
+            'hospitalization_id', 'recorded_dttm',
+            pl.col('vital_value').alias('weight_kg'),
+        ])
+        if timezone:
+            weight = _naive_as_site_local(weight, 'recorded_dttm')
+        weight_data = standardize_datetime_columns(
+            weight,
+            target_timezone=timezone,
+            target_time_unit='ns',  # Match meds time unit
+            datetime_columns=['recorded_dttm']
+        ).collect()
+        logger.info(f"✓ Loaded {weight_data.height} weight records")
     else:
         logger.warning(f"Weight data file not found: {weight_file}")
         weight_data = pl.DataFrame({
@@ -800,7 +778,7 @@ def _load_and_convert_medications(
             'recorded_dttm': [],
             'weight_kg': []
         })
-    
+
     # Sort for join_asof
     meds = meds.sort(['hospitalization_id', 'admin_dttm'])
     weight_data = weight_data.sort(['hospitalization_id', 'recorded_dttm'])
@@ -1234,7 +1212,9 @@ def compute_sofa_polars(
     fill_na_scores_with_zero: bool = True,
     remove_outliers: bool = True,
     timezone: Optional[str] = None,
-    time_unit: str = 'us'
+    time_unit: str = 'us',
+    medication_path: Optional[str] = None,
+    weight_path: Optional[str] = None
 ) -> pl.DataFrame:
     """
     Compute SOFA scores using optimized Polars operations.
@@ -1268,6 +1248,14 @@ def compute_sofa_polars(
     time_unit : str, default='us'
         Time unit for datetime columns ('ms', 'us', 'ns')
         Ensures consistent datetime precision across all data sources
+    medication_path : Optional[str]
+        Directory of the cohort-scoped medication_admin_continuous extract
+        (``_med_extract.med_extract_path``). None reads the raw CLIF file
+        from ``data_directory``.
+    weight_path : Optional[str]
+        Sorted cohort weight extract (``_weight_extract.weight_extract_path``)
+        for the cardiovascular dose conversion. None reads ``clif_vitals``
+        from ``data_directory``.
 
     Returns
     -------
@@ -1342,7 +1330,7 @@ def compute_sofa_polars(
     resp_df = _load_respiratory_support(data_directory, filetype, hospitalization_ids, cohort_df_local, lookback_hours=24, timezone=timezone)
 
     logger.info("Loading and converting medication data...")
-    meds_df = _load_and_convert_medications(data_directory, filetype, hospitalization_ids, cohort_df_local, vitals_df, timezone, time_unit)
+    meds_df = _load_and_convert_medications(data_directory, filetype, hospitalization_ids, cohort_df_local, vitals_df, timezone, time_unit, medication_path, weight_path)
 
     # ==================================================================================
     # CRITICAL: Collect each data source BEFORE combining to avoid Windows crash
@@ -0,0 +1,293 @@
+"""Content-fingerprinted cache for the expensive 01/04 stages.
+
+Replaces "does the cache parquet exist?" (plus the manual ``rerun_*``
+config flags) as the recompute decision for:
+
+==================  ============  =============================================
+stage               script        cached artifact(s) under ``output/{site}/``
+==================  ============  =============================================
+``waterfall``       01_cohort     ``cohort_resp_processed_bf.parquet``
+``sofa_first_24h``  04_covariates ``sofa_first_24h.parquet``
+``ase``             04_covariates ``covariates_ase.parquet``
+``cci_elix``        04_covariates ``covariates_cci.parquet``, ``covariates_elix.parquet``
+==================  ============  =============================================
+
+Each stage's fingerprint is a dict of per-input component hashes:
+
+- ``clif_<table>`` — the raw CLIF source, from parquet footer metadata only
+  (per-row-group row counts and column min/max/null-count statistics via
+  DuckDB's ``parquet_metadata``). A CLIF refresh changes these; reading
+  them costs milliseconds even on billion-row tables. CSV sources have no
+  footer and fall back to file size + mtime.
+- ``cohort_ids`` — sorted hospitalization-ID set the stage ran for.
+- ``outlier_config`` — bytes of ``config/outlier_config.yaml`` (stages
+  that apply it).
+- ``config`` — the stage-relevant config keys (e.g. ``timezone``).
+- ``code`` — bytes of the project modules that implement the stage
+  (``code/_waterfall.py`` plus the ``_utils`` timestamp / category helpers
+  and the vendored outlier handler 01 applies before it, for the
+  waterfall; ``code/_sofa.py`` and the med / weight extract modules for
+  ``sofa_first_24h``), so a logic change recomputes.
+- ``clifpy`` — installed clifpy version (ASE / CCI logic lives there; a
+  version bump is a legitimate reason to recompute).
+
+After a successful recompute the stage writes
+``<artifact>.manifest.json`` next to the (first) artifact. A later run is
+a cache HIT only when every artifact exists and the stored components
+equal the current ones; otherwise it recomputes and reports which
+components changed. A cache with no manifest (written before this layer
+existed, or by 01's Mode A external-table load) is a MISS.
+
+``rerun_waterfall`` / ``rerun_sofa_24h`` / ``rerun_ase`` are still honored
+as a force-recompute override, but are no longer needed after a CLIF
+refresh. ``make cache-status`` (``code/qc/cache_status.py``) prints
+hit/miss per stage without running anything.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError, version
+from typing import Iterable
+
+import duckdb
+from clifpy.utils.logging_config import get_logger
+
+logger = get_logger("epi_sedation.stage_cache")
+
+MANIFEST_SUFFIX = ".manifest.json"
+OUTLIER_CONFIG_PATH = "config/outlier_config.yaml"
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    """Inputs and artifacts of one cached stage."""
+
+    artifacts: tuple[str, ...]
+    tables: tuple[str, ...]
+    config_keys: tuple[str, ...] = ('timezone',)
+    uses_outlier_config: bool = False
+    code: tuple[str, ...] = ()
+
+
+STAGES: dict[str, StageSpec] = {
+    'waterfall': StageSpec(
+        artifacts=('cohort_resp_processed_bf.parquet',),
+        tables=('respiratory_support',),
+        uses_outlier_config=True,
+        code=('code/_waterfall.py', 'code/_utils.py', 'code/_outlier_handler.py'),
+    ),
+    # compute_sofa_polars reads the cohort med and weight extracts when
+    # present. Each is a function of its raw table + cohort + the module
+    # that writes it, so the raw sources and all three modules are
+    # fingerprinted.
+    'sofa_first_24h': StageSpec(
+        artifacts=('sofa_first_24h.parquet',),
+        tables=(
+            'adt', 'labs', 'vitals', 'patient_assessments',
+            'respiratory_support', 'medication_admin_continuous',
+        ),
+        code=('code/_sofa.py', 'code/_med_extract.py', 'code/_weight_extract.py'),
+    ),
+    'ase': StageSpec(
+        artifacts=('covariates_ase.parquet',),
+        tables=(
+            'hospitalization', 'adt', 'labs', 'microbiology_culture',
+            'medication_admin_continuous', 'medication_admin_intermittent',
+            'respiratory_support',
+        ),
+    ),
+    'cci_elix': StageSpec(
+        artifacts=('covariates_cci.parquet', 'covariates_elix.parquet'),
+        tables=('hospital_diagnosis',),
+        config_keys=(),
+    ),
+}
+
+
+def _sha256(payload: "str | bytes") -> str:
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def parquet_fingerprint(path: str) -> str:
+    """Hash of a parquet file's footer metadata (no data pages read).
+
+    Covers row-group layout, per-column statistics and the schema, so
+    appends, deletions and value changes all move the hash while a
+    byte-identical copy at another path does not. ``"missing"`` when the
+    file does not exist (tables like microbiology_culture are optional at
+    some sites).
+    """
+    if not os.path.exists(path):
+        return "missing"
+    # Private connection: the default one may serve a cached footer for a
+    # file rewritten within the same second (mtime-keyed metadata cache).
+    with duckdb.connect() as _con:
+        rows = _con.sql(f"""
+            FROM parquet_metadata('{path}')
+            SELECT row_group_id, row_group_num_rows, path_in_schema, type
+                , stats_min, stats_max, stats_min_value, stats_max_value
+                , stats_null_count, total_compressed_size
+            ORDER BY row_group_id, column_id
+        """).fetchall()
+    return _sha256(json.dumps(rows, default=str))
+
+
+def table_fingerprint(path: str, filetype: str = 'parquet') -> str:
+    """Fingerprint of a raw CLIF table stored as ``filetype``.
+
+    Parquet goes through :func:`parquet_fingerprint`. CSV has no footer and
+    hashing its bytes would cost a full read of the table on every run, so
+    size + mtime stand in: any rewrite moves the hash (a bare ``touch``
+    costs one spurious recompute).
+    """
+    if filetype == 'parquet':
+        return parquet_fingerprint(path)
+    if not os.path.exists(path):
+        return "missing"
+    st = os.stat(path)
+    return _sha256(f"{st.st_size}:{st.st_mtime_ns}")
+
+
+def file_fingerprint(path: str) -> str:
+    """Hash of a small text/config file's bytes (``"missing"`` if absent)."""
+    if not os.path.exists(path):
+        return "missing"
+    with open(path, 'rb') as f:
+        return _sha256(f.read())
+
+
+def ids_fingerprint(ids: Iterable) -> str:
+    """Order-independent hash of a hospitalization-ID set."""
+    return _sha256("\n".join(sorted({str(i) for i in ids})))
+
+
+def _clifpy_version() -> str:
+    try:
+        return version('clifpy')
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def stage_components(
+    stage: str,
+    cfg: dict,
+    cohort_ids: "Iterable | None" = None,
+) -> dict[str, str]:
+    """Current input fingerprint of ``stage``.
+
+    ``cohort_ids`` is omitted only by ``make cache-status`` for stages whose
+    cohort is not recoverable from disk without re-running (the waterfall's
+    post-stitch cohort); :func:`check_stage_cache` then skips that
+    component and reports it as unchecked.
+    """
+    spec = STAGES[stage]
+    data_dir = cfg['data_directory']
+    filetype = cfg.get('filetype', 'parquet')
+    components = {
+        f"clif_{t}": table_fingerprint(f"{data_dir}/clif_{t}.{filetype}", filetype)
+        for t in spec.tables
+    }
+    if cohort_ids is not None:
+        components['cohort_ids'] = ids_fingerprint(cohort_ids)
+    if spec.uses_outlier_config:
+        components['outlier_config'] = file_fingerprint(OUTLIER_CONFIG_PATH)
+    if spec.config_keys:
+        components['config'] = _sha256(json.dumps(
+            {k: cfg.get(k) for k in spec.config_keys}, sort_keys=True, default=str,
+        ))
+    if spec.code:
+        components['code'] = _sha256("".join(file_fingerprint(p) for p in spec.code))
+    components['clifpy'] = _clifpy_version()
+    return components
+
+
+def artifact_paths(site_name: str, stage: str) -> list[str]:
+    return [f"output/{site_name}/{a}" for a in STAGES[stage].artifacts]
+
+
+def manifest_path(site_name: str, stage: str) -> str:
+    return artifact_paths(site_name, stage)[0] + MANIFEST_SUFFIX
+
+
+def read_stage_manifest(site_name: str, stage: str) -> "dict | None":
+    _path = manifest_path(site_name, stage)
+    if not os.path.exists(_path):
+        return None
+    with open(_path) as f:
+        return json.load(f)
+
+
+def check_stage_cache(
+    site_name: str,
+    stage: str,
+    components: dict[str, str],
+) -> tuple[bool, str]:
+    """Return ``(hit, reason)`` for ``stage`` against current ``components``.
+
+    ``reason`` is a short operator-facing explanation: ``"fingerprint
+    match"`` on a hit; the missing artifact, a missing manifest, or the
+    list of changed components on a miss.
+    """
+    for _path in artifact_paths(site_name, stage):
+        if not os.path.exists(_path):
+            return False, f"{os.path.basename(_path)} absent"
+    manifest = read_stage_manifest(site_name, stage)
+    if manifest is None:
+        return False, "no manifest (cache predates fingerprinting)"
+    stored = manifest.get('components', {})
+    changed = sorted(
+        k for k in set(stored) | set(components)
+        if k in components and stored.get(k) != components[k]
+    )
+    if changed:
+        return False, f"changed: {', '.join(changed)}"
+    unchecked = sorted(set(stored) - set(components))
+    if unchecked:
+        return True, f"fingerprint match (unchecked: {', '.join(unchecked)})"
+    return True, "fingerprint match"
+
+
+def write_stage_manifest(
+    site_name: str,
+    stage: str,
+    components: dict[str, str],
+    n_rows: "int | None" = None,
+) -> str:
+    """Record ``components`` as the fingerprint of the just-written cache."""
+    _path = manifest_path(site_name, stage)
+    with open(_path, 'w') as f:
+        json.dump({
+            'stage': stage,
+            'written_at': _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds'),
+            'n_rows': n_rows,
+            'components': components,
+        }, f, indent=2, sort_keys=True)
+    return _path
+
+
+def drop_stage_manifest(site_name: str, stage: str) -> None:
+    """Mark the stage cache as untracked (next fingerprint check misses)."""
+    _path = manifest_path(site_name, stage)
+    if os.path.exists(_path):
+        os.remove(_path)
+
+
+def resolve_stage_cache(
+    site_name: str,
+    stage: str,
+    components: dict[str, str],
+    force: bool = False,
+) -> bool:
+    """Log the cache decision for ``stage`` and return True to recompute."""
+    hit, reason = check_stage_cache(site_name, stage, components)
+    if force:
+        logger.info(f"[cache] {stage}: RECOMPUTE (forced by rerun_* config; {reason})")
+        return True
+    logger.info(f"[cache] {stage}: {'HIT' if hit else 'MISS'} — {reason}")
+    return not hit
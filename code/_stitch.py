@@ -0,0 +1,90 @@
+"""Encounter stitching (discharge → readmit within N hours) in DuckDB.
+
+Replaces the ``clifpy.utils.stitching_encounters.stitch_encounters`` bridge
+in ``01_cohort.py``'s stitch-dedup cell. The clifpy function is pandas-only:
+it needed ``.df()`` of the hospitalization and ADT relations for every ICU
+hospitalization, then an iterate-until-convergence loop to propagate block
+IDs, plus pandas merges / set comprehensions in the cell to derive the
+kept, dropped and unmapped IDs.
+
+Here the same rule is one gaps-and-islands query over the lazy
+hospitalization relation:
+
+1. order each patient's hospitalizations by ``admission_dttm`` (clifpy's
+   sort; ``hospitalization_id`` breaks exact ties deterministically);
+2. a row is *linked* to the next one when the next admission starts at most
+   ``time_interval`` hours after this discharge (overlaps count; a NULL gap
+   or a NULL ``patient_id`` never links — clifpy's ``fillna(False)``);
+3. a block starts wherever the previous row is not linked, and every row of
+   the block takes the global row number (1-based, ``patient_id,
+   admission_dttm`` order) of the block's LAST row — the same
+   ``encounter_block`` value clifpy's backward propagation converges to.
+
+ADT does not enter the rule (clifpy only merges it back for its stitched
+outputs), so only the hospitalization relation is read.
+``tests/test_stitch.py`` checks parity against clifpy on synthetic CLIF.
+"""
+from __future__ import annotations
+
+import duckdb
+
+ENCOUNTER_STITCH_TABLE = "encounter_stitch"
+
+
+def stitch_encounter_blocks(
+    hosp: duckdb.DuckDBPyRelation,
+    time_interval: float = 12,
+) -> duckdb.DuckDBPyRelation:
+    """(Re)create TEMP TABLE ``encounter_stitch`` from ``hosp`` and return it.
+
+    ``hosp`` needs ``patient_id``, ``hospitalization_id``,
+    ``admission_dttm`` and ``discharge_dttm`` (UTC ``TIMESTAMPTZ``). One
+    output row per hospitalization: ``hospitalization_id``,
+    ``encounter_block`` (INTEGER, clifpy's numbering) and
+    ``is_block_start`` — the first admission of its block, i.e. the one the
+    dedup filter keeps.
+    """
+    duckdb.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {ENCOUNTER_STITCH_TABLE} AS
+        WITH stays AS (
+            FROM hosp
+            SELECT DISTINCT patient_id, hospitalization_id
+                , admission_dttm, discharge_dttm
+        )
+        , linked AS (
+            FROM stays
+            SELECT *
+                , _row: ROW_NUMBER() OVER (
+                    ORDER BY patient_id NULLS LAST, admission_dttm NULLS LAST,
+                        hospitalization_id
+                )
+                , _linked_next: patient_id IS NOT NULL AND COALESCE(
+                    (epoch(LEAD(admission_dttm) OVER w) - epoch(discharge_dttm))
+                        / 3600.0 <= {float(time_interval)} + 1e-6,
+                    FALSE
+                )
+            WINDOW w AS (
+                PARTITION BY patient_id
+                ORDER BY admission_dttm NULLS LAST, hospitalization_id
+            )
+        )
+        , starts AS (
+            FROM linked
+            SELECT *
+                , is_block_start: NOT COALESCE(LAG(_linked_next) OVER w, FALSE)
+            WINDOW w AS (PARTITION BY patient_id ORDER BY _row)
+        )
+        , islands AS (
+            FROM starts
+            SELECT *
+                , _island: SUM(is_block_start::INT) OVER (
+                    PARTITION BY patient_id ORDER BY _row
+                )
+        )
+        FROM islands
+        SELECT hospitalization_id
+            , encounter_block: (MAX(_row) OVER (PARTITION BY patient_id, _island))::INTEGER
+            , is_block_start
+        ORDER BY encounter_block, _row
+    """)
+    return duckdb.table(ENCOUNTER_STITCH_TABLE)
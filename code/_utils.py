@@ -141,125 +141,6 @@ def coerce_dttm_to_utc(rel, columns, site_tz):
     return rel.project(", ".join(parts))
 
 
-def compute_weight_qc_exclusions(
-    weight_rel,
-    hosp_ids,
-    *,
-    clamp_lo: float = 30.0,
-    clamp_hi: float = 300.0,
-    max_jump_kg: float = 20.0,
-    max_jump_hours: float = 24.0,
-    max_range_kg: float = 30.0,
-    range_rule_on: bool = False,
-) -> dict:
-    """Compute weight-QC exclusion sets in-memory (no parquet round-trip).
-
-    Replaces the 2-pass `make run`-`make weight-audit`-`make run` dance with
-    a single-pass in-cohort computation. Same three criteria as the original
-    `code/qc/weight_audit.py` `section_g_drop_list`:
-
-    1. **zero_weight** — cohort hosps with no weight rows surviving the
-       [clamp_lo, clamp_hi] clamp. Catches both "no weight ever charted"
-       AND "all weights are clearly garbage" (e.g., lb-vs-kg unit errors).
-    2. **jump** — hosps with any consecutive pair of weight readings
-       differing by > ``max_jump_kg`` within ``max_jump_hours``. Raw jump
-       (not normalized rate) — normalizing inflates short-gap recordings
-       and misclassifies them as outliers.
-    3. **range** (opt-in via ``range_rule_on``) — hosps whose min-max
-       weight spread within the stay exceeds ``max_range_kg``.
-
-    Criteria are incremental: ``jump`` excludes hosps already in
-    ``zero_weight``; ``range`` excludes hosps in either prior set.
-
-    Implementation is DuckDB-native (avoids materializing the full
-    cohort-wide weight frame to pandas). Defaults match the env-var
-    defaults in ``code/qc/weight_audit.py``.
-
-    Parameters
-    ----------
-    weight_rel : duckdb.DuckDBPyRelation
-        Raw weight events with columns ``hospitalization_id``,
-        ``recorded_dttm``, ``weight_kg_raw``. Caller is responsible for
-        the source filter (e.g., ``vital_category = 'weight_kg'``).
-    hosp_ids : iterable of str
-        Cohort hospitalization IDs. ``zero_weight`` is computed against
-        this set.
-
-    Returns
-    -------
-    dict with keys:
-        ``zero_weight``, ``jump``, ``range`` — sets of hospitalization_id;
-        ``jump_threshold_str``, ``range_threshold_str`` — reason strings
-        suitable for CONSORT label / parquet ``_drop_reason`` columns
-        (range_threshold_str is None when ``range_rule_on=False``).
-    """
-    duckdb.execute(f"""
-        CREATE OR REPLACE TEMP TABLE _wqc_clamped AS
-        FROM weight_rel
-        SELECT hospitalization_id, recorded_dttm, weight_kg_raw
-        WHERE weight_kg_raw BETWEEN {clamp_lo} AND {clamp_hi}
-    """)
-    _has_weight_ids = {
-        r[0]
-        for r in duckdb.sql(
-            "FROM _wqc_clamped SELECT DISTINCT hospitalization_id"
-        ).fetchall()
-    }
-    zero_weight = set(hosp_ids) - _has_weight_ids
-
-    _jump_rows = duckdb.sql(f"""
-        WITH ordered AS (
-            FROM _wqc_clamped
-            SELECT hospitalization_id, recorded_dttm, weight_kg_raw
-                , prev_w: LAG(weight_kg_raw) OVER (
-                    PARTITION BY hospitalization_id ORDER BY recorded_dttm)
-                , prev_t: LAG(recorded_dttm) OVER (
-                    PARTITION BY hospitalization_id ORDER BY recorded_dttm)
-        )
-        , pairs AS (
-            FROM ordered
-            SELECT hospitalization_id
-                , jump_kg: abs(weight_kg_raw - prev_w)
-                , dt_hr: epoch(recorded_dttm - prev_t) / 3600.0
-            WHERE prev_w IS NOT NULL
-        )
-        , per_hosp AS (
-            FROM pairs
-            SELECT hospitalization_id, max_jump: MAX(jump_kg)
-            WHERE dt_hr < {max_jump_hours}
-            GROUP BY hospitalization_id
-        )
-        FROM per_hosp
-        SELECT hospitalization_id
-        WHERE max_jump > {max_jump_kg}
-    """).fetchall()
-    jump = {r[0] for r in _jump_rows} - zero_weight
-
-    range_set: set = set()
-    if range_rule_on:
-        _range_rows = duckdb.sql(f"""
-            FROM _wqc_clamped
-            SELECT hospitalization_id
-            GROUP BY hospitalization_id
-            HAVING MAX(weight_kg_raw) - MIN(weight_kg_raw) > {max_range_kg}
-        """).fetchall()
-        range_set = {r[0] for r in _range_rows} - zero_weight - jump
-
-    duckdb.execute("DROP TABLE IF EXISTS _wqc_clamped")
-
-    return {
-        'zero_weight': zero_weight,
-        'jump': jump,
-        'range': range_set,
-        'jump_threshold_str': (
-            f"jump_gt_{int(max_jump_kg)}kg_within_{int(max_jump_hours)}h"
-        ),
-        'range_threshold_str': (
-            f"range_gt_{int(max_range_kg)}kg" if range_rule_on else None
-        ),
-    }
-
-
 def mar_action_zero_dose_sql(has_category: bool) -> str:
     """Return the SQL fragment that zeros out doses for stop/not_given MAR actions.
 
@@ -313,6 +194,47 @@ def mar_action_not_given_filter_sql(has_category: bool) -> str:
     )
 
 
+# M1 per-hour clinical ceilings for the sedation rate columns of
+# seddose_by_id_imvhr (02_exposure.py clamps to these with LEAST()).
+SEDDOSE_CEILINGS = {
+    'prop_mcg_kg_min_cont':  200,
+    'prop_mcg_kg_min_total': 200,
+    'fenteq_mcg_hr_cont':   1000,
+    'fenteq_mcg_hr_total':  1000,
+    'midazeq_mg_hr_cont':     50,
+    'midazeq_mg_hr_total':    50,
+}
+
+
+def seddose_clamp_summary(seddose_rel, ceilings=SEDDOSE_CEILINGS) -> list[dict]:
+    """Per-ceiling violator stats over the PRE-CLAMP hourly sedation grid.
+
+    One row per ceiling column: count above the ceiling, total rows, and
+    p50/p95/max of the violators' original values. These rows are the
+    ``qc/m1_clamp_summary.csv`` schema; 02_exposure.py logs them and
+    ``_shard.merge_stage_shards`` recomputes them on merged shard output
+    (percentiles do not add across shards).
+    """
+    _total = duckdb.sql("FROM seddose_rel SELECT COUNT(*)").fetchone()[0]
+    rows = []
+    for _col, _ceil in ceilings.items():
+        _n_above, _p50, _p95, _max = duckdb.sql(f"""
+            FROM seddose_rel
+            SELECT
+                COUNT(*) FILTER (WHERE {_col} > {_ceil})                       AS n_above
+                , quantile_cont({_col}, 0.50) FILTER (WHERE {_col} > {_ceil})  AS p50_above
+                , quantile_cont({_col}, 0.95) FILTER (WHERE {_col} > {_ceil})  AS p95_above
+                , MAX({_col})                  FILTER (WHERE {_col} > {_ceil}) AS max_above
+        """).fetchone()
+        rows.append({
+            'column': _col, 'ceiling': _ceil,
+            'n_above': _n_above, 'n_total': _total,
+            'pct_above': round(_n_above / _total * 100 if _total else 0, 4),
+            'p50_above': _p50, 'p95_above': _p95, 'max_above': _max,
+        })
+    return rows
+
+
 def normalize_categories(data, columns):
     """Lowercase + strip-whitespace the named CLIF ``_category`` columns.
 
@@ -360,7 +282,7 @@ def normalize_categories(data, columns):
     # turns NaN into pd.NA, which propagates through downstream
     # `.eq(...).to_numpy()` chains as an object array, breaking any
     # subsequent `.any()` / `np.argmax` etc. with "boolean value of NA is
-    # ambiguous." See 03_outcomes.py:433 (count_intubations_v2). Operate
+    # ambiguous." See _imv_state_machine.count_intubations_v2. Operate
     # on the existing dtype so NaN stays NaN.
     df = data.copy()
     for col in columns:
@@ -422,13 +344,13 @@ def add_dh_hr(
 
 
 def add_day_shift_id(
-    df: pd.DataFrame,
+    data,
     timestamp_name: str = "event_dttm",
     *,
     site_tz: str,
-) -> pd.DataFrame:
+):
     """Add day/shift columns (_dh, _hr, _shift, _is_day_start, _nth_day,
-    _day_shift) to a DataFrame.
+    _day_shift) to ``data`` and return the same container type.
 
     Day shift: 7:00-19:00 site-local, Night shift: 19:00-7:00 site-local.
     _nth_day increments at each local 7am boundary.
@@ -437,11 +359,17 @@ def add_day_shift_id(
     shift-id columns on top via window functions. The `_dh` / `_hr`
     formula lives in ``add_dh_hr`` and only there.
 
-    Caller contract: ``df[timestamp_name]`` is UTC tz-aware
-    (``datetime64[*, UTC]``). ``site_tz`` is REQUIRED (keyword-only) — pass
-    ``cfg['timezone']`` from config for clinical site-local semantics. To
-    reproduce pre-`ea911a9` (UTC-hour) outputs, pass ``site_tz="UTC"``
-    explicitly.
+    Polymorphic like ``add_dh_hr``: pandas DataFrame in → pandas DataFrame
+    out; ``DuckDBPyRelation`` in → ``DuckDBPyRelation`` out (lazy — the
+    `_dh`/`_hr` projection and both window passes compose into one query,
+    so the hourly grid never round-trips through pandas). A pandas input
+    is materialized once, at the end.
+
+    Caller contract: ``data[timestamp_name]`` is UTC tz-aware
+    (``datetime64[*, UTC]`` or TIMESTAMPTZ tagged UTC). ``site_tz`` is
+    REQUIRED (keyword-only) — pass ``cfg['timezone']`` from config for
+    clinical site-local semantics. To reproduce pre-`ea911a9` (UTC-hour)
+    outputs, pass ``site_tz="UTC"`` explicitly.
 
     All local-tz interpretation is done with explicit ``AT TIME ZONE`` in
     SQL, so the result is invariant under DuckDB's session timezone (any
@@ -454,11 +382,15 @@ def add_day_shift_id(
     - ``_hr``: INT, local hour 0-23.
     - ``_shift``: 'day' if ``_hr`` in [7, 19), else 'night'.
     - ``_is_day_start``: 1 at the row where ``_hr`` first crosses to 7.
-    - ``_nth_day``: running count of local 7am crossings per hospitalization.
+    - ``_nth_day``: running count of local 7am crossings per hospitalization
+      (DOUBLE — the type the pandas path has always written to parquet).
     - ``_day_shift``: e.g., ``'day1_day'`` / ``'day2_night'``.
     """
-    with_dh = add_dh_hr(df, timestamp_name, site_tz=site_tz)
-    result = duckdb.sql(f"""
+    is_df = isinstance(data, pd.DataFrame)
+    with_dh = add_dh_hr(
+        duckdb.from_df(data) if is_df else data, timestamp_name, site_tz=site_tz,
+    )
+    rel = duckdb.sql("""
         WITH day_starts AS (
             FROM with_dh
             SELECT *
@@ -470,16 +402,19 @@ def add_day_shift_id(
         )
         FROM day_starts
         SELECT *
-            , _nth_day: SUM(_is_day_start) OVER w
+            , _nth_day: (SUM(_is_day_start) OVER w)::DOUBLE
             , _day_shift: 'day' || _nth_day::INT::TEXT || '_' || _shift
         WINDOW w AS (PARTITION BY hospitalization_id ORDER BY _dh)
         ORDER BY hospitalization_id, _dh
-    """).df()
+    """)
+    if not is_df:
+        return rel
     # Re-anchor the input timestamp's display tz to UTC, so the function's
     # output dtype is deterministic regardless of DuckDB's session tz at the
     # time of `.df()` (when session tz != UTC, the TIMESTAMPTZ → pandas
     # conversion tags the column with whatever session tz was set; that
     # leaks session state into the caller's frame).
+    result = rel.df()
     s = result[timestamp_name]
     if pd.api.types.is_datetime64_any_dtype(s) and s.dt.tz is not None:
         result[timestamp_name] = s.dt.tz_convert("UTC")
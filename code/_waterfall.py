@@ -0,0 +1,499 @@
+"""Out-of-core respiratory-support waterfall (DuckDB port of clifpy's).
+
+``01_cohort.py`` Mode C used to materialize the cohort's whole
+``respiratory_support`` table into pandas and hand it to
+``clifpy.RespiratorySupport.waterfall(bfill=True)``. That was the largest
+memory peak in the pipeline. This module runs the same algorithm
+(``clifpy.utils.waterfall.process_resp_support_waterfall``) as DuckDB
+window SQL:
+
+- ``process_resp_waterfall`` — single pass, polymorphic (pandas in →
+  pandas out; relation in → lazy relation out). Used by the parity test
+  in ``tests/test_waterfall.py``.
+- ``write_resp_waterfall`` — the pipeline entry point. Stages the input
+  once into hash partitions of ``hospitalization_id``, runs the waterfall
+  per partition (every window is per hospitalization, so partitions are
+  independent) and writes ``cohort_resp_processed_bf.parquet`` directly.
+  Peak memory is bounded by the partition size, not the cohort.
+
+Phases (same numbering as clifpy):
+
+0. Lowercase device/mode strings, coerce numerics, rescale FiO2 given in
+   percent (global mean > 1), hourly ``HH:59:59`` scaffold per
+   hospitalization.
+1. Device inference: IMV from mode_category, IMV / NIPPV from neighbouring
+   rows plus ventilator settings, duplicate and empty-row cleanup,
+   nasal-cannula-with-PEEP guard.
+2. Hierarchical change IDs ``device_cat_id → device_id → mode_cat_id →
+   mode_name_id`` with forward/back fill of each level inside its parent
+   (the same episode structure ``_sofa._create_resp_support_episodes``
+   uses; the SOFA-only heuristics there — NIPPV from mode, LPM→FiO2
+   imputation — are not part of the clifpy waterfall and are not applied).
+3. Room-air FiO2 0.21, tidal-volume cleanup, numeric fill inside
+   ``mode_name_id`` blocks split at each ``trach collar`` row, T-piece →
+   ``blow by``, tracheostomy forward fill.
+
+Two deliberate differences from clifpy:
+
+- The trach-collar split. clifpy's ``groupby(breaker).apply`` picks up
+  group keys under pandas >= 2, which raises or blanks every numeric
+  setting in any block containing a ``trach collar`` row. The split here
+  implements the documented intent (fill never crosses a trach-collar
+  row).
+- Global fallback labels (most common IMV / NIPPV ``device_name``) break
+  count ties alphabetically; pandas' ``value_counts`` order is not
+  specified for ties.
+
+Rows with tied ``recorded_dttm`` within a hospitalization keep input order
+(pandas' stable multi-key sort), and at a tie a real row sorts before the
+scaffold row, as after clifpy's concat. "Input order" has to be a column:
+DuckDB scans run in parallel, so ``ROW_NUMBER() OVER ()`` is not stable
+across runs. Sources carry ``file_row_number`` (``read_parquet(...,
+file_row_number=true)`` in 01; the DataFrame's row position in
+``process_resp_waterfall``); a source without it breaks ties on the
+remaining column values instead, which is deterministic but not clifpy's
+order.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import shutil
+
+import duckdb
+import pandas as pd
+from clifpy.utils.logging_config import get_logger
+
+logger = get_logger("epi_sedation.waterfall")
+
+
+RESP_WATERFALL_COLUMNS = [
+    "hospitalization_id",
+    "recorded_dttm",
+    "device_name",
+    "device_category",
+    "mode_name",
+    "mode_category",
+    "fio2_set",
+    "peep_set",
+    "pressure_support_set",
+    "resp_rate_set",
+    "tidal_volume_set",
+    "peak_inspiratory_pressure_set",
+    "tracheostomy",
+]
+# Carried through when the source has them (clifpy treats them the same).
+OPTIONAL_NUMERIC_COLUMNS = ["lpm_set", "resp_rate_obs"]
+
+_STRING_COLS = ["device_category", "device_name", "mode_category", "mode_name"]
+# Phase-3 fill order, as in clifpy's num_cols_fill.
+_FILL_COLS = [
+    "fio2_set", "lpm_set", "peep_set", "tidal_volume_set",
+    "pressure_support_set", "resp_rate_set", "resp_rate_obs",
+    "peak_inspiratory_pressure_set",
+]
+_ID_COLS = ["device_cat_id", "device_id", "mode_cat_id", "mode_name_id"]
+# Original row index of the source, the tie-break for equal recorded_dttm.
+SOURCE_ROW_COLUMN = "file_row_number"
+
+# Input rows per hash partition in write_resp_waterfall. Each partition's
+# window sort fits comfortably in memory at this size (~1 GB).
+ROWS_PER_PARTITION = 5_000_000
+
+
+def _columns(rel) -> list[str]:
+    missing = [c for c in RESP_WATERFALL_COLUMNS if c not in rel.columns]
+    if missing:
+        raise ValueError(f"respiratory_support is missing waterfall columns: {missing}")
+    return RESP_WATERFALL_COLUMNS + [c for c in OPTIONAL_NUMERIC_COLUMNS if c in rel.columns]
+
+
+def _numeric(cols: list[str]) -> list[str]:
+    return [c for c in cols if c not in _STRING_COLS + ["hospitalization_id", "recorded_dttm"]]
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _source_order(rel, cols: list[str]) -> str:
+    """ORDER BY for ``_rn``: natural key, then the source row index."""
+    tiebreak = [SOURCE_ROW_COLUMN] if SOURCE_ROW_COLUMN in rel.columns else cols[2:]
+    return ", ".join(["hospitalization_id", "recorded_dttm", *tiebreak])
+
+
+def _normalize_sql(src: str, cols: list[str], order: str, n_partitions: int = 1) -> str:
+    """Phase-0 row-wise normalization plus ``_rn`` (input order, see
+    :func:`_source_order`)."""
+    exprs = []
+    for c in cols:
+        if c in _STRING_COLS:
+            exprs.append(f"{c}: LOWER({c}::VARCHAR)")
+        elif c in _numeric(cols):
+            # pd.to_numeric(errors="coerce"); NaN from a pandas source → NULL.
+            exprs.append(f"{c}: NULLIF(TRY_CAST({c} AS DOUBLE), 'NaN'::DOUBLE)")
+        else:
+            exprs.append(c)
+    return f"""
+        FROM {src}
+        SELECT {", ".join(exprs)}
+            , _rn: ROW_NUMBER() OVER (ORDER BY {order})
+            , _part: hash(hospitalization_id) % {n_partitions}
+    """
+
+
+def _fallback_labels(norm) -> tuple[bool, str, str]:
+    """Global phase-0/1 constants: FiO2 percent flag, IMV / NIPPV names.
+
+    Computed over the whole input (not per partition) so partitioned and
+    single-pass runs agree.
+    """
+    scale, imv, nippv = duckdb.sql("""
+        WITH counts AS (
+            FROM norm
+            SELECT device_category, device_name, n: COUNT(*)
+            WHERE device_category IN ('imv', 'nippv') AND device_name IS NOT NULL
+            GROUP BY ALL
+        )
+        SELECT
+            (FROM norm SELECT AVG(fio2_set)) > 1
+            , (FROM counts SELECT device_name WHERE device_category = 'imv'
+               ORDER BY n DESC, device_name LIMIT 1)
+            , (FROM counts SELECT device_name WHERE device_category = 'nippv'
+               ORDER BY n DESC, device_name LIMIT 1)
+    """).fetchone()
+    return bool(scale), imv or "ventilator", nippv or "bipap"
+
+
+def _fb(col: str, partition: str, bfill: bool) -> str:
+    """Forward fill (then back fill) of ``col`` within ``partition``."""
+    ffill = (
+        f"LAST_VALUE({col} IGNORE NULLS) OVER (PARTITION BY {partition} "
+        f"ORDER BY _ord ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)"
+    )
+    if not bfill:
+        return ffill
+    return (
+        f"COALESCE({ffill}, FIRST_VALUE({col} IGNORE NULLS) OVER (PARTITION BY "
+        f"{partition} ORDER BY _ord ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING))"
+    )
+
+
+def _change(col: str) -> str:
+    """1 where ``col`` (NULL read as 'missing') differs from the previous row."""
+    return (
+        f"(COALESCE({col}, 'missing') IS DISTINCT FROM "
+        f"LAG(COALESCE({col}, 'missing')) OVER (PARTITION BY hospitalization_id "
+        f"ORDER BY _ord))::INTEGER"
+    )
+
+
+def _run_id(flag: str) -> str:
+    return (
+        f"SUM({flag}) OVER (PARTITION BY hospitalization_id ORDER BY _ord "
+        f"ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)::INTEGER"
+    )
+
+
+def _waterfall_sql(
+    src: str,
+    cols: list[str],
+    *,
+    bfill: bool,
+    scale_fio2: bool,
+    imv_name: str,
+    nippv_name: str,
+) -> str:
+    """Phases 0-3 over a normalized source (output of ``_normalize_sql``)."""
+    fill_cols = [c for c in _FILL_COLS if c in cols]
+    all_na = " AND ".join(f"{c} IS NULL" for c in cols[2:])
+    imv, nippv = _quote(imv_name), _quote(nippv_name)
+    fio2 = (
+        "CASE WHEN fio2_set > 1 THEN fio2_set / 100 ELSE fio2_set END"
+        if scale_fio2 else "fio2_set"
+    )
+    return f"""
+        WITH src AS (
+            FROM {src}
+            SELECT * EXCLUDE (_part) REPLACE ({fio2} AS fio2_set)
+        )
+        , scaffold AS (
+            FROM (
+                FROM src
+                SELECT hospitalization_id
+                    , _lo: date_trunc('hour', timezone('UTC', MIN(recorded_dttm)))
+                    , _hi: date_trunc('hour', timezone('UTC', MAX(recorded_dttm)))
+                WHERE recorded_dttm IS NOT NULL
+                GROUP BY hospitalization_id
+            )
+            SELECT hospitalization_id
+                , _hr: UNNEST(generate_series(_lo, _hi, INTERVAL 1 HOUR))
+        )
+        -- 1-a: IMV from mode_category when device is entirely unknown.
+        , h1a AS (
+            FROM (
+                FROM src
+                SELECT *
+                    , _f: device_category IS NULL AND device_name IS NULL
+                        AND COALESCE(regexp_matches(mode_category,
+                            '(?:assist control-volume control|simv|pressure control)'), FALSE)
+            )
+            SELECT * EXCLUDE (_f) REPLACE (
+                CASE WHEN _f THEN 'imv' ELSE device_category END AS device_category,
+                CASE WHEN _f THEN {imv} ELSE device_name END AS device_name)
+        )
+        -- 1-b: IMV next to an IMV row with full ventilator settings.
+        , h1b AS (
+            FROM (
+                FROM h1a
+                SELECT *
+                    , _f: device_category IS NULL
+                        AND (COALESCE(LAG(device_category) OVER w = 'imv', FALSE)
+                             OR COALESCE(LEAD(device_category) OVER w = 'imv', FALSE))
+                        AND peep_set > 1 AND resp_rate_set > 1 AND tidal_volume_set > 1
+                WINDOW w AS (PARTITION BY hospitalization_id ORDER BY recorded_dttm, _rn)
+            )
+            SELECT * EXCLUDE (_f) REPLACE (
+                CASE WHEN _f THEN 'imv' ELSE device_category END AS device_category,
+                CASE WHEN _f THEN {imv} ELSE device_name END AS device_name)
+        )
+        -- 1-c: NIPPV next to an NIPPV row with PIP and pressure support.
+        , h1c AS (
+            FROM (
+                FROM h1b
+                SELECT *
+                    , _f: device_category IS NULL
+                        AND (COALESCE(LAG(device_category) OVER w = 'nippv', FALSE)
+                             OR COALESCE(LEAD(device_category) OVER w = 'nippv', FALSE))
+                        AND peak_inspiratory_pressure_set > 1 AND pressure_support_set > 1
+                WINDOW w AS (PARTITION BY hospitalization_id ORDER BY recorded_dttm, _rn)
+            )
+            SELECT * EXCLUDE (_f) REPLACE (
+                CASE WHEN _f THEN 'nippv' ELSE device_category END AS device_category,
+                CASE WHEN _f AND device_name IS NULL THEN {nippv} ELSE device_name END
+                    AS device_name)
+        )
+        -- 1-d: at duplicated timestamps drop NIPPV rows, then uncategorized rows.
+        , h1d AS (
+            FROM (
+                FROM h1c
+                SELECT *, _n1: COUNT(*) OVER (PARTITION BY hospitalization_id, recorded_dttm)
+            )
+            SELECT * EXCLUDE (_n1)
+                , _n2: COUNT(*) OVER (PARTITION BY hospitalization_id, recorded_dttm)
+            WHERE NOT (_n1 > 1 AND device_category IS NOT DISTINCT FROM 'nippv')
+        )
+        -- 1-e: nasal cannula never carries PEEP.
+        , h1e AS (
+            FROM h1d
+            SELECT * EXCLUDE (_n2) REPLACE (
+                CASE WHEN device_category = 'nasal cannula' AND peep_set > 0
+                     THEN NULL ELSE device_category END AS device_category)
+            WHERE NOT (_n2 > 1 AND device_category IS NULL)
+        )
+        -- Drop rows with nothing recorded, then keep one row per timestamp.
+        , real AS (
+            FROM h1e
+            SELECT *, is_scaffold: FALSE
+            WHERE NOT ({all_na})
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY hospitalization_id, recorded_dttm ORDER BY _rn) = 1
+        )
+        -- MATERIALIZED: without the barrier DuckDB's filter pushdown walks
+        -- the whole window chain below (seconds of planning per query).
+        , merged AS MATERIALIZED (
+            FROM (
+                FROM real
+                UNION ALL BY NAME
+                FROM scaffold
+                SELECT hospitalization_id
+                    , recorded_dttm: timezone('UTC', _hr + INTERVAL '59 minutes 59 seconds')
+                    , is_scaffold: TRUE
+            )
+            SELECT * EXCLUDE (_rn)
+                -- clifpy's stable sort after concat: real rows first at a tie.
+                , _ord: ROW_NUMBER() OVER (PARTITION BY hospitalization_id
+                    ORDER BY recorded_dttm, is_scaffold, _rn)
+        )
+        -- Phase 2: hierarchical IDs, each level filled inside its parent.
+        , p2a AS (
+            FROM merged
+            SELECT * REPLACE (
+                LAST_VALUE(device_category IGNORE NULLS) OVER (
+                    PARTITION BY hospitalization_id ORDER BY _ord
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS device_category)
+        )
+        , p2b AS (FROM p2a SELECT *, _chg: {_change("device_category")})
+        , p2c AS (FROM p2b SELECT * EXCLUDE (_chg), device_cat_id: {_run_id("_chg")})
+        , p2d AS (
+            FROM p2c
+            SELECT * REPLACE (
+                {_fb("device_name", "hospitalization_id, device_cat_id", bfill)} AS device_name)
+        )
+        , p2e AS (FROM p2d SELECT *, _chg: {_change("device_name")})
+        , p2f AS (FROM p2e SELECT * EXCLUDE (_chg), device_id: {_run_id("_chg")})
+        , p2g AS (
+            FROM p2f
+            SELECT * REPLACE (
+                {_fb("mode_category", "hospitalization_id, device_id", bfill)} AS mode_category)
+        )
+        , p2h AS (FROM p2g SELECT *, _chg: {_change("mode_category")})
+        , p2i AS (FROM p2h SELECT * EXCLUDE (_chg), mode_cat_id: {_run_id("_chg")})
+        , p2j AS (
+            FROM p2i
+            SELECT * REPLACE (
+                {_fb("mode_name", "hospitalization_id, mode_cat_id", bfill)} AS mode_name)
+        )
+        , p2k AS (FROM p2j SELECT *, _chg: {_change("mode_name")})
+        , p2l AS (FROM p2k SELECT * EXCLUDE (_chg), mode_name_id: {_run_id("_chg")})
+        -- Phase 3: numeric waterfall.
+        , p3a AS (
+            FROM p2l
+            SELECT * REPLACE (
+                CASE WHEN device_category = 'room air' AND fio2_set IS NULL
+                     THEN 0.21 ELSE fio2_set END AS fio2_set,
+                CASE WHEN (mode_category = 'pressure support/cpap'
+                           AND pressure_support_set IS NOT NULL)
+                       OR (mode_category IS NULL AND contains(device_name, 'trach'))
+                       OR (mode_category = 'pressure support/cpap'
+                           AND contains(device_name, 'trach'))
+                     THEN NULL ELSE tidal_volume_set END AS tidal_volume_set)
+                -- Fill never crosses a trach-collar row.
+                , _tc_blk: COALESCE(SUM((device_category = 'trach collar')::INTEGER) OVER (
+                    PARTITION BY hospitalization_id, mode_name_id ORDER BY _ord
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW), 0)
+        )
+        FROM p3a
+        SELECT * EXCLUDE (_tc_blk) REPLACE (
+            {", ".join(
+                f'{_fb(c, "hospitalization_id, mode_name_id, _tc_blk", bfill)} AS {c}'
+                for c in fill_cols
+            )},
+            CASE WHEN mode_category IS NULL AND contains(device_name, 't-piece')
+                 THEN 'blow by' ELSE mode_category END AS mode_category,
+            LAST_VALUE(tracheostomy IGNORE NULLS) OVER (
+                PARTITION BY hospitalization_id ORDER BY _ord
+                ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS tracheostomy)
+    """
+
+
+def _output_sql(src: str, cols: list[str], trach_int: bool = False) -> str:
+    """Final column order (input columns, ``is_scaffold``, IDs) and sort."""
+    select = [
+        "tracheostomy: (COALESCE(tracheostomy, 0) > 0)::TINYINT"
+        if c == "tracheostomy" and trach_int else c
+        for c in cols
+    ]
+    return f"""
+        FROM {src}
+        SELECT {", ".join(select + ["is_scaffold"] + _ID_COLS)}
+        ORDER BY hospitalization_id, _ord
+    """
+
+
+def process_resp_waterfall(data, *, bfill: bool = True):
+    """Waterfall ``data`` in one pass.
+
+    Same output as ``clifpy.utils.waterfall.process_resp_support_waterfall``
+    (modulo the two differences in the module docstring): input columns,
+    then ``is_scaffold`` and the four int32 episode IDs, one row per
+    ``(hospitalization_id, recorded_dttm)`` sorted by both.
+
+    Polymorphic: pandas DataFrame in → pandas DataFrame out;
+    ``DuckDBPyRelation`` in → ``DuckDBPyRelation`` out (lazy).
+
+    Caller contract: ``recorded_dttm`` is UTC ``TIMESTAMPTZ`` (tz-aware
+    UTC in pandas) and every column in ``RESP_WATERFALL_COLUMNS`` exists.
+    """
+    if isinstance(data, pd.DataFrame):
+        # The DataFrame's row position is its input order.
+        source = data.assign(**{SOURCE_ROW_COLUMN: range(len(data))})
+        rel = duckdb.sql("FROM source")
+    else:
+        rel = data
+    cols = _columns(rel)
+    norm = duckdb.sql(_normalize_sql("rel", cols, _source_order(rel, cols)))
+    scale_fio2, imv_name, nippv_name = _fallback_labels(norm)
+    filled = duckdb.sql(_waterfall_sql(
+        "norm", cols, bfill=bfill, scale_fio2=scale_fio2,
+        imv_name=imv_name, nippv_name=nippv_name,
+    ))
+    out = duckdb.sql(_output_sql("filled", cols))
+    if not isinstance(data, pd.DataFrame):
+        return out
+    result = out.df()
+    result['recorded_dttm'] = result['recorded_dttm'].dt.tz_convert("UTC")
+    return result
+
+
+def write_resp_waterfall(
+    resp_rel: duckdb.DuckDBPyRelation,
+    out_path: str,
+    *,
+    bfill: bool = True,
+    rows_per_partition: int = ROWS_PER_PARTITION,
+) -> int:
+    """Waterfall ``resp_rel`` partition by partition into ``out_path``.
+
+    The input is scanned once into ``<out_path>.parts/`` (hash-partitioned
+    on ``hospitalization_id``); the FiO2 scaling flag and fallback device
+    names are computed over all partitions; each partition is then
+    waterfalled and written on its own, and the parts are merged into one
+    parquet sorted by ``(hospitalization_id, recorded_dttm)``.
+
+    On disk ``tracheostomy`` is written as TINYINT 0/1 (the project's
+    canonical type; see Mode A in ``01_cohort.py``) and ``recorded_dttm``
+    as UTC ``TIMESTAMPTZ``. Returns the number of rows written.
+    """
+    cols = _columns(resp_rel)
+    n_input = resp_rel.aggregate("COUNT(*)").fetchone()[0]
+    n_partitions = max(1, math.ceil(n_input / rows_per_partition))
+    parts_dir = f"{out_path}.parts"
+    if os.path.isdir(parts_dir):
+        shutil.rmtree(parts_dir)
+    os.makedirs(parts_dir)
+    try:
+        order = _source_order(resp_rel, cols)
+        duckdb.sql(_normalize_sql("resp_rel", cols, order, n_partitions)).to_parquet(
+            f"{parts_dir}/input", partition_by=['_part'],
+        )
+        inputs = sorted(os.listdir(f"{parts_dir}/input")) if n_input else []
+        norm = (
+            duckdb.read_parquet(f"{parts_dir}/input/*/*.parquet", hive_partitioning=True)
+            if inputs else duckdb.sql(_normalize_sql("resp_rel", cols, order))
+        )
+        scale_fio2, imv_name, nippv_name = _fallback_labels(norm)
+        logger.info(
+            f"Waterfall: {n_input:,} input rows in {len(inputs)} partition(s); "
+            f"fio2 percent rescale={scale_fio2}, fallback names imv={imv_name!r} "
+            f"nippv={nippv_name!r}"
+        )
+        os.makedirs(f"{parts_dir}/output")
+        for _i, _part in enumerate(inputs or [None]):
+            part = (
+                duckdb.read_parquet(f"{parts_dir}/input/{_part}/*.parquet", hive_partitioning=True)
+                if _part else norm
+            )
+            filled = duckdb.sql(_waterfall_sql(
+                "part", cols, bfill=bfill, scale_fio2=scale_fio2,
+                imv_name=imv_name, nippv_name=nippv_name,
+            ))
+            duckdb.sql(_output_sql("filled", cols, trach_int=True)).to_parquet(
+                f"{parts_dir}/output/part_{_i:05d}.parquet"
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"  waterfall partition {_i + 1}/{len(inputs)} done")
+        duckdb.sql(f"""
+            COPY (
+                FROM read_parquet('{parts_dir}/output/*.parquet')
+                ORDER BY hospitalization_id, recorded_dttm, is_scaffold
+            ) TO '{out_path}' (FORMAT parquet)
+        """)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    n_out = duckdb.connect().sql(
+        f"FROM parquet_file_metadata('{out_path}') SELECT SUM(num_rows)"
+    ).fetchone()[0]
+    logger.info(f"Waterfall written: {out_path} ({n_out:,} rows)")
+    return int(n_out)
@@ -0,0 +1,281 @@
+"""Cohort-scoped, sorted extract of ``weight_kg`` rows from ``clif_vitals``.
+
+Five places used to read weights out of the raw vitals table on their own:
+weight QC in ``01_cohort.py`` (via a ``_wqc_clamped`` temp table), the
+continuous-sedative ASOF attachment and the intermittent converter in
+``02_exposure.py``, the vasopressor converter / BMI / ``weight_daily`` in
+``04_covariates.py``, and the cardiovascular SOFA component in
+``_sofa._load_and_convert_medications``.
+
+``write_weight_extract`` (called once from ``01_cohort.py``) scans the raw
+file a single time — ``vital_category = 'weight_kg'`` plus the cohort
+hospitalization IDs pushed down — and writes one parquet sorted by
+``(hospitalization_id, recorded_dttm)``::
+
+    output/{site}/cohort_weight.parquet
+
+Columns (``recorded_dttm`` is UTC ``TIMESTAMPTZ``, project convention):
+
+- ``weight_kg_raw`` — the charted ``vital_value``, untouched (NULLs kept);
+- ``weight_kg`` — ``weight_kg_raw`` clamped to ``[clamp_lo, clamp_hi]``
+  (NULL outside), identical to the ``outlier_config.yaml`` weight_kg range
+  the consumers applied before;
+- ``admission_weight_kg`` — first clamped weight of the hospitalization
+  (the admission fallback of every ASOF attachment);
+- ``wqc_has_weight``, ``wqc_all_clamped``, ``wqc_jump``, ``wqc_range`` —
+  per-hospitalization weight-QC flags (constant within a hospitalization),
+  read back by :func:`weight_qc_exclusions`.
+
+Rows are sorted so each consumer's ASOF join / first-row lookup runs over a
+small pre-ordered file. Consumers resolve their input through
+``weight_extract_rel`` / ``weight_extract_path``, which fall back to the
+raw file when the extract has not been written yet (e.g., 02/04 re-run
+against an older 01 output).
+"""
+from __future__ import annotations
+
+import os
+
+import duckdb
+from clifpy.utils.logging_config import get_logger
+
+from _utils import coerce_dttm_to_utc
+
+logger = get_logger("epi_sedation.weight_extract")
+
+# Same range as config/outlier_config.yaml vitals.weight_kg.
+WEIGHT_CLAMP_KG = (30.0, 300.0)
+
+
+def weight_extract_file(site_name: str) -> str:
+    """Site-scoped path of the weight extract."""
+    return f"output/{site_name}/cohort_weight.parquet"
+
+
+def weight_extract_path(site_name: str) -> "str | None":
+    """Extract path if it has been written, else None.
+
+    ``None`` tells callers to fall back to the raw CLIF file.
+    """
+    _path = weight_extract_file(site_name)
+    return _path if os.path.exists(_path) else None
+
+
+def _build_weight_rel(
+    data_dir: str,
+    site_tz: str,
+    hosp_ids_rel: duckdb.DuckDBPyRelation,
+    *,
+    clamp_lo: float = WEIGHT_CLAMP_KG[0],
+    clamp_hi: float = WEIGHT_CLAMP_KG[1],
+    max_jump_kg: float = 20.0,
+    max_jump_hours: float = 24.0,
+    max_range_kg: float = 30.0,
+) -> duckdb.DuckDBPyRelation:
+    """Lazy extract relation straight from the raw vitals file."""
+    _raw = duckdb.sql(f"""
+        FROM '{data_dir}/clif_vitals.parquet' v
+        SEMI JOIN hosp_ids_rel USING (hospitalization_id)
+        SELECT hospitalization_id
+            , v.recorded_dttm
+            , weight_kg_raw: v.vital_value
+        WHERE v.vital_category = 'weight_kg'
+    """)
+    _raw = coerce_dttm_to_utc(_raw, ['recorded_dttm'], site_tz)
+    return duckdb.sql(f"""
+        WITH clamped AS (
+            FROM _raw
+            SELECT *
+                , weight_kg: CASE
+                    WHEN weight_kg_raw BETWEEN {clamp_lo} AND {clamp_hi}
+                    THEN weight_kg_raw
+                END
+        )
+        -- Consecutive clamped readings, for the jump rule.
+        , pairs AS (
+            FROM clamped
+            SELECT hospitalization_id
+                , jump_kg: abs(weight_kg - LAG(weight_kg) OVER w)
+                , dt_hr: epoch(recorded_dttm - LAG(recorded_dttm) OVER w) / 3600.0
+            WHERE weight_kg IS NOT NULL
+            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY recorded_dttm)
+        )
+        , jumps AS (
+            FROM pairs
+            SELECT hospitalization_id, max_jump: MAX(jump_kg)
+            WHERE dt_hr < {max_jump_hours}
+            GROUP BY hospitalization_id
+        )
+        , per_hosp AS (
+            FROM clamped
+            SELECT hospitalization_id
+                , admission_weight_kg: arg_min(weight_kg, recorded_dttm)
+                    FILTER (WHERE weight_kg IS NOT NULL)
+                , wqc_has_weight: bool_or(weight_kg_raw IS NOT NULL)
+                , _n_clamped: COUNT(weight_kg)
+                , _range_kg: MAX(weight_kg) - MIN(weight_kg)
+            GROUP BY hospitalization_id
+        )
+        FROM clamped c
+        JOIN per_hosp p USING (hospitalization_id)
+        LEFT JOIN jumps j USING (hospitalization_id)
+        SELECT hospitalization_id
+            , c.recorded_dttm
+            , c.weight_kg_raw
+            , c.weight_kg
+            , p.admission_weight_kg
+            , p.wqc_has_weight
+            , wqc_all_clamped: p.wqc_has_weight AND p._n_clamped = 0
+            , wqc_jump: COALESCE(j.max_jump > {max_jump_kg}, FALSE)
+            , wqc_range: COALESCE(p._range_kg > {max_range_kg}, FALSE)
+        ORDER BY hospitalization_id, c.recorded_dttm
+    """)
+
+
+def write_weight_extract(
+    data_dir: str,
+    site_name: str,
+    site_tz: str,
+    hosp_ids_rel: duckdb.DuckDBPyRelation,
+    *,
+    clamp_lo: float = WEIGHT_CLAMP_KG[0],
+    clamp_hi: float = WEIGHT_CLAMP_KG[1],
+    max_jump_kg: float = 20.0,
+    max_jump_hours: float = 24.0,
+    max_range_kg: float = 30.0,
+) -> str:
+    """Write the cohort-scoped, sorted weight extract.
+
+    Parameters
+    ----------
+    data_dir : str
+        CLIF data directory (``config["data_directory"]``).
+    site_name : str
+        Lower-cased site name; selects ``output/{site}/``.
+    site_tz : str
+        IANA timezone used to interpret naive ``recorded_dttm`` wall-clocks
+        (see :func:`_utils.coerce_dttm_to_utc`).
+    hosp_ids_rel : DuckDBPyRelation
+        One ``hospitalization_id`` column. Must cover every consumer's
+        cohort — 01 passes the pre-weight IMV cohort, which is a superset
+        of the final cohort read by 02/04/SOFA.
+    clamp_lo, clamp_hi, max_jump_kg, max_jump_hours, max_range_kg : float
+        Clamp range and thresholds of the precomputed QC flags (defaults
+        match ``code/qc/weight_audit.py``).
+
+    Returns
+    -------
+    str
+        The extract path (an existing file is replaced).
+    """
+    _path = weight_extract_file(site_name)
+    os.makedirs(os.path.dirname(_path), exist_ok=True)
+    _build_weight_rel(
+        data_dir, site_tz, hosp_ids_rel,
+        clamp_lo=clamp_lo, clamp_hi=clamp_hi, max_jump_kg=max_jump_kg,
+        max_jump_hours=max_jump_hours, max_range_kg=max_range_kg,
+    ).to_parquet(_path)
+    _n_rows, _n_hosp = duckdb.sql(f"""
+        FROM '{_path}' SELECT COUNT(*), COUNT(DISTINCT hospitalization_id)
+    """).fetchone()
+    logger.info(f"Weight extract written: {_path} ({_n_rows:,} rows, {_n_hosp:,} hospitalizations)")
+    return _path
+
+
+def weight_extract_rel(
+    data_dir: str,
+    site_name: str,
+    site_tz: str,
+    hosp_ids_rel: duckdb.DuckDBPyRelation,
+) -> duckdb.DuckDBPyRelation:
+    """Extract rows for the hospitalizations in ``hosp_ids_rel``.
+
+    Reads the extract when present, otherwise builds the same relation
+    lazily from the raw vitals file (default QC thresholds).
+    """
+    _path = weight_extract_path(site_name)
+    if _path is None:
+        logger.warning(
+            f"Weight extract not found at {weight_extract_file(site_name)}; "
+            f"reading raw clif_vitals.parquet (run 01_cohort.py to build the extract)"
+        )
+        return _build_weight_rel(data_dir, site_tz, hosp_ids_rel)
+    return duckdb.sql(f"""
+        FROM '{_path}' w
+        SEMI JOIN hosp_ids_rel USING (hospitalization_id)
+        SELECT w.*
+    """)
+
+
+def as_vitals(weights: duckdb.DuckDBPyRelation) -> duckdb.DuckDBPyRelation:
+    """Extract rows in ``clif_vitals`` shape, clamped weight as ``vital_value``.
+
+    For clifpy's unit converters (``vitals_df=``), which look up weights by
+    ``vital_category = 'weight_kg'``. Equal to the former raw read followed
+    by ``apply_outlier_handling`` on weight_kg.
+    """
+    return duckdb.sql("""
+        FROM weights
+        SELECT hospitalization_id
+            , recorded_dttm
+            , vital_category: 'weight_kg'
+            , vital_value: weight_kg
+    """)
+
+
+def weight_qc_exclusions(
+    weights: duckdb.DuckDBPyRelation,
+    hosp_ids,
+    *,
+    max_jump_kg: float = 20.0,
+    max_jump_hours: float = 24.0,
+    max_range_kg: float = 30.0,
+    range_rule_on: bool = False,
+) -> dict:
+    """Weight-QC exclusion sets from the extract's precomputed flags.
+
+    Same three criteria as ``code/qc/weight_audit.py``
+    ``section_g_drop_list``:
+
+    1. **zero_weight** — ``hosp_ids`` with no weight surviving the clamp
+       (no weight ever charted, or all clearly garbage, e.g. lb-vs-kg).
+    2. **jump** — any consecutive pair of clamped readings differing by
+       > ``max_jump_kg`` within ``max_jump_hours`` (raw jump, not a rate).
+    3. **range** (opt-in via ``range_rule_on``) — min-max spread within the
+       stay > ``max_range_kg``.
+
+    Criteria are incremental: ``jump`` excludes hosps already in
+    ``zero_weight``; ``range`` excludes hosps in either prior set. The
+    thresholds only label the reason strings — pass the ones the extract
+    was written with (01 reads both from the same env vars).
+
+    Returns
+    -------
+    dict with keys:
+        ``zero_weight``, ``jump``, ``range`` — sets of hospitalization_id;
+        ``jump_threshold_str``, ``range_threshold_str`` — reason strings
+        suitable for CONSORT label / parquet ``_drop_reason`` columns
+        (range_threshold_str is None when ``range_rule_on=False``).
+    """
+    # Hospitalizations with at least one clamped weight.
+    _flags = duckdb.sql("""
+        FROM weights
+        SELECT DISTINCT hospitalization_id, wqc_jump, wqc_range
+        WHERE wqc_has_weight AND NOT wqc_all_clamped
+    """).fetchall()
+    zero_weight = set(hosp_ids) - {h for h, _, _ in _flags}
+    jump = {h for h, _jump, _ in _flags if _jump} - zero_weight
+    range_set: set = set()
+    if range_rule_on:
+        range_set = {h for h, _, _range in _flags if _range} - zero_weight - jump
+    return {
+        'zero_weight': zero_weight,
+        'jump': jump,
+        'range': range_set,
+        'jump_threshold_str': (
+            f"jump_gt_{int(max_jump_kg)}kg_within_{int(max_jump_hours)}h"
+        ),
+        'range_threshold_str': (
+            f"range_gt_{int(max_range_kg)}kg" if range_rule_on else None
+        ),
+    }
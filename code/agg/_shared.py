@@ -6,7 +6,8 @@ and write pooled/stacked outputs to output_to_agg/. This module centralizes:
   - site discovery (list_sites): scans output_to_share/*/ for real site dirs
   - site labeling (site_label): honors ANONYMIZE_SITES env var for blinded output
   - analytical dataset loader keyed on site name
-  - figure/table save helpers targeting output_to_agg/ (figures/ subdir)
+  - figure/table save helpers targeting output_to_agg/ (figures/ subdir),
+    plus the deferred-figure queue (queue_agg_fig / render_agg_figures)
   - re-exports of drug constants from code/descriptive/_shared so palettes
     and thresholds stay in lockstep with per-site descriptive figures
 
@@ -390,6 +391,31 @@ def save_agg_fig(fig, name: str) -> str:
     return str(path)
 
 
+# Same deferred-render queue as the per-site descriptive figures
+# (code/_render.py; code/ is on sys.path once descriptive/_shared.py has
+# been loaded above): RENDER_WORKERS, --no-figures / NO_FIGURES=1.
+from _render import RenderQueue  # noqa: E402
+
+AGG_FIGURE_QUEUE = RenderQueue()
+
+
+def queue_agg_fig(name: str, render_fn, *args, **kwargs) -> str:
+    """Queue `render_fn(*args, **kwargs)` for output_to_agg/figures/{name}.png.
+
+    `render_fn` must be module-level (it runs in a worker process) and
+    return the Figure. Returns the path.
+    """
+    ensure_agg_dirs()
+    path = AGG_FIGURES_DIR / f"{name}.png"
+    AGG_FIGURE_QUEUE.submit(path, render_fn, *args, **kwargs)
+    return str(path)
+
+
+def render_agg_figures() -> list[str]:
+    """Render everything queued via queue_agg_fig(); returns the saved paths."""
+    return AGG_FIGURE_QUEUE.render()
+
+
 # ── Salient three-tier headline ──────────────────────────────────────────
 def add_salient_headline(
     fig,
@@ -56,8 +56,9 @@ from _shared import (  # noqa: E402
     SITE_PALETTE,
     add_audit_badge,
     add_salient_headline,
+    queue_agg_fig,
+    render_agg_figures,
     save_agg_csv,
-    save_agg_fig,
     site_label,
 )
 from meta_analysis_cross_site import (  # noqa: E402
@@ -313,11 +314,10 @@ def main() -> None:
     )
 
     for presentation, suffix in [("per_unit", ""), ("p10_p90", "_audit")]:
-        fig = _render(df_fig, pooled, presentation)
-        save_agg_fig(fig, f"forest_daytime_cross_site{suffix}")
-        plt.close(fig)
+        queue_agg_fig(f"forest_daytime_cross_site{suffix}", _render, df_fig, pooled, presentation)
 
 
 if __name__ == "__main__":
     main()
+    render_agg_figures()
 
@@ -55,8 +55,9 @@ from _shared import (  # noqa: E402
     SITE_PALETTE,
     add_audit_badge,
     add_salient_headline,
+    queue_agg_fig,
+    render_agg_figures,
     save_agg_csv,
-    save_agg_fig,
     site_label,
 )
 # Pull the pool primitives from meta_analysis_cross_site so this script
@@ -345,10 +346,9 @@ def main() -> None:
 
     # Two PNGs per figure family — primary (per_unit) + audit (p10_p90).
     for presentation, suffix in [("per_unit", ""), ("p10_p90", "_audit")]:
-        fig = _render(df_fig, pooled, presentation)
-        save_agg_fig(fig, f"forest_night_day_cross_site{suffix}")
-        plt.close(fig)
+        queue_agg_fig(f"forest_night_day_cross_site{suffix}", _render, df_fig, pooled, presentation)
 
 
 if __name__ == "__main__":
     main()
+    render_agg_figures()
@@ -57,8 +57,9 @@ from _shared import (  # noqa: E402
     SITE_PALETTE,
     add_audit_badge,
     add_salient_headline,
+    queue_agg_fig,
+    render_agg_figures,
     save_agg_csv,
-    save_agg_fig,
     site_label,
 )
 from meta_analysis_cross_site import (  # noqa: E402
@@ -287,10 +288,9 @@ def main() -> None:
                 "or_p10_p90", "or_p10_p90_lo", "or_p10_p90_hi"]],
         "forest_sbt_sensitivity_cross_site",
     )
-    fig = _render(df_fig, pooled)
-    save_agg_fig(fig, "forest_sbt_sensitivity_cross_site")
-    plt.close(fig)
+    queue_agg_fig("forest_sbt_sensitivity_cross_site", _render, df_fig, pooled)
 
 
 if __name__ == "__main__":
     main()
+    render_agg_figures()
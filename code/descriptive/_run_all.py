@@ -0,0 +1,110 @@
+"""Run every descriptive figure script in one interpreter.
+
+Driver for ``make descriptive`` (and the descriptive step of ``make run``
+/ ``make tables``). The per-file loop it replaces paid interpreter start-up
+plus pandas / matplotlib / clifpy / ``_shared`` imports once per script,
+and re-read ``model_input_by_id_imvday.parquet`` in most of them. Here:
+
+1. ``model_input_by_id_imvday.parquet`` is read once, unfiltered and with
+   the outcome-modeling filter, into ``_shared``'s frame cache; every
+   script's ``load_model_input(columns=...)`` / ``load_modeling(...)`` is
+   then projected from memory.
+2. Every ``code/descriptive/*.py`` not starting with ``_`` (or the ones
+   named on the command line) is imported and its ``main()`` called —
+   ``--jobs N`` runs N of them at once in threads. Each call is a
+   ``perf_stage`` named after the module (``[perf] <module>: Xs`` in the
+   log, a row in ``stage_timings_summary.csv`` under script ``_run_all``).
+   A failing script is logged with its traceback and the rest still run.
+3. The figures every ``main()`` queued (``queue_fig``) are rendered in one
+   process pool at the end (``RENDER_WORKERS``; ``--no-figures`` skips them).
+
+Exits 1 if any script failed. Each script still runs standalone
+(``uv run python code/descriptive/<script>.py``).
+
+Usage:
+    uv run python code/descriptive/_run_all.py
+    uv run python code/descriptive/_run_all.py --jobs 4 los_histogram pairwise_corr_matrix
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DESCRIPTIVE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(DESCRIPTIVE_DIR))
+
+from _shared import (  # noqa: E402
+    MODEL_INPUT_PARQUET,
+    load_model_input,
+    load_modeling,
+    render_figures,
+)
+from _perf import perf_stage  # noqa: E402
+from clifpy.utils.logging_config import get_logger  # noqa: E402
+
+logger = get_logger("epi_sedation.descriptive.run_all")
+
+# Loaders several scripts project from; the rest read one file each.
+PRELOADERS = (load_model_input, load_modeling)
+
+
+def figure_modules() -> list[str]:
+    """Figure scripts under code/descriptive/ (``_``-prefixed helpers skipped)."""
+    return sorted(p.stem for p in DESCRIPTIVE_DIR.glob("*.py") if not p.name.startswith("_"))
+
+
+def _run_one(name: str) -> bool:
+    try:
+        with perf_stage(name):
+            importlib.import_module(name).main()
+    except Exception:
+        logger.exception(f"{name}: FAILED")
+        return False
+    return True
+
+
+def main() -> int:
+    available = figure_modules()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scripts', nargs='*', metavar='script',
+                        help=f"figure modules to run (default: all of {', '.join(available)})")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="scripts whose compute pass runs at once (threads)")
+    parser.add_argument('--no-figures', action='store_true',
+                        help="write CSVs only (read by code/_render.py)")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be >= 1")
+    unknown = sorted(set(args.scripts) - set(available))
+    if unknown:
+        parser.error(f"unknown script(s): {', '.join(unknown)}")
+    args.scripts = args.scripts or available
+
+    if Path(MODEL_INPUT_PARQUET).exists():
+        with perf_stage("preload") as _ps:
+            _ps.rows = sum(len(load()) for load in PRELOADERS)
+
+    logger.info(f"Descriptive runner — {len(args.scripts)} script(s), {args.jobs} at a time")
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        ok = dict(zip(args.scripts, pool.map(_run_one, args.scripts)))
+    failed = [name for name, passed in ok.items() if not passed]
+
+    try:
+        with perf_stage("render_figures"):
+            render_figures()
+    except Exception:
+        logger.exception("render_figures: FAILED")
+        failed.append("render_figures")
+
+    if failed:
+        logger.error(f"Descriptive step(s) failed: {', '.join(failed)}")
+        return 1
+    logger.info(f"All {len(args.scripts)} descriptive scripts done")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
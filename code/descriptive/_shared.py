@@ -7,7 +7,9 @@ modeling dataset). This module centralizes:
   - threshold definitions (fent > 25/hr, prop > 10 mcg/kg/min, midaz > 1/hr)
   - drug label + color conventions
   - day_n bucketing (1..7, "8+")
-  - dataset loaders (load_exposure() / load_modeling()) and figure saver
+  - dataset loaders (load_exposure() / load_modeling() / load_model_input()):
+    column-projected, filter-pushdown reads behind a process-level cache
+  - figure saver and the deferred-figure queue (queue_fig() / render_figures())
   - 4-way and 6-way categorization helpers around ±threshold
 
 Edit here once to propagate across every figure.
@@ -23,15 +25,19 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from _logging_setup import setup_logging  # noqa: E402
+from _render import RenderQueue  # noqa: E402
 from clifpy.utils.logging_config import get_logger
 logger = get_logger("epi_sedation.descriptive_shared")
 
@@ -208,12 +214,77 @@ DIFF_BIN_COLORS = ["#2166ac", "#92c5de", "#f4a582", "#b2182b"]
 
 
 # ── Loaders + bucketing ───────────────────────────────────────────────────
-def load_modeling() -> pd.DataFrame:
+# Outcome-modeling row filter, pushed into the parquet scan by
+# load_modeling(). `is_null(nan_is_null=True)` matches pandas' notna() for
+# float columns that carry NaN rather than NULL.
+MODELING_FILTER = (
+    (pc.field("_nth_day") > 0)
+    & ~pc.field("sbt_done_next_day").is_null(nan_is_null=True)
+    & ~pc.field("success_extub_next_day").is_null(nan_is_null=True)
+)
+_ROW_FILTERS = {"modeling": MODELING_FILTER}
+
+# Process-level frame cache: (path, mtime_ns, columns, row_filter) → frame.
+# A script that loads the same slice twice, or several figures run by
+# _run_all.py in one interpreter, read the parquet once. A request whose
+# columns are a subset of a cached frame's (same file + filter) is
+# projected from it. Hits are copies so one caller's in-place edits
+# never leak into the next; rewriting the parquet changes its mtime and
+# so misses the stale entries. `_run_all.py --jobs N` calls this from
+# worker threads, so lookups and inserts hold `_FRAME_CACHE_LOCK`; the
+# parquet read itself runs outside it (two threads missing on the same
+# slice both read it, and the later insert wins).
+_FRAME_CACHE: dict[tuple, pd.DataFrame] = {}
+_FRAME_CACHE_LOCK = threading.Lock()
+
+
+def read_parquet(
+    path: str,
+    columns: list[str] | None = None,
+    row_filter: str | None = None,
+) -> pd.DataFrame:
+    """Memoized `pd.read_parquet(path, columns=...)` with an optional row filter.
+
+    `row_filter` names an entry of `_ROW_FILTERS` (e.g. "modeling"); it is
+    applied inside the pyarrow scan, so filtered-out rows are never
+    materialized. Filter columns need not be in `columns`. The result
+    has a fresh RangeIndex.
+    """
+    path = str(path)
+    cols = None if columns is None else tuple(dict.fromkeys(columns))
+    stem = (path, os.stat(path).st_mtime_ns, row_filter)
+    with _FRAME_CACHE_LOCK:
+        cached = _FRAME_CACHE.get((*stem, cols))
+        if cached is None:
+            for (c_path, c_mtime, c_filter, c_cols), frame in _FRAME_CACHE.items():
+                if (c_path, c_mtime, c_filter) == stem and (
+                    c_cols is None or (cols is not None and set(cols) <= set(c_cols))
+                ):
+                    cached = frame if cols is None else frame[list(cols)]
+                    break
+    if cached is None:
+        table = pq.read_table(
+            path,
+            columns=None if cols is None else list(cols),
+            filters=None if row_filter is None else _ROW_FILTERS[row_filter],
+        )
+        cached = table.to_pandas().reset_index(drop=True)
+        with _FRAME_CACHE_LOCK:
+            _FRAME_CACHE[(*stem, cols)] = cached
+    return cached.copy()
+
+
+def clear_frame_cache() -> None:
+    with _FRAME_CACHE_LOCK:
+        _FRAME_CACHE.clear()
+
+
+def load_modeling(columns: list[str] | None = None) -> pd.DataFrame:
     """Load the modeling dataset (production outcome-modeling cohort).
 
     Phase 4 cutover (2026-05-08): reads the consolidated
     `model_input_by_id_imvday.parquet` and applies the outcome-modeling
-    filter inline. Byte-equivalent to the legacy
+    filter in the scan. Byte-equivalent to the legacy
     `modeling_dataset.parquet` row set on the surviving cohort —
     verified at both sites: 43,119 rows / 9,119 hosps (UCMC),
     48,092 / 11,628 (MIMIC). Filter:
@@ -223,17 +294,13 @@ def load_modeling() -> pd.DataFrame:
 
     Drops day 0 and trajectory-final partial rows, so every surviving
     row has a well-defined next-day outcome. Use this for partial-shift
-    audits that mirror what the production models see.
+    audits that mirror what the production models see. `columns`
+    projects the read (default: every column).
     """
-    df = pd.read_parquet(MODEL_INPUT_PARQUET)
-    return df.loc[
-        (df["_nth_day"] > 0)
-        & df["sbt_done_next_day"].notna()
-        & df["success_extub_next_day"].notna()
-    ].reset_index(drop=True)
+    return read_parquet(MODEL_INPUT_PARQUET, columns, row_filter="modeling")
 
 
-def load_exposure() -> pd.DataFrame:
+def load_exposure(columns: list[str] | None = None) -> pd.DataFrame:
     """Load the exposure dataset (full hospital-stay coverage).
 
     Legacy loader kept during Phase 4 cutover. Includes day 0 AND last
@@ -244,10 +311,10 @@ def load_exposure() -> pd.DataFrame:
     `_is_full_24h_day`, `_is_last_partial_day`, `_is_last_full_day`
     flags from the patient-day registry).
     """
-    return pd.read_parquet(EXPOSURE_PARQUET)
+    return read_parquet(EXPOSURE_PARQUET, columns)
 
 
-def load_model_input() -> pd.DataFrame:
+def load_model_input(columns: list[str] | None = None) -> pd.DataFrame:
     """Load the Phase 4 consolidated per-day modeling input.
 
     One row per (hospitalization_id, _nth_day), base table = the canonical
@@ -258,7 +325,12 @@ def load_model_input() -> pd.DataFrame:
     full-vs-partial coverage filtering — `WHERE _is_full_24h_day` drops
     intubation-day and extubation-day partial rows in one filter.
     """
-    return pd.read_parquet(MODEL_INPUT_PARQUET)
+    return read_parquet(MODEL_INPUT_PARQUET, columns)
+
+
+def model_input_columns() -> list[str]:
+    """Column names of `model_input_by_id_imvday.parquet` (schema read only)."""
+    return pq.read_schema(MODEL_INPUT_PARQUET).names
 
 
 def load_analytical() -> pd.DataFrame:
@@ -390,6 +462,30 @@ def save_fig(fig, name: str) -> str:
     return path
 
 
+# Figures queued by the scripts' compute pass, rendered together by
+# render_figures() in a process pool (code/_render.py: RENDER_WORKERS,
+# --no-figures / NO_FIGURES=1).
+FIGURE_QUEUE = RenderQueue()
+
+
+def queue_fig(name: str, render_fn, *args, **kwargs) -> str:
+    """Queue `render_fn(*args, **kwargs)` for {FIGURES_DIR}/{name}.png.
+
+    `render_fn` is a module-level function that builds and returns the
+    Figure from precomputed data. The current rcParams (apply_style())
+    are captured here and applied when it renders. Returns the path.
+    """
+    ensure_dirs()
+    path = os.path.join(FIGURES_DIR, f"{name}.png")
+    FIGURE_QUEUE.submit(path, render_fn, *args, **kwargs)
+    return path
+
+
+def render_figures() -> list[str]:
+    """Render everything queued via queue_fig(); returns the saved paths."""
+    return FIGURE_QUEUE.render()
+
+
 def save_csv(df: pd.DataFrame, name: str, index: bool = False) -> str:
     """Save `df` as output_to_share/{name}.csv. Returns the path."""
     ensure_dirs()
@@ -46,8 +46,9 @@ from _shared import (  # noqa: E402
     apply_style,
     categorize_diff_6way,
     load_model_input,
+    queue_fig,
+    render_figures,
     save_csv,
-    save_fig,
 )
 
 
@@ -57,52 +58,15 @@ DAY_BINS = [str(i) for i in range(MIN_DAY, MAX_DAY + 1)]
 SEGMENT_LABEL_THRESHOLD_FRAC = 0.04  # only label segments ≥ 4% of bar's total
 
 
-def main() -> None:
-    apply_style()
-    df = load_model_input()
-    # Restrict to full-24h ICU days 1..7. Drops day 0 (first_partial),
-    # the trajectory-final partial day (last_partial), and any day ≥ 8.
-    # Each bar reflects a fully-comparable 12+12 hr coverage population.
-    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
-    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
-    df["_x_bin"] = pd.Categorical(
-        df["_nth_day"].astype(int).astype(str),
-        categories=DAY_BINS, ordered=True,
-    )
-
+def _render(counts_by_drug: dict[str, pd.DataFrame]):
+    """Draw the 3-panel stacked bars from per-drug (day bin × pattern) counts."""
     fig, axes = plt.subplots(1, 3, figsize=(17, 7.0), sharex=True)
     x_positions = np.arange(len(DAY_BINS))
 
-    # Long-format rows accumulated across drugs so we can emit a single
-    # federated-friendly CSV at the end. Cross-site pooling reads this
-    # CSV (never the raw parquet) per the federation contract in
-    # .dev/CLAUDE.md "Federation contract" subsection.
-    csv_frames: list[pd.DataFrame] = []
-
     for ax, drug in zip(axes, DRUGS):
-        d = df.copy()
-        d["_pattern"] = pd.Categorical(
-            categorize_diff_6way(
-                d[DIFF_COLS[drug]], d[DAY_COLS[drug]], d[NIGHT_COLS[drug]],
-                THRESHOLDS[drug],
-            ),
-            categories=list(DOSE_PATTERN_LABELS), ordered=True,
-        )
-
-        counts = (
-            d.groupby(["_x_bin", "_pattern"], observed=False)
-            .size()
-            .unstack(fill_value=0)
-            .reindex(columns=list(DOSE_PATTERN_LABELS), fill_value=0)
-            .reindex(index=DAY_BINS, fill_value=0)
-        )
+        counts = counts_by_drug[drug]
         bar_totals = counts.sum(axis=1)
 
-        long = counts.stack().reset_index()
-        long.columns = ["nth_day", "pattern_label", "count"]
-        long.insert(0, "drug", drug)
-        csv_frames.append(long)
-
         # Stack order from bottom: the 5 measurable-diff colored bands, then
         # the drug-holiday gray cap ("Not receiving that day").
         cum = np.zeros(len(DAY_BINS))
@@ -168,7 +132,57 @@ def main() -> None:
         "Per-patient composition is in `dose_pattern_6group_persistence.png` Panel A.",
         ha="center", va="bottom", fontsize=8, color="dimgray", wrap=True,
     )
-    save_fig(fig, "dose_pattern_6group_count_by_icu_day")
+    return fig
+
+
+def main() -> None:
+    apply_style()
+    df = load_model_input(columns=[
+        "_nth_day", "_is_full_24h_day",
+        *DIFF_COLS.values(), *DAY_COLS.values(), *NIGHT_COLS.values(),
+    ])
+    # Restrict to full-24h ICU days 1..7. Drops day 0 (first_partial),
+    # the trajectory-final partial day (last_partial), and any day ≥ 8.
+    # Each bar reflects a fully-comparable 12+12 hr coverage population.
+    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
+    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
+    df["_x_bin"] = pd.Categorical(
+        df["_nth_day"].astype(int).astype(str),
+        categories=DAY_BINS, ordered=True,
+    )
+
+    # Long-format rows accumulated across drugs so we can emit a single
+    # federated-friendly CSV at the end. Cross-site pooling reads this
+    # CSV (never the raw parquet) per the federation contract in
+    # .dev/CLAUDE.md "Federation contract" subsection.
+    csv_frames: list[pd.DataFrame] = []
+    counts_by_drug: dict[str, pd.DataFrame] = {}
+
+    for drug in DRUGS:
+        d = df.copy()
+        d["_pattern"] = pd.Categorical(
+            categorize_diff_6way(
+                d[DIFF_COLS[drug]], d[DAY_COLS[drug]], d[NIGHT_COLS[drug]],
+                THRESHOLDS[drug],
+            ),
+            categories=list(DOSE_PATTERN_LABELS), ordered=True,
+        )
+
+        counts = (
+            d.groupby(["_x_bin", "_pattern"], observed=False)
+            .size()
+            .unstack(fill_value=0)
+            .reindex(columns=list(DOSE_PATTERN_LABELS), fill_value=0)
+            .reindex(index=DAY_BINS, fill_value=0)
+        )
+        counts_by_drug[drug] = counts
+
+        long = counts.stack().reset_index()
+        long.columns = ["nth_day", "pattern_label", "count"]
+        long.insert(0, "drug", drug)
+        csv_frames.append(long)
+
+    queue_fig("dose_pattern_6group_count_by_icu_day", _render, counts_by_drug)
 
     # Federated-pooling artifact: long-format counts at the (drug, nth_day,
     # pattern_label) grain. Cross-site code reads this CSV (never the raw
@@ -181,3 +195,4 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
+    render_figures()
@@ -49,8 +49,10 @@ sys.path.insert(0, str(Path(__file__).parent))
 from _shared import (  # noqa: E402
     SITE_NAME,
     apply_style,
+    queue_fig,
+    read_parquet,
+    render_figures,
     save_csv,
-    save_fig,
 )
 
 
@@ -233,7 +235,7 @@ def main() -> None:
     apply_style()
 
     meta_path = f"output/{SITE_NAME}/cohort_meta_by_id.parquet"
-    meta = pd.read_parquet(meta_path)
+    meta = read_parquet(meta_path, columns=["n_days_full_24h", "imv_dur_hrs", "exit_mechanism"])
     logger.info(f"Loaded {meta_path}: {len(meta):,} hospitalizations")
 
     # Convert imv_dur_hrs → imv_duration_days for like-units binning
@@ -264,14 +266,11 @@ def main() -> None:
     # imv_duration_days is logged in CSV form for reviewer cross-check;
     # one PNG flavor is enough to keep the descriptive deck compact.
     primary_col, primary_label = "n_days_full_24h", "Full-24h IMV days"
-    fig1 = _plot_overall(meta, primary_col, primary_label)
-    save_fig(fig1, "los_histogram_overall")
-    plt.close(fig1)
-
-    fig2 = _plot_by_exit(meta, primary_col, primary_label)
-    save_fig(fig2, "los_histogram_by_exit")
-    plt.close(fig2)
+    plot_df = meta[[primary_col, "exit_mechanism"]]
+    queue_fig("los_histogram_overall", _plot_overall, plot_df, primary_col, primary_label)
+    queue_fig("los_histogram_by_exit", _plot_by_exit, plot_df, primary_col, primary_label)
 
 
 if __name__ == "__main__":
     main()
+    render_figures()
@@ -45,8 +45,9 @@ from _shared import (  # noqa: E402
     ON_DRUG_FLAGS,
     apply_style,
     load_model_input,
+    queue_fig,
+    render_figures,
     save_csv,
-    save_fig,
 )
 
 
@@ -220,28 +221,8 @@ def _draw_iqr_panel(ax, df, drug, x_positions):
     ax.set_xlabel("ICU day")
 
 
-def main() -> None:
-    apply_style()
-    df = load_model_input()
-    # Restrict to full-24h ICU days 1..7. Drops day 0 (first_partial),
-    # the trajectory-final partial day, single-shift rows, and days 8+
-    # in one filter — replaces the legacy
-    # `~_single_shift_day + _classify_bin + boundary-day` complexity.
-    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
-    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
-    df["_x_bin"] = pd.Categorical(
-        df["_nth_day"].astype(int).astype(str),
-        categories=DAY_BINS, ordered=True,
-    )
-
-    # Federated-pooling artifact: long-format per-(drug, nth_day) stats
-    # at output_to_share/{site}/descriptive/. Cross-site code reads this
-    # CSV (never the raw parquet) and recomputes Wilson / Student-t CIs
-    # + fixed-effects pooled estimates at agg time. See .dev/CLAUDE.md
-    # "Federation contract".
-    stats_df = _build_stats_csv(df)
-    save_csv(stats_df, "night_day_dose_stats_by_icu_day")
-
+def _render(df: pd.DataFrame):
+    """Mean (top) + signed-IQR (bottom) panels per drug from the binned rows."""
     fig, axes = plt.subplots(2, 3, figsize=(17, 10.5), sharex="col")
     x_positions = np.arange(len(DAY_BINS))
 
@@ -285,8 +266,39 @@ def main() -> None:
         "See docs/descriptive_figures.md §6.0.",
         ha="center", va="bottom", fontsize=8, color="dimgray", wrap=True,
     )
-    save_fig(fig, "night_day_diff_combined_by_icu_day")
+    return fig
+
+
+def main() -> None:
+    apply_style()
+    df = load_model_input(columns=[
+        "_nth_day", "_is_full_24h_day", *DIFF_COLS.values(), *ON_DRUG_FLAGS.values(),
+    ])
+    # Restrict to full-24h ICU days 1..7. Drops day 0 (first_partial),
+    # the trajectory-final partial day, single-shift rows, and days 8+
+    # in one filter — replaces the legacy
+    # `~_single_shift_day + _classify_bin + boundary-day` complexity.
+    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
+    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
+    df["_x_bin"] = pd.Categorical(
+        df["_nth_day"].astype(int).astype(str),
+        categories=DAY_BINS, ordered=True,
+    )
+
+    # Federated-pooling artifact: long-format per-(drug, nth_day) stats
+    # at output_to_share/{site}/descriptive/. Cross-site code reads this
+    # CSV (never the raw parquet) and recomputes Wilson / Student-t CIs
+    # + fixed-effects pooled estimates at agg time. See .dev/CLAUDE.md
+    # "Federation contract".
+    stats_df = _build_stats_csv(df)
+    save_csv(stats_df, "night_day_dose_stats_by_icu_day")
+
+    queue_fig(
+        "night_day_diff_combined_by_icu_day", _render,
+        df[["_x_bin", *DIFF_COLS.values()]],
+    )
 
 
 if __name__ == "__main__":
     main()
+    render_figures()
@@ -33,7 +33,8 @@ from _shared import (  # noqa: E402
     THRESHOLDS,
     apply_style,
     load_model_input,
-    save_fig,
+    queue_fig,
+    render_figures,
 )
 
 
@@ -42,34 +43,14 @@ MAX_DAY = 7
 DAY_BINS = [str(i) for i in range(MIN_DAY, MAX_DAY + 1)]
 
 
-def main() -> None:
-    apply_style()
-    df = load_model_input()
-    # Restrict to full-24h ICU days 1..7 (drops day 0 partial,
-    # extubation-day partial, and days 8+). Replaces the old
-    # `_drop_last_day_per_patient + cap_day` pipeline; the registry's
-    # `_is_full_24h_day` flag is the canonical "complete 12+12 hr
-    # coverage" filter.
-    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
-    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
-    df["_nth_day_bin"] = pd.Categorical(
-        df["_nth_day"].astype(int).astype(str),
-        categories=DAY_BINS, ordered=True,
-    )
+def _render(per_drug: dict[str, tuple[list[np.ndarray], float, float]]):
+    """One violin panel per drug from (clipped per-bin diffs, lo, hi)."""
     bins = DAY_BINS
-
     fig, axes = plt.subplots(1, 3, figsize=(15, 5.5), sharex=True)
 
     for ax, drug in zip(axes, DRUGS):
-        col = DIFF_COLS[drug]
         thr = THRESHOLDS[drug]
-        pooled = df[col].dropna()
-        lo, hi = np.percentile(pooled, [1, 99])
-
-        data_per_bin = [
-            df.loc[df["_nth_day_bin"] == b, col].dropna().clip(lower=lo, upper=hi).to_numpy()
-            for b in bins
-        ]
+        data_per_bin, lo, hi = per_drug[drug]
         ns = [len(d) for d in data_per_bin]
 
         # Filter out any bin with fewer than 2 points (violin requires variance);
@@ -124,8 +105,37 @@ def main() -> None:
         "Glossary: docs/descriptive_figures.md §3.",
         ha="center", va="top", fontsize=8, color="dimgray", wrap=True,
     )
-    save_fig(fig, "night_day_diff_violin_by_icu_day")
+    return fig
+
+
+def main() -> None:
+    apply_style()
+    df = load_model_input(columns=["_nth_day", "_is_full_24h_day", *DIFF_COLS.values()])
+    # Restrict to full-24h ICU days 1..7 (drops day 0 partial,
+    # extubation-day partial, and days 8+). Replaces the old
+    # `_drop_last_day_per_patient + cap_day` pipeline; the registry's
+    # `_is_full_24h_day` flag is the canonical "complete 12+12 hr
+    # coverage" filter.
+    in_range = df["_nth_day"].between(MIN_DAY, MAX_DAY)
+    df = df.loc[df["_is_full_24h_day"] & in_range].copy()
+    df["_nth_day_bin"] = pd.Categorical(
+        df["_nth_day"].astype(int).astype(str),
+        categories=DAY_BINS, ordered=True,
+    )
+
+    per_drug = {}
+    for drug in DRUGS:
+        col = DIFF_COLS[drug]
+        pooled = df[col].dropna()
+        lo, hi = np.percentile(pooled, [1, 99])
+        data_per_bin = [
+            df.loc[df["_nth_day_bin"] == b, col].dropna().clip(lower=lo, upper=hi).to_numpy()
+            for b in DAY_BINS
+        ]
+        per_drug[drug] = (data_per_bin, lo, hi)
+    queue_fig("night_day_diff_violin_by_icu_day", _render, per_drug)
 
 
 if __name__ == "__main__":
     main()
+    render_figures()
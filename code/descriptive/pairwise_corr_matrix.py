@@ -42,14 +42,31 @@ from _shared import (  # noqa: E402
     NIGHT_COLS,
     apply_style,
     load_modeling,
+    model_input_columns,
+    queue_fig,
+    render_figures,
     save_csv,
-    save_fig,
 )
 
 
+def _render(corr):
+    fig, ax = plt.subplots(figsize=(14, 10))
+    sns.heatmap(
+        corr,
+        annot=True,
+        fmt=".2f",
+        cmap="vlag",
+        linewidths=0.5,
+        cbar_kws={"label": "Pearson r"},
+        ax=ax,
+    )
+    ax.set_title("Pairwise Pearson Correlation (Continuous Variables)")
+    fig.tight_layout()
+    return fig
+
+
 def main() -> None:
     apply_style()
-    df = load_modeling()  # eligibility-cohort filter already applied
 
     # Variable list: same scientific intent as the old 07 corr matrix
     # but sourced through DAY/NIGHT/DIFF_COLS dicts so column-rename
@@ -72,25 +89,16 @@ def main() -> None:
     ]
 
     # Defensive — skip columns missing from the current parquet schema.
-    cols = [c for c in continuous_vars if c in df.columns]
+    available = set(model_input_columns())
+    cols = [c for c in continuous_vars if c in available]
+    df = load_modeling(columns=cols)  # eligibility-cohort filter applied in the scan
     corr = df[cols].corr(method="pearson")
 
     save_csv(corr, "pairwise_corr_matrix", index=True)
 
-    fig, ax = plt.subplots(figsize=(14, 10))
-    sns.heatmap(
-        corr,
-        annot=True,
-        fmt=".2f",
-        cmap="vlag",
-        linewidths=0.5,
-        cbar_kws={"label": "Pearson r"},
-        ax=ax,
-    )
-    ax.set_title("Pairwise Pearson Correlation (Continuous Variables)")
-    fig.tight_layout()
-    save_fig(fig, "pairwise_corr_matrix")
+    queue_fig("pairwise_corr_matrix", _render, corr)
 
 
 if __name__ == "__main__":
     main()
+    render_figures()
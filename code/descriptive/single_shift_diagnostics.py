@@ -32,7 +32,10 @@ sys.path.insert(0, str(Path(__file__).parent))
 from _shared import (  # noqa: E402
     SITE_NAME,
     apply_style,
-    save_fig,
+    load_modeling,
+    queue_fig,
+    read_parquet,
+    render_figures,
 )
 
 
@@ -50,28 +53,8 @@ def _summary_row(s: pd.Series, label: str) -> dict:
     }
 
 
-def main() -> None:
-    apply_style()
-
-    sd = pd.read_parquet(f"output/{SITE_NAME}/seddose_by_id_imvday.parquet")
-    # Phase 4 cutover (2026-05-08): read consolidated parquet + apply
-    # outcome-modeling filter inline. Byte-equivalent to legacy
-    # modeling_dataset.parquet on the surviving cohort.
-    _full = pd.read_parquet(f"output/{SITE_NAME}/model_input_by_id_imvday.parquet")
-    ad = _full.loc[
-        (_full["_nth_day"] > 0)
-        & _full["sbt_done_next_day"].notna()
-        & _full["success_extub_next_day"].notna()
-    ].reset_index(drop=True)
-
-    # Flag kept-vs-dropped from the modeling filter so the plot shows how
-    # much single-shift exposure is actually inherited downstream.
-    ad["_nth_day"] = ad["_nth_day"].astype(int)
-    sd["_nth_day"] = sd["_nth_day"].astype(int)
-    kept_ids = ad[["hospitalization_id", "_nth_day"]].assign(_kept=1)
-    sd = sd.merge(kept_ids, on=["hospitalization_id", "_nth_day"], how="left")
-    sd["_kept"] = sd["_kept"].fillna(0).astype(int)
-
+def _render(sd: pd.DataFrame):
+    """Shift-hours histograms + summary table; `sd` carries the `_kept` flag."""
     # Tall figure — bottom region reserved for the inline footnote.
     fig = plt.figure(figsize=(14, 11.5))
     gs = fig.add_gridspec(2, 2, height_ratios=[2.5, 1], hspace=0.55, wspace=0.25)
@@ -139,8 +122,35 @@ def main() -> None:
         "rows from intubation-after-7-PM cases on day 0 (expected).",
         ha="center", va="bottom", fontsize=8, color="dimgray", wrap=True,
     )
-    save_fig(fig, "single_shift_diagnostics")
+    return fig
+
+
+def main() -> None:
+    apply_style()
+
+    sd = read_parquet(
+        f"output/{SITE_NAME}/seddose_by_id_imvday.parquet",
+        columns=["hospitalization_id", "_nth_day", "n_hours_day", "n_hours_night"],
+    )
+    # Outcome-modeling cohort (load_modeling applies the filter to the
+    # consolidated model_input parquet; byte-equivalent to the legacy
+    # modeling_dataset.parquet on the surviving cohort).
+    ad = load_modeling(columns=["hospitalization_id", "_nth_day"])
+
+    # Flag kept-vs-dropped from the modeling filter so the plot shows how
+    # much single-shift exposure is actually inherited downstream.
+    ad["_nth_day"] = ad["_nth_day"].astype(int)
+    sd["_nth_day"] = sd["_nth_day"].astype(int)
+    kept_ids = ad[["hospitalization_id", "_nth_day"]].assign(_kept=1)
+    sd = sd.merge(kept_ids, on=["hospitalization_id", "_nth_day"], how="left")
+    sd["_kept"] = sd["_kept"].fillna(0).astype(int)
+
+    queue_fig(
+        "single_shift_diagnostics", _render,
+        sd[["n_hours_day", "n_hours_night", "_kept"]],
+    )
 
 
 if __name__ == "__main__":
     main()
+    render_figures()
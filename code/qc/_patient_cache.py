@@ -0,0 +1,214 @@
+"""Memory-bounded per-patient cache and background prefetch for the QC viewer.
+
+``get_wide_df`` / ``get_enrichment`` used to sit behind
+``lru_cache(maxsize=32)``: bounded by entry count rather than memory, no
+visibility into hits, and nothing loaded until the reviewer clicked. Here:
+
+- :class:`PatientCache` is an LRU bounded by the pandas memory footprint of
+  its values (``QC_CACHE_MB``, default 1024). Concurrent requests for a
+  key that is still loading wait for that load instead of repeating it,
+  so a click on a patient the prefetcher is already fetching costs only
+  the remainder. :meth:`PatientCache.stats` feeds the viewer's status line.
+- :class:`Prefetcher` runs loads on a small thread pool
+  (``QC_PREFETCH_WORKERS``, default 2; 0 disables). The viewer queues the
+  sampled chips and the next ``QC_PREFETCH_NEXT`` cohort IDs after the
+  patient on screen. Only the newest ``max_pending`` requests are kept
+  waiting; older ones are dropped once the reviewer has moved on.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields, is_dataclass
+from functools import wraps
+from typing import Any, Callable, Hashable, Iterable
+
+import pandas as pd
+from clifpy.utils.logging_config import get_logger
+
+logger = get_logger("epi_sedation.qc.patient_cache")
+
+CACHE_MB_ENV = "QC_CACHE_MB"
+PREFETCH_WORKERS_ENV = "QC_PREFETCH_WORKERS"
+PREFETCH_NEXT_ENV = "QC_PREFETCH_NEXT"
+
+_PREFETCHING = threading.local()
+
+
+def env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    value = int(raw)
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {raw!r}")
+    return value
+
+
+def nbytes(obj: Any) -> int:
+    """Approximate in-memory size of a cached value (frames counted deep)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if is_dataclass(obj):
+        return sum(nbytes(getattr(obj, f.name)) for f in fields(obj))
+    if isinstance(obj, (tuple, list)):
+        return sum(nbytes(o) for o in obj)
+    return 64
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    prefetched: int       # loads run by the prefetcher
+    prefetch_hits: int    # first foreground use of a prefetched entry
+    pending: int = 0      # prefetch requests not yet started
+
+    def summary(self) -> str:
+        mb = 1024 * 1024
+        return (f"cache {self.entries} frames · {self.bytes / mb:.0f}/{self.max_bytes / mb:.0f} MB · "
+                f"{self.hits} hits / {self.misses} misses · {self.evictions} evicted · "
+                f"prefetch {self.prefetch_hits}/{self.prefetched} used, {self.pending} queued")
+
+
+class PatientCache:
+    """Thread-safe LRU keyed by (loader, site, hosp_id), bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, list] = OrderedDict()  # key -> [value, size, prefetched]
+        self._loading: dict[Hashable, list] = {}  # key -> [Future, prefetched]
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = 0
+        self._prefetched = self._prefetch_hits = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries or key in self._loading
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        prefetching = getattr(_PREFETCHING, "active", False)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if not prefetching:
+                    self._hits += 1
+                    if entry[2]:
+                        self._prefetch_hits += 1
+                        entry[2] = False
+                return entry[0]
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = [Future(), prefetching]
+                owner = True
+                if prefetching:
+                    self._prefetched += 1
+                else:
+                    self._misses += 1
+            else:
+                owner = False
+                if not prefetching:
+                    # Joining a load already in flight — most likely the
+                    # prefetch this cache exists for.
+                    self._hits += 1
+                    if loading[1]:
+                        self._prefetch_hits += 1
+                        loading[1] = False
+        if not owner:
+            return loading[0].result()
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[key]
+            loading[0].set_exception(exc)
+            raise
+        self._store(key, value)
+        loading[0].set_result(value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = nbytes(value)
+        with self._lock:
+            _, prefetched = self._loading.pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = [value, size, prefetched]
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                hits=self._hits, misses=self._misses, evictions=self._evictions,
+                prefetched=self._prefetched, prefetch_hits=self._prefetch_hits,
+            )
+
+    def patient_cached(self, fn: Callable[[str, str], Any]) -> Callable[[str, str], Any]:
+        """Decorator: cache ``fn(site, hosp_id)`` here (replaces ``lru_cache``)."""
+        @wraps(fn)
+        def wrapper(site: str, hosp_id: str) -> Any:
+            return self.get_or_load((fn.__name__, site, hosp_id), lambda: fn(site, hosp_id))
+
+        wrapper.cache = self  # type: ignore[attr-defined]
+        return wrapper
+
+
+class Prefetcher:
+    """Background loads into a :class:`PatientCache`; newest requests win."""
+
+    def __init__(self, workers: int, max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qc-prefetch")
+                      if workers > 0 else None)
+        self._pending: deque[Future] = deque()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _run(task: Callable[[], Any]) -> None:
+        _PREFETCHING.active = True
+        try:
+            task()
+        except Exception as exc:  # noqa: BLE001 — the foreground load reports it
+            logger.debug(f"prefetch failed: {exc}")
+        finally:
+            _PREFETCHING.active = False
+
+    def submit(self, tasks: Iterable[Callable[[], Any]]) -> int:
+        """Queue ``tasks``; returns how many are waiting to start."""
+        if self._pool is None:
+            return 0
+        with self._lock:
+            for task in tasks:
+                self._pending.append(self._pool.submit(self._run, task))
+            self._pending = deque(f for f in self._pending if not f.done())
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft().cancel()
+            return self._n_waiting()
+
+    def _n_waiting(self) -> int:
+        return sum(1 for f in self._pending if not (f.running() or f.done()))
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._n_waiting()
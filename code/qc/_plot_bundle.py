@@ -0,0 +1,419 @@
+"""Figure-ready trajectory payloads for the QC viewer.
+
+``build_timeline`` used to derive everything it draws from the raw frames
+on every load: the carry-forward and abs-max scale of each trace, the
+clinical event list, night-shift windows, the cohort-boundary lines, the
+day labels and the resp-panel device/mode ribbon. Here that work is split
+from the drawing:
+
+- :func:`timeline_parts` computes all of it for any number of
+  hospitalizations at once — one groupby pass over a stacked wide frame
+  (``get_wide_dfs``) plus the per-patient enrichment — as a dict of
+  ``hospitalization_id``-keyed frames ("parts").
+- :class:`TimelinePayload` is one patient's slice of those parts; the
+  viewer turns it into Plotly traces and shapes without touching pandas
+  beyond the division by each trace's scale.
+- ``make qc-bundles`` (``code/qc/build_qc_bundles.py``) runs
+  :func:`timeline_parts` over the whole cohort in chunks and writes
+  ``output/{site}/qc_bundles/``: per chunk one parquet per part, sorted by
+  ``hospitalization_id``, plus a row-range index in the ``qc_index`` layout
+  (``_qc_index.row_ranges`` / ``QcIndex``) and a manifest holding the
+  footer fingerprint of every source. :func:`open_plot_bundles` flags the
+  store as stale when any source changed; the viewer then computes the
+  payload from the loaded frames instead.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _stage_cache import parquet_fingerprint  # noqa: E402
+from _qc_index import ROW_GROUP_SIZE, QcIndex, row_ranges  # noqa: E402
+from _shared import (  # noqa: E402
+    ASSESSMENT_COLORS,
+    DEVICE_CATEGORY_COLORS,
+    MODE_IN_IMV_COLORS,
+    PRESSOR_COLORS,
+    RESP_COLORS,
+    VITAL_COLORS,
+    PatientEnrichment,
+    cohort_excluded_zones,
+    compute_nee,
+    day_labels_for_cohort,
+    extract_events,
+    night_windows_in_range,
+)
+
+BUNDLE_DIRNAME = "qc_bundles"
+ROW_INDEX_FILE = "row_index.parquet"
+MANIFEST_FILE = "manifest.json"
+# Bump when timeline_parts changes what it stores; older stores are ignored.
+BUNDLE_VERSION = 1
+CHUNK_SIZE = 250
+
+# output/{site}/ parquets the payload is derived from (via get_enrichment).
+SOURCE_ARTIFACTS = (
+    "model_input_by_id_imvday",
+    "outcomes_by_id_imvday",
+    "outcomes_by_event",
+    "cohort_imv_streaks",
+)
+
+SED_DRUGS = ("propofol", "fentanyl", "midazolam", "lorazepam", "hydromorphone")
+# Step-function traces ("set value persists until changed"): carried
+# forward between their first and last observation before scaling.
+STEP_COLUMNS = (
+    *SED_DRUGS,
+    *PRESSOR_COLORS,          # incl. "nee", derived by compute_nee
+    *RESP_COLORS,
+)
+POINT_COLUMNS = (*ASSESSMENT_COLORS, *VITAL_COLORS)
+TRACE_COLUMNS = (*STEP_COLUMNS, *POINT_COLUMNS)
+INTM_PREFIX = "intm:"
+
+PARTS = ("windows", "traces", "scales", "intm", "ribbon", "events",
+         "nights", "boundaries", "day_labels")
+_PART_COLUMNS = {
+    "windows": ["cohort_start", "cohort_end"],
+    "traces": ["event_time", *TRACE_COLUMNS],
+    "scales": ["series", "scale"],
+    "intm": ["admin_dttm", "med_category", "med_dose"],
+    "ribbon": ["start", "end", "label", "legend_key", "color", "show_legend"],
+    "events": ["x", "kind", "label"],
+    "nights": ["start", "end"],
+    "boundaries": ["x", "label"],
+    "day_labels": ["center", "nth_day"],
+}
+
+
+def bundle_dir(site_dir: Path) -> Path:
+    return Path(site_dir) / BUNDLE_DIRNAME
+
+
+# ── Payload ────────────────────────────────────────────────────────────
+
+@dataclass
+class TimelinePayload:
+    """Everything `build_timeline` draws for one hospitalization."""
+
+    traces: pd.DataFrame        # event_time + TRACE_COLUMNS (step columns carried forward)
+    scales: dict[str, float]    # drawable series → abs max (trace / scale lands in [0, 1])
+    intm: pd.DataFrame          # admin_dttm, med_category, med_dose — sedative boluses
+    ribbon: pd.DataFrame        # start, end, label, legend_key, color, show_legend
+    events: pd.DataFrame        # x (ISO string), kind, label
+    nights: pd.DataFrame        # start, end — 7 PM → 7 AM, clipped to the data span
+    boundaries: pd.DataFrame    # x, label — "day 0" end / "last day" start
+    day_labels: pd.DataFrame    # center, nth_day
+    cohort_start: pd.Timestamp | None
+    cohort_end: pd.Timestamp | None
+
+    @classmethod
+    def from_parts(cls, parts: dict[str, pd.DataFrame]) -> "TimelinePayload":
+        """One patient's payload from its slice of each part."""
+        def _part(name: str) -> pd.DataFrame:
+            return parts[name].drop(columns="hospitalization_id").reset_index(drop=True)
+
+        windows = _part("windows")
+        bounds = [None, None]
+        if not windows.empty:
+            bounds = [None if pd.isna(v) else pd.Timestamp(v)
+                      for v in (windows["cohort_start"].iloc[0], windows["cohort_end"].iloc[0])]
+        scales = _part("scales")
+        return cls(
+            traces=_part("traces"),
+            scales=dict(zip(scales["series"], scales["scale"].astype(float))),
+            intm=_part("intm"),
+            ribbon=_part("ribbon"),
+            events=_part("events"),
+            nights=_part("nights"),
+            boundaries=_part("boundaries"),
+            day_labels=_part("day_labels"),
+            cohort_start=bounds[0],
+            cohort_end=bounds[1],
+        )
+
+
+def _fill_between_valid(values: pd.DataFrame, by: pd.Series) -> pd.DataFrame:
+    """Forward-fill each column within each `by` group, only between the
+    column's first and last valid row — leading and trailing NaN stay NaN.
+    """
+    filled = values.groupby(by, sort=False).ffill()
+    has_later = (values.notna().astype("int8").iloc[::-1]
+                 .groupby(by.iloc[::-1], sort=False).cummax().iloc[::-1].astype(bool))
+    return filled.where(has_later)
+
+
+def _frame(rows: list[tuple], name: str) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["hospitalization_id", *_PART_COLUMNS[name]])
+
+
+def _scales(values: pd.DataFrame, by: pd.Series) -> pd.DataFrame:
+    """(hospitalization_id, series, scale) for every drawable series.
+
+    The scale is the series' absolute max: each trace is divided by it so
+    curves with very different units (FiO2 0–1 vs PEEP 5–20; NEE 0.05 vs
+    raw norepi) all live in the same vertical band of their panel. All-NaN,
+    all-zero and non-finite series are not drawn and get no row.
+    """
+    m = values.abs().groupby(by.rename("hospitalization_id"), sort=False).max()
+    long = m.reset_index().melt(id_vars="hospitalization_id", var_name="series", value_name="scale")
+    keep = np.isfinite(long["scale"]) & (long["scale"] > 0)
+    return long.loc[keep].reset_index(drop=True)
+
+
+def _ribbon(wide: pd.DataFrame) -> pd.DataFrame:
+    """Device/mode segments for the resp-panel ribbon.
+
+    Device and mode are carried forward between observed records (the
+    wide-dataset join with vitals/meds re-introduces NaN rows between the
+    waterfall-filled resp rows), rows outside the resp record span are
+    dropped, and consecutive rows with the same (device, mode) collapse
+    into one segment that ends where the next one starts (the final one at
+    its own last observation, at least 15 min wide). IMV segments are
+    colored by mode (`MODE_IN_IMV_COLORS`), others by device.
+    """
+    if not {"event_time", "device_category", "mode_category"}.issubset(wide.columns):
+        return _frame([], "ribbon")
+    df = wide[["hospitalization_id", "event_time", "device_category", "mode_category"]]
+    df = df.dropna(subset=["event_time"]).reset_index(drop=True)
+    h = df["hospitalization_id"]
+    df[["device_category", "mode_category"]] = _fill_between_valid(
+        df[["device_category", "mode_category"]], h)
+    df = df.dropna(subset=["device_category"]).reset_index(drop=True)
+    if df.empty:
+        return _frame([], "ribbon")
+
+    key = df["device_category"].astype(str) + "|" + df["mode_category"].fillna("?").astype(str)
+    h = df["hospitalization_id"]
+    seg = ((key != key.shift()) | (h != h.shift())).cumsum()
+    segments = df.groupby(seg).agg(
+        hospitalization_id=("hospitalization_id", "first"),
+        start=("event_time", "first"),
+        last_in_seg=("event_time", "last"),
+        device=("device_category", "first"),
+        mode=("mode_category", "first"),
+    ).reset_index(drop=True)
+    nxt_same = segments["hospitalization_id"].shift(-1) == segments["hospitalization_id"]
+    end = segments["start"].shift(-1).where(nxt_same, segments["last_in_seg"])
+    segments["end"] = end.where(end > segments["start"], segments["start"] + pd.Timedelta(minutes=15))
+
+    device = segments["device"].astype(str)
+    mode = segments["mode"]
+    imv = (device.str.lower() == "imv") & mode.notna()
+    mode_str = mode.astype(str)
+    segments["color"] = np.where(
+        imv,
+        mode_str.map(MODE_IN_IMV_COLORS).fillna(DEVICE_CATEGORY_COLORS["imv"]),
+        device.str.lower().map(DEVICE_CATEGORY_COLORS).fillna(DEVICE_CATEGORY_COLORS["other"]),
+    )
+    segments["label"] = np.where(imv, device + " / " + mode_str, device)
+    segments["legend_key"] = np.where(imv, "imv: " + mode_str, "device: " + device)
+    segments["show_legend"] = ~segments.duplicated(["hospitalization_id", "legend_key"])
+    return segments[["hospitalization_id", *_PART_COLUMNS["ribbon"]]]
+
+
+def timeline_parts(
+    wide: pd.DataFrame, enrichments: dict[str, PatientEnrichment],
+) -> dict[str, pd.DataFrame]:
+    """Payload parts for every hospitalization in `wide`.
+
+    `wide` is a (stack of) wide timeline(s) sorted by
+    (`hospitalization_id`, `event_time`) as `get_wide_dfs` returns it;
+    `enrichments` maps each of its IDs to its `PatientEnrichment`. Every
+    part is a frame keyed by `hospitalization_id`, in `wide`'s ID order.
+    """
+    if wide.empty:
+        return {name: _frame([], name) for name in PARTS}
+    wide = wide.reset_index(drop=True)
+    h = wide["hospitalization_id"].astype(str).rename("hospitalization_id")
+    ids = list(dict.fromkeys(h))
+
+    # ── Traces: one column per series, step series carried forward.
+    values = pd.DataFrame(
+        {c: wide[c].astype("float64") if c in wide.columns else np.nan
+         for c in TRACE_COLUMNS if c != "nee"},
+        index=wide.index,
+    )
+    nee = compute_nee(wide)
+    values["nee"] = nee.astype("float64") if not nee.empty else np.nan
+    values = values[list(TRACE_COLUMNS)]
+    values[list(STEP_COLUMNS)] = _fill_between_valid(values[list(STEP_COLUMNS)], h)
+    traces = pd.concat([h, wide["event_time"], values], axis=1)
+
+    # ── Intermittent sedative boluses (markers, scaled per drug).
+    intm = [
+        enr.intm.loc[enr.intm["med_category"].isin(SED_DRUGS), _PART_COLUMNS["intm"]]
+        .assign(hospitalization_id=hid)
+        for hid, enr in ((hid, enrichments[hid]) for hid in ids)
+        if not enr.intm.empty
+    ]
+    intm = [df for df in intm if not df.empty]
+    intm = (pd.concat(intm, ignore_index=True)[["hospitalization_id", *_PART_COLUMNS["intm"]]]
+            if intm else _frame([], "intm"))
+    scales = [_scales(values, h)]
+    for drug, sub in intm.groupby("med_category", sort=False):
+        scales.append(_scales(sub[["med_dose"]].rename(columns={"med_dose": f"{INTM_PREFIX}{drug}"}),
+                              sub["hospitalization_id"]))
+    scales = pd.concat(scales, ignore_index=True)
+
+    # ── Per-patient geometry: events, night windows, filter boundaries, day labels.
+    events: list[pd.DataFrame] = []
+    windows, nights, boundaries, day_labels = [], [], [], []
+    span = wide.groupby(h, sort=False)["event_time"].agg(["min", "max"])
+    for hid in ids:
+        enr = enrichments[hid]
+        start, end = enr.cohort_start, enr.cohort_end
+        windows.append((hid, start, end))
+        ev = extract_events(enr)
+        if not ev.empty:
+            # Plotly drops the UTC offset of a date string, so the ISO text
+            # (wall clock of each event's own timezone) is what gets drawn.
+            events.append(pd.DataFrame({
+                "hospitalization_id": hid,
+                "x": [pd.Timestamp(t).isoformat() for t in ev["time"]],
+                "kind": ev["kind"].astype(str),
+                "label": ev["label"].astype(str),
+            }))
+        nights += [(hid, s, e) for s, e in night_windows_in_range(*span.loc[hid])]
+        for z_start, z_end, label in cohort_excluded_zones(start, end):
+            # The interior edges: end of the day-0 zone (first 7 AM after
+            # intubation) and start of the last-day zone (last 7 AM before
+            # extubation) — where the analytical filter starts/ends keeping data.
+            boundaries.append((hid, z_end if label == "day 0" else z_start, label))
+        day_labels += [(hid, c, n) for c, n in day_labels_for_cohort(start, end)]
+
+    return {
+        "windows": _frame(windows, "windows"),
+        "traces": traces,
+        "scales": scales,
+        "intm": intm,
+        "ribbon": _ribbon(wide.assign(hospitalization_id=h)),
+        "events": pd.concat(events, ignore_index=True) if events else _frame([], "events"),
+        "nights": _frame(nights, "nights"),
+        "boundaries": _frame(boundaries, "boundaries"),
+        "day_labels": _frame(day_labels, "day_labels"),
+    }
+
+
+def timeline_payload(wide_df: pd.DataFrame, enr: PatientEnrichment) -> TimelinePayload:
+    """The payload for one patient's `get_wide_df` / `get_enrichment` pair."""
+    hosp_id = str(wide_df["hospitalization_id"].iloc[0])
+    return TimelinePayload.from_parts(timeline_parts(wide_df, {hosp_id: enr}))
+
+
+# ── Store (make qc-bundles) ────────────────────────────────────────────
+
+def build_plot_bundles(
+    site_dir: Path,
+    hosp_ids: Iterable[str],
+    parts_for: Callable[[list[str]], dict[str, pd.DataFrame]],
+    sources: dict[str, Path],
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Write ``site_dir/qc_bundles/`` from ``parts_for(chunk)`` over ``hosp_ids``.
+
+    ``parts_for`` returns :func:`timeline_parts` for a list of IDs;
+    ``sources`` names every file the payload depends on (fingerprinted
+    into the manifest). Built next to the old store and swapped in at the
+    end, like ``build_qc_index``. Returns the manifest.
+    """
+    out = bundle_dir(site_dir)
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    hosp_ids = sorted(str(h) for h in hosp_ids)
+    chunks = [hosp_ids[i:i + chunk_size] for i in range(0, len(hosp_ids), chunk_size)]
+    ranges: list[pd.DataFrame] = []
+    n_patients = 0
+    for i, chunk in enumerate(chunks):
+        parts = parts_for(chunk)
+        (tmp / f"c{i:05d}").mkdir()
+        for name in PARTS:
+            file = f"c{i:05d}/{name}"
+            df = parts[name].sort_values("hospitalization_id", kind="stable")
+            df.to_parquet(tmp / f"{file}.parquet", index=False, row_group_size=ROW_GROUP_SIZE)
+            ranges.append(row_ranges(tmp / f"{file}.parquet", "hospitalization_id").assign(file=file))
+        n_patients += len(parts["windows"])
+        if progress is not None:
+            progress(i + 1, len(chunks))
+
+    row_index = (pd.concat(ranges, ignore_index=True) if ranges
+                 else pd.DataFrame(columns=["key", "row_group", "offset", "n_rows", "file"]))
+    row_index[["file", "key", "row_group", "offset", "n_rows"]].to_parquet(
+        tmp / ROW_INDEX_FILE, index=False)
+    manifest = {
+        "built_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds"),
+        "version": BUNDLE_VERSION,
+        "chunk_size": chunk_size,
+        "n_chunks": len(chunks),
+        "n_hospitalizations": n_patients,
+        "sources": {name: {"source": str(src), "fingerprint": parquet_fingerprint(str(src))}
+                    for name, src in sorted(sources.items())},
+    }
+    with open(tmp / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return manifest
+
+
+@dataclass
+class PlotBundles:
+    """An opened ``qc_bundles/`` store: one payload per range read set."""
+
+    index: QcIndex
+    chunk_of: dict[str, str]
+    stale: list[str] = field(default_factory=list)
+
+    def payload(self, hosp_id: str) -> Optional[TimelinePayload]:
+        chunk = self.chunk_of.get(str(hosp_id))
+        if chunk is None:
+            return None
+        return TimelinePayload.from_parts({
+            name: self.index.read(f"{chunk}/{name}", hosp_id).to_pandas() for name in PARTS
+        })
+
+
+def open_plot_bundles(site_dir: Path) -> Optional[PlotBundles]:
+    """Open ``site_dir/qc_bundles/`` or return None when absent.
+
+    ``PlotBundles.stale`` lists the sources whose footer fingerprint moved
+    since the build ("version" for a store written by an older
+    :func:`timeline_parts`); callers should not serve a stale store.
+    """
+    root = bundle_dir(site_dir)
+    manifest_path = root / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    stale = sorted(name for name, info in manifest.get("sources", {}).items()
+                   if parquet_fingerprint(info["source"]) != info["fingerprint"])
+    if manifest.get("version") != BUNDLE_VERSION:
+        stale.insert(0, "version")
+    row_index = pd.read_parquet(root / ROW_INDEX_FILE)
+    ranges = {
+        f"c{i:05d}/{name}": {} for i in range(manifest.get("n_chunks", 0)) for name in PARTS
+    }
+    for name, grp in row_index.groupby("file", sort=False):
+        ranges[name] = dict(zip(grp["key"], zip(grp["row_group"].astype(int),
+                                                grp["offset"].astype(int), grp["n_rows"].astype(int))))
+    chunk_of = {
+        key: name.split("/")[0]
+        for name, keys in ranges.items() if name.endswith("/windows") for key in keys
+    }
+    return PlotBundles(index=QcIndex(root=root, files={}, ranges=ranges),
+                       chunk_of=chunk_of, stale=stale)
@@ -0,0 +1,300 @@
+"""Per-patient sidecar index for the trajectory QC viewer.
+
+Every viewer click used to pay a filtered scan per source: six raw CLIF
+tables through ``ClifOrchestrator.load_table`` and seven pipeline
+parquets through ``pd.read_parquet(filters=...)``. Neither is clustered
+by patient, so every row group is opened (the ID predicate rarely prunes
+anything) and a multi-GB vitals table costs seconds per patient.
+
+``make qc-index`` (``code/qc/build_qc_index.py``) writes, under
+``output/{site}/qc_index/``:
+
+- ``clif_<table>.parquet`` — cohort-only copy of each raw table the viewer
+  reads, sorted by ``hospitalization_id`` (``clif_patient`` by
+  ``patient_id``). Written by DuckDB (out-of-core sort), the same reader
+  clifpy uses, so the slices come back with clifpy's dtypes.
+- ``<artifact>.parquet`` — the same for each ``output/{site}/`` parquet the
+  viewer reads. Written by pyarrow so the pandas metadata (site-tz tagged
+  timestamps, index) survives the copy.
+- ``row_index.parquet`` — one row per (file, key): the first row group,
+  the row offset inside it and the row count. A patient's slice is a
+  ``read_row_groups`` of the one or two groups it spans, no predicate
+  evaluation.
+- ``manifest.json`` — per file: source path, key column and the source's
+  footer fingerprint (``_stage_cache.parquet_fingerprint``).
+
+The cohort is the set of IDs in ``model_input_by_id_imvday.parquet`` (a
+superset of the viewer's picker pool). :func:`open_qc_index` drops any file
+whose source fingerprint changed since the build — a stale copy is never
+served — and the whole index when the cohort itself changed.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _stage_cache import parquet_fingerprint  # noqa: E402
+
+QC_INDEX_DIRNAME = "qc_index"
+ROW_INDEX_FILE = "row_index.parquet"
+MANIFEST_FILE = "manifest.json"
+ROW_GROUP_SIZE = 16_384
+
+COHORT_ARTIFACT = "model_input_by_id_imvday"
+
+# Raw CLIF tables read per click (get_wide_df, get_intm_med,
+# get_discharge_info). `patient` is copied cohort-only, keyed by patient_id.
+RAW_TABLES = (
+    "hospitalization", "adt",
+    "vitals", "medication_admin_continuous",
+    "respiratory_support", "patient_assessments",
+    "medication_admin_intermittent",
+)
+# output/{site}/ parquets read per click (get_enrichment, get_all_imv_streaks).
+ARTIFACTS = (
+    COHORT_ARTIFACT,
+    "seddose_by_id_imvhr",
+    "covariates_by_id_imvday",
+    "outcomes_by_id_imvday",
+    "outcomes_by_event",
+    "cohort_imv_streaks",
+    "cohort_resp_processed_bf",
+)
+
+
+def raw_file(table: str) -> str:
+    return f"clif_{table}"
+
+
+def index_dir(site_dir: Path) -> Path:
+    return Path(site_dir) / QC_INDEX_DIRNAME
+
+
+# ── Build ──────────────────────────────────────────────────────────────
+
+def row_ranges(path: Path, key: str) -> pd.DataFrame:
+    """(key, row_group, offset, n_rows) for each run of ``key`` in a sorted file."""
+    pf = pq.ParquetFile(path)
+    keys = pc.cast(pf.read(columns=[key]).column(key), pa.string()).to_numpy(zero_copy_only=False)
+    if len(keys) == 0:
+        return pd.DataFrame({"key": pd.Series(dtype=str), "row_group": pd.Series(dtype="int32"),
+                             "offset": pd.Series(dtype="int64"), "n_rows": pd.Series(dtype="int64")})
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    n_rows = np.diff(np.r_[starts, len(keys)])
+    rg_starts = np.cumsum([0] + [pf.metadata.row_group(i).num_rows
+                                 for i in range(pf.metadata.num_row_groups)])[:-1]
+    row_group = np.searchsorted(rg_starts, starts, side="right") - 1
+    return pd.DataFrame({
+        "key": keys[starts],
+        "row_group": row_group.astype("int32"),
+        "offset": (starts - rg_starts[row_group]).astype("int64"),
+        "n_rows": n_rows.astype("int64"),
+    })
+
+
+def _copy_raw(src: Path, dst: Path, key: str, key_sql: str, row_group_size: int) -> None:
+    # Separate connection: COPY … ORDER BY may spill, and the shared default
+    # connection is re-pinned to UTC by every clifpy load.
+    with duckdb.connect() as con:
+        con.execute(f"""
+            COPY (
+                FROM read_parquet('{src}')
+                SELECT *
+                WHERE CAST({key} AS VARCHAR) IN ({key_sql})
+                ORDER BY {key}
+            ) TO '{dst}' (FORMAT parquet, ROW_GROUP_SIZE {row_group_size})
+        """)
+
+
+def _copy_artifact(src: Path, dst: Path, ids: pa.Array, row_group_size: int) -> None:
+    tbl = pq.read_table(src)
+    mask = pc.is_in(pc.cast(tbl.column("hospitalization_id"), pa.string()), value_set=ids)
+    tbl = tbl.filter(mask).sort_by("hospitalization_id")
+    pq.write_table(tbl, dst, row_group_size=row_group_size)
+
+
+def build_qc_index(
+    site_dir: Path,
+    raw_sources: dict[str, Path],
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> dict:
+    """Write ``site_dir/qc_index/`` from ``raw_sources`` and ``site_dir``'s artifacts.
+
+    ``raw_sources`` maps a CLIF table name (``RAW_TABLES`` plus
+    ``patient``) to its parquet; missing sources are skipped. The new
+    index is assembled next to the old one and swapped in at the end, so
+    a viewer never sees a half-built directory. Returns the manifest.
+    """
+    site_dir = Path(site_dir)
+    cohort_src = site_dir / f"{COHORT_ARTIFACT}.parquet"
+    if not cohort_src.exists():
+        raise FileNotFoundError(f"{cohort_src} not found — run the pipeline first")
+    out = index_dir(site_dir)
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    ids = pa.array(sorted(
+        pd.read_parquet(cohort_src, columns=["hospitalization_id"])["hospitalization_id"]
+        .astype(str).unique()
+    ), type=pa.string())
+    files: dict[str, dict] = {}
+    ranges: list[pd.DataFrame] = []
+
+    def _add(name: str, src: Path, key: str) -> None:
+        dst = tmp / f"{name}.parquet"
+        r = row_ranges(dst, key)
+        ranges.append(r.assign(file=name))
+        files[name] = {
+            "source": str(src),
+            "fingerprint": parquet_fingerprint(str(src)),
+            "key": key,
+            "rows": int(r["n_rows"].sum()),
+        }
+
+    for name in ARTIFACTS:
+        src = site_dir / f"{name}.parquet"
+        if src.exists():
+            _copy_artifact(src, tmp / f"{name}.parquet", ids, row_group_size)
+            _add(name, src, "hospitalization_id")
+
+    cohort_sql = (f"FROM read_parquet('{tmp / COHORT_ARTIFACT}.parquet') "
+                  "SELECT DISTINCT CAST(hospitalization_id AS VARCHAR)")
+    for table in RAW_TABLES:
+        src = raw_sources.get(table)
+        if src is None or not Path(src).exists():
+            continue
+        _copy_raw(Path(src), tmp / f"{raw_file(table)}.parquet",
+                  "hospitalization_id", cohort_sql, row_group_size)
+        _add(raw_file(table), Path(src), "hospitalization_id")
+    patient_src = raw_sources.get("patient")
+    hosp_copy = tmp / f"{raw_file('hospitalization')}.parquet"
+    if patient_src is not None and Path(patient_src).exists() and hosp_copy.exists():
+        _copy_raw(Path(patient_src), tmp / f"{raw_file('patient')}.parquet", "patient_id",
+                  f"FROM read_parquet('{hosp_copy}') SELECT DISTINCT CAST(patient_id AS VARCHAR)",
+                  row_group_size)
+        _add(raw_file("patient"), Path(patient_src), "patient_id")
+
+    pd.concat(ranges, ignore_index=True)[["file", "key", "row_group", "offset", "n_rows"]] \
+        .to_parquet(tmp / ROW_INDEX_FILE, index=False)
+    manifest = {
+        "built_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds"),
+        "row_group_size": row_group_size,
+        "n_hospitalizations": len(ids),
+        "files": files,
+    }
+    with open(tmp / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return manifest
+
+
+# ── Read ───────────────────────────────────────────────────────────────
+
+@dataclass
+class QcIndex:
+    """An opened ``qc_index/`` directory: range reads by key."""
+
+    root: Path
+    files: dict[str, dict]
+    ranges: dict[str, dict[str, tuple[int, int, int]]]
+    stale: list[str] = field(default_factory=list)
+    _metadata: dict = field(default_factory=dict, repr=False)
+
+    def has(self, name: str) -> bool:
+        return name in self.ranges
+
+    def in_cohort(self, hosp_id: str) -> bool:
+        return str(hosp_id) in self.ranges.get(COHORT_ARTIFACT, {})
+
+    def read(self, name: str, key: str, columns: Optional[Iterable[str]] = None) -> pa.Table:
+        """The rows of ``name`` whose key column equals ``key`` (empty if none)."""
+        path = self.root / f"{name}.parquet"
+        md = self._metadata.get(name)
+        if md is None:
+            md = self._metadata[name] = pq.read_metadata(path)
+        pf = pq.ParquetFile(path, metadata=md)
+        columns = list(columns) if columns is not None else None
+        hit = self.ranges[name].get(str(key))
+        if hit is None:
+            return pf.schema_arrow.empty_table().select(columns) if columns else pf.schema_arrow.empty_table()
+        row_group, offset, n_rows = hit
+        groups, covered = [], -offset
+        while covered < n_rows:
+            groups.append(row_group + len(groups))
+            covered += md.row_group(groups[-1]).num_rows
+        return pf.read_row_groups(groups, columns=columns).slice(offset, n_rows)
+
+    def read_many(self, name: str, keys: Iterable[str],
+                  columns: Optional[Iterable[str]] = None) -> pa.Table:
+        """The rows of ``name`` for every key in ``keys``, in ``keys`` order.
+
+        Each row group spanned by any key is read once, so a chunk of
+        neighbouring IDs (the batch jobs walk the sorted cohort) costs one
+        contiguous read rather than one per key.
+        """
+        path = self.root / f"{name}.parquet"
+        md = self._metadata.get(name)
+        if md is None:
+            md = self._metadata[name] = pq.read_metadata(path)
+        pf = pq.ParquetFile(path, metadata=md)
+        columns = list(columns) if columns is not None else None
+        rg_starts = np.cumsum([0] + [md.row_group(i).num_rows for i in range(md.num_row_groups)])
+        hits = [h for h in (self.ranges[name].get(str(k)) for k in keys) if h is not None]
+        if not hits:
+            return pf.schema_arrow.empty_table().select(columns) if columns else pf.schema_arrow.empty_table()
+        rows = np.concatenate([np.arange(rg_starts[g] + o, rg_starts[g] + o + n) for g, o, n in hits])
+        groups = np.unique(np.searchsorted(rg_starts, rows, side="right") - 1)
+        # Position of each wanted row inside the concatenation of `groups`.
+        local_starts = np.cumsum([0] + [md.row_group(int(g)).num_rows for g in groups])[:-1]
+        group_of = np.searchsorted(rg_starts, rows, side="right") - 1
+        local = rows - rg_starts[group_of] + local_starts[np.searchsorted(groups, group_of)]
+        return pf.read_row_groups(groups.tolist(), columns=columns).take(pa.array(local))
+
+
+def open_qc_index(site_dir: Path) -> Optional[QcIndex]:
+    """Open ``site_dir/qc_index/`` or return None when absent / cohort stale.
+
+    Files whose source footer fingerprint moved since the build are left
+    out (listed in ``QcIndex.stale``); callers fall back to the source.
+    """
+    root = index_dir(site_dir)
+    manifest_path = root / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    files = manifest.get("files", {})
+    stale = sorted(name for name, info in files.items()
+                   if parquet_fingerprint(info["source"]) != info["fingerprint"])
+    if COHORT_ARTIFACT not in files or COHORT_ARTIFACT in stale:
+        return None
+    row_index = pd.read_parquet(root / ROW_INDEX_FILE)
+    ranges: dict[str, dict[str, tuple[int, int, int]]] = {}
+    for name, grp in row_index.groupby("file", sort=False):
+        if name in stale:
+            continue
+        ranges[name] = dict(zip(
+            grp["key"],
+            zip(grp["row_group"].astype(int), grp["offset"].astype(int), grp["n_rows"].astype(int)),
+        ))
+    for name in files:
+        if name not in stale:
+            ranges.setdefault(name, {})
+    return QcIndex(root=root, files=files, ranges=ranges, stale=stale)
@@ -5,11 +5,24 @@ Centralizes per-patient data access so the Dash app stays thin:
 - `list_sites()` discovers which sites have pipeline outputs available.
 - `build_site_config(site)` returns the per-site JSON config (used by clifpy).
 - `get_wide_df(site, hosp_id)` returns the wide dataset for ONE patient, loading
-  only that patient's rows from raw CLIF tables. LRU-cached so flipping between
-  recent IDs is instant.
+  only that patient's rows from raw CLIF tables. Cached in a memory-bounded
+  LRU (`PATIENT_CACHE`, see `_patient_cache.py`) that the viewer also fills
+  in the background, so flipping between recent or upcoming IDs is instant.
 - `get_enrichment(site, hosp_id)` reads per-patient slices of the pipeline
   artifacts (analytical dataset, sed dose by hour, SBT outcomes, covariates,
   IMV streaks) without loading the full parquet into memory.
+- Both read through `output/{site}/qc_index/` when `make qc-index` has built
+  it (cohort-only, patient-sorted copies + a row-range index, see
+  `_qc_index.py`): one patient is a direct row-group range read instead of
+  a filtered scan per table. Sources whose footer changed since the build
+  fall back to the filtered scan.
+- `get_wide_dfs(site, ids)` / `get_enrichments(site, ids)` are the same
+  loads for a list of patients in one pass (the single-patient versions
+  are thin wrappers); `make qc-bundles` walks the cohort with them.
+- `get_timeline_payload(site, hosp_id)` returns what `build_timeline`
+  draws (`_plot_bundle.TimelinePayload`): read from
+  `output/{site}/qc_bundles/` when that store is current, else computed
+  from the two loads above.
 - `extract_events(...)` builds a dataframe of clinical event markers
   (intubation / SBT / extubation / tracheostomy / death) with absolute
   timestamps for drawing as vertical lines on the timeline.
@@ -21,12 +34,18 @@ per the project's multi-site layout.
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
+from clifpy.utils.logging_config import get_logger
+
+from _patient_cache import CACHE_MB_ENV, PatientCache, env_int
+
+logger = get_logger("epi_sedation.qc.shared")
 
 # Reuse the drug color palette from the descriptive figures so the dashboard
 # reads consistently with the static figures in output_to_share/<site>/figures.
@@ -199,6 +218,15 @@ def load_site_config(site: str) -> dict[str, Any]:
 
 # ── ClifOrchestrator cache (per site) ──────────────────────────────────
 
+# The cached orchestrator's table objects and DuckDB's default connection
+# are shared state: every clifpy load below runs under this lock, so the
+# prefetch threads and a foreground click never interleave two patients.
+_CLIF_LOCK = threading.RLock()
+
+# get_wide_df / get_enrichment results, LRU-bounded by memory (QC_CACHE_MB).
+PATIENT_CACHE = PatientCache(env_int(CACHE_MB_ENV, 1024, minimum=1) * 1024 * 1024)
+
+
 @lru_cache(maxsize=4)
 def _get_orchestrator(site: str):
     """Return a ClifOrchestrator bound to the site's config.
@@ -214,6 +242,94 @@ def _get_orchestrator(site: str):
     return ClifOrchestrator(config_path=str(cfg_path))
 
 
+# ── Per-patient sidecar index (make qc-index) ──────────────────────────
+
+def _qc_index(site_dir: Path, hosp_ids: list[str]):
+    """Open `site_dir/qc_index/` if it exists and covers every ID, else None.
+
+    Re-opened whenever `manifest.json` is rewritten, so a `make qc-index`
+    during a viewer session is picked up on the next click.
+    """
+    manifest = site_dir / "qc_index" / "manifest.json"
+    if not manifest.exists():
+        return None
+    idx = _open_qc_index(site_dir, manifest.stat().st_mtime_ns)
+    if idx is None or not all(idx.in_cohort(h) for h in hosp_ids):
+        return None
+    return idx
+
+
+@lru_cache(maxsize=4)
+def _open_qc_index(site_dir: Path, _manifest_mtime: int):
+    from _qc_index import open_qc_index  # lazy: pulls in duckdb / _stage_cache
+
+    idx = open_qc_index(site_dir)
+    if idx is None:
+        logger.warning(f"{site_dir.name}: qc_index cohort is stale — rerun `make qc-index`")
+    elif idx.stale:
+        logger.warning(f"{site_dir.name}: qc_index out of date for {', '.join(idx.stale)} "
+                       "(filtered scan instead) — rerun `make qc-index`")
+    return idx
+
+
+def _clif_frame(tbl, timezone: str | None) -> pd.DataFrame:
+    """An indexed raw-table slice as clifpy's `load_data` would return it.
+
+    Same DuckDB → pandas conversion, `*_id` columns as string, `*_dttm`
+    relabelled to the site timezone.
+    """
+    import duckdb
+    from clifpy.utils.io import _cast_id_cols_to_string, convert_datetime_columns_to_site_tz
+
+    with duckdb.connect() as con:
+        con.execute("SET timezone = 'UTC'")
+        df = con.from_arrow(tbl).df()
+    df = _cast_id_cols_to_string(df)
+    if timezone:
+        df = convert_datetime_columns_to_site_tz(df, timezone, verbose=False)
+    return df
+
+
+def _clif_table(co, table: str, df: pd.DataFrame):
+    """A clifpy table object for `table` holding `df`, configured like `co`."""
+    from clifpy.clif_orchestrator import TABLE_CLASSES
+
+    return TABLE_CLASSES[table](
+        data_directory=co.data_directory,
+        filetype=co.filetype,
+        timezone=co.timezone,
+        output_directory=co.output_directory,
+        data=df,
+    )
+
+
+def _load_patient_table(co, site: str, table: str, hosp_ids: list[str]) -> None:
+    """`co.load_table(table)` for `hosp_ids` only, via the qc_index if built.
+
+    On the index path the table object from the previous patient is kept
+    and only its `.df` swapped: constructing one re-parses clifpy's schema
+    and outlier YAML, which costs more than the range read itself. Nothing
+    here validates, so the stale validation state is never consulted.
+    """
+    idx = _qc_index(OUTPUT_DIR / site, hosp_ids)
+    name = f"clif_{table}"
+    if idx is None or not idx.has(name):
+        co.load_table(table, filters={"hospitalization_id": list(hosp_ids)})
+        return
+    _set_table_df(co, table, _clif_frame(idx.read_many(name, hosp_ids), co.timezone))
+
+
+def _set_table_df(co, table: str, df: pd.DataFrame) -> None:
+    """Point `co.<table>` at `df`, reusing the loaded table object if any."""
+    from clifpy.clif_orchestrator import TABLE_CLASSES
+
+    obj = getattr(co, table, None)
+    if isinstance(obj, TABLE_CLASSES[table]):
+        obj.df = df
+    else:
+        setattr(co, table, _clif_table(co, table, df))
+
+
 _WIDE_TABLES: dict[str, list[str] | None] = {
     "vitals": ["heart_rate", "sbp", "map", "spo2", "temp_c", "respiratory_rate"],
     "medication_admin_continuous": [
@@ -228,35 +344,56 @@ _WIDE_TABLES: dict[str, list[str] | None] = {
 }
 
 
-@lru_cache(maxsize=32)
+@PATIENT_CACHE.patient_cached
 def get_wide_df(site: str, hosp_id: str) -> pd.DataFrame:
     """Build the wide timeline for ONE hospitalization_id.
 
-    Loads only that patient's rows from each raw CLIF table. LRU-cached on
-    (site, id) so repeated clicks on the same ID are free.
+    Loads only that patient's rows from each raw CLIF table. Cached on
+    (site, id) in `PATIENT_CACHE`, so repeated (or prefetched) IDs are free.
+    """
+    wide_df = get_wide_dfs(site, [hosp_id])
+    if wide_df.empty:
+        return wide_df
+    return wide_df.sort_values("event_time").reset_index(drop=True)
+
+
+def get_wide_dfs(site: str, hosp_ids: list[str]) -> pd.DataFrame:
+    """Wide timelines for several hospitalizations in one clifpy pass.
+
+    Same frame as `get_wide_df` per ID, stacked and sorted by
+    (`hospitalization_id`, `event_time`). Batch jobs (`build_qc_bundles.py`)
+    walk the cohort in chunks through this; one `create_wide_dataset` call
+    per chunk is far cheaper than one per patient.
     """
     from clifpy.utils.wide_dataset import create_wide_dataset
 
-    co = _get_orchestrator(site)
-    # Scope the raw loads to this patient only. ClifOrchestrator's `load_table`
-    # accepts a filter dict, so we bypass any prior full-cohort load.
-    hosp_filter = {"hospitalization_id": [hosp_id]}
-    for t in [
-        "hospitalization", "adt",
-        "vitals", "medication_admin_continuous",
-        "respiratory_support", "patient_assessments",
-    ]:
-        co.load_table(t, filters=hosp_filter)
-    # patient table has no hospitalization_id — load unfiltered but it's small.
-    co.load_table("patient")
-
-    wide_df = create_wide_dataset(
-        clif_instance=co,
-        category_filters=_WIDE_TABLES,
-        hospitalization_ids=[hosp_id],
-        output_format="dataframe",
-        show_progress=False,
-    )
+    hosp_ids = list(hosp_ids)
+    with _CLIF_LOCK:
+        co = _get_orchestrator(site)
+        # Scope the raw loads to these patients only — a qc_index range read
+        # when built, else ClifOrchestrator's filtered `load_table`.
+        for t in [
+            "hospitalization", "adt",
+            "vitals", "medication_admin_continuous",
+            "respiratory_support", "patient_assessments",
+        ]:
+            _load_patient_table(co, site, t, hosp_ids)
+        # patient table has no hospitalization_id — the qc_index keys its
+        # cohort-only copy by patient_id; otherwise load unfiltered (it's small).
+        idx = _qc_index(OUTPUT_DIR / site, hosp_ids)
+        if idx is not None and idx.has("clif_patient"):
+            patient_ids = co.hospitalization.df["patient_id"].drop_duplicates().tolist()
+            _set_table_df(co, "patient", _clif_frame(idx.read_many("clif_patient", patient_ids), co.timezone))
+        else:
+            co.load_table("patient")
+
+        wide_df = create_wide_dataset(
+            clif_instance=co,
+            category_filters=_WIDE_TABLES,
+            hospitalization_ids=hosp_ids,
+            output_format="dataframe",
+            show_progress=False,
+        )
     if wide_df is None or wide_df.empty:
         return pd.DataFrame()
 
@@ -264,7 +401,7 @@ def get_wide_df(site: str, hosp_id: str) -> pd.DataFrame:
     time_cols = [c for c in wide_df.columns if "time" in c.lower() or "dttm" in c.lower()]
     if time_cols:
         wide_df = wide_df.rename(columns={time_cols[0]: "event_time"})
-        wide_df = wide_df.sort_values("event_time").reset_index(drop=True)
+        wide_df = wide_df.sort_values(["hospitalization_id", "event_time"]).reset_index(drop=True)
     return wide_df
 
 
@@ -287,15 +424,45 @@ class PatientEnrichment:
     intm: pd.DataFrame                     # Long-form medication_admin_intermittent
 
 
-def _read_filtered_parquet(path: Path, hosp_id: str) -> pd.DataFrame:
-    """Read a parquet filtered to one hospitalization_id (pyarrow pushdown)."""
+def _read_filtered_parquet(
+    path: Path, hosp_ids: list[str], columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """Read a parquet filtered to `hosp_ids`.
+
+    A row-group range read of the qc_index copy when `make qc-index` has
+    built one for this output, else a pyarrow pushdown scan of `path`.
+    """
     if not path.exists():
         return pd.DataFrame()
-    return pd.read_parquet(path, filters=[("hospitalization_id", "=", hosp_id)])
+    idx = _qc_index(path.parent, hosp_ids)
+    if idx is not None and idx.has(path.stem):
+        return idx.read_many(path.stem, hosp_ids, columns).to_pandas()
+    return pd.read_parquet(
+        path,
+        columns=columns,
+        filters=[("hospitalization_id", "in", list(hosp_ids))],
+    )
+
+
+def _split_by_id(df: pd.DataFrame, hosp_ids: list[str]) -> dict[str, pd.DataFrame]:
+    """`{hosp_id: rows}` from a multi-patient read, as a one-ID read returns them.
+
+    Row order within each ID is kept; a default RangeIndex is renumbered
+    per slice. A frame without columns (missing source) maps to itself.
+    """
+    if df.columns.empty:
+        return {h: df for h in hosp_ids}
+    renumber = isinstance(df.index, pd.RangeIndex)
+    positions = df.groupby("hospitalization_id", sort=False, observed=True).indices
+    out = {}
+    for h in hosp_ids:
+        part = df.iloc[positions.get(h, slice(0, 0))]
+        out[h] = part.reset_index(drop=True) if renumber else part
+    return out
 
 
-def _read_sbt_onset_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
-    """Load row-level SBT onset events for one hospitalization.
+def _read_sbt_onset_rows(site_dir: Path, hosp_ids: list[str]) -> dict[str, pd.DataFrame]:
+    """Load row-level SBT onset events per hospitalization in `hosp_ids`.
 
     Reads the per-row `outcomes_by_event.parquet` (NOT the daily aggregate
     `outcomes_by_id_imvday.parquet`) so the dashboard can place SBT vlines at
@@ -320,7 +487,7 @@ def _read_sbt_onset_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
     """
     path = site_dir / "outcomes_by_event.parquet"
     if not path.exists():
-        return pd.DataFrame()
+        return {h: pd.DataFrame() for h in hosp_ids}
     cols = [
         "hospitalization_id", "event_dttm", "_block_id",
         "sbt_done", "sbt_done_anyprior", "sbt_done_imv6h",
@@ -331,24 +498,23 @@ def _read_sbt_onset_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
         "_prior_mode_controlled", "_lag_imv_streak_minutes",
         "mode_category", "device_category",
     ]
-    df = pd.read_parquet(
-        path,
-        columns=cols,
-        filters=[("hospitalization_id", "=", hosp_id)],
-    )
-    if df.empty:
-        return df
     # event_dttm is already UTC tz-tagged on disk (03_outcomes.py applies
     # to_utc before writing). No read-time conversion needed.
     flag_cols = ["sbt_done", "sbt_done_anyprior", "sbt_done_imv6h",
                  "sbt_done_prefix", "sbt_done_2min",
                  "sbt_done_subira", "sbt_done_abc"]
-    onset_mask = (df[flag_cols].fillna(0).astype(int) == 1).any(axis=1)
-    return df.loc[onset_mask].sort_values("event_dttm").reset_index(drop=True)
+    out = {}
+    for h, df in _split_by_id(_read_filtered_parquet(path, hosp_ids, columns=cols), hosp_ids).items():
+        if df.empty:
+            out[h] = df
+            continue
+        onset_mask = (df[flag_cols].fillna(0).astype(int) == 1).any(axis=1)
+        out[h] = df.loc[onset_mask].sort_values("event_dttm").reset_index(drop=True)
+    return out
 
 
-def _read_sbt_audit_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
-    """Load the FULL per-row sbt_outcomes data for one hospitalization.
+def _read_sbt_audit_rows(site_dir: Path, hosp_ids: list[str]) -> dict[str, pd.DataFrame]:
+    """Load the FULL per-row sbt_outcomes data per hospitalization in `hosp_ids`.
 
     Sibling of `_read_sbt_onset_rows` but returns *every* row for the patient
     (no onset-mask filter). Used by the dashboard's linked table to surface
@@ -369,7 +535,7 @@ def _read_sbt_audit_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
     """
     path = site_dir / "outcomes_by_event.parquet"
     if not path.exists():
-        return pd.DataFrame()
+        return {h: pd.DataFrame() for h in hosp_ids}
     cols = [
         "hospitalization_id", "event_dttm",
         # Block / LAG-check context for SBT flag computation
@@ -392,19 +558,21 @@ def _read_sbt_audit_rows(site_dir: Path, hosp_id: str) -> pd.DataFrame:
         "_intub", "_extub_1st", "_fail_extub", "_success_extub",
         "_trach_1st",
     ]
-    df = pd.read_parquet(
-        path,
-        columns=cols,
-        filters=[("hospitalization_id", "=", hosp_id)],
-    )
-    if df.empty:
-        return df
     # event_dttm is already site-tz tagged on disk (03_outcomes.py retags).
-    return df.sort_values("event_dttm").reset_index(drop=True)
+    return {
+        h: df if df.empty else df.sort_values("event_dttm").reset_index(drop=True)
+        for h, df in _split_by_id(_read_filtered_parquet(path, hosp_ids, columns=cols), hosp_ids).items()
+    }
 
 
-@lru_cache(maxsize=32)
+@PATIENT_CACHE.patient_cached
 def get_enrichment(site: str, hosp_id: str) -> PatientEnrichment:
+    return get_enrichments(site, [hosp_id])[hosp_id]
+
+
+def get_enrichments(site: str, hosp_ids: list[str]) -> dict[str, PatientEnrichment]:
+    """`get_enrichment` for several IDs: one read per artifact, split per ID."""
+    hosp_ids = list(hosp_ids)
     site_dir = OUTPUT_DIR / site
     # Phase 4 cutover (2026-05-08): per-patient enrichment now reads from
     # the consolidated parquet. For a single-patient view we pull every
@@ -412,54 +580,101 @@ def get_enrichment(site: str, hosp_id: str) -> PatientEnrichment:
     # patient's full IMV trajectory (including partial first/last days).
     # Downstream analyses that need the modeling-cohort filter apply it
     # themselves — single-patient QC is a different need.
-    analytical = _read_filtered_parquet(site_dir / "model_input_by_id_imvday.parquet", hosp_id)
-    sed_hourly = _read_filtered_parquet(site_dir / "seddose_by_id_imvhr.parquet", hosp_id)
-    covariates = _read_filtered_parquet(site_dir / "covariates_by_id_imvday.parquet", hosp_id)
-    sbt_daily = _read_filtered_parquet(site_dir / "outcomes_by_id_imvday.parquet", hosp_id)
-    sbt_rows = _read_sbt_onset_rows(site_dir, hosp_id)
-    sbt_audit = _read_sbt_audit_rows(site_dir, hosp_id)
-    imv_streaks = _read_filtered_parquet(site_dir / "cohort_imv_streaks.parquet", hosp_id)
-    all_streaks = get_all_imv_streaks(site, hosp_id)
-
-    first_icu = None
-    if not analytical.empty and "_first_icu_dttm" in analytical.columns:
-        first_icu = analytical["_first_icu_dttm"].iloc[0]
-        if pd.notna(first_icu):
-            first_icu = pd.Timestamp(first_icu)
-        else:
-            first_icu = None
-
-    cohort_start = cohort_end = None
-    if not imv_streaks.empty:
-        s = imv_streaks.iloc[0]
-        if pd.notna(s.get("_start_dttm")):
-            cohort_start = pd.Timestamp(s["_start_dttm"])
-        if pd.notna(s.get("_end_dttm")):
-            cohort_end = pd.Timestamp(s["_end_dttm"])
-
-    discharge = get_discharge_info(site, hosp_id)
-    intm = get_intm_med(site, hosp_id)
-
-    return PatientEnrichment(
-        analytical=analytical,
-        sed_hourly=sed_hourly,
-        covariates=covariates,
-        sbt_daily=sbt_daily,
-        sbt_rows=sbt_rows,
-        sbt_audit=sbt_audit,
-        imv_streaks=imv_streaks,
-        all_imv_streaks=all_streaks,
-        first_icu_dttm=first_icu,
-        cohort_start=cohort_start,
-        cohort_end=cohort_end,
-        discharge=discharge,
-        intm=intm,
-    )
+    def _slices(name: str) -> dict[str, pd.DataFrame]:
+        return _split_by_id(_read_filtered_parquet(site_dir / f"{name}.parquet", hosp_ids), hosp_ids)
+
+    analytical = _slices("model_input_by_id_imvday")
+    sed_hourly = _slices("seddose_by_id_imvhr")
+    covariates = _slices("covariates_by_id_imvday")
+    sbt_daily = _slices("outcomes_by_id_imvday")
+    sbt_rows = _read_sbt_onset_rows(site_dir, hosp_ids)
+    sbt_audit = _read_sbt_audit_rows(site_dir, hosp_ids)
+    imv_streaks = _slices("cohort_imv_streaks")
+    all_streaks = _all_imv_streaks_by_id(site, hosp_ids)
+    discharge = _discharge_info_by_id(site, hosp_ids)
+    intm = _intm_med_by_id(site, hosp_ids)
+
+    out = {}
+    for h in hosp_ids:
+        first_icu = None
+        if not analytical[h].empty and "_first_icu_dttm" in analytical[h].columns:
+            first_icu = analytical[h]["_first_icu_dttm"].iloc[0]
+            if pd.notna(first_icu):
+                first_icu = pd.Timestamp(first_icu)
+            else:
+                first_icu = None
+
+        cohort_start = cohort_end = None
+        if not imv_streaks[h].empty:
+            s = imv_streaks[h].iloc[0]
+            if pd.notna(s.get("_start_dttm")):
+                cohort_start = pd.Timestamp(s["_start_dttm"])
+            if pd.notna(s.get("_end_dttm")):
+                cohort_end = pd.Timestamp(s["_end_dttm"])
+
+        out[h] = PatientEnrichment(
+            analytical=analytical[h],
+            sed_hourly=sed_hourly[h],
+            covariates=covariates[h],
+            sbt_daily=sbt_daily[h],
+            sbt_rows=sbt_rows[h],
+            sbt_audit=sbt_audit[h],
+            imv_streaks=imv_streaks[h],
+            all_imv_streaks=all_streaks[h],
+            first_icu_dttm=first_icu,
+            cohort_start=cohort_start,
+            cohort_end=cohort_end,
+            discharge=discharge[h],
+            intm=intm[h],
+        )
+    return out
+
+
+# ── Figure payload (make qc-bundles) ───────────────────────────────────
+
+@PATIENT_CACHE.patient_cached
+def get_timeline_payload(site: str, hosp_id: str):
+    """The trajectory figure's `TimelinePayload` for one hospitalization.
+
+    Read from `output/{site}/qc_bundles/` when `make qc-bundles` has built
+    a store that is still current; else computed from `get_wide_df` /
+    `get_enrichment` (see `_plot_bundle.py`). None when the patient has no
+    wide-dataset rows.
+    """
+    from _plot_bundle import timeline_payload  # lazy: _plot_bundle imports this module
+
+    bundles = _plot_bundles(OUTPUT_DIR / site)
+    if bundles is not None:
+        payload = bundles.payload(hosp_id)
+        if payload is not None:
+            return payload
+    wide_df = get_wide_df(site, hosp_id)
+    if wide_df.empty:
+        return None
+    return timeline_payload(wide_df, get_enrichment(site, hosp_id))
+
+
+def _plot_bundles(site_dir: Path):
+    manifest = site_dir / "qc_bundles" / "manifest.json"
+    if not manifest.exists():
+        return None
+    return _open_plot_bundles(site_dir, manifest.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _open_plot_bundles(site_dir: Path, _manifest_mtime: int):
+    from _plot_bundle import open_plot_bundles
+
+    bundles = open_plot_bundles(site_dir)
+    if bundles is not None and bundles.stale:
+        logger.warning(f"{site_dir.name}: qc_bundles out of date for {', '.join(bundles.stale)} "
+                       "(computing figures live) — rerun `make qc-bundles`")
+        return None
+    return bundles
 
 
 # ── Intermittent-admin loader (DIY, bypasses create_wide_dataset) ─────
 
-@lru_cache(maxsize=32)
 def get_intm_med(site: str, hosp_id: str) -> pd.DataFrame:
     """Long-format `medication_admin_intermittent` rows for one hosp_id.
 
@@ -468,28 +683,31 @@ def get_intm_med(site: str, hosp_id: str) -> pd.DataFrame:
     rates). Bypasses clifpy's `create_wide_dataset` since we want the
     raw event stream, not a category-pivoted wide frame.
     """
+    return _intm_med_by_id(site, [hosp_id])[hosp_id]
+
+
+def _intm_med_by_id(site: str, hosp_ids: list[str]) -> dict[str, pd.DataFrame]:
     try:
-        co = _get_orchestrator(site)
-        co.load_table("medication_admin_intermittent",
-                      filters={"hospitalization_id": [hosp_id]})
-        df = co.medication_admin_intermittent.df
+        with _CLIF_LOCK:
+            co = _get_orchestrator(site)
+            _load_patient_table(co, site, "medication_admin_intermittent", hosp_ids)
+            df = co.medication_admin_intermittent.df
     except Exception:  # noqa: BLE001 — table missing → return empty
-        return pd.DataFrame()
+        return {h: pd.DataFrame() for h in hosp_ids}
     if df is None or df.empty:
-        return pd.DataFrame()
+        return {h: pd.DataFrame() for h in hosp_ids}
     keep_cats = ["propofol", "fentanyl", "midazolam", "lorazepam", "hydromorphone",
                  "norepinephrine", "epinephrine", "vasopressin"]
-    sub = df[df["med_category"].isin(keep_cats)].copy()
-    if sub.empty:
-        return pd.DataFrame()
     cols = [c for c in ("admin_dttm", "med_category", "med_dose", "med_dose_unit")
-            if c in sub.columns]
-    return sub[cols].sort_values("admin_dttm").reset_index(drop=True)
+            if c in df.columns]
+    out = {}
+    for h, sub in _split_by_id(df[df["med_category"].isin(keep_cats)], hosp_ids).items():
+        out[h] = pd.DataFrame() if sub.empty else sub[cols].sort_values("admin_dttm").reset_index(drop=True)
+    return out
 
 
 # ── All-streaks (QC-only, on-the-fly) ──────────────────────────────────
 
-@lru_cache(maxsize=32)
 def get_all_imv_streaks(site: str, hosp_id: str) -> pd.DataFrame:
     """Compute the full IMV-episode list (not just the cohort-qualifying one).
 
@@ -504,84 +722,112 @@ def get_all_imv_streaks(site: str, hosp_id: str) -> pd.DataFrame:
     `_streak_id`, `_start_dttm`, `_end_dttm`, `_duration_hrs`, `_at_least_24h`.
     Empty if no IMV rows or the upstream parquet is missing.
     """
+    return _all_imv_streaks_by_id(site, [hosp_id])[hosp_id]
+
+
+def _all_imv_streaks_by_id(site: str, hosp_ids: list[str]) -> dict[str, pd.DataFrame]:
     import duckdb  # lazy import — avoids paying cost at module load
 
     path = OUTPUT_DIR / site / "cohort_resp_processed_bf.parquet"
     if not path.exists():
-        return pd.DataFrame()
-    resp_p = pd.read_parquet(path, filters=[("hospitalization_id", "=", hosp_id)])
+        return {h: pd.DataFrame() for h in hosp_ids}
+    resp_p = _read_filtered_parquet(path, hosp_ids)
     if resp_p.empty or "recorded_dttm" not in resp_p.columns:
-        return pd.DataFrame()
-
-    streaks = duckdb.query("""
-        -- Gap-island: detect transitions in/out of IMV → assign _streak_id →
-        -- aggregate to per-streak start/end, mirroring 01_cohort.py:190-265.
-        WITH t1 AS (
-            FROM resp_p
-            SELECT hospitalization_id
-                , event_dttm: recorded_dttm
-                , _on_imv: CASE WHEN device_category = 'imv' THEN 1 ELSE 0 END
-                , _chg_imv: CASE
-                    WHEN (_on_imv = 0 AND LAG(_on_imv) OVER w = 1)
-                    OR (_on_imv = 1 AND _on_imv IS DISTINCT FROM LAG(_on_imv) OVER w)
-                    THEN 1 ELSE 0 END
-            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY event_dttm)
-        ), t2 AS (
-            FROM t1
-            SELECT *
-                , _streak_id: SUM(_chg_imv) OVER w
-            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY event_dttm)
-        ), agg AS (
-            FROM t2
+        return {h: pd.DataFrame() for h in hosp_ids}
+
+    # Private connection: the default one is shared with clifpy's loads on
+    # other threads. UTC like the default after a clifpy load.
+    with duckdb.connect() as con:
+        con.execute("SET timezone = 'UTC'")
+        streaks = con.query("""
+            -- Gap-island: detect transitions in/out of IMV → assign _streak_id →
+            -- aggregate to per-streak start/end, mirroring 01_cohort.py:190-265.
+            WITH t1 AS (
+                FROM resp_p
+                SELECT hospitalization_id
+                    , event_dttm: recorded_dttm
+                    , _on_imv: CASE WHEN device_category = 'imv' THEN 1 ELSE 0 END
+                    , _chg_imv: CASE
+                        WHEN (_on_imv = 0 AND LAG(_on_imv) OVER w = 1)
+                        OR (_on_imv = 1 AND _on_imv IS DISTINCT FROM LAG(_on_imv) OVER w)
+                        THEN 1 ELSE 0 END
+                WINDOW w AS (PARTITION BY hospitalization_id ORDER BY event_dttm)
+            ), t2 AS (
+                FROM t1
+                SELECT *
+                    , _streak_id: SUM(_chg_imv) OVER w
+                WINDOW w AS (PARTITION BY hospitalization_id ORDER BY event_dttm)
+            ), agg AS (
+                FROM t2
+                SELECT hospitalization_id
+                    , _streak_id
+                    , _start_dttm: MIN(event_dttm)
+                    , _last_observed_dttm: MAX(event_dttm)
+                    , _on_imv: MAX(_on_imv)
+                GROUP BY hospitalization_id, _streak_id
+            )
+            FROM agg
             SELECT hospitalization_id
                 , _streak_id
-                , _start_dttm: MIN(event_dttm)
-                , _last_observed_dttm: MAX(event_dttm)
-                , _on_imv: MAX(_on_imv)
-            GROUP BY hospitalization_id, _streak_id
-        )
-        FROM agg
-        SELECT _streak_id
-            , _start_dttm
-            , _end_dttm: COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)
-            , _duration_hrs: date_diff('minute', _start_dttm, COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)) / 60.0
-            , _at_least_24h: CASE WHEN date_diff('minute', _start_dttm, COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)) / 60.0 >= 24 THEN 1 ELSE 0 END
-        WHERE _on_imv = 1
-        WINDOW w AS (ORDER BY _streak_id)
-        ORDER BY _streak_id
-    """).df()
-    return streaks
+                , _start_dttm
+                , _end_dttm: COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)
+                , _duration_hrs: date_diff('minute', _start_dttm, COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)) / 60.0
+                , _at_least_24h: CASE WHEN date_diff('minute', _start_dttm, COALESCE(LEAD(_start_dttm) OVER w, _last_observed_dttm)) / 60.0 >= 24 THEN 1 ELSE 0 END
+            WHERE _on_imv = 1
+            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY _streak_id)
+            ORDER BY hospitalization_id, _streak_id
+        """).df()
+    present = set(resp_p["hospitalization_id"].astype(str))
+    return {
+        h: df.drop(columns="hospitalization_id") if h in present else pd.DataFrame()
+        for h, df in _split_by_id(streaks, hosp_ids).items()
+    }
 
 
 # ── Discharge info (for the discharge vline + linked summary) ──────────
 
-@lru_cache(maxsize=32)
 def get_discharge_info(site: str, hosp_id: str) -> pd.Series | None:
     """Return a 1-row Series with discharge_dttm + discharge_category.
 
     Mirrors the loader pattern in code/06_table1.py:78-84. Returns None if
     clifpy can't resolve the hospitalization or the fields are absent.
     """
+    return _discharge_info_by_id(site, [hosp_id])[hosp_id]
+
+
+def _discharge_info_by_id(site: str, hosp_ids: list[str]) -> dict[str, pd.Series | None]:
     try:
         from clifpy import Hospitalization
         from clifpy.utils import apply_outlier_handling
     except Exception:  # noqa: BLE001 — clifpy missing → skip discharge overlay
-        return None
-
-    cfg_path = _site_config_path(site)
-    hosp = Hospitalization.from_file(
-        config_path=str(cfg_path),
-        columns=["hospitalization_id", "discharge_dttm", "discharge_category"],
-        filters={"hospitalization_id": [hosp_id]},
-    )
-    try:
-        apply_outlier_handling(hosp, outlier_config_path="config/outlier_config.yaml")
-    except Exception:  # noqa: BLE001 — config path unknown → tolerate
-        pass
+        return {h: None for h in hosp_ids}
+
+    with _CLIF_LOCK:
+        columns = ["hospitalization_id", "discharge_dttm", "discharge_category"]
+        idx = _qc_index(OUTPUT_DIR / site, hosp_ids)
+        if idx is not None and idx.has("clif_hospitalization"):
+            co = _get_orchestrator(site)
+            hosp = _clif_table(co, "hospitalization", _clif_frame(
+                idx.read_many("clif_hospitalization", hosp_ids, columns), co.timezone,
+            ))
+        else:
+            cfg_path = _site_config_path(site)
+            hosp = Hospitalization.from_file(
+                config_path=str(cfg_path),
+                columns=columns,
+                filters={"hospitalization_id": list(hosp_ids)},
+            )
+        try:
+            apply_outlier_handling(hosp, outlier_config_path="config/outlier_config.yaml")
+        except Exception:  # noqa: BLE001 — config path unknown → tolerate
+            pass
     df = hosp.df
     if df is None or df.empty:
-        return None
-    return df.iloc[0]
+        return {h: None for h in hosp_ids}
+    return {
+        h: None if part.empty else part.iloc[0]
+        for h, part in _split_by_id(df, hosp_ids).items()
+    }
 
 
 def categorize_discharge(category: object) -> str:
@@ -0,0 +1,76 @@
+"""Precompute the trajectory viewer's figure payloads (``make qc-bundles``).
+
+Writes ``output/{site}/qc_bundles/``: for every cohort hospitalization the
+scaled traces, event lines, night windows, filter boundaries, day labels
+and device ribbon ``build_timeline`` draws (see ``code/qc/_plot_bundle.py``).
+The cohort is walked in chunks of ``--chunk-size`` IDs, each loaded with
+one clifpy pass (``get_wide_dfs`` / ``get_enrichments``) — through the
+``qc_index`` copies when ``make qc-index`` has built them. ``make qc``
+serves a patient's payload from the store; without it (or when a source
+changed since the build) the viewer computes it per click.
+
+Usage:
+    make qc-bundles              # every site under output/ with a cohort
+    make qc-bundles SITE=mimic
+    # or directly:
+    uv run python code/qc/build_qc_bundles.py [site ...] [--chunk-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _plot_bundle import (  # noqa: E402
+    CHUNK_SIZE,
+    SOURCE_ARTIFACTS,
+    build_plot_bundles,
+    bundle_dir,
+    timeline_parts,
+)
+from _shared import OUTPUT_DIR, get_enrichments, get_wide_dfs, list_sites  # noqa: E402
+from build_qc_index import raw_sources  # noqa: E402
+
+
+def bundle_sources(site: str) -> dict[str, Path]:
+    """Every parquet a payload is derived from: raw CLIF tables + artifacts."""
+    sources = {f"clif_{t}": p for t, p in raw_sources(site).items()}
+    sources.update({name: OUTPUT_DIR / site / f"{name}.parquet" for name in SOURCE_ARTIFACTS})
+    return sources
+
+
+def main() -> int:
+    sites = list_sites()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sites", nargs="*", metavar="site",
+                        help=f"sites to build (default: all of {', '.join(sites) or 'none'})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"hospitalizations per clifpy load (default {CHUNK_SIZE})")
+    args = parser.parse_args()
+    unknown = sorted(set(args.sites) - set(sites))
+    if unknown:
+        parser.error(f"no model_input_by_id_imvday.parquet for: {', '.join(unknown)}")
+    for site in args.sites or sites:
+        t0 = time.perf_counter()
+        ids = pd.read_parquet(OUTPUT_DIR / site / "model_input_by_id_imvday.parquet",
+                              columns=["hospitalization_id"])["hospitalization_id"].astype(str).unique()
+
+        def parts_for(chunk: list[str]) -> dict[str, pd.DataFrame]:
+            return timeline_parts(get_wide_dfs(site, chunk), get_enrichments(site, chunk))
+
+        def progress(done: int, total: int) -> None:
+            print(f"  {site}: chunk {done}/{total} ({time.perf_counter() - t0:.0f}s)", flush=True)
+
+        manifest = build_plot_bundles(OUTPUT_DIR / site, ids, parts_for, bundle_sources(site),
+                                      chunk_size=args.chunk_size, progress=progress)
+        print(f"{site}: {manifest['n_hospitalizations']} hospitalizations → "
+              f"{bundle_dir(OUTPUT_DIR / site)} ({time.perf_counter() - t0:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
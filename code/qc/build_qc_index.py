@@ -0,0 +1,61 @@
+"""Build the trajectory viewer's per-patient sidecar index (``make qc-index``).
+
+Writes ``output/{site}/qc_index/``: cohort-only, ``hospitalization_id``-
+sorted copies of the raw CLIF tables and pipeline parquets the viewer
+reads per click, plus a row-range index (see ``code/qc/_qc_index.py``).
+``make qc`` picks it up automatically; without it the viewer falls back to
+a filtered scan of each source. Rebuild after a pipeline rerun or CLIF
+refresh — the viewer ignores (and warns about) any copy whose source
+changed since the build.
+
+Usage:
+    make qc-index              # every site under output/ with a cohort
+    make qc-index SITE=mimic
+    # or directly:
+    uv run python code/qc/build_qc_index.py [site ...]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _qc_index import RAW_TABLES, build_qc_index, index_dir  # noqa: E402
+from _shared import OUTPUT_DIR, list_sites, load_site_config  # noqa: E402
+
+
+def raw_sources(site: str) -> dict[str, Path]:
+    """Raw CLIF parquet per table, from the site config's data_directory."""
+    cfg = load_site_config(site)
+    if cfg.get("filetype", "parquet") != "parquet":
+        print(f"  {site}: filetype={cfg.get('filetype')!r} — raw tables not indexed "
+              "(parquet only); pipeline outputs still are")
+        return {}
+    data_dir = Path(cfg["data_directory"])
+    return {t: data_dir / f"clif_{t}.parquet" for t in (*RAW_TABLES, "patient")}
+
+
+def main() -> int:
+    sites = list_sites()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sites", nargs="*", metavar="site",
+                        help=f"sites to index (default: all of {', '.join(sites) or 'none'})")
+    args = parser.parse_args()
+    unknown = sorted(set(args.sites) - set(sites))
+    if unknown:
+        parser.error(f"no model_input_by_id_imvday.parquet for: {', '.join(unknown)}")
+    for site in args.sites or sites:
+        t0 = time.perf_counter()
+        manifest = build_qc_index(OUTPUT_DIR / site, raw_sources(site))
+        print(f"{site}: {manifest['n_hospitalizations']} hospitalizations, "
+              f"{len(manifest['files'])} files → {index_dir(OUTPUT_DIR / site)} "
+              f"({time.perf_counter() - t0:.1f}s)")
+        for name, info in sorted(manifest["files"].items()):
+            print(f"  {name:<40} {info['rows']:>12,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Stage-cache status — which expensive 01/04 stages would recompute.
+
+Read-only. Recomputes each cached stage's input fingerprint (see
+``code/_stage_cache.py``) from the raw CLIF parquet footers, the current
+config and the cohort on disk, compares it with the manifest stored next
+to the cached parquet, and prints HIT / MISS per stage with the reason
+(changed components, missing manifest, missing artifact).
+
+The waterfall's cohort component (post-stitch hospitalization IDs) is only
+known inside 01_cohort.py, so it is reported as unchecked here; every other
+component is compared exactly.
+
+Usage:
+    make cache-status SITE=mimic
+    # or directly:
+    uv run python code/qc/cache_status.py
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import duckdb
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT / "code"))
+from _stage_cache import (  # noqa: E402
+    STAGES,
+    check_stage_cache,
+    read_stage_manifest,
+    stage_components,
+)
+
+CONFIG_PATH = PROJECT_ROOT / "config" / "config.json"
+
+
+def main() -> int:
+    # _stage_cache paths are relative to the project root (same as the
+    # pipeline scripts, which `make` runs from there).
+    os.chdir(PROJECT_ROOT)
+    with CONFIG_PATH.open() as f:
+        cfg = json.load(f)
+    site = os.getenv("SITE", cfg.get("site_name", "unknown")).lower()
+
+    grid_path = f"output/{site}/cohort_meta_by_id_imvhr.parquet"
+    cohort_ids = (
+        [r[0] for r in duckdb.sql(
+            f"FROM '{grid_path}' SELECT DISTINCT hospitalization_id"
+        ).fetchall()]
+        if os.path.exists(grid_path) else None
+    )
+
+    print(f"Stage cache status — site: {site}")
+    print(f"  rerun_waterfall={cfg.get('rerun_waterfall', False)}  "
+          f"rerun_sofa_24h={cfg.get('rerun_sofa_24h', False)}  "
+          f"rerun_ase={cfg.get('rerun_ase', False)}")
+    print()
+    print(f"{'stage':<16} {'status':<6} {'written':<26} reason")
+    print("-" * 90)
+    n_miss = 0
+    for stage in STAGES:
+        ids = None if stage == 'waterfall' else cohort_ids
+        hit, reason = check_stage_cache(site, stage, stage_components(stage, cfg, ids))
+        manifest = read_stage_manifest(site, stage) or {}
+        n_miss += not hit
+        print(f"{stage:<16} {'HIT' if hit else 'MISS':<6} "
+              f"{manifest.get('written_at', '—'):<26} {reason}")
+    if cohort_ids is None:
+        print(f"\nNote: {grid_path} absent — cohort_ids unchecked for 04 stages.")
+    if cfg.get('path_to_waterfall_processed_resp_table'):
+        print("\nNote: path_to_waterfall_processed_resp_table is set — 01 loads the "
+              "external table (Mode A) and bypasses the waterfall cache.")
+    print(f"\n{len(STAGES) - n_miss} hit / {n_miss} miss")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
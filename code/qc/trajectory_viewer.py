@@ -26,12 +26,13 @@ Run:
 """
 from __future__ import annotations
 
+import bisect
 import random
+from functools import lru_cache
 from pathlib import Path
 
 import dash
 import dash_bootstrap_components as dbc
-import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from dash import ALL, ctx, Input, Output, State, dash_table, dcc, html, no_update
@@ -43,27 +44,29 @@ logger = get_logger("epi_sedation.qc.trajectory_viewer")
 # Local helpers.
 import sys as _sys
 _sys.path.insert(0, str(Path(__file__).parent))
+from _patient_cache import (  # noqa: E402
+    PREFETCH_NEXT_ENV,
+    PREFETCH_WORKERS_ENV,
+    Prefetcher,
+    env_int,
+)
+from _plot_bundle import INTM_PREFIX, SED_DRUGS, TimelinePayload  # noqa: E402
 from _shared import (  # noqa: E402
     ASSESSMENT_COLORS,
     DAY_START_HOUR,
-    DEVICE_CATEGORY_COLORS,
     EVENT_COLORS,
     HOVER_WINDOW_MIN,
-    MODE_IN_IMV_COLORS,
     NIGHT_SHIFT_COLOR,
+    PATIENT_CACHE,
     PRESSOR_COLORS,
     RESP_COLORS,
     SEDATIVE_COLORS,
     VITAL_COLORS,
     PatientEnrichment,
-    cohort_excluded_zones,
-    compute_nee,
-    day_labels_for_cohort,
-    extract_events,
     get_enrichment,
+    get_timeline_payload,
     get_wide_df,
     list_sites,
-    night_windows_in_range,
 )
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -84,12 +87,18 @@ PANEL_BY_ID = {p["id"]: p for p in PANELS}
 # ── Cohort pool discovery ───────────────────────────────────────────────
 
 def cohort_ids_for_site(site: str) -> list[str]:
-    # Phase 4 cutover (2026-05-08): cohort discovery from the consolidated
-    # parquet. Apply outcome-modeling filter so the patient picker reflects
-    # the same cohort the production models see.
     path = OUTPUT_DIR / site / "model_input_by_id_imvday.parquet"
     if not path.exists():
         return []
+    return _cohort_ids(path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _cohort_ids(path: Path, _mtime: int) -> list[str]:
+    # Phase 4 cutover (2026-05-08): cohort discovery from the consolidated
+    # parquet. Apply outcome-modeling filter so the patient picker reflects
+    # the same cohort the production models see. Cached per file version —
+    # load_patient checks membership on every click.
     df = pd.read_parquet(
         path,
         columns=["hospitalization_id", "_nth_day",
@@ -103,6 +112,32 @@ def cohort_ids_for_site(site: str) -> list[str]:
     return sorted(df["hospitalization_id"].unique().tolist())
 
 
+# ── Background prefetch ────────────────────────────────────────────────
+# While the reviewer reads one timeline, worker threads fill PATIENT_CACHE
+# with the sampled chips and the next QC_PREFETCH_NEXT cohort IDs, so the
+# following click is a cache hit. QC_PREFETCH_WORKERS=0 turns it off.
+
+PREFETCH = Prefetcher(env_int(PREFETCH_WORKERS_ENV, 2))
+PREFETCH_NEXT = env_int(PREFETCH_NEXT_ENV, 5)
+
+
+def prefetch_patients(site: str, hosp_ids: list[str]) -> None:
+    tasks = []
+    for h in hosp_ids:
+        tasks.append(lambda h=h: get_enrichment(site, h))
+        tasks.append(lambda h=h: get_wide_df(site, h))
+        tasks.append(lambda h=h: get_timeline_payload(site, h))
+    PREFETCH.submit(tasks)
+
+
+def next_cohort_ids(pool: list[str], hosp_id: str, n: int) -> list[str]:
+    """The `n` IDs after `hosp_id` in the sorted cohort pool (wrapping)."""
+    if not pool or n <= 0:
+        return []
+    i = bisect.bisect_right(pool, hosp_id)
+    return [pool[(i + k) % len(pool)] for k in range(min(n, len(pool) - 1))]
+
+
 # ── Dash app scaffold ──────────────────────────────────────────────────
 
 app = dash.Dash(
@@ -245,7 +280,11 @@ See `docs/outcomes_specs.md` § "Sensitivity siblings" for the full operationali
             children="Hover the plot to filter the table · click to pin a cursor",
             className="text-muted",
         ), width=True),
+        dbc.Col(html.Small(id="cache-stats", className="text-muted",
+                           style={"fontFamily": "monospace", "fontSize": "11px"}),
+                width="auto"),
     ], className="g-2 align-items-center mb-1"),
+    dcc.Interval(id="cache-stats-tick", interval=3000),
 
     dcc.Loading(
         id="plot-loading", type="default",
@@ -323,6 +362,7 @@ def sample_ids(_n_clicks, site):
     if not pool:
         return f"no cohort found for {site}", no_update
     picks = random.sample(pool, min(5, len(pool)))
+    prefetch_patients(site, picks)
     chips = [
         dbc.Badge(
             pid, id={"type": "sample-chip", "idx": i}, n_clicks=0,
@@ -349,6 +389,16 @@ def pick_sampled_chip(n_clicks_list, chip_children):
     return chip_children[triggered["idx"]]
 
 
+@app.callback(
+    Output("cache-stats", "children"),
+    Input("cache-stats-tick", "n_intervals"),
+)
+def update_cache_stats(_n):
+    stats = PATIENT_CACHE.stats()
+    stats.pending = PREFETCH.pending()
+    return stats.summary()
+
+
 # ── Core load callback ────────────────────────────────────────────────
 
 @app.callback(
@@ -396,10 +446,11 @@ def load_patient(_n_load, _n_submit, visible_panels, site, hosp_id, prior_state)
         msg = f"No wide-dataset rows returned for {hosp_id}."
         return _empty_fig(msg), dbc.Alert(msg, color="warning", className="py-1"), None, [], [], False, "▸ ", None
 
-    events = extract_events(enr)
-    fig = build_timeline(wide_df, enr, events, visible_panels or [])
+    fig = build_timeline(get_timeline_payload(site, hosp_id), visible_panels or [])
     summary = build_summary_strip(enr, wide_df)
 
+    prefetch_patients(site, next_cohort_ids(pool, hosp_id, PREFETCH_NEXT))
+
     table_df = _linked_table_source(wide_df, enr)
     columns, records = _table_spec(table_df)
     state = {"site": site, "hosp_id": hosp_id}
@@ -664,35 +715,21 @@ app.clientside_callback(
 )
 
 
-# ── Trace normalization helper ────────────────────────────────────────
+# ── Figure construction ───────────────────────────────────────────────
 
-def _normalize(y: pd.Series) -> tuple[pd.Series, pd.Series, float]:
-    """Return (y_normalized_to_[0,1], y_raw_for_hover, max_value).
+def build_timeline(payload: TimelinePayload | None, visible_panels: list[str]) -> go.Figure:
+    """Draw a patient's `TimelinePayload` (see `_plot_bundle.py`).
 
-    Each trace is divided by its own absolute max so curves with very
-    different scales (FiO2 0–1 vs PEEP 5–20; NEE 0.05 vs raw norepi) all
-    live in the same vertical band of their panel.
+    Every pandas step — carry-forward and scaling, event extraction,
+    night windows, cohort boundaries, day labels, ribbon segments — is
+    already in the payload (precomputed by `make qc-bundles`, or computed
+    on load); this only builds the Plotly objects.
     """
-    raw = y
-    if raw.empty or not raw.notna().any():
-        return raw, raw, 0.0
-    m = float(np.nanmax(np.abs(raw.to_numpy())))
-    if m == 0 or not np.isfinite(m):
-        return raw, raw, 0.0
-    return raw / m, raw, m
-
-
-# ── Figure construction ───────────────────────────────────────────────
-
-def build_timeline(
-    wide_df: pd.DataFrame,
-    enr: PatientEnrichment,
-    events: pd.DataFrame,
-    visible_panels: list[str],
-) -> go.Figure:
     ordered = [p for p in PANELS if p["id"] in set(visible_panels)]
     if not ordered:
         return _empty_fig("All panels hidden. Check at least one above.")
+    if payload is None:
+        return _empty_fig("No wide-dataset rows for this patient.")
 
     row_heights = [p["height"] for p in ordered]
     total = sum(row_heights) or 1.0
@@ -705,16 +742,14 @@ def build_timeline(
         row_heights=row_heights,
     )
 
-    cohort_start, cohort_end = enr.cohort_start, enr.cohort_end
+    cohort_start, cohort_end = payload.cohort_start, payload.cohort_end
 
     # ── Background: night-shift grey, drawn per visible panel so each
     # panel's shape stays bound to its own xref/yref. Higher opacity
     # (0.55) so the grey actually reads against simple_white's bg.
     # NOTE: use `add_shape` (not `add_vrect`) — `add_vrect` with
     # `row=N, col=N` is silently a no-op in current Plotly versions.
-    plot_start = wide_df["event_time"].min() if "event_time" in wide_df.columns else cohort_start
-    plot_end = wide_df["event_time"].max() if "event_time" in wide_df.columns else cohort_end
-    night_pairs = night_windows_in_range(plot_start, plot_end)
+    night_pairs = list(zip(payload.nights["start"], payload.nights["end"]))
     for r in range(1, len(ordered) + 1):
         for n_start, n_end in night_pairs:
             fig.add_shape(
@@ -730,16 +765,7 @@ def build_timeline(
     # without colored shading. cohort_start/end already have
     # intubation/extubation event vlines so we only emit the two
     # internal boundaries (day 0 → day 1 and N-1 → last day).
-    for z_start, z_end, label in cohort_excluded_zones(cohort_start, cohort_end):
-        # The "interior" boundary is the end of the day-0 zone (= first
-        # 7 AM after intub) and the start of the last-day zone (= last
-        # 7 AM before extub). Drawing both edges gives the reviewer a
-        # clear "this is where the analytical filter starts/ends keeping
-        # data" cue.
-        if label == "day 0":
-            x = z_end
-        else:  # "last day"
-            x = z_start
+    for x, label in zip(payload.boundaries["x"], payload.boundaries["label"]):
         for r in range(1, len(ordered) + 1):
             fig.add_shape(
                 type="line", xref="x", yref="y domain",
@@ -759,22 +785,22 @@ def build_timeline(
 
     # ── Panel traces ──────────────────────────────────────────────────
     if "sedatives" in panel_to_row:
-        _draw_sedatives(fig, wide_df, enr, row=panel_to_row["sedatives"])
+        _draw_sedatives(fig, payload, row=panel_to_row["sedatives"])
     if "resp" in panel_to_row:
-        _draw_resp(fig, wide_df, row=panel_to_row["resp"])
+        _draw_resp(fig, payload, row=panel_to_row["resp"])
     if "pressors" in panel_to_row:
-        _draw_pressors(fig, wide_df, row=panel_to_row["pressors"])
+        _draw_pressors(fig, payload, row=panel_to_row["pressors"])
     if "assessments" in panel_to_row:
-        _draw_assessments(fig, wide_df, row=panel_to_row["assessments"])
+        _draw_assessments(fig, payload, row=panel_to_row["assessments"])
     if "vitals" in panel_to_row:
-        _draw_vitals(fig, wide_df, row=panel_to_row["vitals"])
+        _draw_vitals(fig, payload, row=panel_to_row["vitals"])
 
-    _draw_event_vlines(fig, events, n_rows=len(ordered))
+    _draw_event_vlines(fig, payload.events, n_rows=len(ordered))
 
     # _nth_day labels along top edge. Pushed above the staggered SBT-variant
     # annotation band (now 1.005..1.180 with subira/abc additions) so they
     # never collide with event labels.
-    for ts_center, nth_day in day_labels_for_cohort(cohort_start, cohort_end):
+    for ts_center, nth_day in zip(payload.day_labels["center"], payload.day_labels["nth_day"]):
         fig.add_annotation(
             x=ts_center, y=1.210, xref="x", yref="paper",
             text=f"d{nth_day}", showarrow=False,
@@ -867,39 +893,27 @@ def build_timeline(
     return fig
 
 
-# ── Per-panel trace drawers (all pass through _normalize) ─────────────
+# ── Per-panel trace drawers (all divide by the payload's scales) ──────
 
 def _add_normed_line(
-    fig: go.Figure, x: pd.Series, y_raw: pd.Series, *,
+    fig: go.Figure, x: pd.Series, y_raw: pd.Series, scale: float, *,
     name: str, color: str, row: int,
     legendgroup: str, legendtitle: str | None = None,
     width: float = 1.5, dash: str | None = None,
     mode: str = "lines",
     step: bool = False,
-    carry_forward: bool = False,
     unit: str | None = None,
 ) -> None:
-    """Add a line trace, normalized to [0, 1] in-panel.
-
-    - `step=True`         → render as step-function (`line_shape="hv"`),
-      so the value visually holds until the next observation. Use for
-      anything that has a "set value persists until changed" semantic
-      (FiO₂, PEEP, continuous infusion rates, RASS targets, etc.).
-    - `carry_forward=True` → forward-fill `y_raw` before normalization
-      so sparse joins with other wide-dataset tables don't break the
-      step rendering with NaN gaps. Only the densified non-null span
-      [first_valid_index → last_valid_index] is filled — leading and
-      trailing NaN stay NaN.
+    """Add a line trace, normalized to [0, 1] in-panel (`y_raw / scale`).
+
+    - `step=True` → render as step-function (`line_shape="hv"`), so the
+      value visually holds until the next observation. Use for anything
+      that has a "set value persists until changed" semantic (FiO₂, PEEP,
+      continuous infusion rates, RASS targets, etc.). The payload has
+      already carried those series forward between their first and last
+      observation, so sparse joins with other wide-dataset tables don't
+      break the step rendering with NaN gaps.
     """
-    if carry_forward:
-        y_raw = y_raw.copy()
-        first = y_raw.first_valid_index()
-        last = y_raw.last_valid_index()
-        if first is not None and last is not None:
-            y_raw.loc[first:last] = y_raw.loc[first:last].ffill()
-    y_norm, y_raw_kept, m = _normalize(y_raw)
-    if m == 0:
-        return
     line_kwargs: dict = {"color": color, "width": width}
     if dash:
         line_kwargs["dash"] = dash
@@ -912,9 +926,9 @@ def _add_normed_line(
     # per-trace template.
     unit_suffix = f" {unit}" if unit else ""
     trace_kwargs: dict = {
-        "x": x, "y": y_norm, "mode": mode,
+        "x": x, "y": y_raw / scale, "mode": mode,
         "name": name, "line": line_kwargs,
-        "customdata": y_raw_kept,
+        "customdata": y_raw,
         "hovertemplate": f"{name}: %{{customdata:.3g}}{unit_suffix}<extra></extra>",
         "legendgroup": legendgroup,
     }
@@ -925,7 +939,6 @@ def _add_normed_line(
     fig.add_trace(go.Scatter(**trace_kwargs), row=row, col=1)
 
 
-_SED_DRUGS = ("propofol", "fentanyl", "midazolam", "lorazepam", "hydromorphone")
 _SED_LABELS = {
     "propofol": "prop", "fentanyl": "fent", "midazolam": "midaz",
     "lorazepam": "loraz", "hydromorphone": "hydromorph",
@@ -952,62 +965,55 @@ _SED_COLOR = {
 }
 
 
-def _draw_sedatives(
-    fig: go.Figure, wide_df: pd.DataFrame, enr: PatientEnrichment, row: int,
-) -> None:
+def _draw_sedatives(fig: go.Figure, payload: TimelinePayload, row: int) -> None:
     """Sedatives panel — RAW data, audit-friendly.
 
     Two trace types per drug:
-      - Continuous: step-function line from `wide_df[<drug>]` (raw
+      - Continuous: step-function line from `payload.traces[<drug>]` (raw
         clifpy mg/min or mcg/min charted rate, persists until next change).
-      - Intermittent: marker-only trace from `enr.intm` (raw bolus dose
+      - Intermittent: marker-only trace from `payload.intm` (raw bolus dose
         at admin_dttm). Each bolus drawn as a diamond at its raw value
         normalized into [0, 1] of its own trace.
 
     Per-trace normalization (unchanged) keeps both visible despite very
     different magnitudes (cont 0.2–5 mg/min vs. intm 50–200 mg bolus).
     """
-    t = wide_df["event_time"] if "event_time" in wide_df.columns else pd.Series(dtype="datetime64[ns]")
-    intm_df = enr.intm
-    seen_drugs: list[str] = []
+    t = payload.traces["event_time"]
     seen_legend = False
 
-    for drug in _SED_DRUGS:
+    for drug in SED_DRUGS:
         color = _SED_COLOR[drug]
         label = _SED_LABELS[drug]
 
-        # CONT — step-function from wide_df
-        if drug in wide_df.columns and wide_df[drug].notna().any():
+        # CONT — step-function from the wide timeline
+        if drug in payload.scales:
             _add_normed_line(
-                fig, t, wide_df[drug],
+                fig, t, payload.traces[drug], payload.scales[drug],
                 name=f"{label} cont", color=color, row=row,
                 legendgroup="sedatives",
                 legendtitle="Sedatives" if not seen_legend else None,
-                width=1.5, step=True, carry_forward=True,
+                width=1.5, step=True,
                 unit=_SED_CONT_UNIT[drug],
             )
             seen_legend = True
-            seen_drugs.append(drug)
 
         # INTM — diamond markers per bolus event
-        if not intm_df.empty:
-            sub = intm_df[intm_df["med_category"] == drug]
-            if not sub.empty and sub["med_dose"].notna().any():
-                # Reuse the normalized-line helper but mode="markers" gives
-                # us no line; the helper computes its own normalization.
-                _add_normed_line(
-                    fig, sub["admin_dttm"], sub["med_dose"],
-                    name=f"{label} intm", color=color, row=row,
-                    legendgroup="sedatives",
-                    legendtitle="Sedatives" if not seen_legend else None,
-                    width=0, mode="markers",
-                    unit=_SED_INTM_UNIT[drug],
-                )
-                # Override the marker symbol → diamond, clearly distinct
-                # from the cont step line. Last trace just added.
-                fig.data[-1].marker = {"size": 8, "color": color, "symbol": "diamond",
-                                        "line": {"color": "#222", "width": 0.6}}
-                seen_legend = True
+        intm_key = f"{INTM_PREFIX}{drug}"
+        if intm_key in payload.scales:
+            sub = payload.intm[payload.intm["med_category"] == drug]
+            _add_normed_line(
+                fig, sub["admin_dttm"], sub["med_dose"], payload.scales[intm_key],
+                name=f"{label} intm", color=color, row=row,
+                legendgroup="sedatives",
+                legendtitle="Sedatives" if not seen_legend else None,
+                width=0, mode="markers",
+                unit=_SED_INTM_UNIT[drug],
+            )
+            # Override the marker symbol → diamond, clearly distinct
+            # from the cont step line. Last trace just added.
+            fig.data[-1].marker = {"size": 8, "color": color, "symbol": "diamond",
+                                    "line": {"color": "#222", "width": 0.6}}
+            seen_legend = True
 
 
 _PRESSOR_UNITS = {
@@ -1025,42 +1031,41 @@ _VITAL_UNITS = {"heart_rate": "bpm", "map": "mmHg", "spo2": "%", "respiratory_ra
 _ASSESS_UNITS = {"rass": "(score)", "gcs_total": "(score)"}
 
 
-def _draw_pressors(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
-    t = wide_df["event_time"] if "event_time" in wide_df.columns else pd.Series(dtype="datetime64[ns]")
-    nee = compute_nee(wide_df)
+def _draw_pressors(fig: go.Figure, payload: TimelinePayload, row: int) -> None:
+    t = payload.traces["event_time"]
     seen = False
-    if not nee.empty and nee.notna().any():
+    if "nee" in payload.scales:
         _add_normed_line(
-            fig, t, nee,
+            fig, t, payload.traces["nee"], payload.scales["nee"],
             name="NEE", color=PRESSOR_COLORS["nee"], row=row,
             legendgroup="pressors", legendtitle="Pressors",
-            width=2.2, step=True, carry_forward=True,
+            width=2.2, step=True,
             unit=_PRESSOR_UNITS["nee"],
         )
         seen = True
     for col, color in PRESSOR_COLORS.items():
         if col == "nee":
             continue
-        if col in wide_df.columns and wide_df[col].notna().any():
+        if col in payload.scales:
             _add_normed_line(
-                fig, t, wide_df[col],
+                fig, t, payload.traces[col], payload.scales[col],
                 name=col, color=color, row=row,
                 legendgroup="pressors",
                 legendtitle="Pressors" if not seen else None,
                 width=1.0, dash="dot",
-                step=True, carry_forward=True,
+                step=True,
                 unit=_PRESSOR_UNITS.get(col, ""),
             )
             seen = True
 
 
-def _draw_assessments(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
-    t = wide_df["event_time"] if "event_time" in wide_df.columns else pd.Series(dtype="datetime64[ns]")
+def _draw_assessments(fig: go.Figure, payload: TimelinePayload, row: int) -> None:
+    t = payload.traces["event_time"]
     seen = False
     for col, color in ASSESSMENT_COLORS.items():
-        if col in wide_df.columns and wide_df[col].notna().any():
+        if col in payload.scales:
             _add_normed_line(
-                fig, t, wide_df[col],
+                fig, t, payload.traces[col], payload.scales[col],
                 name=col.upper(), color=color, row=row,
                 legendgroup="assessments",
                 legendtitle="Assessments" if not seen else None,
@@ -1070,31 +1075,31 @@ def _draw_assessments(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
             seen = True
 
 
-def _draw_resp(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
-    t = wide_df["event_time"] if "event_time" in wide_df.columns else pd.Series(dtype="datetime64[ns]")
-    _draw_device_ribbon(fig, wide_df, row=row)
+def _draw_resp(fig: go.Figure, payload: TimelinePayload, row: int) -> None:
+    t = payload.traces["event_time"]
+    _draw_device_ribbon(fig, payload.ribbon, row=row)
     seen = False
     for col, color in RESP_COLORS.items():
-        if col in wide_df.columns and wide_df[col].notna().any():
+        if col in payload.scales:
             _add_normed_line(
-                fig, t, wide_df[col],
+                fig, t, payload.traces[col], payload.scales[col],
                 name=col, color=color, row=row,
                 legendgroup="resp",
                 legendtitle="Resp" if not seen else None,
                 width=1.4,
-                step=True, carry_forward=True,
+                step=True,
                 unit=_RESP_UNITS.get(col, ""),
             )
             seen = True
 
 
-def _draw_vitals(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
-    t = wide_df["event_time"] if "event_time" in wide_df.columns else pd.Series(dtype="datetime64[ns]")
+def _draw_vitals(fig: go.Figure, payload: TimelinePayload, row: int) -> None:
+    t = payload.traces["event_time"]
     seen = False
     for col, color in VITAL_COLORS.items():
-        if col in wide_df.columns and wide_df[col].notna().any():
+        if col in payload.scales:
             _add_normed_line(
-                fig, t, wide_df[col],
+                fig, t, payload.traces[col], payload.scales[col],
                 name=col, color=color, row=row,
                 legendgroup="vitals",
                 legendtitle="Vitals" if not seen else None,
@@ -1106,7 +1111,7 @@ def _draw_vitals(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
 
 # ── Resp-panel device ribbon (mode-encoded inside IMV) ────────────────
 
-def _draw_device_ribbon(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None:
+def _draw_device_ribbon(fig: go.Figure, ribbon: pd.DataFrame, row: int) -> None:
     """Narrow ribbon at the bottom of the resp panel.
 
     For non-IMV devices, each contiguous segment is filled with the
@@ -1114,30 +1119,10 @@ def _draw_device_ribbon(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None
     `mode_category` and each sub-segment is filled with a variant blue
     from `MODE_IN_IMV_COLORS`. This puts both device and mode on a
     single layer (no full-height mode background) so they don't compete
-    visually with the FiO₂ / PEEP lines.
+    visually with the FiO₂ / PEEP lines. The segments themselves
+    (carry-forward, gap-island, colors) come precomputed in the payload.
     """
-    needed = {"event_time", "device_category"}
-    if not needed.issubset(wide_df.columns):
-        return
-    df = wide_df[["event_time", "device_category", "mode_category"]].copy()
-    df = df.dropna(subset=["event_time"])
-    if df.empty:
-        return
-    df = df.sort_values("event_time").reset_index(drop=True)
-    # Carry-forward device + mode between observed records. The upstream
-    # resp_processed_bf is already waterfall-ffilled, but the wide-dataset
-    # join with vitals/meds re-introduces NaN rows. Forward-filling here
-    # collapses those gaps so segments are clinically contiguous.
-    # Only fill between first_valid → last_valid so leading/trailing
-    # NaN (truly outside the resp record window) stay NaN.
-    for col in ("device_category", "mode_category"):
-        first = df[col].first_valid_index()
-        last = df[col].last_valid_index()
-        if first is not None and last is not None:
-            df.loc[first:last, col] = df.loc[first:last, col].ffill()
-    # Drop rows where device is still NaN (outside the resp record span).
-    df = df.dropna(subset=["device_category"]).reset_index(drop=True)
-    if df.empty:
+    if ribbon.empty:
         return
 
     # Compute panel y-domain in paper coordinates so the ribbon hugs the
@@ -1147,45 +1132,10 @@ def _draw_device_ribbon(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None
     y_bottom = panel_domain[0]
     y_top = panel_domain[0] + (panel_domain[1] - panel_domain[0]) * 0.07
 
-    # Build (start, end, device, mode) segments via gap-island. Devices
-    # change less frequently than modes, so we segment by device first
-    # then within each IMV segment, sub-segment by mode.
-    seen_devices: set[str] = set()
-    seen_modes: set[str] = set()
-
-    # First, collapse consecutive rows where (device, mode) are identical.
-    df["__key"] = df["device_category"].astype(str) + "|" + df["mode_category"].fillna("?").astype(str)
-    df["__chg"] = (df["__key"] != df["__key"].shift()).astype(int)
-    df["__seg"] = df["__chg"].cumsum()
-    segments = df.groupby("__seg").agg(
-        start=("event_time", "first"),
-        last_in_seg=("event_time", "last"),
-        device=("device_category", "first"),
-        mode=("mode_category", "first"),
-    ).reset_index(drop=True)
-    # Make segments contiguous by extending each one's end to the start
-    # of the next segment (the time at which the device/mode actually
-    # changed). The final segment ends at its own last observation.
-    segments["end"] = segments["start"].shift(-1).fillna(segments["last_in_seg"])
-
-    for _, seg in segments.iterrows():
-        start = pd.Timestamp(seg["start"])
-        end = pd.Timestamp(seg["end"])
-        if end <= start:
-            end = start + pd.Timedelta(minutes=15)
-        device = str(seg["device"])
-        mode = seg["mode"] if pd.notna(seg["mode"]) else None
-
-        # Determine fill color: IMV → mode-specific; else device color.
-        if device.lower() == "imv" and mode is not None:
-            color = MODE_IN_IMV_COLORS.get(str(mode), DEVICE_CATEGORY_COLORS["imv"])
-            label = f"{device} / {mode}"
-            legend_key = f"imv: {mode}"
-        else:
-            color = DEVICE_CATEGORY_COLORS.get(device.lower(), DEVICE_CATEGORY_COLORS["other"])
-            label = device
-            legend_key = f"device: {device}"
-
+    for start, end, label, legend_key, color, show_legend in ribbon[
+        ["start", "end", "label", "legend_key", "color", "show_legend"]
+    ].itertuples(index=False):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
         fig.add_shape(
             type="rect", xref="x", yref="paper",
             x0=start, x1=end, y0=y_bottom, y1=y_top,
@@ -1201,7 +1151,7 @@ def _draw_device_ribbon(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None
         )
 
         # Legend entry once per unique device or device-mode combo
-        if legend_key not in seen_devices.union(seen_modes):
+        if show_legend:
             fig.add_trace(go.Scatter(
                 x=[start], y=[None], mode="markers",
                 marker={"size": 8, "color": color, "symbol": "square",
@@ -1209,7 +1159,6 @@ def _draw_device_ribbon(fig: go.Figure, wide_df: pd.DataFrame, row: int) -> None
                 name=legend_key,
                 legendgroup="resp", showlegend=True,
             ), row=row, col=1)
-            (seen_modes if "imv:" in legend_key else seen_devices).add(legend_key)
 
 
 # ── Events ────────────────────────────────────────────────────────────
@@ -1258,10 +1207,9 @@ SBT_KIND_DISPLAY = {
 def _draw_event_vlines(fig: go.Figure, events: pd.DataFrame, n_rows: int) -> None:
     if events.empty:
         return
-    # Per-row vlines so each is bound to its panel's domain
-    for _, e in events.iterrows():
-        t_iso = pd.Timestamp(e["time"]).isoformat()
-        kind = e["kind"]
+    # Per-row vlines so each is bound to its panel's domain. `x` is the
+    # event time already rendered as an ISO string by the payload.
+    for t_iso, kind in zip(events["x"], events["kind"]):
         color = EVENT_COLORS.get(kind, "#444")
         for r in range(1, n_rows + 1):
             fig.add_shape(
@@ -2,7 +2,7 @@
 
 B3 refactor (2026-05): the same three drop criteria (zero-weight / jump /
 range) are now computed inline in `01_cohort.py` via
-`_utils.compute_weight_qc_exclusions`. This script is no longer required
+`_weight_extract.weight_qc_exclusions`. This script is no longer required
 by `make run` and no longer produces the load-bearing drop list — it
 remains as a DIAGNOSTIC tool for federated cross-site QA:
 
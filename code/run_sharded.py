@@ -0,0 +1,105 @@
+"""Run 02_exposure / 03_outcomes as hospitalization shards, then merge.
+
+Driver for ``make run-sharded`` (see ``code/_shard.py`` for the design).
+Every (stage, shard) pair runs as its own ``python code/<stage>.py``
+subprocess with ``SHARD_INDEX`` / ``SHARD_COUNT`` set; ``--workers`` of
+them run at once, each with ``cpu_count // workers`` DuckDB threads and an
+optional per-worker ``memory_limit``. 03 does not read 02's outputs, so
+both stages' shards share one pool. Each worker logs to its own shard
+directory; the logs are appended to ``output_to_share/{site}/logs/`` once
+the pool finishes. Any failing shard aborts the run before merging; a
+successful run leaves only the canonical ``output/{site}/`` parquets and
+QC CSVs behind.
+
+Usage:
+    make run-sharded SITE=mimic SHARDS=8 WORKERS=4
+    # or directly (after 01_cohort.py):
+    uv run python code/run_sharded.py --shards 8 --workers 4 --memory-limit 8GB
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "code"))
+from _shard import (  # noqa: E402
+    SHARDED_STAGES,
+    Shard,
+    clear_shards,
+    merge_shard_logs,
+    merge_stage_shards,
+)
+
+CONFIG_PATH = PROJECT_ROOT / "config" / "config.json"
+
+
+def _run_shard(stage: str, shard: Shard, env: dict) -> tuple[str, Shard, int, float]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, SHARDED_STAGES[stage].script],
+        env={**env, 'SHARD_INDEX': str(shard.index), 'SHARD_COUNT': str(shard.count)},
+    )
+    return stage, shard, proc.returncode, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--memory-limit', default=None,
+                        help="DuckDB memory_limit per worker, e.g. 8GB")
+    # No default list here: argparse checks a nargs='*' default against
+    # choices as one value.
+    parser.add_argument('stages', nargs='*', choices=list(SHARDED_STAGES))
+    args = parser.parse_args()
+    args.stages = args.stages or list(SHARDED_STAGES)
+    if args.shards < 1 or args.workers < 1:
+        parser.error("--shards and --workers must be >= 1")
+
+    # Pipeline scripts resolve output/ and config/ relative to the root.
+    os.chdir(PROJECT_ROOT)
+    with CONFIG_PATH.open() as f:
+        cfg = json.load(f)
+    site = os.getenv("SITE", cfg.get("site_name", "unknown")).lower()
+
+    env = {**os.environ, 'SHARD_THREADS': str(max(1, (os.cpu_count() or 1) // args.workers))}
+    if args.memory_limit:
+        env['SHARD_MEMORY_LIMIT'] = args.memory_limit
+
+    clear_shards(site)
+    jobs = [(stage, Shard(i, args.shards)) for stage in args.stages for i in range(args.shards)]
+    print(f"Sharded run — site: {site}, {len(jobs)} jobs "
+          f"({', '.join(args.stages)} × {args.shards} shards), {args.workers} workers")
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(_run_shard, stage, shard, env) for stage, shard in jobs]
+        for fut in as_completed(futures):
+            stage, shard, rc, secs = fut.result()
+            print(f"  {stage} shard {shard.label}: "
+                  f"{'ok' if rc == 0 else f'FAILED (exit {rc})'} in {secs:,.1f}s")
+            if rc != 0:
+                failed.append((stage, shard))
+                for other in futures:
+                    other.cancel()
+    merge_shard_logs(site, args.stages, args.shards)
+    if failed:
+        print(f"ERROR: {len(failed)} shard(s) failed; not merging. "
+              f"Partial outputs left under output/{site}/shards/", file=sys.stderr)
+        return 1
+
+    for stage in args.stages:
+        merge_stage_shards(site, stage, args.shards)
+    clear_shards(site)
+    print("Merged shard outputs into the canonical output paths.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
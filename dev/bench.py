@@ -0,0 +1,220 @@
+"""Scale benchmark: run the pipeline on synthetic CLIF at several sizes.
+
+Driver for ``make bench``. For every ``--scales`` entry N it
+
+1. generates (or reuses, when ``synthetic_params.json`` matches) synthetic
+   CLIF tables for N hospitalizations under ``output/bench/data/bench_<N>/``
+   (``dev/synthetic_clif.py``);
+2. points ``config/config.json`` at them as site ``bench_<N>`` (the real
+   config is backed up and restored afterwards, even on failure);
+3. runs each ``--scripts`` entry as ``python code/<script>.py`` and records
+   its wall time, plus its peak RSS from the script's ``__script__`` perf
+   record (``code/_perf.py`` → ``output/bench_<N>/perf/stage_timings.jsonl``).
+
+One row per (scale, script) is appended to ``output/bench/bench_results.csv``
+(run_at, git_sha, scale, script, status, wall_s, peak_rss_mb); per-stage
+hot spots for the same runs are in
+``output_to_share/bench_<N>/qc/stage_timings_summary.csv``. A failing script
+stops its scale (later scripts read its outputs) and the run exits 1.
+
+``--compare baseline.csv`` checks this run's wall times against the latest
+ok row per (scale, script) of an earlier results CSV and exits 1 when any
+script is more than ``--tolerance`` (default 25%) slower — the same CSV
+(e.g. a copy of ``bench_results.csv`` taken on main) serves as baseline.
+
+Usage:
+    make bench                                    # 1k, 10k, 100k
+    make bench BENCH_SCALES=1000,10000
+    uv run python dev/bench.py --scales 1000 --scripts 01_cohort,02_exposure \\
+        --compare output/bench/baseline.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as _dt
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "dev"))
+from synthetic_clif import generate_clif  # noqa: E402
+
+CONFIG_PATH = PROJECT_ROOT / "config" / "config.json"
+BENCH_DIR = PROJECT_ROOT / "output" / "bench"
+RESULTS_CSV = BENCH_DIR / "bench_results.csv"
+RESULT_COLUMNS = ['run_at', 'git_sha', 'scale', 'script', 'status', 'wall_s', 'peak_rss_mb']
+DEFAULT_SCRIPTS = (
+    '01_cohort', '02_exposure', '03_outcomes', '04_covariates',
+    '05_modeling_dataset', '06_table1', '08_models',
+)
+
+
+def _git_sha() -> str:
+    proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else 'unknown'
+
+
+def _bench_config(site: str, data_dir: Path) -> dict:
+    return {
+        'site_name': site,
+        'data_directory': str(data_dir),
+        'filetype': 'parquet',
+        'timezone': 'US/Central',
+        'reintub_window_hrs': 48,
+        'path_to_waterfall_processed_resp_table': None,
+        'rerun_waterfall': False,
+        'rerun_sofa_24h': False,
+        'rerun_ase': False,
+        # Benchmarks time the fits, not fit-store loads.
+        'rerun_models': True,
+        'enable_v2_outcomes': True,
+    }
+
+
+def _ensure_data(data_dir: Path, n: int, imv_fraction: float, density: float, seed: int) -> None:
+    params = {'n_hospitalizations': n, 'imv_fraction': imv_fraction, 'density': density, 'seed': seed}
+    params_path = data_dir / "synthetic_params.json"
+    if params_path.exists():
+        with params_path.open() as f:
+            prior = json.load(f)
+        if {k: prior.get(k) for k in params} == params:
+            print(f"  reusing synthetic data in {data_dir.relative_to(PROJECT_ROOT)}")
+            return
+    t0 = time.perf_counter()
+    counts = generate_clif(data_dir, n, imv_fraction=imv_fraction, density=density, seed=seed)
+    print(f"  generated {sum(counts.values()):,} rows in {time.perf_counter() - t0:,.1f}s")
+
+
+def _script_peak_rss(site: str, script: str, since: str) -> Optional[float]:
+    """Peak RSS of the script's ``__script__`` perf record written after ``since``."""
+    jsonl = PROJECT_ROOT / "output" / site / "perf" / "stage_timings.jsonl"
+    if not jsonl.exists():
+        return None
+    peak = None
+    with jsonl.open() as f:
+        for line in f:
+            rec = json.loads(line)
+            if (rec.get('script') == script and rec.get('stage') == '__script__'
+                    and rec.get('finished_at', '') >= since):
+                peak = rec.get('peak_rss_mb')
+    return peak
+
+
+def run_scale(n: int, scripts: list[str], args, run_at: str, sha: str) -> list[dict]:
+    site = f"bench_{n}"
+    data_dir = BENCH_DIR / "data" / site
+    print(f"[bench] scale {n:,} (site {site})")
+    _ensure_data(data_dir, n, args.imv_fraction, args.density, args.seed)
+    with CONFIG_PATH.open("w") as f:
+        json.dump(_bench_config(site, data_dir), f, indent=4)
+    rows = []
+    for script in scripts:
+        since = _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='microseconds')
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, f"code/{script}.py"], cwd=PROJECT_ROOT)
+        wall_s = time.perf_counter() - t0
+        status = 'ok' if proc.returncode == 0 else f'failed ({proc.returncode})'
+        rss = _script_peak_rss(site, script, since)
+        rows.append({
+            'run_at': run_at, 'git_sha': sha, 'scale': n, 'script': script,
+            'status': status, 'wall_s': round(wall_s, 2), 'peak_rss_mb': rss,
+        })
+        print(f"  {script}: {status} in {wall_s:,.1f}s"
+              + (f", peak RSS {rss:,.0f} MB" if rss else ""))
+        if proc.returncode != 0:
+            print(f"  stopping scale {n:,}: later scripts depend on {script}", file=sys.stderr)
+            break
+    return rows
+
+
+def _append_results(rows: list[dict]) -> None:
+    RESULTS_CSV.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not RESULTS_CSV.exists()
+    with RESULTS_CSV.open("a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def compare(rows: list[dict], baseline_csv: Path, tolerance: float) -> list[str]:
+    """Regression messages for scripts slower than baseline × (1 + tolerance)."""
+    baseline: dict[tuple[int, str], float] = {}
+    with baseline_csv.open() as f:
+        # Later rows win: the latest ok run per (scale, script).
+        for rec in csv.DictReader(f):
+            if rec['status'] == 'ok':
+                baseline[(int(rec['scale']), rec['script'])] = float(rec['wall_s'])
+    regressions = []
+    for row in rows:
+        base = baseline.get((row['scale'], row['script']))
+        if row['status'] != 'ok' or base is None or base <= 0:
+            continue
+        ratio = row['wall_s'] / base
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{row['script']} @ {row['scale']:,}: {row['wall_s']:,.1f}s vs "
+                f"baseline {base:,.1f}s (+{ratio - 1:.0%})"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='1000,10000,100000',
+                        help="comma-separated hospitalization counts")
+    parser.add_argument('--scripts', default=','.join(DEFAULT_SCRIPTS),
+                        help="comma-separated code/<script>.py stems, in run order")
+    parser.add_argument('--imv-fraction', type=float, default=0.6)
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', type=Path, default=None, metavar='BASELINE_CSV')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    scripts = [s.strip() for s in args.scripts.split(',') if s.strip()]
+    missing = [s for s in scripts if not (PROJECT_ROOT / "code" / f"{s}.py").exists()]
+    if missing:
+        parser.error(f"unknown script(s): {', '.join(missing)}")
+    if args.compare is not None and not args.compare.exists():
+        parser.error(f"baseline {args.compare} not found")
+
+    run_at = _dt.datetime.now(_dt.timezone.utc).isoformat(timespec='seconds')
+    sha = _git_sha()
+    backup = CONFIG_PATH.with_name("config.json.bench-backup")
+    had_config = CONFIG_PATH.exists()
+    if had_config:
+        shutil.copy2(CONFIG_PATH, backup)
+    rows: list[dict] = []
+    try:
+        for n in scales:
+            scale_rows = run_scale(n, scripts, args, run_at, sha)
+            _append_results(scale_rows)
+            rows.extend(scale_rows)
+    finally:
+        if had_config:
+            shutil.move(backup, CONFIG_PATH)
+        else:
+            CONFIG_PATH.unlink(missing_ok=True)
+    print(f"[bench] results appended to {RESULTS_CSV.relative_to(PROJECT_ROOT)}")
+
+    failed = [r for r in rows if r['status'] != 'ok']
+    if args.compare is not None:
+        regressions = compare(rows, args.compare, args.tolerance)
+        for msg in regressions:
+            print(f"  REGRESSION {msg}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"[bench] no regressions beyond {args.tolerance:.0%} vs {args.compare}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
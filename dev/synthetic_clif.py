@@ -0,0 +1,637 @@
+"""Deterministic synthetic CLIF tables for benchmarking the per-site pipeline.
+
+Writes ``clif_<table>.parquet`` for every table the pipeline reads (the
+README's required list plus ``patient_assessments`` for SOFA-CNS and
+``microbiology_culture`` for ASE), with no PHI, at any scale. Same
+``(n_hospitalizations, imv_fraction, density, seed)`` → byte-identical
+tables.
+
+Each hospitalization is an ED → ICU → ward timeline. An ``imv_fraction``
+share are intubated shortly after ICU admit (median ~3 days) and end in
+one of: extubation (with a pressure-support SBT right before), extubation
+then reintubation within 36h, tracheostomy (IMV on trach → trach collar),
+or death on the ventilator (withdrawal: DNR code status, discharged
+expired / hospice). Around that timeline:
+
+- respiratory_support charted every ``1 / density`` hours in the ICU (IMV
+  rows carry AC/VC settings, daily PS/CPAP SBT windows);
+- continuous sedation/analgesia (propofol, fentanyl, midazolam,
+  hydromorphone, lorazepam — ~10% of propofol charted in mg/hr to exercise
+  the weight-based converter), vasopressors, and a small NMB share (which
+  the cohort excludes);
+- intermittent sedative boluses (some ``not_given``);
+- vitals (hourly × density in the ICU, q4h on the ward; daily weights with
+  a few missing-weight hospitalizations and implausible jumps for the
+  weight-QC step), ABGs and chemistries, GCS/RASS, code status, ICD-10
+  diagnoses and blood cultures;
+- ~13% of hospitalizations are readmissions of an earlier patient, some
+  within the 12h encounter-stitching window; ~1% are pediatric.
+
+Categories are lowercase (README contract). Timestamps are UTC.
+
+Usage:
+    uv run python dev/synthetic_clif.py --n 1000 --out output/bench/data/bench_1k
+    # options: --imv-fraction 0.6 --density 1.0 --seed 0
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+EPOCH = np.datetime64("2023-01-01T00:00:00", "us")
+CHUNK_HOSPITALIZATIONS = 10_000
+
+TABLES = (
+    'patient', 'hospitalization', 'adt', 'vitals', 'labs',
+    'medication_admin_continuous', 'medication_admin_intermittent',
+    'respiratory_support', 'code_status', 'hospital_diagnosis',
+    'patient_assessments', 'microbiology_culture',
+)
+
+# Outcome of the first IMV episode.
+_SUCCESS, _REINTUB, _TRACH, _DIED = 0, 1, 2, 3
+
+# (med_category, med_group, unit, dose lo, dose hi, hospitalization-level
+#  probability among IMV hospitalizations)
+_CONT_SEDATION = [
+    ('propofol', 'sedation', 'mcg/kg/min', 5, 60, 0.70),
+    ('fentanyl', 'sedation', 'mcg/hr', 25, 200, 0.75),
+    ('midazolam', 'sedation', 'mg/hr', 1, 6, 0.25),
+    ('hydromorphone', 'sedation', 'mg/hr', 0.5, 3, 0.10),
+    ('lorazepam', 'sedation', 'mg/hr', 1, 3, 0.03),
+]
+_INTM_SEDATION = [
+    ('fentanyl', 'analgesia', 'mcg', 25, 100),
+    ('midazolam', 'sedation', 'mg', 1, 4),
+    ('hydromorphone', 'analgesia', 'mg', 0.2, 1),
+    ('lorazepam', 'anxiolytic', 'mg', 1, 2),
+    ('propofol', 'sedation', 'mg', 10, 50),
+]
+# (lab_category, lab_order_category, reference_unit, mean, sd, decimals)
+_LABS_ICU = [
+    ('ph_arterial', 'blood_gas', '(no units)', 7.38, 0.06, 2),
+    ('po2_arterial', 'blood_gas', 'mmhg', 95, 25, 0),
+    ('pco2_arterial', 'blood_gas', 'mmhg', 42, 7, 0),
+    ('lactate', 'misc', 'mmol/l', 1.8, 1.0, 1),
+]
+_LABS_DAILY = [
+    ('creatinine', 'bmp', 'mg/dl', 1.2, 0.6, 2),
+    ('platelet_count', 'cbc', '10^3/ul', 210, 80, 0),
+    ('bilirubin_total', 'lft', 'mg/dl', 0.9, 0.7, 1),
+    ('wbc', 'cbc', '10^3/ul', 10, 4, 1),
+    ('sodium', 'bmp', 'mmol/l', 139, 4, 0),
+    ('ph_venous', 'blood_gas', '(no units)', 7.35, 0.05, 2),
+]
+_VITALS = [
+    ('heart_rate', 88, 15, 0), ('map', 78, 12, 0), ('sbp', 118, 18, 0),
+    ('dbp', 62, 10, 0), ('spo2', 96, 2.5, 0), ('respiratory_rate', 18, 4, 0),
+]
+_ICD10 = [
+    'J96.00', 'J96.01', 'A41.9', 'J18.9', 'I10', 'E11.9', 'N17.9', 'I50.9',
+    'J44.1', 'I48.91', 'E87.1', 'D64.9', 'K72.00', 'I63.9', 'G93.41',
+    'C34.90', 'N18.3', 'E66.9', 'F10.20', 'B20',
+]
+
+
+def _ts(hours: np.ndarray) -> np.ndarray:
+    """Hours since 2023-01-01 UTC → datetime64[us]."""
+    return EPOCH + np.round(np.asarray(hours) * 3.6e9).astype("timedelta64[us]")
+
+
+def _utc(col: str) -> pl.Expr:
+    return pl.col(col).dt.replace_time_zone("UTC")
+
+
+def _grid(start: np.ndarray, end: np.ndarray, step) -> tuple[np.ndarray, np.ndarray]:
+    """Regular times in ``[start, end)`` per row; returns (row index, time)."""
+    step = np.broadcast_to(np.asarray(step, dtype=float), start.shape)
+    n = np.maximum(np.ceil((end - start) / step), 0).astype(np.int64)
+    row = np.repeat(np.arange(len(start)), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    return row, start[row] + k * step[row]
+
+
+def _hid(i: np.ndarray) -> np.ndarray:
+    return np.char.add("H", np.char.zfill(np.asarray(i).astype(str), 8))
+
+
+def _seq(row: np.ndarray) -> np.ndarray:
+    """0, 1, 2, ... within each run of equal (sorted) ``row`` values."""
+    if len(row) == 0:
+        return row
+    starts = np.r_[0, np.flatnonzero(row[1:] != row[:-1]) + 1]
+    return np.arange(len(row)) - np.repeat(starts, np.diff(np.r_[starts, len(row)]))
+
+
+def _round(x: np.ndarray, decimals: int) -> np.ndarray:
+    return np.round(x, decimals)
+
+
+def _blank_to_null(df: pl.DataFrame, *cols: str) -> pl.DataFrame:
+    """String columns are built with "" for missing (numpy has no null)."""
+    return df.with_columns(pl.col(c).replace("", None) for c in cols)
+
+
+class _Timeline:
+    """Per-hospitalization timeline arrays (hours since EPOCH)."""
+
+    def __init__(self, rng: np.random.Generator, n: int, imv_fraction: float):
+        self.n = n
+        n_readmit = int(round(n * 0.13))
+        n_index = n - n_readmit
+        # Index admissions spread over 2023; readmissions follow an index
+        # hospitalization's discharge (filled in below).
+        adm = rng.uniform(0, 365 * 24, n)
+        ed = rng.uniform(1, 6, n)
+        self.imv = rng.random(n) < imv_fraction
+        icu_in = adm + ed
+        imv_s = icu_in + rng.uniform(0.5, 6, n)
+        d1 = np.clip(rng.lognormal(np.log(72), 0.7, n), 6, 21 * 24)
+        outcome = rng.choice(4, n, p=[0.70, 0.10, 0.08, 0.12])
+        outcome[~self.imv] = _SUCCESS
+        # Tracheostomy patients stay ventilated through the trach day.
+        trach_t = imv_s + rng.uniform(5, 10, n) * 24
+        d1 = np.where(outcome == _TRACH, np.maximum(d1, trach_t - imv_s + 48), d1)
+        imv_e = imv_s + d1
+        gap = rng.uniform(4, 36, n)
+        imv2_s = imv_e + gap
+        imv2_e = imv2_s + rng.uniform(24, 96, n)
+        last_resp = np.select(
+            [~self.imv, outcome == _REINTUB, outcome == _TRACH],
+            [icu_in + rng.uniform(24, 96, n), imv2_e, imv_e + rng.uniform(24, 96, n)],
+            imv_e,
+        )
+        died = self.imv & (outcome == _DIED)
+        icu_out = np.where(died, imv_e, last_resp + rng.uniform(12, 48, n))
+        disch = np.where(died, icu_out, icu_out + rng.uniform(24, 6 * 24, n))
+
+        # Readmissions: shift the last n_readmit timelines after a random
+        # index hospitalization's discharge (15% inside the stitch window).
+        alive = np.flatnonzero(~died[:n_index])
+        parent = alive[rng.integers(0, len(alive), n_readmit)]
+        readmit_gap = np.where(
+            rng.random(n_readmit) < 0.15,
+            rng.uniform(1, 11, n_readmit),
+            rng.uniform(14 * 24, 120 * 24, n_readmit),
+        )
+        shift = np.zeros(n)
+        shift[n_index:] = disch[parent] + readmit_gap - adm[n_index:]
+        for name, arr in [
+            ('adm', adm), ('icu_in', icu_in), ('imv_s', imv_s), ('imv_e', imv_e),
+            ('imv2_s', imv2_s), ('imv2_e', imv2_e), ('trach_t', trach_t),
+            ('last_resp', last_resp), ('icu_out', icu_out), ('disch', disch),
+        ]:
+            setattr(self, name, arr + shift)
+        self.ed_out = self.icu_in
+        self.outcome = outcome
+        self.died = died
+        self.patient = np.concatenate([np.arange(n_index), parent])
+        self.hosp_id = _hid(np.arange(n))
+
+    def chunk(self, start: int, stop: int) -> "_Timeline":
+        """Hospitalizations ``[start, stop)`` as a timeline of their own."""
+        sub = copy.copy(self)
+        for name, arr in vars(self).items():
+            if isinstance(arr, np.ndarray):
+                setattr(sub, name, arr[start:stop])
+        sub.n = len(sub.hosp_id)
+        return sub
+
+
+def _patient(rng, tl: _Timeline) -> pl.DataFrame:
+    n_pat = int(tl.patient.max()) + 1
+    death = np.full(n_pat, np.nan)
+    died_pat = tl.patient[tl.died]
+    death[died_pat] = tl.disch[tl.died]
+    return pl.DataFrame({
+        'patient_id': np.char.add("P", np.char.zfill(np.arange(n_pat).astype(str), 8)),
+        'birth_date': (np.datetime64("1950-01-01") + rng.integers(0, 50 * 365, n_pat).astype("timedelta64[D]")),
+        'death_dttm': _ts(death),
+        'race_category': rng.choice(['white', 'black or african american', 'asian', 'other', 'unknown'],
+                                    n_pat, p=[0.6, 0.22, 0.06, 0.07, 0.05]),
+        'ethnicity_category': rng.choice(['non-hispanic', 'hispanic', 'unknown'], n_pat, p=[0.82, 0.14, 0.04]),
+        'sex_category': rng.choice(['male', 'female'], n_pat, p=[0.56, 0.44]),
+        'language_category': rng.choice(['english', 'spanish'], n_pat, p=[0.92, 0.08]),
+    }).with_columns(_utc('death_dttm'))
+
+
+def _hospitalization(rng, tl: _Timeline) -> pl.DataFrame:
+    age = np.where(rng.random(tl.n) < 0.01, rng.integers(12, 18, tl.n), rng.integers(18, 96, tl.n))
+    disch_cat = np.where(
+        tl.died,
+        rng.choice(['expired', 'hospice'], tl.n, p=[0.9, 0.1]),
+        rng.choice(['home', 'skilled nursing facility (snf)', 'acute inpatient rehab facility',
+                    'long term care hospital (ltach)'], tl.n, p=[0.55, 0.25, 0.12, 0.08]),
+    )
+    return pl.DataFrame({
+        'patient_id': np.char.add("P", np.char.zfill(tl.patient.astype(str), 8)),
+        'hospitalization_id': tl.hosp_id,
+        'admission_dttm': _ts(tl.adm),
+        'discharge_dttm': _ts(tl.disch),
+        'age_at_admission': age,
+        'admission_type_category': rng.choice(['ed', 'osh', 'direct'], tl.n, p=[0.8, 0.15, 0.05]),
+        'discharge_category': disch_cat,
+    }).with_columns(_utc('admission_dttm'), _utc('discharge_dttm'))
+
+
+def _adt(rng, tl: _Timeline) -> pl.DataFrame:
+    icu_type = rng.choice(['medical_icu', 'surgical_icu', 'cardiac_icu', 'neuro_icu', 'general_icu'],
+                          tl.n, p=[0.45, 0.2, 0.15, 0.1, 0.1])
+    ward = tl.disch > tl.icu_out
+    idx = np.concatenate([np.arange(tl.n), np.arange(tl.n), np.flatnonzero(ward)])
+    in_h = np.concatenate([tl.adm, tl.icu_in, tl.icu_out[ward]])
+    out_h = np.concatenate([tl.ed_out, tl.icu_out, tl.disch[ward]])
+    cat = np.concatenate([np.full(tl.n, 'ed'), np.full(tl.n, 'icu'), np.full(ward.sum(), 'ward')])
+    loc_type = np.concatenate([np.full(tl.n, ''), icu_type, np.full(ward.sum(), '')])
+    order = np.lexsort((in_h, idx))
+    return pl.DataFrame({
+        'hospitalization_id': tl.hosp_id[idx][order],
+        'hospital_id': np.full(len(idx), 'HOSP_A'),
+        'hospital_type': np.full(len(idx), 'academic'),
+        'in_dttm': _ts(in_h[order]),
+        'out_dttm': _ts(out_h[order]),
+        'location_category': cat[order],
+        'location_type': loc_type[order],
+    }).with_columns(_utc('in_dttm'), _utc('out_dttm')).pipe(_blank_to_null, 'location_type')
+
+
+def _respiratory_support(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    step = 1.0 / density
+    imv = tl.imv
+    trach = imv & (tl.outcome == _TRACH)
+    reint = imv & (tl.outcome == _REINTUB)
+    post_end = np.where(reint, tl.imv2_s, tl.last_resp)
+    # Segments: (hosp, start, end, kind). kind: 0 nc, 1 imv, 2 imv on
+    # trach, 3 trach collar, 4 room air.
+    segs = [
+        (np.flatnonzero(~imv), tl.icu_in[~imv], tl.last_resp[~imv], 0),
+        (np.flatnonzero(imv), tl.icu_in[imv], tl.imv_s[imv], 0),
+        (np.flatnonzero(imv & ~trach), tl.imv_s[imv & ~trach], tl.imv_e[imv & ~trach], 1),
+        (np.flatnonzero(trach), tl.imv_s[trach], tl.trach_t[trach], 1),
+        (np.flatnonzero(trach), tl.trach_t[trach], tl.imv_e[trach], 2),
+        (np.flatnonzero(trach), tl.imv_e[trach], tl.last_resp[trach], 3),
+        (np.flatnonzero(reint), tl.imv2_s[reint], tl.imv2_e[reint], 1),
+    ]
+    ext = imv & ~trach & ~tl.died
+    segs.append((np.flatnonzero(ext), tl.imv_e[ext], post_end[ext], 0))
+    segs.append((np.flatnonzero(reint), tl.imv2_e[reint], tl.last_resp[reint], 0))
+    seg_h = np.concatenate([s[0] for s in segs])
+    seg_s = np.concatenate([s[1] for s in segs])
+    seg_e = np.concatenate([s[2] for s in segs])
+    seg_k = np.concatenate([np.full(len(s[0]), s[3]) for s in segs])
+    ward_ra = tl.disch > tl.icu_out  # one room-air row on ward arrival
+    seg_h = np.concatenate([seg_h, np.flatnonzero(ward_ra)])
+    seg_s = np.concatenate([seg_s, tl.icu_out[ward_ra]])
+    seg_e = np.concatenate([seg_e, tl.icu_out[ward_ra] + 0.5])
+    seg_k = np.concatenate([seg_k, np.full(ward_ra.sum(), 4)])
+
+    row, t = _grid(seg_s, seg_e, np.where(seg_k == 0, 4 * step, step))
+    t = t + rng.uniform(0, min(step, 1) * 0.25, len(t))
+    h, k = seg_h[row], seg_k[row]
+    u = t - seg_s[row]
+    # SBT: PS/CPAP in the 2h before every planned extubation, and on a
+    # random ~50% of mornings (hours 20-22 of each ventilator day).
+    day = np.floor(u / 24).astype(np.int64)
+    coin = (np.sin((h * 131 + day * 17).astype(float)) * 43758.5453) % 1
+    sbt = (k == 1) & (
+        ((seg_e[row] - t <= 2) & (tl.outcome[h] != _DIED))
+        | ((day >= 1) & ((u % 24) >= 20) & ((u % 24) < 22) & (coin < 0.5))
+    )
+    n = len(t)
+    device = np.select([k == 0, k == 3, k == 4], ['nasal cannula', 'trach collar', 'room air'], 'imv')
+    is_vent = (k == 1) | (k == 2)
+    mode = np.where(is_vent, np.where(sbt, 'pressure support/cpap', 'assist control-volume control'), '')
+    nan = np.full(n, np.nan)
+    fio2 = np.where(is_vent, np.where(sbt, 0.4, _round(rng.uniform(0.3, 0.6, n), 2)),
+                    np.where(k == 3, 0.35, nan))
+    peep = np.where(is_vent, np.where(sbt, 5.0, rng.choice([5.0, 8.0, 10.0, 12.0], n)), nan)
+    df = pl.DataFrame({
+        'hospitalization_id': tl.hosp_id[h],
+        'recorded_dttm': _ts(t),
+        'device_name': np.select([is_vent, k == 0], ['Ventilator', 'Nasal Cannula'], ''),
+        'device_category': device,
+        'mode_name': np.where(is_vent, np.where(sbt, 'CPAP/PS', 'AC/VC'), ''),
+        'mode_category': mode,
+        'tracheostomy': ((k == 2) | (k == 3)).astype(np.int32),
+        'fio2_set': fio2,
+        'lpm_set': np.where(k == 0, rng.choice([2.0, 3.0, 4.0], n), nan),
+        'tidal_volume_set': np.where(is_vent & ~sbt, rng.choice([400.0, 450.0, 500.0], n), nan),
+        'resp_rate_set': np.where(is_vent & ~sbt, rng.choice([14.0, 16.0, 18.0, 20.0], n), nan),
+        'pressure_support_set': np.where(sbt, 5.0, nan),
+        'peak_inspiratory_pressure_set': nan,
+        'peep_set': peep,
+    })
+    return (df.with_columns(_utc('recorded_dttm'))
+            .pipe(_blank_to_null, 'device_name', 'mode_name', 'mode_category')
+            .sort('hospitalization_id', 'recorded_dttm'))
+
+
+def _vent_windows(tl: _Timeline) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(hosp, start, end) of every ventilated interval."""
+    imv, reint = tl.imv, tl.imv & (tl.outcome == _REINTUB)
+    return (
+        np.concatenate([np.flatnonzero(imv), np.flatnonzero(reint)]),
+        np.concatenate([tl.imv_s[imv], tl.imv2_s[reint]]),
+        np.concatenate([tl.imv_e[imv], tl.imv2_e[reint]]),
+    )
+
+
+def _continuous_meds(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    vh, vs, ve = _vent_windows(tl)
+    frames = []
+    drugs = _CONT_SEDATION + [
+        ('norepinephrine', 'vasoactives', 'mcg/kg/min', 0.02, 0.3, 0.35),
+        ('vasopressin', 'vasoactives', 'units/min', 0.03, 0.04, 0.10),
+        ('cisatracurium', 'paralytics', 'mcg/kg/min', 1, 3, 0.04),
+    ]
+    for cat, group, unit, lo, hi, p in drugs:
+        on = rng.random(tl.n) < p
+        sel = on[vh]
+        h, s, e = vh[sel], vs[sel], ve[sel]
+        start = s + rng.uniform(0, 1, len(s))
+        if group == 'vasoactives':
+            stop = np.minimum(e, start + rng.uniform(6, 48, len(s)))
+        elif group == 'paralytics':
+            stop = np.minimum(e, start + rng.uniform(2, 24, len(s)))
+        else:
+            stop = np.maximum(start + 0.5, e - rng.uniform(0, 2, len(s)))
+        row, t = _grid(start, stop, 2.0 / density)
+        first = _seq(row) == 0
+        # stop row (dose 0) at the end of each infusion
+        t = np.concatenate([t, stop])
+        row = np.concatenate([row, np.arange(len(h))])
+        action = np.concatenate([np.where(first, 'start', 'dose_change'), np.full(len(h), 'stop')])
+        dose = np.concatenate([_round(rng.uniform(lo, hi, len(first)), 3), np.zeros(len(h))])
+        units = np.full(len(t), unit)
+        if cat == 'propofol':
+            mg_hr = rng.random(tl.n) < 0.1
+            alt = mg_hr[h[row]]
+            units = np.where(alt, 'mg/hr', units)
+            dose = np.where(alt, _round(dose * 80 * 60 / 1000, 1), dose)
+        frames.append(pl.DataFrame({
+            'hospitalization_id': tl.hosp_id[h[row]],
+            'admin_dttm': _ts(t),
+            'med_name': np.full(len(t), f"{cat.upper()} INFUSION"),
+            'med_category': np.full(len(t), cat),
+            'med_group': np.full(len(t), group),
+            'med_route_category': np.full(len(t), 'iv'),
+            'med_dose': dose.astype(float),
+            'med_dose_unit': units,
+            'mar_action_name': np.select([action == 'start', action == 'stop'], ['New Bag', 'Stopped'], 'Rate Change'),
+            'mar_action_category': action,
+            'mar_action_group': np.full(len(t), 'administered'),
+        }))
+    return (pl.concat(frames).with_columns(_utc('admin_dttm'))
+            .sort('hospitalization_id', 'admin_dttm', 'med_category'))
+
+
+def _intermittent_meds(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    vh, vs, ve = _vent_windows(tl)
+    n_bolus = rng.poisson((ve - vs) / 6 * density)
+    row = np.repeat(np.arange(len(vh)), n_bolus)
+    t = vs[row] + rng.random(len(row)) * (ve - vs)[row]
+    which = rng.integers(0, len(_INTM_SEDATION), len(row))
+    spec = [_INTM_SEDATION[i] for i in range(len(_INTM_SEDATION))]
+    lo = np.array([s[3] for s in spec])[which]
+    hi = np.array([s[4] for s in spec])[which]
+    action = rng.choice(['given', 'not_given', 'bolus'], len(row), p=[0.93, 0.05, 0.02])
+    cats = np.array([s[0] for s in spec])[which]
+    return pl.DataFrame({
+        'hospitalization_id': tl.hosp_id[vh[row]],
+        'admin_dttm': _ts(t),
+        'med_name': np.char.add(np.char.upper(cats.astype(str)), " INJ"),
+        'med_category': cats,
+        'med_group': np.array([s[1] for s in spec])[which],
+        'med_route_category': np.full(len(row), 'iv'),
+        'med_dose': _round(rng.uniform(lo, hi), 2),
+        'med_dose_unit': np.array([s[2] for s in spec])[which],
+        'mar_action_name': np.where(action == 'not_given', 'Held', 'Given'),
+        'mar_action_category': action,
+        'mar_action_group': np.where(action == 'not_given', 'not_administered', 'administered'),
+    }).with_columns(_utc('admin_dttm')).sort('hospitalization_id', 'admin_dttm')
+
+
+def _vitals(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    frames = []
+    icu_row, icu_t = _grid(tl.icu_in, tl.icu_out, 1.0 / density)
+    ward_row, ward_t = _grid(tl.icu_out, tl.disch, 4.0)
+    row = np.concatenate([icu_row, ward_row])
+    t = np.concatenate([icu_t, ward_t]) + rng.uniform(0, 0.2, len(row))
+    for cat, mu, sd, dec in _VITALS:
+        frames.append((row, t, cat, _round(rng.normal(mu, sd, len(row)), dec)))
+    temp_row, temp_t = _grid(tl.icu_in, tl.disch, 4.0)
+    frames.append((temp_row, temp_t, 'temp_c', _round(rng.normal(37.0, 0.6, len(temp_row)), 1)))
+    # Daily weights (2% never weighed; 1% with an implausible jump).
+    weighed = rng.random(tl.n) >= 0.02
+    base_wt = np.clip(rng.normal(82, 20, tl.n), 40, 200)
+    jump = rng.random(tl.n) < 0.01
+    w_row, w_t = _grid(tl.adm[weighed], tl.disch[weighed], 24.0)
+    w_row = np.flatnonzero(weighed)[w_row]
+    w_day = np.floor((w_t - tl.adm[w_row]) / 24)
+    wt = base_wt[w_row] + rng.normal(0, 0.8, len(w_row)) + np.where(jump[w_row] & (w_day == 2), 35, 0)
+    frames.append((w_row, w_t, 'weight_kg', _round(wt, 1)))
+    frames.append((np.arange(tl.n), tl.adm + 0.5, 'height_cm', _round(rng.normal(170, 10, tl.n), 0)))
+    return pl.concat([
+        pl.DataFrame({
+            'hospitalization_id': tl.hosp_id[r],
+            'recorded_dttm': _ts(tt),
+            'vital_category': np.full(len(r), cat),
+            'vital_value': v.astype(float),
+        }) for r, tt, cat, v in frames
+    ]).with_columns(_utc('recorded_dttm')).sort('hospitalization_id', 'recorded_dttm')
+
+
+def _labs(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    frames = []
+    abg_h = np.flatnonzero(tl.imv)
+    a_row, a_t = _grid(tl.icu_in[abg_h], tl.icu_out[abg_h], 6.0 / density)
+    for cat, order, unit, mu, sd, dec in _LABS_ICU:
+        frames.append((abg_h[a_row], a_t, cat, order, unit, _round(rng.normal(mu, sd, len(a_row)), dec)))
+    d_row, d_t = _grid(tl.adm + 2, tl.disch, 24.0)
+    for cat, order, unit, mu, sd, dec in _LABS_DAILY:
+        v = rng.normal(mu, sd, len(d_row))
+        if cat in ('creatinine', 'bilirubin_total', 'platelet_count'):
+            v = np.abs(v)
+        frames.append((d_row, d_t, cat, order, unit, _round(v, dec)))
+    out = []
+    for r, t, cat, order, unit, v in frames:
+        t = t + rng.uniform(0, 1, len(r))
+        out.append(pl.DataFrame({
+            'hospitalization_id': tl.hosp_id[r],
+            'lab_order_dttm': _ts(t),
+            'lab_collect_dttm': _ts(t + 0.1),
+            'lab_result_dttm': _ts(t + 0.75),
+            'lab_order_category': np.full(len(r), order),
+            'lab_category': np.full(len(r), cat),
+            'lab_value': v.astype(str),
+            'lab_value_numeric': v.astype(float),
+            'reference_unit': np.full(len(r), unit),
+            'lab_specimen_category': np.full(len(r), 'blood/plasma/serum'),
+        }))
+    return (pl.concat(out)
+            .with_columns(_utc('lab_order_dttm'), _utc('lab_collect_dttm'), _utc('lab_result_dttm'))
+            .sort('hospitalization_id', 'lab_result_dttm'))
+
+
+def _patient_assessments(rng, tl: _Timeline, density: float) -> pl.DataFrame:
+    g_row, g_t = _grid(tl.icu_in, tl.icu_out, 4.0)
+    reint = tl.imv & (tl.outcome == _REINTUB)
+    vented = tl.imv[g_row] & (
+        ((g_t >= tl.imv_s[g_row]) & (g_t < tl.imv_e[g_row]))
+        | (reint[g_row] & (g_t >= tl.imv2_s[g_row]) & (g_t < tl.imv2_e[g_row]))
+    )
+    vh, vs, ve = _vent_windows(tl)
+    gcs = np.where(vented, rng.integers(3, 11, len(g_row)), rng.integers(9, 16, len(g_row))).astype(float)
+    r_row, r_t = _grid(vs, ve, 2.0 / density)
+    rass = rng.integers(-5, 2, len(r_row)).astype(float)
+    return pl.concat([
+        pl.DataFrame({
+            'hospitalization_id': tl.hosp_id[g_row], 'recorded_dttm': _ts(g_t),
+            'assessment_category': np.full(len(g_row), 'gcs_total'),
+            'assessment_group': np.full(len(g_row), 'Neurological'),
+            'numerical_value': gcs,
+        }),
+        pl.DataFrame({
+            'hospitalization_id': tl.hosp_id[vh[r_row]], 'recorded_dttm': _ts(r_t),
+            'assessment_category': np.full(len(r_row), 'RASS'),
+            'assessment_group': np.full(len(r_row), 'Sedation/Agitation'),
+            'numerical_value': rass,
+        }),
+    ]).with_columns(
+        _utc('recorded_dttm'),
+        categorical_value=pl.lit(None, pl.String),
+        text_value=pl.lit(None, pl.String),
+    ).sort('hospitalization_id', 'recorded_dttm')
+
+
+def _code_status(rng, tl: _Timeline) -> pl.DataFrame:
+    pid = np.char.add("P", np.char.zfill(tl.patient.astype(str), 8))
+    dnr = tl.died | (rng.random(tl.n) < 0.05)
+    dnr_t = np.where(tl.died, tl.disch - rng.uniform(1, 12, tl.n),
+                     tl.adm + rng.random(tl.n) * (tl.disch - tl.adm))
+    return pl.DataFrame({
+        'patient_id': np.concatenate([pid, pid[dnr]]),
+        'start_dttm': _ts(np.concatenate([tl.adm + 0.25, dnr_t[dnr]])),
+        'code_status_category': np.concatenate([np.full(tl.n, 'full'), np.full(dnr.sum(), 'dnr')]),
+    }).with_columns(_utc('start_dttm')).sort('patient_id', 'start_dttm')
+
+
+def _hospital_diagnosis(rng, tl: _Timeline) -> pl.DataFrame:
+    k = rng.poisson(5, tl.n) + 1
+    row = np.repeat(np.arange(tl.n), k)
+    first = _seq(row) == 0
+    return pl.DataFrame({
+        'hospitalization_id': tl.hosp_id[row],
+        'diagnosis_code': rng.choice(_ICD10, len(row)),
+        'diagnosis_code_format': np.full(len(row), 'icd10cm'),
+        'diagnosis_primary': first.astype(np.int32),
+        'poa_present': (rng.random(len(row)) < 0.8).astype(np.int32),
+    }).unique(['hospitalization_id', 'diagnosis_code'], keep='first', maintain_order=True)
+
+
+def _microbiology_culture(rng, tl: _Timeline) -> pl.DataFrame:
+    k = np.where(rng.random(tl.n) < 0.5, rng.integers(1, 4, tl.n), 0)
+    row = np.repeat(np.arange(tl.n), k)
+    t = tl.adm[row] + rng.uniform(0, 72, len(row))
+    growth = rng.random(len(row)) < 0.2
+    org = np.where(growth, rng.choice(['staphylococcus_aureus', 'escherichia_coli'], len(row)), 'no_growth')
+    return pl.DataFrame({
+        'patient_id': np.char.add("P", np.char.zfill(tl.patient[row].astype(str), 8)),
+        'hospitalization_id': tl.hosp_id[row],
+        'organism_id': np.char.add(np.char.add(tl.hosp_id[row], "-"), _seq(row).astype(str)),
+        'order_dttm': _ts(t),
+        'collect_dttm': _ts(t + 0.2),
+        'result_dttm': _ts(t + 36),
+        'fluid_category': np.full(len(row), 'blood_buffy'),
+        'method_category': np.full(len(row), 'culture'),
+        'organism_category': org,
+        'organism_group': np.where(growth, np.where(org == 'escherichia_coli', 'escherichia', 'staphylococcus'), 'no_growth'),
+    }).with_columns(_utc('order_dttm'), _utc('collect_dttm'), _utc('result_dttm'))
+
+
+def generate_clif(
+    out_dir: "str | os.PathLike",
+    n_hospitalizations: int,
+    *,
+    imv_fraction: float = 0.6,
+    density: float = 1.0,
+    seed: int = 0,
+) -> dict[str, int]:
+    """Write the synthetic CLIF parquets to ``out_dir``; return row counts.
+
+    ``density`` scales ICU charting frequency (1.0 = hourly vitals and
+    ventilator rows, q2h infusion titrations, q6h ABGs).
+    """
+    if not 0 <= imv_fraction <= 1 or density <= 0 or n_hospitalizations < 1:
+        raise ValueError("need n_hospitalizations >= 1, 0 <= imv_fraction <= 1, density > 0")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    tl = _Timeline(np.random.default_rng(seed), n_hospitalizations, imv_fraction)
+    builders = {
+        'patient': _patient,
+        'hospitalization': _hospitalization,
+        'adt': _adt,
+        'vitals': partial(_vitals, density=density),
+        'labs': partial(_labs, density=density),
+        'medication_admin_continuous': partial(_continuous_meds, density=density),
+        'medication_admin_intermittent': partial(_intermittent_meds, density=density),
+        'respiratory_support': partial(_respiratory_support, density=density),
+        'code_status': _code_status,
+        'hospital_diagnosis': _hospital_diagnosis,
+        'patient_assessments': partial(_patient_assessments, density=density),
+        'microbiology_culture': _microbiology_culture,
+    }
+    counts = {}
+    for t_idx, table in enumerate(TABLES):
+        # Chunks of CHUNK_HOSPITALIZATIONS keep 100k-scale vitals out of
+        # memory; each chunk has its own (seed, table, chunk) stream, so
+        # output does not depend on how many chunks ran before it.
+        # patient is keyed by patient, not hospitalization: one chunk.
+        step = n_hospitalizations if table == 'patient' else CHUNK_HOSPITALIZATIONS
+        writer = None
+        counts[table] = 0
+        try:
+            for c, c0 in enumerate(range(0, n_hospitalizations, step)):
+                rng = np.random.default_rng([seed, t_idx, c])
+                df = builders[table](rng, tl.chunk(c0, c0 + step))
+                # Missing numerics are NaN in numpy; CLIF stores nulls.
+                part = df.with_columns(pl.col(pl.Float64).fill_nan(None)).to_arrow()
+                if writer is None:
+                    writer = pq.ParquetWriter(out / f"clif_{table}.parquet", part.schema)
+                writer.write_table(part.cast(writer.schema))
+                counts[table] += part.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+    with open(out / "synthetic_params.json", "w") as f:
+        json.dump({
+            'n_hospitalizations': n_hospitalizations, 'imv_fraction': imv_fraction,
+            'density': density, 'seed': seed, 'rows': counts,
+        }, f, indent=2)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, required=True, help="number of hospitalizations")
+    parser.add_argument('--out', required=True, help="output directory for clif_*.parquet")
+    parser.add_argument('--imv-fraction', type=float, default=0.6)
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    counts = generate_clif(args.out, args.n, imv_fraction=args.imv_fraction,
+                           density=args.density, seed=args.seed)
+    for table, n in counts.items():
+        print(f"  clif_{table}.parquet: {n:,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cohort-membership table (`code/_cohort_ids.py`).
+
+01 writes the final cohort once; every later script registers it as the
+``cohort_ids`` TEMP TABLE and restricts raw loads with a SEMI JOIN, so the
+restricted rows must match the old ``IN``-list filters exactly.
+"""
+import json
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _cohort_ids import (  # noqa: E402
+    COHORT_IDS_TABLE,
+    cohort_ids_path,
+    load_cohort_table,
+    register_cohort_ids,
+    register_ids,
+    semi_join_ids,
+    write_cohort_ids,
+)
+from _shard import Shard  # noqa: E402
+
+IDS = [f"H{i:03d}" for i in range(40)]
+
+
+@pytest.fixture
+def site_dir(tmp_path, monkeypatch):
+    """cwd = tmp_path with ``output/site/`` in place."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output" / "site").mkdir(parents=True)
+    return tmp_path / "output" / "site"
+
+
+def _ids(rel):
+    return [r[0] for r in rel.fetchall()]
+
+
+def test_register_ids_sorted_distinct_from_list_and_relation():
+    rel = register_ids("t_ids", ["H3", "H1", "H3", "H2"])
+    assert _ids(rel) == ["H1", "H2", "H3"]
+    src = duckdb.sql("SELECT * FROM (VALUES ('b', 1), ('a', 2), ('b', 3)) t(hospitalization_id, x)")
+    assert _ids(register_ids("t_ids", src)) == ["a", "b"]
+    # Re-registering replaces the table; the relation reads the live table.
+    assert _ids(duckdb.table("t_ids")) == ["a", "b"]
+
+
+def test_write_then_register_roundtrip(site_dir):
+    path = write_cohort_ids("site", register_ids("t_final", reversed(IDS)))
+    assert path == cohort_ids_path("site")
+    assert pd.read_parquet(path)["hospitalization_id"].tolist() == IDS
+    assert _ids(register_cohort_ids("site")) == IDS
+    assert _ids(duckdb.table(COHORT_IDS_TABLE)) == IDS
+
+
+def test_register_restricts_to_shard(site_dir):
+    write_cohort_ids("site", register_ids("t_final", IDS))
+    parts = [_ids(register_cohort_ids("site", Shard(k, 3))) for k in range(3)]
+    assert sorted(sum(parts, [])) == IDS
+    assert all(parts)
+
+
+def test_register_falls_back_to_grid(site_dir):
+    pd.DataFrame({
+        "hospitalization_id": ["H2", "H1", "H2"], "_hr": [7, 8, 9],
+    }).to_parquet(site_dir / "cohort_meta_by_id_imvhr.parquet", index=False)
+    assert _ids(register_cohort_ids("site")) == ["H1", "H2"]
+
+
+def test_semi_join_matches_in_filter():
+    rows = duckdb.sql("""
+        SELECT * FROM (VALUES ('H1', 1), ('H2', 2), ('H1', 3), ('H9', 4))
+            t(hospitalization_id, x)
+    """)
+    out = semi_join_ids(rows, register_ids("t_ids", ["H1", "H2", "H5"]))
+    assert sorted(out.fetchall()) == sorted(
+        rows.filter("hospitalization_id IN ('H1', 'H2', 'H5')").fetchall()
+    )
+
+
+def test_load_cohort_table(site_dir, tmp_path):
+    from clifpy import Vitals
+
+    data_dir = tmp_path / "clif"
+    data_dir.mkdir()
+    pd.DataFrame({
+        "hospitalization_id": ["H1", "H1", "H2", "H3"],
+        "recorded_dttm": pd.to_datetime(["2024-01-01 08:00"] * 4, utc=True),
+        "vital_category": ["weight_kg", "spo2", "weight_kg", "weight_kg"],
+        "vital_value": [80.0, 95.0, 70.0, 60.0],
+    }).to_parquet(data_dir / "clif_vitals.parquet", index=False)
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({
+        "site_name": "site", "data_directory": str(data_dir),
+        "filetype": "parquet", "timezone": "US/Central",
+    }))
+
+    vitals = load_cohort_table(
+        Vitals, str(config), register_ids("t_ids", ["H1", "H3"]),
+        columns=["hospitalization_id", "recorded_dttm", "vital_category", "vital_value"],
+        filters={"vital_category": ["weight_kg"]},
+    )
+    df = vitals.df.sort_values("hospitalization_id", ignore_index=True)
+    assert df["hospitalization_id"].tolist() == ["H1", "H3"]
+    assert df["hospitalization_id"].dtype == "string"
+    assert df["vital_value"].tolist() == [80.0, 60.0]
+    # Raw TIMESTAMPTZ read: the UTC instant, not a site-local relabel.
+    assert (df["recorded_dttm"] == pd.Timestamp("2024-01-01 08:00", tz="UTC")).all()
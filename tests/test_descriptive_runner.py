@@ -0,0 +1,90 @@
+"""Single-process descriptive runner (`code/descriptive/_run_all.py`)."""
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code" / "descriptive"))
+import _run_all  # noqa: E402
+import _shared  # noqa: E402
+
+
+def test_frame_cache_serves_copies_and_projections(tmp_path, monkeypatch):
+    path = tmp_path / "model_input.parquet"
+    pd.DataFrame({"x": [1, 2, 3], "y": [4.0, 5.0, 6.0]}).to_parquet(path)
+    monkeypatch.setattr(_shared, "_FRAME_CACHE", {})
+    reads = []
+    real_read_table = _shared.pq.read_table
+    monkeypatch.setattr(_shared.pq, "read_table", lambda *a, **k: reads.append(k) or real_read_table(*a, **k))
+
+    first = _shared.read_parquet(str(path))
+    first.loc[0, "x"] = 99
+    assert _shared.read_parquet(str(path))["x"].tolist() == [1, 2, 3]
+    assert _shared.read_parquet(str(path), columns=["y"]).columns.tolist() == ["y"]
+    assert len(reads) == 1  # copy and projection both served from memory
+
+
+def test_frame_cache_is_thread_safe(tmp_path, monkeypatch):
+    # `_run_all.py --jobs N` reads through the cache from worker threads;
+    # inserts must not break another thread's scan of the entries.
+    monkeypatch.setattr(_shared, "_FRAME_CACHE", {})
+    paths = []
+    for i in range(8):
+        paths.append(tmp_path / f"f{i}.parquet")
+        pd.DataFrame({"x": [i] * 3, "y": [float(i)] * 3}).to_parquet(paths[-1])
+    requests = [(p, cols) for p in paths for cols in (None, ["x"], ["y"], ["x", "y"])] * 4
+
+    def _read(req):
+        path, cols = req
+        return _shared.read_parquet(str(path), columns=cols)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(_read, requests))
+    for (path, cols), frame in zip(requests, frames):
+        i = int(path.stem[1:])
+        assert frame.columns.tolist() == (cols or ["x", "y"])
+        assert frame.iloc[:, 0].tolist() == [i] * 3
+
+
+def test_failing_script_is_isolated(monkeypatch):
+    calls = []
+    ok = types.ModuleType("fig_ok")
+    ok.main = lambda: calls.append("ok")
+    bad = types.ModuleType("fig_bad")
+    bad.main = lambda: 1 / 0
+    monkeypatch.setitem(sys.modules, "fig_ok", ok)
+    monkeypatch.setitem(sys.modules, "fig_bad", bad)
+
+    assert _run_all._run_one("fig_bad") is False
+    assert _run_all._run_one("fig_ok") is True
+    assert calls == ["ok"]
+
+
+def test_figure_modules_skip_helpers():
+    names = _run_all.figure_modules()
+    assert "los_histogram" in names
+    assert not any(n.startswith("_") for n in names)
+
+
+def test_modeling_filter_pushdown_matches_pandas_filter(tmp_path, monkeypatch):
+    df = pd.DataFrame({
+        "hospitalization_id": list("aabbcc"),
+        "_nth_day": [0.0, 1.0, 1.0, 2.0, 1.0, 2.0],
+        "sbt_done_next_day": [1.0, None, 0.0, 1.0, float("nan"), 0.0],
+        "success_extub_next_day": pd.array([0, 1, 1, None, 0, 1], dtype="Int32"),
+    })
+    path = tmp_path / "model_input_by_id_imvday.parquet"
+    df.to_parquet(path)
+    monkeypatch.setattr(_shared, "MODEL_INPUT_PARQUET", str(path))
+    monkeypatch.setattr(_shared, "_FRAME_CACHE", {})
+
+    want = df.loc[
+        (df["_nth_day"] > 0)
+        & df["sbt_done_next_day"].notna()
+        & df["success_extub_next_day"].notna()
+    ]
+    got = _shared.load_modeling(columns=["hospitalization_id", "_nth_day"])
+    assert got.columns.tolist() == ["hospitalization_id", "_nth_day"]
+    assert got.to_dict("list") == want[["hospitalization_id", "_nth_day"]].to_dict("list")
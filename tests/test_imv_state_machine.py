@@ -0,0 +1,139 @@
+"""Parity tests for the columnar V2 IMV state machine.
+
+``add_imv_events_v2`` (DuckDB window SQL, used by ``03_outcomes.py``) must
+reproduce the per-row pandas reference ``count_intubations_v2`` exactly on
+every row. Hand-written trajectories pin each rule (consensus windows,
+trach sentinel, direct-to-trach, trailing partial windows); a seeded
+random generator then sweeps a few thousand synthetic hospitalizations.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _imv_state_machine import (  # noqa: E402
+    add_imv_events_v2,
+    count_intubations_v2,
+)
+
+_EVENTS = ['_intub_event_v2', '_extub_event_v2', '_trach_event_v2']
+
+
+def _reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Run the pandas state machine the way 03_outcomes.py used to."""
+    _sorted = df.sort_values(['hospitalization_id', 'recorded_dttm']).reset_index(drop=True)
+    _events = _sorted.groupby('hospitalization_id', group_keys=False).apply(
+        count_intubations_v2
+    )
+    return pd.concat([_sorted, _events], axis=1)
+
+
+def _assert_parity(df: pd.DataFrame) -> pd.DataFrame:
+    keys = ['hospitalization_id', 'recorded_dttm']
+    expected = _reference(df).sort_values(keys).reset_index(drop=True)
+    actual = add_imv_events_v2(df).sort_values(keys).reset_index(drop=True)
+    assert len(actual) == len(expected)
+    assert (actual['hospitalization_id'] == expected['hospitalization_id']).all()
+    for col in _EVENTS:
+        mismatch = actual[col].to_numpy() != expected[col].to_numpy()
+        assert not mismatch.any(), (
+            f"{col} differs on {int(mismatch.sum())} rows, e.g.\n"
+            f"{actual.loc[mismatch, keys + _EVENTS].head()}"
+        )
+    return actual
+
+
+def _traj(hid: str, rows: list[tuple[int, str | None, int]]) -> pd.DataFrame:
+    """(minutes since t0, device_category, tracheostomy) → resp frame."""
+    t0 = pd.Timestamp("2024-01-01 00:00:00", tz="UTC")
+    return pd.DataFrame({
+        'hospitalization_id': hid,
+        'recorded_dttm': t0 + pd.to_timedelta([m for m, _, _ in rows], unit='m'),
+        'device_category': [d for _, d, _ in rows],
+        'tracheostomy': [t for _, _, t in rows],
+    })
+
+
+@pytest.mark.parametrize("rows, intub, extub, trach", [
+    # Sustained IMV then sustained extubation.
+    ([(0, 'nasal cannula', 0), (60, 'imv', 0), (80, 'imv', 0),
+      (200, 'nasal cannula', 0), (240, 'nasal cannula', 0)],
+     [0, 1, 0, 0, 0], [0, 0, 0, 1, 0], [0, 0, 0, 0, 0]),
+    # IMV blip shorter than the 15-min intub window: no episode.
+    ([(0, 'imv', 0), (10, 'imv', 0), (20, 'face mask', 0), (90, 'face mask', 0)],
+     [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]),
+    # Off-IMV blip shorter than the 30-min extub window: episode continues.
+    ([(0, 'imv', 0), (20, 'imv', 0), (30, 'high flow nc', 0), (50, 'imv', 0),
+      (120, 'room air', 0), (130, 'room air', 0)],
+     [1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]),
+    # Direct-to-trach: trach row before any IMV row.
+    ([(0, 'trach collar', 1), (60, 'imv', 1), (120, 'imv', 1)],
+     [0, 0, 0], [0, 0, 0], [1, 0, 0]),
+    # Trach while on IMV closes the episode on the trach row.
+    ([(0, 'imv', 0), (30, 'imv', 0), (60, 'imv', 1), (90, 'imv', 1)],
+     [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 1, 0]),
+    # Trach while an extubation candidate is pending fires it early.
+    ([(0, 'imv', 0), (30, 'imv', 0), (40, 'room air', 0), (45, 'trach collar', 1)],
+     [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]),
+    # Trach during an unconfirmed intubation candidate: extub only.
+    ([(0, 'room air', 0), (10, 'imv', 0), (15, 'imv', 1)],
+     [0, 0, 0], [0, 0, 1], [0, 0, 1]),
+    # NULL device_category counts as off-IMV.
+    ([(0, 'imv', 0), (20, 'imv', 0), (30, None, 0), (70, None, 0)],
+     [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 0, 0]),
+])
+def test_rules(rows, intub, extub, trach):
+    out = _assert_parity(_traj('H1', rows))
+    assert out['_intub_event_v2'].tolist() == intub
+    assert out['_extub_event_v2'].tolist() == extub
+    assert out['_trach_event_v2'].tolist() == trach
+
+
+def _synthetic(n_hosp: int, seed: int) -> pd.DataFrame:
+    """Random run-structured resp trajectories with windows near 15/30 min."""
+    rng = np.random.default_rng(seed)
+    devices = ['imv', 'nasal cannula', 'high flow nc', 'room air', None]
+    frames = []
+    for h in range(n_hosp):
+        n_runs = int(rng.integers(1, 12))
+        t = 0
+        mins, devs, trachs = [], [], []
+        trached = False
+        for _ in range(n_runs):
+            dev = 'imv' if rng.random() < 0.5 else devices[int(rng.integers(1, 5))]
+            for _ in range(int(rng.integers(1, 6))):
+                t += int(rng.choice([1, 2, 5, 7, 10, 14, 15, 16, 29, 30, 31, 60]))
+                if not trached and rng.random() < 0.02:
+                    trached = True
+                mins.append(t)
+                devs.append(dev)
+                trachs.append(int(trached))
+        frames.append(_traj(f"H{h:05d}", list(zip(mins, devs, trachs))))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parity_synthetic(seed):
+    df = _synthetic(1500, seed)
+    # Shuffle so neither engine can rely on input order.
+    df = df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    out = _assert_parity(df)
+    # Sanity: the sweep actually exercises every event type.
+    for col in _EVENTS:
+        assert out[col].sum() > 0
+
+
+def test_passthrough_columns_and_relation_input():
+    import duckdb
+
+    df = _traj('H1', [(0, 'imv', 0), (20, 'imv', 0)]).assign(fio2_set=0.4)
+    rel = duckdb.sql("FROM df")
+    out_rel = add_imv_events_v2(rel)
+    assert isinstance(out_rel, duckdb.DuckDBPyRelation)
+    assert out_rel.columns == list(df.columns) + _EVENTS
@@ -0,0 +1,111 @@
+"""Round-trip tests for the cohort-scoped medication_admin_continuous extract.
+
+The extract replaces four independent scans of the raw table, so each
+consumer must see exactly the rows it would have read from the raw file:
+cohort + med_category pushdown, UTC ``admin_dttm``, passthrough of every
+other column, and a raw-file fallback when the extract is absent.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _med_extract import (  # noqa: E402
+    EXTRACT_CATEGORIES,
+    SOFA_CATEGORIES,
+    med_admin_continuous_source,
+    med_extract_path,
+    write_med_admin_continuous_extract,
+)
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    """Raw CLIF dir with naive site-local admin_dttm; cwd = tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    raw = pd.DataFrame({
+        'hospitalization_id': ['H1', 'H1', 'H1', 'H2', 'H3'],
+        'admin_dttm': pd.to_datetime([
+            '2024-01-01 08:00', '2024-01-01 09:00', '2024-01-01 10:00',
+            '2024-01-01 08:00', '2024-01-01 08:00',
+        ]).astype('datetime64[us]'),
+        'med_category': ['propofol', 'heparin', 'rocuronium', 'dobutamine', 'propofol'],
+        'med_dose': [10.0, 5.0, 1.0, 2.0, 20.0],
+        'med_dose_unit': ['mcg/kg/min', 'u/hr', 'mg/hr', 'mcg/kg/min', 'mcg/kg/min'],
+        'mar_action_category': ['going', 'going', 'start', 'going', 'going'],
+    })
+    data_dir = tmp_path / 'clif'
+    data_dir.mkdir()
+    raw.to_parquet(data_dir / 'clif_medication_admin_continuous.parquet', index=False)
+    return str(data_dir)
+
+
+def _ids(*hosp_ids):
+    return duckdb.sql(f"SELECT UNNEST({list(hosp_ids)}) AS hospitalization_id")
+
+
+def test_sofa_categories_cover_required_meds():
+    from _sofa import REQUIRED_MEDS
+
+    assert set(REQUIRED_MEDS) <= set(SOFA_CATEGORIES) <= set(EXTRACT_CATEGORIES)
+
+
+def test_extract_pushdown_and_utc(raw_dir):
+    write_med_admin_continuous_extract(raw_dir, 'site', 'US/Central', _ids('H1', 'H2'))
+    src = med_admin_continuous_source(raw_dir, 'site')
+    assert src.startswith('read_parquet(')
+    out = duckdb.sql(f"""
+        FROM {src}
+        SELECT hospitalization_id, med_category, mar_action_category
+            , utc_hr: hour(timezone('UTC', admin_dttm))
+        ORDER BY ALL
+    """).fetchall()
+    # H3 (out of cohort) and heparin (not consumed) are pushed down;
+    # mar_action_category passes through; naive 08:00 Chicago → 14:00 UTC.
+    assert out == [
+        ('H1', 'propofol', 'going', 14),
+        ('H1', 'rocuronium', 'start', 16),
+        ('H2', 'dobutamine', 'going', 14),
+    ]
+
+
+def test_rewrite_drops_stale_partitions(raw_dir):
+    write_med_admin_continuous_extract(raw_dir, 'site', 'UTC', _ids('H1', 'H2'))
+    write_med_admin_continuous_extract(raw_dir, 'site', 'UTC', _ids('H3'))
+    cats = duckdb.sql(f"""
+        FROM {med_admin_continuous_source(raw_dir, 'site')}
+        SELECT DISTINCT med_category
+    """).fetchall()
+    assert cats == [('propofol',)]
+
+
+def test_fallback_to_raw_file(raw_dir):
+    assert med_extract_path('site') is None
+    src = med_admin_continuous_source(raw_dir, 'site')
+    assert src == f"'{raw_dir}/clif_medication_admin_continuous.parquet'"
+    assert duckdb.sql(f"FROM {src} SELECT COUNT(*)").fetchone()[0] == 5
+
+
+def test_sofa_raw_fallback_matches_extract_times(raw_dir):
+    import polars as pl
+    from _datetime_utils import standardize_datetime_columns
+    from _sofa import _naive_as_site_local
+
+    raw = standardize_datetime_columns(
+        _naive_as_site_local(
+            pl.scan_parquet(f"{raw_dir}/clif_medication_admin_continuous.parquet"),
+            'admin_dttm',
+        ),
+        target_timezone='US/Central', datetime_columns=['admin_dttm'],
+    ).filter(pl.col('med_category') == 'dobutamine').collect()
+    write_med_admin_continuous_extract(raw_dir, 'site', 'US/Central', _ids('H2'))
+    ext = pl.read_parquet(
+        f"{med_extract_path('site')}/**/*.parquet", hive_partitioning=True,
+    )
+    # Naive 08:00 is Chicago wall-clock in both branches (14:00 UTC).
+    assert (raw['admin_dttm'].dt.convert_time_zone('UTC').to_list()
+            == ext['admin_dttm'].dt.convert_time_zone('UTC').to_list())
+    assert raw['admin_dttm'].dt.convert_time_zone('UTC').dt.hour().to_list() == [14]
@@ -0,0 +1,176 @@
+"""Process-pool model-fit grid used by 08_models.py (`code/_model_fit.py`)."""
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+import _model_fit  # noqa: E402
+from _model_fit import DesignCache, FitJob, FitStore, FittedModel, fit_grid, fit_workers  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(11)
+    n = 600
+    x = rng.normal(size=n)
+    z = rng.normal(size=n)
+    y = (rng.random(n) < 1 / (1 + np.exp(-(0.8 * x - 0.4 * z)))).astype(int)
+    d = pd.DataFrame({
+        'hospitalization_id': np.repeat(np.arange(n // 4), 4).astype(str),
+        'y': y, 'x': x, 'z': z, 'x_dup': 2 * x,
+    })
+    d.loc[::37, 'z'] = np.nan
+    return d
+
+
+def _jobs():
+    return [
+        FitJob('y', mt, spec, formula, check_rank='rcs' not in spec)
+        for mt in ('gee', 'logit', 'logit_asym')
+        for spec, formula in (
+            ('base', 'y ~ x'),
+            ('adj', 'y ~ x + z'),
+            ('rcs', 'y ~ cr(x, df=3) + z'),
+        )
+    ]
+
+
+def test_pool_matches_serial_in_job_order(df):
+    jobs = _jobs()
+    serial = list(fit_grid(jobs, df, workers=1))
+    pooled = list(fit_grid(jobs, df, workers=2))
+    assert [o.job for o in pooled] == jobs
+    for s, p in zip(serial, pooled):
+        assert s.status == p.status == 'OK'
+        assert (s.n_obs, s.n_events, s.n_clusters) == (p.n_obs, p.n_events, p.n_clusters)
+        pd.testing.assert_series_equal(s.result.params, p.result.params)
+        pd.testing.assert_series_equal(s.result.bse, p.result.bse)
+    # Pooled fits get the formula design reattached for predictions.
+    assert (pooled[2].result.design_info.column_names
+            == serial[2].result.design_info.column_names)
+    new = pd.DataFrame({'x': [0.0, 1.0], 'z': [0.0, 0.0]})
+    assert np.allclose(pooled[2].result.predict(new), serial[2].result.predict(new))
+    # Counts are on the dropna'd row set (z has NaNs).
+    assert serial[1].n_obs == df['z'].notna().sum()
+
+
+def test_cached_designs_match_formula_fits(df):
+    import statsmodels.api as sm
+    import statsmodels.formula.api as smf
+
+    d = df.assign(y2=df['y'][::-1].to_numpy(), site=np.tile(['a', 'b', 'c'], len(df) // 3))
+    designs = DesignCache(d)
+    for outcome in ('y', 'y2'):
+        formula = f'{outcome} ~ cr(x, knots=[-0.5, 0.5]) + z + C(site)'
+        gee = _model_fit.fit_gee(formula, designs)
+        ref = smf.gee(formula, groups='hospitalization_id', data=d,
+                      family=sm.families.Binomial()).fit(maxiter=500)
+        pd.testing.assert_series_equal(gee.params, ref.params)
+        pd.testing.assert_series_equal(gee.bse, ref.bse)
+        asym = _model_fit.fit_logit_asym(formula, designs)
+        ref = smf.logit(formula, data=d.dropna(subset=['z'])).fit(maxiter=500, disp=False)
+        pd.testing.assert_series_equal(asym.params, ref.params)
+        new = d.head(3)
+        assert np.allclose(asym.get_prediction(new).predicted,
+                           ref.get_prediction(new).predicted)
+    # One RHS, one row set (z's NaNs) → built once, reused by the other
+    # model type and outcome.
+    assert (designs.built, designs.reused) == (1, 3)
+    designs.design('y ~ x', ['y', 'x', 'hospitalization_id'])
+    assert designs.built == 2
+
+
+def test_fitted_model_matches_statsmodels_result(df):
+    designs = DesignCache(df)
+    new = pd.DataFrame({'x': [-1.0, 0.0, 1.5], 'z': [0.5, 0.0, -0.5]})
+    for fit_fn in (_model_fit.fit_gee, _model_fit.fit_logit):
+        # Full-rank spec: cr() + intercept leaves a singular covariance,
+        # where prediction SEs are rounding noise either way.
+        res = fit_fn('y ~ x + z', designs)
+        fit = FittedModel.from_result(res)
+        pd.testing.assert_series_equal(fit.bse, res.bse, check_names=False)
+        pd.testing.assert_series_equal(fit.pvalues, res.pvalues, check_names=False)
+        pd.testing.assert_frame_equal(fit.conf_int(), res.conf_int(), check_names=False)
+        frame = res.get_prediction(new).summary_frame()
+        prob, lo, hi = fit.predict(new)
+        assert np.allclose(prob, frame.iloc[:, 0])
+        assert np.allclose(lo, frame.iloc[:, -2])
+        assert np.allclose(hi, frame.iloc[:, -1])
+
+
+def test_fit_store_round_trip(df, tmp_path):
+    path = tmp_path / "fit_store.parquet"
+    jobs = _jobs()[:3] + [FitJob('y', 'logit', 'dup', 'y ~ x + x_dup')]
+    first = list(fit_grid(jobs, df, workers=1, store=FitStore(path)))
+    again = list(fit_grid(jobs, df, workers=1, store=FitStore(path)))
+    assert not any(o.from_store for o in first) and all(o.from_store for o in again)
+    for a, b in zip(first, again):
+        assert (a.status, a.n_obs, a.n_clusters) == (b.status, b.n_obs, b.n_clusters)
+        if a.result is not None:
+            pd.testing.assert_series_equal(a.result.params, b.result.params)
+            pd.testing.assert_frame_equal(a.result.cov, b.result.cov)
+            assert b.result.design_info.column_names == a.result.design_info.column_names
+    assert again[-1].status == 'SKIP_SINGULAR' and again[-1].result is None
+
+    # Changing a modeling column refits only the cells that use it;
+    # refresh refits everything.
+    changed = df.assign(z=df['z'] * 2)
+    mixed = list(fit_grid(jobs, changed, workers=1, store=FitStore(path)))
+    assert [o.from_store for o in mixed] == [True, False, False, True]
+    fresh = list(fit_grid(jobs, changed, workers=1, store=FitStore(path, refresh=True)))
+    assert not any(o.from_store for o in fresh)
+
+
+def test_fit_store_keeps_concurrent_writers(df, tmp_path):
+    # 08 and 08b open the shared store before either has flushed; the
+    # second flush must not drop the first one's cells.
+    path = tmp_path / "fit_store.parquet"
+    models = [FitJob('y', 'logit', 'base', 'y ~ x')]
+    cascade = [replace(j, cohort='stage_1') for j in models]
+    store_08, store_08b = FitStore(path), FitStore(path)
+    list(fit_grid(models, df, workers=1, store=store_08))
+    list(fit_grid(cascade, df, workers=1, store=store_08b))
+    both = list(fit_grid(models + cascade, df, workers=1, store=FitStore(path)))
+    assert all(o.from_store for o in both)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_singular_and_failed_fits(df):
+    singular, failed = fit_grid([
+        FitJob('y', 'logit', 'dup', 'y ~ x + x_dup'),
+        FitJob('y', 'logit', 'bad', 'y ~ x + not_a_column'),
+    ], df, workers=1)
+    assert singular.status == 'SKIP_SINGULAR' and singular.result is None
+    assert singular.fail_reason == 'design matrix rank 2/3'
+    assert failed.status == 'FAIL' and failed.result is None
+    assert 'not_a_column' in failed.fail_reason
+
+
+def test_fit_workers_env(monkeypatch):
+    monkeypatch.delenv(_model_fit.FIT_WORKERS_ENV, raising=False)
+    assert 1 <= fit_workers(88) <= 88
+    assert fit_workers(0) == 1
+    monkeypatch.setenv(_model_fit.FIT_WORKERS_ENV, "4")
+    assert fit_workers(88) == 4
+    assert fit_workers(2) == 2
+    monkeypatch.setenv(_model_fit.FIT_WORKERS_ENV, "0")
+    with pytest.raises(ValueError):
+        fit_workers(88)
+
+
+def _grid_statuses(d):
+    return [o.status for o in fit_grid(_jobs()[:2], d, workers=2)]
+
+
+def test_grid_inside_spawned_worker_fits_serially(df):
+    # What an unguarded script re-imported by a spawn worker would do: a
+    # pool grid from inside a pool worker must not nest pools.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        assert pool.submit(_grid_statuses, df).result() == ['OK', 'OK']
@@ -0,0 +1,162 @@
+"""NMB minutes per patient-day (`code/_nmb.py`) vs the per-hour ASOF form.
+
+01_cohort's NMB exclusion used to ASOF-join every hourly grid row to the
+latest NMB administration and add that administration's full duration per
+hour. The range-join form must give the same minutes, so the same
+patient-days cross the 60-minute threshold. The pinned table also records
+the clipped-overlap minutes (actual minutes inside each day) to show where
+the two definitions part: multi-hour intervals, sub-hour intervals and
+intervals that cross a day boundary.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "code"))
+from _nmb import nmb_patient_day_minutes, nmb_running_intervals  # noqa: E402
+from _utils import add_day_shift_id  # noqa: E402
+
+# One IMV streak per hospitalization, 2024-01-01 05:10 → 2024-01-02 12:20
+# UTC (grid hours 05:00 .. 13:00 next day; days turn at 07:00, site_tz UTC).
+STREAK = ('2024-01-01 05:10', '2024-01-02 12:20')
+
+# (hospitalization_id, admin_dttm, med_dose), deliberately unsorted.
+ADMINS = [
+    # Multi-hour: one 180-min interval covering the 09/10/11 grid hours.
+    ('H1', '2024-01-01 11:30', 0.0), ('H1', '2024-01-01 08:30', 5.0),
+    # Sub-hour: 08:10-08:40 covers no grid hour; 09:50-10:20 covers 10:00.
+    ('H2', '2024-01-01 08:10', 5.0), ('H2', '2024-01-01 08:40', 0.0),
+    ('H2', '2024-01-01 09:50', 5.0), ('H2', '2024-01-01 10:20', 0.0),
+    # Cross-day: 06:00-08:30 spans the 07:00 boundary (06 | 07, 08).
+    ('H3', '2024-01-01 06:00', 5.0), ('H3', '2024-01-01 08:30', 0.0),
+    # Starts before the streak (03:00-06:30 covers 05, 06); the last
+    # running admin (23:00 next day) has zero duration and no successor.
+    ('H4', '2024-01-01 03:00', 5.0), ('H4', '2024-01-01 06:30', 0.0),
+    ('H4', '2024-01-02 23:00', 5.0),
+    # Runs past the streak: 12:30-16:00 covers only the last (13:00) hour.
+    ('H5', '2024-01-02 12:30', 5.0), ('H5', '2024-01-02 16:00', 0.0),
+]
+
+# (hospitalization_id, _nth_day) → (per-hour minutes, clipped-overlap minutes).
+PINNED = {
+    ('H1', 1.0): (540.0, 180.0),
+    ('H2', 1.0): (30.0, 60.0),
+    ('H3', 0.0): (150.0, 60.0),
+    ('H3', 1.0): (300.0, 90.0),
+    ('H4', 0.0): (420.0, 90.0),
+    ('H5', 2.0): (210.0, 90.0),
+}
+
+
+@pytest.fixture
+def nmb_inputs():
+    hosp_ids = sorted({h for h, _, _ in ADMINS})
+    admins = pd.DataFrame(ADMINS, columns=['hospitalization_id', 'admin_dttm', 'med_dose'])
+    admins['admin_dttm'] = pd.to_datetime(admins['admin_dttm']).dt.tz_localize('UTC')
+    nmb_rel = duckdb.sql("FROM admins SELECT *")
+    streaks = pd.DataFrame({
+        'hospitalization_id': hosp_ids,
+        '_start_dttm': pd.Timestamp(STREAK[0], tz='UTC'),
+        '_end_dttm': pd.Timestamp(STREAK[1], tz='UTC'),
+    })
+    # Same bounds / grid SQL as 01_cohort.py.
+    bounds = duckdb.sql("""
+        FROM streaks
+        SELECT hospitalization_id
+            , _start_hr: date_trunc('hour', _start_dttm)
+            , _end_hr: date_trunc('hour', _end_dttm) + INTERVAL '1 hour'
+    """)
+    grid = add_day_shift_id(duckdb.sql("""
+        FROM bounds
+        SELECT hospitalization_id
+            , unnest(generate_series(_start_hr, _end_hr, INTERVAL '1 hour')) AS event_dttm
+    """), site_tz='UTC')
+    return nmb_rel, bounds, grid
+
+
+def _asof_minutes(nmb_rel, grid):
+    """01_cohort's former nmb_w_duration → nmb_hrly → per-day SUM."""
+    return duckdb.sql("""
+        WITH nmb_w_duration AS (
+            FROM nmb_rel
+            SELECT hospitalization_id, admin_dttm, med_dose
+                , _duration_min: EXTRACT(EPOCH FROM (
+                    LEAD(admin_dttm, 1, admin_dttm) OVER w - admin_dttm
+                  )) / 60.0
+            WINDOW w AS (PARTITION BY hospitalization_id ORDER BY admin_dttm)
+        )
+        , nmb_hrly AS (
+            FROM grid g
+            ASOF LEFT JOIN nmb_w_duration n
+                ON g.hospitalization_id = n.hospitalization_id
+                AND n.admin_dttm <= g.event_dttm
+            SELECT g.hospitalization_id, g._nth_day, n.med_dose, n._duration_min
+        )
+        FROM nmb_hrly
+        SELECT hospitalization_id, _nth_day
+            , _nmb_total_min: SUM(CASE WHEN med_dose > 0 THEN _duration_min ELSE 0 END)
+        GROUP BY hospitalization_id, _nth_day
+        HAVING _nmb_total_min > 0
+    """)
+
+
+def _clipped_minutes(intervals, grid):
+    """Actual running minutes inside each patient-day's grid span."""
+    return duckdb.sql("""
+        WITH day_spans AS (
+            FROM grid
+            SELECT hospitalization_id, _nth_day
+                , _day_start: MIN(event_dttm)
+                , _day_end: MAX(event_dttm) + INTERVAL '1 hour'
+            GROUP BY hospitalization_id, _nth_day
+        )
+        FROM intervals n
+        JOIN day_spans d
+            ON n.hospitalization_id = d.hospitalization_id
+            AND n._nmb_start < d._day_end
+            AND n._nmb_end > d._day_start
+        SELECT d.hospitalization_id, d._nth_day
+            , _nmb_total_min: SUM(epoch(
+                least(n._nmb_end, d._day_end) - greatest(n._nmb_start, d._day_start)
+              )) / 60.0
+        GROUP BY d.hospitalization_id, d._nth_day
+    """)
+
+
+def _as_dict(rel):
+    return {(h, d): m for h, d, m in rel.fetchall()}
+
+
+def test_range_join_matches_asof(nmb_inputs):
+    nmb_rel, bounds, grid = nmb_inputs
+    ours = _as_dict(nmb_patient_day_minutes(nmb_running_intervals(nmb_rel, bounds), grid))
+    assert ours == _as_dict(_asof_minutes(nmb_rel, grid))
+    assert ours == pytest.approx({k: v[0] for k, v in PINNED.items()})
+
+
+def test_per_hour_vs_clipped_minutes(nmb_inputs):
+    nmb_rel, bounds, grid = nmb_inputs
+    intervals = nmb_running_intervals(nmb_rel, bounds)
+    clipped = _as_dict(_clipped_minutes(intervals, grid))
+    # H2's 08:10-08:40 interval counts under clipped minutes only.
+    assert clipped == pytest.approx({k: v[1] for k, v in PINNED.items()})
+    # The >60-min threshold flags different patient-days under the two rules.
+    per_hour_flagged = {k for k, v in PINNED.items() if v[0] > 60}
+    clipped_flagged = {k for k, v in clipped.items() if v > 60}
+    assert per_hour_flagged - clipped_flagged == {('H3', 0.0)}
+    assert clipped_flagged - per_hour_flagged == set()
+
+
+def test_intervals_bounded_to_streak(nmb_inputs):
+    nmb_rel, bounds, _ = nmb_inputs
+    rows = nmb_running_intervals(nmb_rel, bounds).order('hospitalization_id, _nmb_start').fetchall()
+    # Zero-dose rows only delimit; H4's zero-duration 23:00 admin starts
+    # after the grid's last hour and is dropped.
+    assert [(h, d) for h, _, _, d in rows] == [
+        ('H1', 180.0), ('H2', 30.0), ('H2', 30.0), ('H3', 150.0),
+        ('H4', 210.0), ('H5', 210.0),
+    ]
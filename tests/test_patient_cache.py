@@ -0,0 +1,87 @@
+"""QC viewer per-patient cache + prefetch (`code/qc/_patient_cache.py`)."""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code" / "qc"))
+from _patient_cache import PatientCache, Prefetcher, nbytes  # noqa: E402
+
+
+def _frame(n):
+    return pd.DataFrame({"x": np.arange(n, dtype="float64")})
+
+
+def test_evicts_least_recently_used_beyond_byte_budget():
+    one = nbytes(_frame(1000))
+    cache = PatientCache(max_bytes=int(2.5 * one))
+    calls = []
+
+    @cache.patient_cached
+    def load(site, hosp_id):
+        calls.append(hosp_id)
+        return _frame(1000)
+
+    load("s", "a"), load("s", "b"), load("s", "a"), load("s", "c")  # b is LRU
+    stats = cache.stats()
+    assert (stats.entries, stats.hits, stats.misses, stats.evictions) == (2, 1, 3, 1)
+    assert stats.bytes <= stats.max_bytes
+    load("s", "a")
+    load("s", "b")
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_concurrent_requests_share_one_load_and_failures_are_not_cached():
+    cache = PatientCache(max_bytes=1 << 30)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    @cache.patient_cached
+    def load(site, hosp_id):
+        calls.append(hosp_id)
+        started.set()
+        release.wait(5)
+        if hosp_id == "bad":
+            raise ValueError("boom")
+        return _frame(10)
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(load("s", "a")))
+    t.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(load("s", "a")))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    t.join(5), waiter.join(5)
+    assert calls == ["a"] and results[0] is results[1]
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            load("s", "bad")
+    assert calls.count("bad") == 2
+    assert ("load", "s", "bad") not in cache
+
+
+def test_prefetched_entries_count_as_prefetch_hits():
+    cache = PatientCache(max_bytes=1 << 30)
+    load = cache.patient_cached(lambda site, hosp_id: _frame(10))
+    prefetch = Prefetcher(workers=2)
+    prefetch.submit([lambda h=h: load("s", h) for h in ("a", "b", "c")])
+    deadline = time.time() + 5
+    while cache.stats().entries < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    load("s", "a"), load("s", "a"), load("s", "d")
+    stats = cache.stats()
+    assert (stats.prefetched, stats.prefetch_hits, stats.hits, stats.misses) == (3, 1, 2, 1)
+    assert "prefetch 1/3 used" in stats.summary()
+
+
+def test_disabled_prefetcher_runs_nothing():
+    ran = []
+    assert Prefetcher(workers=0).submit([lambda: ran.append(1)]) == 0
+    assert ran == []
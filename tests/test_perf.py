@@ -0,0 +1,87 @@
+"""Stage timing records and the shareable summary (`_perf`)."""
+import json
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+import _perf  # noqa: E402
+
+
+@pytest.fixture
+def perf_site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_perf, "_STATE", None)
+    monkeypatch.setattr(sys, "excepthook", lambda *exc: None)
+    monkeypatch.delenv("PERF_EXPLAIN", raising=False)
+    monkeypatch.delenv("SHARD_INDEX", raising=False)
+    _perf.init_perf("output_to_share/site")
+    return tmp_path
+
+
+def _records(root: Path) -> list[dict]:
+    lines = (root / "output/site/perf" / _perf.TIMINGS_NAME).read_text().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_stage_records_rows_status_and_rss(perf_site):
+    with _perf.perf_stage("load") as ps:
+        ps.rows = 42
+    with pytest.raises(ValueError):
+        with _perf.perf_stage("boom"):
+            raise ValueError("x")
+    load, boom = _records(perf_site)
+    assert (load['site'], load['stage'], load['rows'], load['status']) == ('site', 'load', 42, 'ok')
+    assert load['wall_s'] >= 0 and boom['status'] == 'error'
+    if _perf.resource is not None:
+        assert load['peak_rss_mb'] > 0
+
+
+def test_explain_opt_in_writes_profile(perf_site, monkeypatch):
+    monkeypatch.setenv("PERF_EXPLAIN", "agg")
+    with _perf.perf_stage("agg"):
+        duckdb.sql("FROM range(1000) SELECT SUM(range)").fetchall()
+    with _perf.perf_stage("other"):
+        duckdb.sql("FROM range(10) SELECT COUNT(*)").fetchall()
+    explain_dir = perf_site / "output/site/perf/explain"
+    assert [p.name.endswith("__agg.txt") for p in explain_dir.iterdir()] == [True]
+    assert duckdb.sql("SELECT current_setting('enable_profiling')").fetchone()[0] in (None, '', 'no_output')
+
+
+def test_summary_aggregates_runs_without_failed_stages(perf_site):
+    for rows in (10, 20):
+        with _perf.perf_stage("load") as ps:
+            ps.rows = rows
+    with pytest.raises(RuntimeError):
+        with _perf.perf_stage("load"):
+            raise RuntimeError
+    _perf._finish_script()
+    summary = pd.read_csv(perf_site / "output_to_share/site/qc" / _perf.SUMMARY_NAME)
+    assert summary['stage'].tolist() == ['__script__', 'load']
+    load = summary.set_index('stage').loc['load']
+    assert (load['n_runs'], load['rows_last']) == (2, 20)
+
+
+def test_uncaught_exception_marks_script_failed(perf_site):
+    try:
+        raise RuntimeError("died")
+    except RuntimeError:
+        sys.excepthook(*sys.exc_info())
+    _perf._finish_script()
+    (script,) = _records(perf_site)
+    assert (script['stage'], script['status']) == ('__script__', 'error')
+    # Failed runs stay out of the shareable summary.
+    summary = pd.read_csv(perf_site / "output_to_share/site/qc" / _perf.SUMMARY_NAME)
+    assert summary.empty
+
+
+def test_non_site_directory_records_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_perf, "_STATE", None)
+    _perf.init_perf(str(tmp_path / "logs"))
+    with _perf.perf_stage("load"):
+        pass
+    assert not (tmp_path / "output").exists()
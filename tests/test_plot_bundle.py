@@ -0,0 +1,286 @@
+"""QC viewer figure payloads + `make qc-bundles` store (`code/qc/_plot_bundle.py`)."""
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code" / "qc"))
+# `_shared` collides with descriptive/_shared.py when test_descriptive_runner
+# was collected first: import the qc one, then put the other back.
+_descriptive_shared = sys.modules.pop("_shared", None)
+from _plot_bundle import (  # noqa: E402
+    INTM_PREFIX,
+    PARTS,
+    build_plot_bundles,
+    open_plot_bundles,
+    timeline_parts,
+    timeline_payload,
+)
+from _shared import (  # noqa: E402
+    ASSESSMENT_COLORS,
+    DEVICE_CATEGORY_COLORS,
+    MODE_IN_IMV_COLORS,
+    PRESSOR_COLORS,
+    RESP_COLORS,
+    VITAL_COLORS,
+    PatientEnrichment,
+    cohort_excluded_zones,
+    compute_nee,
+    day_labels_for_cohort,
+    extract_events,
+    night_windows_in_range,
+)
+
+if _descriptive_shared is not None:
+    sys.modules["_shared"] = _descriptive_shared
+
+T0 = pd.Timestamp("2024-03-01 05:00", tz="US/Central")
+
+
+def _wide(hosp_id, n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    prop = rng.uniform(0.5, 3.0, n)
+    prop[[0, 1, 4, 5, n - 1]] = np.nan          # leading / interior / trailing gaps
+    device = np.array(["nippv", None, "imv", None, "imv", "imv"] + [None] * (n - 6), dtype=object)
+    mode = np.array([None, None, "ac/vc", None, "pressure support/cpap", None] + [None] * (n - 6),
+                    dtype=object)
+    return pd.DataFrame({
+        "hospitalization_id": hosp_id,
+        "event_time": T0 + pd.to_timedelta(np.arange(n) * 90, unit="min"),
+        "propofol": prop,
+        "norepinephrine": np.where(np.arange(n) % 3 == 0, 0.05, np.nan),
+        "heart_rate": rng.uniform(60, 110, n),
+        "fio2_set": np.where(np.arange(n) == 3, 0.4, np.nan),
+        "device_category": device,
+        "mode_category": mode,
+    })
+
+
+def _enrichment(hosp_id):
+    empty = pd.DataFrame()
+    return PatientEnrichment(
+        analytical=empty, sed_hourly=empty, covariates=empty, sbt_daily=empty,
+        sbt_rows=empty,
+        sbt_audit=pd.DataFrame({
+            "event_dttm": [T0 + pd.Timedelta(hours=1), T0 + pd.Timedelta(hours=15)],
+            "_intub": [1, 0], "_extub_1st": [0, 1],
+        }),
+        imv_streaks=empty, all_imv_streaks=empty, first_icu_dttm=None,
+        cohort_start=(T0 + pd.Timedelta(hours=1)).tz_convert("UTC"),
+        cohort_end=(T0 + pd.Timedelta(days=2)).tz_convert("UTC"),
+        discharge=None,
+        intm=pd.DataFrame({
+            "admin_dttm": T0 + pd.to_timedelta([2, 6, 7], unit="h"),
+            "med_category": ["fentanyl", "fentanyl", "cefazolin"],
+            "med_dose": [50.0, 100.0, 2000.0],
+        }),
+    )
+
+
+def _payloads_equal(a, b):
+    for name in PARTS:
+        if name == "windows":
+            assert (a.cohort_start, a.cohort_end) == (b.cohort_start, b.cohort_end)
+        elif name == "scales":
+            assert a.scales == b.scales
+        else:
+            pd.testing.assert_frame_equal(getattr(a, name), getattr(b, name), check_dtype=False)
+
+
+def test_payload_carries_forward_scales_and_segments():
+    p = timeline_payload(_wide("H1"), _enrichment("H1"))
+    prop = p.traces["propofol"]
+    raw = _wide("H1")["propofol"]
+    # Filled only between the first and last observation.
+    assert prop.iloc[:2].isna().all() and np.isnan(prop.iloc[-1])
+    assert prop.iloc[4] == prop.iloc[5] == raw.iloc[3]
+    # Point series are never filled; every drawn series has a positive scale.
+    pd.testing.assert_series_equal(p.traces["heart_rate"], _wide("H1")["heart_rate"])
+    assert p.scales["propofol"] == raw.abs().max()
+    assert p.scales["nee"] == 0.05 and p.scales["fio2_set"] == 0.4
+    assert p.scales[f"{INTM_PREFIX}fentanyl"] == 100.0
+    assert "midazolam" not in p.scales and f"{INTM_PREFIX}cefazolin" not in p.scales
+    assert list(p.intm["med_category"]) == ["fentanyl", "fentanyl"]
+
+    # Mode is only carried up to its last observation, so the final IMV
+    # row falls back to the plain device color.
+    assert list(p.ribbon["legend_key"]) == [
+        "device: nippv", "imv: ac/vc", "imv: pressure support/cpap", "device: imv"]
+    assert p.ribbon["end"].iloc[0] == p.ribbon["start"].iloc[1]
+    assert p.ribbon["show_legend"].all()
+    assert list(p.events["kind"]) == ["intubation", "extubation"]
+    assert p.events["x"].iloc[0] == (T0 + pd.Timedelta(hours=1)).isoformat()
+    assert not p.nights.empty and not p.day_labels.empty
+
+
+def test_stacked_parts_match_single_patient_payloads(tmp_path):
+    ids = ["H1", "H2", "H3"]
+    wides = {h: _wide(h, n=12 + i, seed=i) for i, h in enumerate(ids)}
+    enrs = {h: _enrichment(h) for h in ids}
+
+    def parts_for(chunk):
+        return timeline_parts(pd.concat([wides[h] for h in chunk], ignore_index=True),
+                              {h: enrs[h] for h in chunk})
+
+    src = tmp_path / "source.parquet"
+    pd.DataFrame({"x": [1, 2]}).to_parquet(src, index=False)
+    site_dir = tmp_path / "site"
+    manifest = build_plot_bundles(site_dir, ids, parts_for, {"source": src}, chunk_size=2)
+    assert (manifest["n_chunks"], manifest["n_hospitalizations"]) == (2, 3)
+
+    bundles = open_plot_bundles(site_dir)
+    assert bundles.stale == []
+    for h in ids:
+        _payloads_equal(bundles.payload(h), timeline_payload(wides[h], enrs[h]))
+    assert bundles.payload("H9") is None
+
+    pd.DataFrame({"x": [1, 2, 3]}).to_parquet(src, index=False)
+    assert open_plot_bundles(site_dir).stale == ["source"]
+
+
+# ── Baseline: the per-click build_timeline data path before the payload ──
+# Vendored from code/qc/trajectory_viewer.py as of the commit that
+# introduced _plot_bundle.py (its parent): _normalize, the carry_forward
+# branch of _add_normed_line, the per-panel series selection and
+# _draw_device_ribbon's segmenting, minus the Plotly calls. The geometry
+# helpers and extract_events it called are unchanged in _shared.
+
+_BASELINE_SED_DRUGS = ("propofol", "fentanyl", "midazolam", "lorazepam", "hydromorphone")
+
+
+def _baseline_normalize(y):
+    raw = y
+    if raw.empty or not raw.notna().any():
+        return raw, raw, 0.0
+    m = float(np.nanmax(np.abs(raw.to_numpy())))
+    if m == 0 or not np.isfinite(m):
+        return raw, raw, 0.0
+    return raw / m, raw, m
+
+
+def _baseline_line(lines, key, x, y_raw, carry_forward=False):
+    if carry_forward:
+        y_raw = y_raw.copy()
+        first = y_raw.first_valid_index()
+        last = y_raw.last_valid_index()
+        if first is not None and last is not None:
+            y_raw.loc[first:last] = y_raw.loc[first:last].ffill()
+    y_norm, y_raw_kept, m = _baseline_normalize(y_raw)
+    if m == 0:
+        return
+    lines[key] = (x, y_norm, y_raw_kept)
+
+
+def _baseline_ribbon(wide_df):
+    df = wide_df[["event_time", "device_category", "mode_category"]].copy()
+    df = df.dropna(subset=["event_time"]).sort_values("event_time").reset_index(drop=True)
+    for col in ("device_category", "mode_category"):
+        first = df[col].first_valid_index()
+        last = df[col].last_valid_index()
+        if first is not None and last is not None:
+            df.loc[first:last, col] = df.loc[first:last, col].ffill()
+    df = df.dropna(subset=["device_category"]).reset_index(drop=True)
+    df["__key"] = df["device_category"].astype(str) + "|" + df["mode_category"].fillna("?").astype(str)
+    df["__seg"] = (df["__key"] != df["__key"].shift()).astype(int).cumsum()
+    segments = df.groupby("__seg").agg(
+        start=("event_time", "first"),
+        last_in_seg=("event_time", "last"),
+        device=("device_category", "first"),
+        mode=("mode_category", "first"),
+    ).reset_index(drop=True)
+    segments["end"] = segments["start"].shift(-1).fillna(segments["last_in_seg"])
+    rows, seen = [], set()
+    for _, seg in segments.iterrows():
+        start, end = pd.Timestamp(seg["start"]), pd.Timestamp(seg["end"])
+        if end <= start:
+            end = start + pd.Timedelta(minutes=15)
+        device = str(seg["device"])
+        mode = seg["mode"] if pd.notna(seg["mode"]) else None
+        if device.lower() == "imv" and mode is not None:
+            color = MODE_IN_IMV_COLORS.get(str(mode), DEVICE_CATEGORY_COLORS["imv"])
+            label, legend_key = f"{device} / {mode}", f"imv: {mode}"
+        else:
+            color = DEVICE_CATEGORY_COLORS.get(device.lower(), DEVICE_CATEGORY_COLORS["other"])
+            label, legend_key = device, f"device: {device}"
+        rows.append((start, end, label, legend_key, color, legend_key not in seen))
+        seen.add(legend_key)
+    return rows
+
+
+def _baseline_timeline(wide_df, enr):
+    t = wide_df["event_time"]
+    lines = {}
+    for drug in _BASELINE_SED_DRUGS:
+        if drug in wide_df.columns and wide_df[drug].notna().any():
+            _baseline_line(lines, drug, t, wide_df[drug], carry_forward=True)
+        if not enr.intm.empty:
+            sub = enr.intm[enr.intm["med_category"] == drug]
+            if not sub.empty and sub["med_dose"].notna().any():
+                _baseline_line(lines, f"{INTM_PREFIX}{drug}", sub["admin_dttm"], sub["med_dose"])
+    nee = compute_nee(wide_df)
+    if not nee.empty and nee.notna().any():
+        _baseline_line(lines, "nee", t, nee, carry_forward=True)
+    step_cols = [c for c in PRESSOR_COLORS if c != "nee"] + list(RESP_COLORS)
+    for col in (*step_cols, *ASSESSMENT_COLORS, *VITAL_COLORS):
+        if col in wide_df.columns and wide_df[col].notna().any():
+            _baseline_line(lines, col, t, wide_df[col], carry_forward=col in step_cols)
+    events = extract_events(enr)
+    return {
+        "lines": lines,
+        "ribbon": _baseline_ribbon(wide_df),
+        "events": [(pd.Timestamp(e["time"]).isoformat(), e["kind"], e["label"])
+                   for _, e in events.iterrows()],
+        "nights": night_windows_in_range(t.min(), t.max()),
+        "boundaries": [(z_end if label == "day 0" else z_start, label)
+                       for z_start, z_end, label in
+                       cohort_excluded_zones(enr.cohort_start, enr.cohort_end)],
+        "day_labels": day_labels_for_cohort(enr.cohort_start, enr.cohort_end),
+    }
+
+
+def test_payload_matches_baseline_timeline():
+    wide = _wide("H1", n=40, seed=3)
+    wide["vasopressin"] = np.where(np.arange(40) % 5 == 2, 0.04, np.nan)
+    wide["peep_set"] = np.where(np.arange(40) % 7 == 1, 8.0, np.nan)
+    wide["rass"] = np.where(np.arange(40) % 4 == 0, -2.0, np.nan)
+    wide["midazolam"] = 0.0                        # all-zero: not drawn
+    enr = replace(
+        _enrichment("H1"),
+        sbt_rows=pd.DataFrame({
+            "event_dttm": [T0 + pd.Timedelta(hours=h) for h in (26, 27, 30)],
+            "_block_id": [1, 1, 2],
+            "sbt_done": [1, 0, 1], "sbt_done_prefix": [1, 1, 0],
+            **{c: 0 for c in ("sbt_done_anyprior", "sbt_done_imv6h", "sbt_done_2min",
+                              "sbt_done_subira", "sbt_done_abc")},
+        }),
+        discharge=pd.Series({"discharge_dttm": T0 + pd.Timedelta(days=3),
+                             "discharge_category": "Home"}),
+        intm=pd.DataFrame({
+            "admin_dttm": T0 + pd.to_timedelta([2, 6, 7, 9], unit="h"),
+            "med_category": ["fentanyl", "fentanyl", "cefazolin", "midazolam"],
+            "med_dose": [50.0, 100.0, 2000.0, 2.0],
+        }),
+    )
+    base = _baseline_timeline(wide, enr)
+    p = timeline_payload(wide, enr)
+
+    assert set(p.scales) == set(base["lines"])
+    for key, (x, y_norm, y_raw) in base["lines"].items():
+        if key.startswith(INTM_PREFIX):
+            sub = p.intm[p.intm["med_category"] == key[len(INTM_PREFIX):]]
+            x_new, raw_new = sub["admin_dttm"], sub["med_dose"]
+        else:
+            x_new, raw_new = p.traces["event_time"], p.traces[key]
+        assert list(x_new) == list(x), key
+        np.testing.assert_allclose(raw_new, y_raw, err_msg=key)
+        np.testing.assert_allclose(raw_new / p.scales[key], y_norm, err_msg=key)
+
+    assert list(p.ribbon.itertuples(index=False, name=None)) == base["ribbon"]
+    assert list(p.events.itertuples(index=False, name=None)) == base["events"]
+    assert {k for _, k, _ in base["events"]} >= {"intubation", "sbt", "sbt_prefix",
+                                                 "discharge_home"}
+    assert list(zip(p.nights["start"], p.nights["end"])) == base["nights"]
+    assert list(zip(p.boundaries["x"], p.boundaries["label"])) == base["boundaries"]
+    assert list(zip(p.day_labels["center"], p.day_labels["nth_day"])) == base["day_labels"]
@@ -0,0 +1,79 @@
+"""Per-patient QC sidecar index (`code/qc/_qc_index.py`)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code" / "qc"))
+from _qc_index import build_qc_index, open_qc_index  # noqa: E402
+
+
+def _site(tmp_path):
+    rng = np.random.default_rng(3)
+    site_dir = tmp_path / "output" / "site_a"
+    raw_dir = tmp_path / "clif"
+    site_dir.mkdir(parents=True)
+    raw_dir.mkdir()
+    cohort = [f"H{i:03d}" for i in range(0, 40, 2)]  # every other hosp in cohort
+    pd.DataFrame({
+        "hospitalization_id": np.repeat(cohort, 3),
+        "_nth_day": np.tile([0, 1, 2], len(cohort)),
+    }).to_parquet(site_dir / "model_input_by_id_imvday.parquet", index=False)
+    n = 3000
+    hosp = rng.choice([f"H{i:03d}" for i in range(40)], n)
+    pd.DataFrame({
+        "hospitalization_id": hosp,
+        "event_dttm": pd.Timestamp("2024-01-01", tz="US/Central")
+        + pd.to_timedelta(rng.integers(0, 10_000, n), unit="min"),
+        "value": rng.normal(size=n),
+    }).to_parquet(site_dir / "seddose_by_id_imvhr.parquet", index=False)
+    pd.DataFrame({
+        "hospitalization_id": hosp,
+        "patient_id": [f"P{h[1:]}" for h in hosp],
+        "recorded_dttm": pd.Timestamp("2024-01-01", tz="UTC")
+        + pd.to_timedelta(rng.integers(0, 10_000, n), unit="min"),
+        "vital_value": rng.normal(size=n),
+    }).to_parquet(raw_dir / "clif_vitals.parquet", index=False)
+    return site_dir, raw_dir, cohort
+
+
+def test_range_reads_match_filtered_scans(tmp_path):
+    site_dir, raw_dir, cohort = _site(tmp_path)
+    manifest = build_qc_index(site_dir, {"vitals": raw_dir / "clif_vitals.parquet"},
+                              row_group_size=64)
+    assert manifest["n_hospitalizations"] == len(cohort)
+    assert set(manifest["files"]) == {"model_input_by_id_imvday", "seddose_by_id_imvhr",
+                                      "clif_vitals"}
+    idx = open_qc_index(site_dir)
+    # Small row groups: most patients straddle a group boundary.
+    assert pq.ParquetFile(idx.root / "seddose_by_id_imvhr.parquet").num_row_groups > 10
+    for h in cohort:
+        want = pd.read_parquet(site_dir / "seddose_by_id_imvhr.parquet",
+                               filters=[("hospitalization_id", "=", h)])
+        got = idx.read("seddose_by_id_imvhr", h).to_pandas()
+        sort = ["event_dttm", "value"]
+        pd.testing.assert_frame_equal(got.sort_values(sort).reset_index(drop=True),
+                                      want.sort_values(sort).reset_index(drop=True))
+        raw = pd.read_parquet(raw_dir / "clif_vitals.parquet",
+                              filters=[("hospitalization_id", "=", h)])
+        assert sorted(idx.read("clif_vitals", h, ["vital_value"]).column(0).to_pylist()) \
+            == sorted(raw["vital_value"])
+    assert idx.in_cohort(cohort[0]) and not idx.in_cohort("H001")
+    assert idx.read("seddose_by_id_imvhr", "H001").num_rows == 0
+
+
+def test_changed_source_is_not_served(tmp_path):
+    site_dir, raw_dir, cohort = _site(tmp_path)
+    build_qc_index(site_dir, {"vitals": raw_dir / "clif_vitals.parquet"})
+    pd.read_parquet(raw_dir / "clif_vitals.parquet").iloc[:-5] \
+        .to_parquet(raw_dir / "clif_vitals.parquet", index=False)
+    idx = open_qc_index(site_dir)
+    assert idx.stale == ["clif_vitals"]
+    assert not idx.has("clif_vitals") and idx.has("seddose_by_id_imvhr")
+
+    # A new cohort invalidates every copy.
+    pd.DataFrame({"hospitalization_id": cohort[:3], "_nth_day": 1}) \
+        .to_parquet(site_dir / "model_input_by_id_imvday.parquet", index=False)
+    assert open_qc_index(site_dir) is None
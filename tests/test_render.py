@@ -0,0 +1,87 @@
+"""Deferred figure rendering (`code/_render.py`)."""
+import sys
+from pathlib import Path
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+
+matplotlib.use("Agg")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+import _render  # noqa: E402
+from _render import RenderQueue, render_workers  # noqa: E402
+
+
+def _line_fig(ys, title=""):
+    fig, ax = plt.subplots(figsize=(3, 2))
+    ax.plot(ys)
+    ax.set_title(title)
+    return fig
+
+
+def _rc_probe(out_txt):
+    Path(out_txt).write_text(str(plt.rcParams["axes.titlesize"]))
+    return plt.figure(figsize=(1, 1))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_writes_every_figure_in_submit_order(tmp_path, workers):
+    q = RenderQueue(enabled=True)
+    want = [tmp_path / f"fig_{i}.png" for i in range(3)]
+    for i, p in enumerate(want):
+        q.submit(p, _line_fig, [0, i, 2 * i], title=f"fig {i}", savefig_kwargs={"dpi": 50})
+    assert len(q) == 3
+    assert q.render(workers=workers) == [str(p) for p in want]
+    assert all(p.stat().st_size > 0 for p in want)
+    assert len(q) == 0
+    assert plt.get_fignums() == []
+
+
+def test_disabled_queue_skips_rendering(tmp_path):
+    q = RenderQueue(enabled=False)
+    q.submit(tmp_path / "skip.png", _line_fig, [1, 2])
+    assert q.skipped == 1 and len(q) == 0
+    assert q.render() == []
+    assert not (tmp_path / "skip.png").exists()
+
+
+def test_no_figures_flag_and_env(monkeypatch):
+    monkeypatch.delenv("NO_FIGURES", raising=False)
+    monkeypatch.setattr(sys, "argv", ["script.py"])
+    assert _render.figures_enabled()
+    monkeypatch.setattr(sys, "argv", ["script.py", "--no-figures"])
+    assert not RenderQueue().enabled
+    monkeypatch.setattr(sys, "argv", ["script.py"])
+    monkeypatch.setenv("NO_FIGURES", "1")
+    assert not _render.figures_enabled()
+
+
+def test_render_workers_env(monkeypatch):
+    monkeypatch.setenv("RENDER_WORKERS", "3")
+    assert render_workers(10) == 3
+    assert render_workers(2) == 2
+    monkeypatch.setenv("RENDER_WORKERS", "0")
+    with pytest.raises(ValueError):
+        render_workers(4)
+
+
+def test_submit_time_rcparams_reach_the_worker(tmp_path):
+    q = RenderQueue(enabled=True)
+    with matplotlib.rc_context({"axes.titlesize": 17}):
+        q.submit(tmp_path / "rc.png", _rc_probe, tmp_path / "rc.txt")
+    q.render(workers=2)
+    assert (tmp_path / "rc.txt").read_text() == "17.0"
+
+
+def test_cascade_flow_diagram_renders_in_pool(tmp_path):
+    from _model_figures import render_flow_diagram
+
+    summaries = [
+        {"stage": f"stage{i}", "title": f"Stage {i}", "n_rows": 100 - 10 * i,
+         "outcome_positive_rate": 0.1 * (i + 1)}
+        for i in range(3)
+    ]
+    q = RenderQueue(enabled=True)
+    q.submit(tmp_path / "flow.png", render_flow_diagram, summaries, "site")
+    assert q.render(workers=2) == [str(tmp_path / "flow.png")]
+    assert (tmp_path / "flow.png").stat().st_size > 0
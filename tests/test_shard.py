@@ -0,0 +1,140 @@
+"""Shard partitioning and merge semantics (`_shard`)."""
+import logging
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _shard import (  # noqa: E402
+    Shard,
+    current_shard,
+    merge_shard_logs,
+    merge_stage_shards,
+    shard_predicate,
+    stage_output_dir,
+    stage_qc_dir,
+)
+
+_IDS = [f"H{i:03d}" for i in range(40)]
+
+
+def _split(df: pd.DataFrame, count: int) -> list[pd.DataFrame]:
+    return [
+        duckdb.sql(f"FROM df WHERE {shard_predicate(Shard(k, count))}").df()
+        for k in range(count)
+    ]
+
+
+def test_current_shard_env(monkeypatch):
+    monkeypatch.delenv("SHARD_INDEX", raising=False)
+    monkeypatch.delenv("SHARD_COUNT", raising=False)
+    assert current_shard() is None
+    assert shard_predicate(None) == "TRUE"
+    monkeypatch.setenv("SHARD_INDEX", "2")
+    with pytest.raises(RuntimeError, match="set together"):
+        current_shard()
+    monkeypatch.setenv("SHARD_COUNT", "4")
+    assert current_shard() == Shard(2, 4)
+    assert current_shard().label == "002-of-004"
+    monkeypatch.setenv("SHARD_INDEX", "4")
+    with pytest.raises(RuntimeError, match="out of range"):
+        current_shard()
+
+
+def test_predicate_partitions_hospitalizations():
+    df = pd.DataFrame({'hospitalization_id': _IDS * 3, 'x': range(len(_IDS) * 3)})
+    parts = _split(df, 4)
+    assert sum(len(p) for p in parts) == len(df)
+    owners = [set(p['hospitalization_id']) for p in parts]
+    assert set().union(*owners) == set(_IDS)
+    # Each hospitalization lands wholly in one shard.
+    assert sum(len(o) for o in owners) == len(_IDS)
+
+
+def test_merge_reassembles_canonical_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    count = 3
+    daily = pd.DataFrame({
+        'hospitalization_id': sorted(_IDS * 2),
+        '_nth_day': [0, 1] * len(_IDS),
+        'sbt_done': range(len(_IDS) * 2),
+    })
+    for k, part in enumerate(_split(daily, count)):
+        out_dir = stage_output_dir('site', Shard(k, count))
+        part.to_parquet(f"{out_dir}/outcomes_by_id_imvday.parquet")
+    assert not Path("output/site/outcomes_by_id_imvday.parquet").exists()
+
+    merge_stage_shards('site', '03_outcomes', count)
+    merged = pd.read_parquet("output/site/outcomes_by_id_imvday.parquet")
+    pd.testing.assert_frame_equal(merged, daily)
+
+
+def test_merge_sums_count_csvs_and_refuses_partial(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    count = 2
+    hourly = pd.DataFrame({
+        'hospitalization_id': _IDS,
+        'event_dttm': pd.Timestamp("2024-01-01", tz="UTC"),
+        'prop_mcg_kg_min_cont': 10.0,
+    })
+    summaries = [
+        pd.DataFrame({'med_category': ['propofol', 'fentanyl'],
+                      'med_dose_unit': ['mcg/kg/min', 'mcg/hr'], 'count': [5, 2]}),
+        pd.DataFrame({'med_category': ['propofol', 'propofol'],
+                      'med_dose_unit': ['mcg/kg/min', 'mg/hr'], 'count': [7, 1]}),
+    ]
+    for k, part in enumerate(_split(hourly, count)):
+        shard = Shard(k, count)
+        out_dir = stage_output_dir('site', shard)
+        for name in ('seddose_by_id_imvday', 'seddose_by_id_imvhr', 'seddose_by_id_imvhr_raw'):
+            part.assign(_nth_day=0).to_parquet(f"{out_dir}/{name}.parquet")
+        summaries[k].to_csv(stage_qc_dir('site', shard) / 'cont_sed_convert_summary.csv', index=False)
+
+    with pytest.raises(RuntimeError, match="0 of 3 shards"):
+        merge_stage_shards('site', '02_exposure', 3)
+
+    merge_stage_shards('site', '02_exposure', count)
+    merged = pd.read_csv("output_to_share/site/qc/cont_sed_convert_summary.csv")
+    assert merged.to_dict('records') == [
+        {'med_category': 'fentanyl', 'med_dose_unit': 'mcg/hr', 'count': 2},
+        {'med_category': 'propofol', 'med_dose_unit': 'mcg/kg/min', 'count': 12},
+        {'med_category': 'propofol', 'med_dose_unit': 'mg/hr', 'count': 1},
+    ]
+    hr = pd.read_parquet("output/site/seddose_by_id_imvhr.parquet")
+    assert hr['hospitalization_id'].tolist() == _IDS
+
+
+def test_shard_workers_log_separately_then_merge(tmp_path, monkeypatch):
+    import _logging_setup
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_logging_setup, "init_perf", lambda _dir: None)
+    seen = []
+
+    def _clifpy_setup_logging(output_directory, **_kw):
+        seen.append(output_directory)
+        return logging.getLogger("test_shard")
+
+    monkeypatch.setattr(_logging_setup, "_clifpy_setup_logging", _clifpy_setup_logging)
+    monkeypatch.setattr(sys, "argv", ["code/03_outcomes.py"])
+    monkeypatch.setenv("SHARD_INDEX", "1")
+    monkeypatch.setenv("SHARD_COUNT", "2")
+    _logging_setup.setup_logging(output_directory="output_to_share/site")
+    assert seen == ["output/site/shards/001-of-002/03_outcomes"]
+
+    Path("output_to_share/site/logs").mkdir(parents=True)
+    Path("output_to_share/site/logs/clifpy_all.log").write_text("01 line\n")
+    for k in (1, 0):
+        _dir = Path(seen[0].replace("001-of-002", Shard(k, 2).label)) / "logs"
+        _dir.mkdir(parents=True)
+        (_dir / "clifpy_all.log").write_text(f"shard {k} line\n")
+    merge_shard_logs('site', ['02_exposure', '03_outcomes'], 2)
+    assert Path("output_to_share/site/logs/clifpy_all.log").read_text().splitlines() == [
+        "01 line",
+        "===== 03_outcomes shard 000-of-002 =====", "shard 0 line",
+        "===== 03_outcomes shard 001-of-002 =====", "shard 1 line",
+    ]
+    assert Path("output_to_share/site/logs/clifpy_errors.log").read_text() == ""
@@ -0,0 +1,70 @@
+"""Raw-file SOFA loaders (`code/_sofa.py`) on naive-timestamp tables.
+
+Every loader must read a naive timestamp as site-local wall-clock, the rule
+the medication / weight extracts use, so all SOFA components see the same
+instant. The fixture charts one row per table at naive 08:00 and a cohort
+window of 07:00-09:00 Chicago; a loader that read 08:00 as UTC (02:00
+Chicago) would drop its row.
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+import _sofa  # noqa: E402
+
+TZ = 'US/Central'
+NAIVE = pd.Timestamp('2024-01-01 08:00')
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    tables = {
+        'labs': {'lab_category': 'creatinine', 'lab_value': '1.2',
+                 'lab_value_numeric': 1.2, 'lab_result_dttm': NAIVE},
+        'vitals': {'vital_category': 'map', 'vital_value': 70.0, 'recorded_dttm': NAIVE},
+        'patient_assessments': {'assessment_category': 'gcs_total', 'numerical_value': 14.0,
+                                'categorical_value': None, 'recorded_dttm': NAIVE},
+        'respiratory_support': {'device_category': 'imv',
+                                'mode_category': 'assist control-volume control',
+                                'fio2_set': 0.4, 'recorded_dttm': NAIVE},
+        'medication_admin_continuous': {'med_category': 'dobutamine', 'med_dose': 2.0,
+                                        'med_dose_unit': 'mcg/kg/min', 'admin_dttm': NAIVE},
+    }
+    for name, row in tables.items():
+        pd.DataFrame([{'hospitalization_id': 'H1', **row}]).to_parquet(
+            tmp_path / f"clif_{name}.parquet", index=False,
+        )
+    return str(tmp_path)
+
+
+@pytest.fixture
+def cohort():
+    window = pl.datetime_range(
+        datetime(2024, 1, 1, 7), datetime(2024, 1, 1, 9), '2h', eager=True,
+    ).dt.replace_time_zone(TZ)
+    return pl.DataFrame({
+        'hospitalization_id': ['H1'], 'start_dttm': window[:1], 'end_dttm': window[1:],
+    })
+
+
+def _utc_hours(lf, column):
+    return lf.collect()[column].dt.convert_time_zone('UTC').dt.hour().to_list()
+
+
+def test_raw_loaders_read_naive_times_as_site_local(raw_dir, cohort):
+    args = (raw_dir, 'parquet', ['H1'], cohort)
+    loaded = [
+        (_sofa._load_labs(*args, timezone=TZ), 'lab_result_dttm'),
+        (_sofa._load_vitals(*args, timezone=TZ), 'recorded_dttm'),
+        (_sofa._load_patient_assessments(*args, timezone=TZ), 'recorded_dttm'),
+        (_sofa._load_respiratory_support(*args, timezone=TZ), 'recorded_dttm'),
+        (_sofa._load_and_convert_medications(*args, vitals_df=pl.DataFrame(), timezone=TZ),
+         'admin_dttm'),
+    ]
+    # Naive 08:00 Chicago = 14:00 UTC in every component.
+    assert [_utc_hours(lf, column) for lf, column in loaded] == [[14]] * 5
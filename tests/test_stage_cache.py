@@ -0,0 +1,130 @@
+"""Hit/miss semantics of the fingerprinted stage cache (`_stage_cache`)."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _stage_cache import (  # noqa: E402
+    check_stage_cache,
+    drop_stage_manifest,
+    ids_fingerprint,
+    parquet_fingerprint,
+    stage_components,
+    write_stage_manifest,
+)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """Project-shaped tmp dir: raw CLIF dx table + outlier config + output/."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'clif').mkdir()
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'outlier_config.yaml').write_text("tables: {}\n")
+    (tmp_path / 'output' / 'site').mkdir(parents=True)
+    _write_dx(tmp_path, ['H1', 'H2'])
+    return {'data_directory': str(tmp_path / 'clif'), 'timezone': 'US/Central'}
+
+
+def _write_dx(root, hosp_ids):
+    pd.DataFrame({
+        'hospitalization_id': hosp_ids,
+        'diagnosis_code': ['I10'] * len(hosp_ids),
+    }).to_parquet(root / 'clif' / 'clif_hospital_diagnosis.parquet', index=False)
+
+
+def _write_cache():
+    for name in ('covariates_cci.parquet', 'covariates_elix.parquet'):
+        pd.DataFrame({'hospitalization_id': ['H1']}).to_parquet(f"output/site/{name}")
+
+
+def test_fingerprints_are_content_based(tmp_path, site):
+    fp = parquet_fingerprint(f"{site['data_directory']}/clif_hospital_diagnosis.parquet")
+    assert fp == parquet_fingerprint(f"{site['data_directory']}/clif_hospital_diagnosis.parquet")
+    _write_dx(tmp_path, ['H1', 'H3'])
+    assert fp != parquet_fingerprint(f"{site['data_directory']}/clif_hospital_diagnosis.parquet")
+    assert parquet_fingerprint('nope.parquet') == 'missing'
+    assert ids_fingerprint(['b', 'a', 'a']) == ids_fingerprint(['a', 'b'])
+
+
+def test_hit_then_miss_on_refresh_and_cohort_change(tmp_path, site):
+    components = stage_components('cci_elix', site, cohort_ids=['H1', 'H2'])
+    assert check_stage_cache('site', 'cci_elix', components) == (
+        False, 'covariates_cci.parquet absent',
+    )
+    _write_cache()
+    hit, reason = check_stage_cache('site', 'cci_elix', components)
+    assert not hit and reason.startswith('no manifest')
+
+    write_stage_manifest('site', 'cci_elix', components, n_rows=1)
+    assert check_stage_cache('site', 'cci_elix', components) == (True, 'fingerprint match')
+
+    new_cohort = stage_components('cci_elix', site, cohort_ids=['H1'])
+    assert check_stage_cache('site', 'cci_elix', new_cohort) == (False, 'changed: cohort_ids')
+
+    _write_dx(tmp_path, ['H1', 'H2', 'H3'])
+    refreshed = stage_components('cci_elix', site, cohort_ids=['H1', 'H2'])
+    assert check_stage_cache('site', 'cci_elix', refreshed) == (
+        False, 'changed: clif_hospital_diagnosis',
+    )
+
+
+def test_outlier_config_and_unchecked_cohort(tmp_path, site):
+    pd.DataFrame({'x': [1]}).to_parquet('output/site/cohort_resp_processed_bf.parquet')
+    components = stage_components('waterfall', site, cohort_ids=['H1'])
+    write_stage_manifest('site', 'waterfall', components)
+    # cache-status cannot recover the post-stitch cohort: compared without it.
+    hit, reason = check_stage_cache('site', 'waterfall', stage_components('waterfall', site))
+    assert hit and reason == 'fingerprint match (unchecked: cohort_ids)'
+
+    (tmp_path / 'config' / 'outlier_config.yaml').write_text("tables: {x: 1}\n")
+    assert check_stage_cache(
+        'site', 'waterfall', stage_components('waterfall', site, cohort_ids=['H1']),
+    ) == (False, 'changed: outlier_config')
+
+    drop_stage_manifest('site', 'waterfall')
+    assert not check_stage_cache('site', 'waterfall', components)[0]
+
+
+def test_sofa_fingerprints_extract_modules(tmp_path, site):
+    (tmp_path / 'code').mkdir()
+    for name in ('_sofa.py', '_med_extract.py', '_weight_extract.py'):
+        (tmp_path / 'code' / name).write_text("# v1\n")
+    pd.DataFrame({'x': [1]}).to_parquet('output/site/sofa_first_24h.parquet')
+    components = stage_components('sofa_first_24h', site, cohort_ids=['H1'])
+    write_stage_manifest('site', 'sofa_first_24h', components)
+
+    # A change to the weight extract's logic moves the SOFA cache too.
+    (tmp_path / 'code' / '_weight_extract.py').write_text("# v2\n")
+    assert check_stage_cache(
+        'site', 'sofa_first_24h',
+        stage_components('sofa_first_24h', site, cohort_ids=['H1']),
+    ) == (False, 'changed: code')
+
+
+@pytest.mark.parametrize('helper', ['_utils.py', '_outlier_handler.py'])
+def test_waterfall_fingerprints_helper_modules(tmp_path, site, helper):
+    (tmp_path / 'code').mkdir()
+    for name in ('_waterfall.py', '_utils.py', '_outlier_handler.py'):
+        (tmp_path / 'code' / name).write_text("# v1\n")
+    before = stage_components('waterfall', site, cohort_ids=['H1'])
+    (tmp_path / 'code' / helper).write_text("# v2\n")
+    after = stage_components('waterfall', site, cohort_ids=['H1'])
+    assert {k for k in before if before[k] != after[k]} == {'code'}
+
+
+def test_csv_sources_fingerprint_by_size_and_mtime(tmp_path, site):
+    csv_site = {**site, 'filetype': 'csv'}
+    dx = tmp_path / 'clif' / 'clif_hospital_diagnosis.csv'
+    dx.write_text("hospitalization_id,diagnosis_code\nH1,I10\n")
+    components = stage_components('cci_elix', csv_site, cohort_ids=['H1'])
+    assert components['clif_hospital_diagnosis'] != 'missing'
+    assert stage_components('cci_elix', csv_site, cohort_ids=['H1']) == components
+
+    dx.write_text("hospitalization_id,diagnosis_code\nH1,I10\nH2,E11\n")
+    changed = stage_components('cci_elix', csv_site, cohort_ids=['H1'])
+    assert changed['clif_hospital_diagnosis'] != components['clif_hospital_diagnosis']
+    dx.unlink()
+    assert stage_components('cci_elix', csv_site)['clif_hospital_diagnosis'] == 'missing'
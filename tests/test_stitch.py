@@ -0,0 +1,105 @@
+"""DuckDB encounter stitching (`code/_stitch.py`) vs clifpy's stitch_encounters.
+
+01_cohort's stitch-dedup cell used clifpy's pandas implementation; the
+DuckDB one must give every hospitalization the same ``encounter_block``
+and keep the same first-admitted hospitalization per block.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+from clifpy.utils.stitching_encounters import stitch_encounters
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "code"))
+sys.path.insert(0, str(ROOT / "dev"))
+import synthetic_clif  # noqa: E402
+from _stitch import stitch_encounter_blocks  # noqa: E402
+
+T0 = pd.Timestamp("2024-01-01 00:00", tz="UTC")
+
+
+def _clifpy_mapping(hosp: pd.DataFrame) -> pd.DataFrame:
+    hosp = hosp.assign(
+        age_at_admission=60, admission_type_category="x", discharge_category="home",
+    )
+    adt = pd.DataFrame({
+        "hospitalization_id": hosp["hospitalization_id"], "in_dttm": hosp["admission_dttm"],
+        "out_dttm": hosp["discharge_dttm"], "location_category": "icu", "hospital_id": "A",
+    })
+    _, _, mapping = stitch_encounters(hosp, adt, time_interval=12)
+    return mapping
+
+
+def _kept_first_per_block(hosp: pd.DataFrame, mapping: pd.DataFrame) -> set:
+    """The cell's previous dedup rule on clifpy's mapping."""
+    merged = mapping.merge(hosp[["hospitalization_id", "admission_dttm"]], on="hospitalization_id")
+    first = (merged.sort_values(["encounter_block", "admission_dttm"])
+             .drop_duplicates("encounter_block", keep="first"))
+    return set(first["hospitalization_id"])
+
+
+def _assert_parity(hosp: pd.DataFrame):
+    ours = stitch_encounter_blocks(duckdb.from_df(hosp), time_interval=12).df()
+    theirs = _clifpy_mapping(hosp)
+    merged = theirs.merge(ours, on="hospitalization_id", how="outer", validate="1:1")
+    assert len(merged) == len(hosp)
+    assert (merged["encounter_block_x"] == merged["encounter_block_y"]).all()
+    assert set(ours.loc[ours["is_block_start"], "hospitalization_id"]) == \
+        _kept_first_per_block(hosp, theirs)
+    return ours.set_index("hospitalization_id")
+
+
+def test_edge_cases_match_clifpy():
+    h = pd.Timedelta(hours=1)
+    hosp = pd.DataFrame({
+        "patient_id": ["P1", "P1", "P1", "P2", "P2", "P3", "P3", "P4", None, None],
+        "hospitalization_id": [f"H{i}" for i in range(10)],
+        "admission_dttm": [
+            T0, T0 + 30 * h, T0 + 50 * h,       # P1: 12h gap, then 12h01m gap
+            T0, T0 + 5 * h,                     # P2: overlapping stays
+            T0, T0 + 20 * h,                    # P3: NULL discharge never links
+            T0,
+            T0, T0 + 11 * h,                    # NULL patient never links
+        ],
+        "discharge_dttm": [
+            T0 + 18 * h, T0 + 38 * h - pd.Timedelta(minutes=1), T0 + 60 * h,
+            T0 + 10 * h, T0 + 8 * h,
+            pd.NaT, T0 + 30 * h,
+            T0 + 2 * h,
+            T0 + 10 * h, T0 + 12 * h,
+        ],
+    })
+    out = _assert_parity(hosp)
+    # P1: H0→H1 is exactly 12h (linked), H1→H2 is 12h01m (not linked).
+    assert out.loc["H0", "encounter_block"] == out.loc["H1", "encounter_block"]
+    assert out.loc["H2", "encounter_block"] != out.loc["H1", "encounter_block"]
+    assert out.loc["H3", "encounter_block"] == out.loc["H4", "encounter_block"]
+    assert out["encounter_block"].nunique() == 8
+    assert set(out.index[~out["is_block_start"]]) == {"H1", "H4"}
+
+
+def test_synthetic_clif_matches_clifpy(tmp_path):
+    synthetic_clif.generate_clif(tmp_path, 1500, imv_fraction=0.5, seed=11)
+    hosp = pd.read_parquet(
+        tmp_path / "clif_hospitalization.parquet",
+        columns=["patient_id", "hospitalization_id", "admission_dttm", "discharge_dttm"],
+    )
+    out = _assert_parity(hosp)
+    # The generator plants <12h readmissions, so some blocks must stitch.
+    assert (~out["is_block_start"]).sum() > 0
+
+
+@pytest.mark.parametrize("interval,n_blocks", [(0, 3), (12, 2), (48, 1)])
+def test_time_interval(interval, n_blocks):
+    h = pd.Timedelta(hours=1)
+    hosp = pd.DataFrame({
+        "patient_id": ["P1"] * 3,
+        "hospitalization_id": ["A", "B", "C"],
+        "admission_dttm": [T0, T0 + 20 * h, T0 + 60 * h],
+        "discharge_dttm": [T0 + 10 * h, T0 + 30 * h, T0 + 70 * h],
+    })
+    out = stitch_encounter_blocks(duckdb.from_df(hosp), time_interval=interval).df()
+    assert out["encounter_block"].nunique() == n_blocks
@@ -0,0 +1,69 @@
+"""Synthetic CLIF generator used by `make bench` (`dev/synthetic_clif.py`)."""
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "dev"))
+import synthetic_clif  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def clif_dir(tmp_path_factory):
+    out = tmp_path_factory.mktemp("clif")
+    synthetic_clif.generate_clif(out, 400, imv_fraction=0.5, seed=7)
+    return out
+
+
+def _read(root: Path, table: str) -> pl.DataFrame:
+    return pl.read_parquet(root / f"clif_{table}.parquet")
+
+
+def test_tables_carry_pipeline_columns_in_utc(clif_dir):
+    required = {
+        'hospitalization': ['patient_id', 'hospitalization_id', 'admission_dttm', 'discharge_dttm',
+                            'age_at_admission', 'discharge_category'],
+        'adt': ['hospitalization_id', 'in_dttm', 'out_dttm', 'location_category'],
+        'respiratory_support': ['hospitalization_id', 'recorded_dttm', 'device_category',
+                                'mode_category', 'fio2_set', 'peep_set', 'tracheostomy'],
+        'medication_admin_continuous': ['hospitalization_id', 'admin_dttm', 'med_category',
+                                        'med_dose', 'med_dose_unit', 'mar_action_category'],
+        'vitals': ['hospitalization_id', 'recorded_dttm', 'vital_category', 'vital_value'],
+    }
+    for table, cols in required.items():
+        df = _read(clif_dir, table)
+        assert set(cols) <= set(df.columns), table
+        for col, dtype in df.schema.items():
+            if isinstance(dtype, pl.Datetime):
+                assert dtype.time_zone == "UTC", f"{table}.{col}"
+    assert {p.name for p in clif_dir.glob("clif_*.parquet")} == {
+        f"clif_{t}.parquet" for t in synthetic_clif.TABLES
+    }
+
+
+def test_imv_share_and_long_ventilation(clif_dir):
+    resp = _read(clif_dir, "respiratory_support").filter(pl.col('device_category') == 'imv')
+    n_imv = resp['hospitalization_id'].n_unique()
+    assert 0.4 < n_imv / 400 < 0.6
+    span_h = (
+        resp.group_by('hospitalization_id')
+        .agg(((pl.col('recorded_dttm').max() - pl.col('recorded_dttm').min()).dt.total_hours()))
+    )
+    assert (span_h['recorded_dttm'] >= 24).sum() > n_imv / 2
+
+
+def test_same_seed_is_identical_across_chunking(tmp_path, monkeypatch):
+    synthetic_clif.generate_clif(tmp_path / "a", 50, seed=3)
+    synthetic_clif.generate_clif(tmp_path / "b", 50, seed=3)
+    monkeypatch.setattr(synthetic_clif, "CHUNK_HOSPITALIZATIONS", 20)
+    synthetic_clif.generate_clif(tmp_path / "c", 50, seed=3)
+    for table in synthetic_clif.TABLES:
+        a = (tmp_path / "a" / f"clif_{table}.parquet").read_bytes()
+        assert a == (tmp_path / "b" / f"clif_{table}.parquet").read_bytes(), table
+    # Smaller chunks split the streams differently but keep every
+    # hospitalization and the table schemas.
+    for table in ('hospitalization', 'adt', 'vitals'):
+        a, c = _read(tmp_path / "a", table), _read(tmp_path / "c", table)
+        assert a.schema == c.schema
+        assert a['hospitalization_id'].unique().sort().equals(c['hospitalization_id'].unique().sort())
@@ -154,9 +154,14 @@ def test_site_tz_is_required(utc_grid):
 def _load_qc_shared():
     """Import code/qc/_shared.py via importlib (it's not in a regular package
     — the qc dir has no __init__.py and `_shared` would collide with
-    descriptive/_shared.py if added to sys.path)."""
+    descriptive/_shared.py if added to sys.path). Its uniquely named
+    siblings (`_patient_cache`, `_qc_index`) are resolved by appending the
+    qc dir to sys.path."""
     import importlib.util
-    qc_path = Path(__file__).resolve().parent.parent / "code" / "qc" / "_shared.py"
+    qc_dir = Path(__file__).resolve().parent.parent / "code" / "qc"
+    if str(qc_dir) not in sys.path:
+        sys.path.append(str(qc_dir))
+    qc_path = qc_dir / "_shared.py"
     spec = importlib.util.spec_from_file_location("qc_shared", qc_path)
     mod = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(mod)
@@ -427,6 +432,46 @@ def test_add_dh_hr_session_tz_invariant(utc_grid):
             duckdb.execute("SET TimeZone = 'UTC'")
 
 
+# ── add_day_shift_id on a DuckDBPyRelation ─────────────────────────────
+#
+# 01_cohort passes the hourly grid as a relation so grid → shift IDs →
+# cohort_meta_by_id_imvhr.parquet never round-trips through pandas. The
+# lazy path must match the pandas path column for column, dtype included
+# (`_nth_day` is DOUBLE on disk).
+
+
+def test_add_day_shift_id_relation_in_relation_out(utc_grid):
+    """DuckDBPyRelation in → DuckDBPyRelation out (lazy)."""
+    rel = duckdb.sql("FROM utc_grid SELECT *")
+    out = add_day_shift_id(rel, site_tz="America/Chicago")
+    assert isinstance(out, duckdb.DuckDBPyRelation), f"got {type(out).__name__}"
+    assert out.columns == [
+        "hospitalization_id", "event_dttm", "_dh", "_hr",
+        "_shift", "_is_day_start", "_nth_day", "_day_shift",
+    ]
+
+
+@pytest.mark.parametrize("session_tz", ["UTC", "America/Chicago", "Asia/Tokyo"])
+def test_add_day_shift_id_relation_matches_pandas(utc_grid, session_tz):
+    """Relation path == pandas path across DST boundaries, under any
+    session timezone (compared after the same UTC re-anchor)."""
+    base = add_day_shift_id(utc_grid, site_tz="America/Chicago")
+    duckdb.execute(f"SET TimeZone = '{session_tz}'")
+    try:
+        rel = add_day_shift_id(
+            duckdb.sql("FROM utc_grid SELECT *"), site_tz="America/Chicago",
+        )
+        out = rel.df()
+    finally:
+        duckdb.execute("SET TimeZone = 'UTC'")
+    out["event_dttm"] = out["event_dttm"].dt.tz_convert("UTC")
+    pd.testing.assert_frame_equal(base, out, check_dtype=True, check_exact=True)
+    assert out["_nth_day"].dtype == "float64"
+    assert out["_day_shift"].tolist()[:4] == [
+        "day1_day", "day1_day", "day1_night", "day2_day",
+    ]
+
+
 # ── coerce_dttm_to_utc — DuckDB-native load-boundary tz coercion ──────────
 #
 # coerce_dttm_to_utc is the lazy DuckDBPyRelation sibling of to_utc. The
@@ -0,0 +1,182 @@
+"""Parity tests for the DuckDB respiratory-support waterfall (`_waterfall`).
+
+``process_resp_waterfall`` must reproduce clifpy's
+``process_resp_support_waterfall(bfill=True)`` row-for-row: same rows
+(scaffold included), same filled values, same episode IDs. A seeded
+generator sweeps a few hundred synthetic hospitalizations that exercise
+every phase-1 heuristic; hand-written cases pin the trach-collar split
+(where clifpy itself breaks under pandas >= 2) and the partitioned
+parquet writer used by ``01_cohort.py``.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
+from _waterfall import (  # noqa: E402
+    RESP_WATERFALL_COLUMNS,
+    process_resp_waterfall,
+    write_resp_waterfall,
+)
+
+waterfall_mod = pytest.importorskip("clifpy.utils.waterfall")
+
+_T0 = pd.Timestamp("2024-01-01 00:00:00", tz="UTC")
+_DEVICES = [
+    'imv', 'imv', 'nippv', 'cpap', 'high flow nc', 'nasal cannula',
+    'face mask', 'room air', None, None, None,
+]
+_DEVICE_NAMES = {
+    'imv': ['Ventilator', 'PB 840', None],
+    'nippv': ['BiPAP', 'V60', None],
+    None: [None, None, 'Trach mask', 'T-piece'],
+}
+_MODES = [
+    'assist control-volume control', 'simv', 'pressure control',
+    'pressure support/cpap', 'other', None, None,
+]
+
+
+def _random_resp(n_hosp: int = 300, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frames = []
+    for h in range(n_hosp):
+        n = int(rng.integers(1, 25))
+        minutes = np.sort(rng.integers(0, 48 * 60, n))
+        if n > 3 and rng.random() < 0.3:  # duplicated timestamps
+            minutes[2] = minutes[1]
+        device = [_DEVICES[i] for i in rng.integers(0, len(_DEVICES), n)]
+        names = [
+            _DEVICE_NAMES.get(d, [None])[rng.integers(0, len(_DEVICE_NAMES.get(d, [None])))]
+            for d in device
+        ]
+
+        def _num(lo, hi, p_na=0.4):
+            v = rng.uniform(lo, hi, n).round(1)
+            v[rng.random(n) < p_na] = np.nan
+            return v
+
+        frames.append(pd.DataFrame({
+            'hospitalization_id': f"H{h:04d}",
+            'recorded_dttm': _T0 + pd.to_timedelta(minutes, unit='m'),
+            'device_name': names,
+            'device_category': [d.upper() if d and rng.random() < 0.1 else d for d in device],
+            'mode_name': [None if rng.random() < 0.5 else f"Mode{rng.integers(3)}" for _ in range(n)],
+            'mode_category': [_MODES[i] for i in rng.integers(0, len(_MODES), n)],
+            'fio2_set': _num(21, 100),  # percent: global mean > 1 → rescaled
+            'peep_set': _num(0, 12),
+            'pressure_support_set': _num(0, 15),
+            'resp_rate_set': _num(0, 30),
+            'tidal_volume_set': _num(0, 600),
+            'peak_inspiratory_pressure_set': _num(0, 30),
+            'tracheostomy': np.where(rng.random(n) < 0.6, np.nan, rng.integers(0, 2, n)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _assert_frames_equal(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(actual.columns) == list(expected.columns)
+    assert len(actual) == len(expected)
+    for col in expected.columns:
+        a, e = actual[col], expected[col]
+        if col in ('hospitalization_id', 'recorded_dttm', 'is_scaffold') or col.endswith('_id'):
+            mismatch = (a.to_numpy() != e.to_numpy())
+        elif pd.api.types.is_numeric_dtype(e):
+            a, e = a.astype(float).to_numpy(), e.astype(float).to_numpy()
+            mismatch = ~(np.isclose(a, e) | (np.isnan(a) & np.isnan(e)))
+        else:
+            a, e = a.astype(object).where(a.notna(), '<NA>'), e.astype(object).where(e.notna(), '<NA>')
+            mismatch = (a != e).to_numpy()
+        assert not mismatch.any(), (
+            f"{col} differs on {int(mismatch.sum())} rows, e.g.\n"
+            f"{pd.DataFrame({'ours': actual[col], 'clifpy': expected[col]})[mismatch].head()}"
+        )
+
+
+def test_matches_clifpy_row_for_row():
+    df = _random_resp()
+    expected = waterfall_mod.process_resp_support_waterfall(df, bfill=True, verbose=False)
+    actual = process_resp_waterfall(df)
+    _assert_frames_equal(actual, expected)
+    # Every heuristic actually fired on this sample.
+    assert actual['is_scaffold'].any()
+    assert (actual['mode_category'] == 'blow by').any()
+    assert (df['fio2_set'] > 1).any() and (actual['fio2_set'].dropna() <= 1).all()
+
+
+def test_trach_collar_splits_fill_block():
+    df = pd.DataFrame({
+        'hospitalization_id': 'A',
+        'recorded_dttm': _T0 + pd.to_timedelta([10, 20, 70, 80], unit='m'),
+        'device_name': None,
+        'device_category': ['imv', None, 'trach collar', None],
+        'mode_name': None,
+        'mode_category': None,
+        'fio2_set': [0.5, np.nan, np.nan, 0.3],
+        'peep_set': [5.0, np.nan, np.nan, np.nan],
+        'pressure_support_set': np.nan,
+        'resp_rate_set': np.nan,
+        'tidal_volume_set': np.nan,
+        'peak_inspiratory_pressure_set': np.nan,
+        'tracheostomy': [0.0, 0.0, 1.0, np.nan],
+    })[RESP_WATERFALL_COLUMNS]
+    out = process_resp_waterfall(df)
+    real = out[~out['is_scaffold']].reset_index(drop=True)
+    # IMV settings fill forward up to, not across, the trach-collar row.
+    # device_category is forward-filled by phase 3, so every later row is
+    # 'trach collar' too and starts its own block: nothing fills there.
+    assert real['fio2_set'].fillna(-1).tolist() == [0.5, 0.5, -1, 0.3]
+    assert real['peep_set'].isna().tolist() == [False, False, True, True]
+    assert real['tracheostomy'].tolist() == [0.0, 0.0, 1.0, 1.0]
+
+
+def test_partitioned_write_matches_single_pass(tmp_path):
+    import duckdb
+
+    df = _random_resp(n_hosp=60, seed=11)
+    src = str(tmp_path / 'clif_respiratory_support.parquet')
+    df.to_parquet(src, index=False)
+    out_path = str(tmp_path / 'cohort_resp_processed_bf.parquet')
+    # Same source shape as 01's Mode C load.
+    resp_rel = duckdb.read_parquet(src, file_row_number=True)
+    n = write_resp_waterfall(resp_rel, out_path, rows_per_partition=100)
+    written = pd.read_parquet(out_path)
+    expected = process_resp_waterfall(df)
+    assert n == len(expected)
+    assert written['tracheostomy'].dtype == 'int8'
+    assert str(written['recorded_dttm'].dt.tz) == 'UTC'
+    expected['tracheostomy'] = (expected['tracheostomy'].fillna(0) > 0).astype('int8')
+    _assert_frames_equal(written, expected)
+    assert not (tmp_path / 'cohort_resp_processed_bf.parquet.parts').exists()
+
+
+def test_tied_timestamps_keep_source_row_order(tmp_path):
+    import duckdb
+
+    # Every hospitalization gets tied timestamps with conflicting values.
+    df = _random_resp(n_hosp=100, seed=5)
+    dup = df.groupby('hospitalization_id').head(2).assign(
+        device_category='nippv', peep_set=1.0, fio2_set=40.0,
+    )
+    df = pd.concat([df, dup]).sort_values(
+        ['hospitalization_id', 'recorded_dttm'], kind='stable',
+    ).reset_index(drop=True)
+    src = str(tmp_path / 'clif_respiratory_support.parquet')
+    df.to_parquet(src, index=False, row_group_size=64)
+    expected = process_resp_waterfall(df)
+    expected['tracheostomy'] = (expected['tracheostomy'].fillna(0) > 0).astype('int8')
+
+    # A parallel scan (or the cohort SEMI JOIN) may deliver rows in any
+    # order; reversing the ties stands in for that. The source row index,
+    # not the order rows arrive in, decides which tied row wins.
+    scrambled = duckdb.read_parquet(src, file_row_number=True).order(
+        'hospitalization_id, recorded_dttm, file_row_number DESC'
+    )
+    out_path = str(tmp_path / 'cohort_resp_processed_bf.parquet')
+    write_resp_waterfall(scrambled, out_path)
+    _assert_frames_equal(pd.read_parquet(out_path), expected)
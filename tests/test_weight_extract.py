@@ -0,0 +1,143 @@
+"""Cohort-scoped sorted weight extract (`code/_weight_extract.py`).
+
+The extract replaces five independent weight reads of ``clif_vitals``, so
+each consumer must see the rows it would have read from the raw file: the
+clamped weights the outlier config produced, the same weight-QC drop sets the
+former ``_utils.compute_weight_qc_exclusions`` returned, and a raw-file
+fallback when the extract is absent.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "code"))
+from _outlier_handler import apply_outlier_handling_duckdb  # noqa: E402
+from _weight_extract import (  # noqa: E402
+    as_vitals,
+    weight_extract_path,
+    weight_extract_rel,
+    weight_qc_exclusions,
+    write_weight_extract,
+)
+
+# (hospitalization_id, hours after T0, vital_value), deliberately unsorted.
+ROWS = [
+    ('H1', 30, 81.0), ('H1', 0, 80.0), ('H1', 10, 82.0),
+    ('H2', 0, 70.0), ('H2', 10, 95.0),                      # +25 kg in 10 h
+    ('H3', 0, 500.0), ('H3', 5, 12.0),                      # all clamped out
+    ('H4', 0, None),                                        # NULL only
+    ('H5', 0, 60.0), ('H5', 30, 78.0), ('H5', 60, 96.0),    # +36 kg, no jump
+    ('H6', 0, 400.0), ('H6', 2, 90.0), ('H6', 4, 300.0),    # 90 → 300 in 2 h
+    ('H9', 0, 75.0),                                        # out of cohort
+]
+COHORT = ['H1', 'H2', 'H3', 'H4', 'H5', 'H6']
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    """Raw CLIF dir with naive site-local recorded_dttm; cwd = tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    t0 = pd.Timestamp('2024-01-01 08:00')
+    weights = pd.DataFrame({
+        'hospitalization_id': [r[0] for r in ROWS],
+        'recorded_dttm': t0 + pd.to_timedelta([r[1] for r in ROWS], unit='h'),
+        'vital_category': 'weight_kg',
+        'vital_value': [r[2] for r in ROWS],
+    })
+    other = pd.DataFrame({
+        'hospitalization_id': ['H1'], 'recorded_dttm': [t0],
+        'vital_category': ['height_cm'], 'vital_value': [180.0],
+    })
+    raw = pd.concat([weights, other], ignore_index=True)
+    raw['recorded_dttm'] = raw['recorded_dttm'].astype('datetime64[us]')
+    data_dir = tmp_path / 'clif'
+    data_dir.mkdir()
+    raw.to_parquet(data_dir / 'clif_vitals.parquet', index=False)
+    return str(data_dir)
+
+
+def _ids(*hosp_ids):
+    return duckdb.sql(f"SELECT UNNEST({list(hosp_ids)}) AS hospitalization_id")
+
+
+def test_extract_sorted_clamped_and_utc(raw_dir):
+    path = write_weight_extract(raw_dir, 'site', 'US/Central', _ids(*COHORT))
+    assert weight_extract_path('site') == path
+    df = pd.read_parquet(path)
+    # Sorted on disk; out-of-cohort H9 and non-weight rows pushed down.
+    assert df['hospitalization_id'].is_monotonic_increasing
+    assert (df.groupby('hospitalization_id')['recorded_dttm']
+            .apply(lambda s: s.is_monotonic_increasing).all())
+    assert set(df['hospitalization_id']) == set(COHORT)
+    # Naive 08:00 Chicago → 14:00 UTC.
+    first = df.iloc[0]
+    assert first['recorded_dttm'] == pd.Timestamp('2024-01-01 14:00', tz='UTC')
+    h6 = df[df['hospitalization_id'] == 'H6']
+    assert h6['weight_kg_raw'].tolist() == [400.0, 90.0, 300.0]
+    assert h6['weight_kg'].tolist()[1:] == [90.0, 300.0] and pd.isna(h6['weight_kg'].iloc[0])
+    admit = df.groupby('hospitalization_id')['admission_weight_kg'].first()
+    assert admit['H1'] == 80.0 and admit['H6'] == 90.0
+    assert pd.isna(admit['H3']) and pd.isna(admit['H4'])
+
+
+@pytest.mark.parametrize('range_rule_on,expected_range', [(False, set()), (True, {'H5'})])
+def test_qc_exclusions(raw_dir, range_rule_on, expected_range):
+    write_weight_extract(raw_dir, 'site', 'UTC', _ids(*COHORT))
+    weights = duckdb.read_parquet(weight_extract_path('site'))
+    with_weight = [
+        r[0] for r in weights.filter('wqc_has_weight')
+        .select('hospitalization_id').distinct().fetchall()
+    ]
+    assert sorted(with_weight) == ['H1', 'H2', 'H3', 'H5', 'H6']
+    excl = weight_qc_exclusions(weights, with_weight, range_rule_on=range_rule_on)
+    assert excl['zero_weight'] == {'H3'}
+    # H6's 210 kg spread is a jump, so the (incremental) range rule skips it.
+    assert excl['jump'] == {'H2', 'H6'}
+    assert excl['range'] == expected_range
+    assert excl['jump_threshold_str'] == 'jump_gt_20kg_within_24h'
+    assert (excl['range_threshold_str'] is not None) == range_rule_on
+
+
+def test_qc_thresholds_are_applied(raw_dir):
+    write_weight_extract(
+        raw_dir, 'site', 'UTC', _ids(*COHORT), max_jump_kg=30, max_range_kg=40,
+    )
+    excl = weight_qc_exclusions(
+        duckdb.read_parquet(weight_extract_path('site')), COHORT,
+        max_jump_kg=30, max_range_kg=40, range_rule_on=True,
+    )
+    assert excl['zero_weight'] == {'H3', 'H4'}
+    assert excl['jump'] == {'H6'}
+    assert excl['range'] == set()
+    assert excl['jump_threshold_str'] == 'jump_gt_30kg_within_24h'
+
+
+def test_as_vitals_matches_outlier_handled_raw(raw_dir):
+    write_weight_extract(raw_dir, 'site', 'US/Central', _ids(*COHORT))
+    ids = _ids('H1', 'H3', 'H6')
+    ours = as_vitals(weight_extract_rel(raw_dir, 'site', 'US/Central', ids))
+    raw = duckdb.sql(f"""
+        FROM '{raw_dir}/clif_vitals.parquet' v
+        SEMI JOIN ids USING (hospitalization_id)
+        SELECT hospitalization_id
+            , recorded_dttm: timezone('US/Central', v.recorded_dttm)
+            , v.vital_category, v.vital_value
+        WHERE v.vital_category = 'weight_kg'
+    """)
+    theirs = apply_outlier_handling_duckdb(
+        raw, 'vitals', str(ROOT / 'config' / 'outlier_config.yaml'),
+    )
+    assert sorted(ours.fetchall(), key=str) == sorted(theirs.fetchall(), key=str)
+
+
+def test_fallback_to_raw_file(raw_dir):
+    assert weight_extract_path('site') is None
+    ids = _ids(*COHORT)
+    fallback = weight_extract_rel(raw_dir, 'site', 'UTC', ids).df()
+    write_weight_extract(raw_dir, 'site', 'UTC', ids)
+    extract = weight_extract_rel(raw_dir, 'site', 'UTC', ids).df()
+    pd.testing.assert_frame_equal(fallback, extract)